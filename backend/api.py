@@ -1,10 +1,11 @@
 from fastapi import FastAPI, Request, BackgroundTasks, HTTPException, Query, Depends, APIRouter, status
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response as StarletteResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
 import logging
 import os
 import uuid
@@ -23,6 +24,25 @@ from auth_cognito import (
     get_current_user, require_admin, require_user,
     LoginRequest, LoginResponse, UserResponse, ChangePasswordRequest
 )
+from job_repository import JobRepository, StorageRepository, run_blocking
+from json_responses import FastJSONResponse, stream_json_list, dumps as dumps_json
+from job_results import (
+    ResultsCache, render_job_results, results_cache_key, results_etag, body_etag, etag_matches,
+    stored_results_view, RESULTS_FORMAT_VERSION, RESULTS_VIEW_ATTRIBUTES, fits_stored_view, without_stored_view
+)
+from field_selection import FieldSelection, FieldSelectionError
+from job_stats import ensure_stats_table, get_analysis_stats, backfill_user, record_job_removal
+from search_indexer import IncrementalIndexer, parse_analysis, status_index_definition, video_metadata_for
+from chat_cache import get_chat_cache, normalize_query
+from chat_streaming import aiter_in_thread
+from single_flight import AsyncSingleFlight
+from rag_context import build_context, facts_from_job
+from hybrid_retrieval import HybridRetriever, RetrievalBackend
+from job_events import (
+    get_job_event_bus, start_job_events, stop_job_events, notify_local_change, dumps_event, job_event_from_item,
+    SNAPSHOT_ATTRIBUTES,
+)
+from aws_clients import get_client, get_resource, warm_clients
 
 # Basic logging
 logging.basicConfig(level=logging.INFO)
@@ -30,13 +50,16 @@ logger = logging.getLogger(__name__)
 
 # Import cost-optimized AWS features
 try:
-    from cost_optimized_aws_vector import get_cost_optimized_vector_db, get_cost_optimized_chatbot
+    from cost_optimized_aws_vector import get_cost_optimized_vector_db, get_cost_optimized_chatbot, SearchUnavailableError
     COST_OPTIMIZED_AWS_AVAILABLE = True
     logger.info("✅ Cost-optimized AWS Vector DB loaded successfully")
 except ImportError as e:
     COST_OPTIMIZED_AWS_AVAILABLE = False
     logger.warning(f"⚠️  Cost-optimized AWS Vector DB not available: {e}")
 
+    class SearchUnavailableError(RuntimeError):
+        """Stand-in so the handlers' except clauses stay valid (never raised)"""
+
 # Import premium AWS features (fallback)
 try:
     from aws_vector_db import get_aws_vector_db, get_aws_chatbot
@@ -46,6 +69,15 @@ except ImportError as e:
     PREMIUM_AWS_VECTOR_DB_AVAILABLE = False
     logger.warning(f"⚠️  Premium AWS Vector DB not available: {e}")
 
+# Self-contained memory-mapped vector index (no cluster needed)
+try:
+    from local_vector_db import get_local_vector_db
+    from embedding_service import get_embedding_service
+    LOCAL_VECTOR_INDEX_AVAILABLE = True
+except ImportError as e:
+    LOCAL_VECTOR_INDEX_AVAILABLE = False
+    logger.warning(f"⚠️  Local vector index not available: {e}")
+
 # Fallback to local vector DB for development
 try:
     from vector_db import get_vector_db, VideoVectorDB
@@ -57,14 +89,23 @@ except ImportError as e:
     logger.warning(f"⚠️  Local Vector DB modules not available: {e}")
 
 # Determine which system to use (prioritize cost-optimized)
-VECTOR_DB_AVAILABLE = COST_OPTIMIZED_AWS_AVAILABLE or PREMIUM_AWS_VECTOR_DB_AVAILABLE or LOCAL_VECTOR_DB_AVAILABLE
+VECTOR_DB_AVAILABLE = (
+    COST_OPTIMIZED_AWS_AVAILABLE or PREMIUM_AWS_VECTOR_DB_AVAILABLE or LOCAL_VECTOR_INDEX_AVAILABLE
+    or LOCAL_VECTOR_DB_AVAILABLE
+)
 USE_COST_OPTIMIZED = COST_OPTIMIZED_AWS_AVAILABLE and os.environ.get('USE_COST_OPTIMIZED', 'true').lower() == 'true'
 USE_AWS_NATIVE = PREMIUM_AWS_VECTOR_DB_AVAILABLE and os.environ.get('USE_AWS_NATIVE_VECTOR_DB', 'false').lower() == 'true'
+# Completed jobs are also embedded into the local vector index; it serves vector search unless cost-optimized is on
+USE_LOCAL_VECTOR_INDEX = LOCAL_VECTOR_INDEX_AVAILABLE and os.environ.get('USE_LOCAL_VECTOR_INDEX', 'false').lower() == 'true'
 # increase opensearch/urllib3 logs for debugging if needed
 logging.getLogger("opensearch").setLevel(logging.INFO)
 logging.getLogger("urllib3").setLevel(logging.INFO)
 
-app = FastAPI(title="Proov API", description="Enterprise Video Analysis API with JWT Authentication")
+app = FastAPI(
+    title="Proov API",
+    description="Enterprise Video Analysis API with JWT Authentication",
+    default_response_class=FastJSONResponse,
+)
 
 # --- CRITICAL: API Routes with /api/ prefix (MUST be first!) ---
 @app.get("/api/health")
@@ -78,9 +119,55 @@ def api_test():
 # Initialize authentication system on startup
 @app.on_event("startup")
 async def startup_event():
-    """Initialize authentication system"""
+    """Initialize authentication system and warm pooled AWS clients"""
     logger.info("🛡️  Initializing Cognito authentication system...")
     logger.info("✅ Cognito authentication system ready!")
+    await run_blocking(warm_clients, region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"))
+    try:
+        await run_blocking(ensure_stats_table, region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"))
+    except Exception as e:
+        logger.warning(f"Analysis stats table not available: {e}")
+    if USE_COST_OPTIMIZED:
+        try:
+            keyword_index = get_cost_optimized_vector_db().keyword_index
+            if keyword_index is not None:
+                await run_blocking(keyword_index.ensure_table)
+        except Exception as e:
+            logger.warning(f"Keyword index table not available: {e}")
+    # Completed/deleted jobs invalidate the owner's cached chat answers
+    get_job_event_bus().add_listener(get_chat_cache().on_job_change)
+    if USE_COST_OPTIMIZED:
+        # With JOB_EVENTS_SOURCE=dynamodb-streams this includes other instances' deletes;
+        # engine updates write snapshots, so they run off the event loop
+        get_job_event_bus().add_listener(get_cost_optimized_vector_db().on_job_change, blocking=True)
+    if USE_LOCAL_VECTOR_INDEX:
+        local_vector_db = await run_blocking(get_local_vector_db)
+        # Lets the index backfill tenants and retry failed embeddings on its own
+        local_vector_db.list_jobs = local_vector_job_ids
+        local_vector_db.load_jobs = local_vector_entries
+        if cfg("JOB_EVENTS_SOURCE", "local") == "dynamodb-streams":
+            # Stream thread; the API's own deletes are handled in delete_job
+            get_job_event_bus().add_listener(on_job_change_local_vectors, blocking=True)
+    if HYBRID_SEARCH_ENABLED:
+        chatbot = await run_blocking(get_cost_optimized_chatbot)
+        chatbot.retriever = hybrid_retriever
+    start_job_events(
+        cfg("JOB_EVENTS_SOURCE", "local"),
+        JOB_TABLE,
+        region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"),
+    )
+    global _indexer_task
+    if (USE_COST_OPTIMIZED or USE_LOCAL_VECTOR_INDEX) and str(cfg("INDEXER_ENABLED", "true")).lower() == "true":
+        _indexer_task = asyncio.create_task(
+            run_search_indexer(float(cfg("INDEXER_INTERVAL_SECONDS", 60)))
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    stop_job_events()
+    if _indexer_task:
+        _indexer_task.cancel()
 
 # --- Authentication Endpoints ---
 
@@ -92,7 +179,7 @@ async def login(login_request: LoginRequest):
         from auth_cognito import authenticate_user
         
         # Authenticate with Cognito
-        auth_result = authenticate_user(login_request.username, login_request.password)
+        auth_result = await run_blocking(authenticate_user, login_request.username, login_request.password)
         
         if not auth_result:
             raise HTTPException(
@@ -152,7 +239,6 @@ async def get_upload_url(
     Returns URL valid for 15 minutes for secure client-side upload.
     """
     try:
-        s3_client = get_s3_client()
         final_key = request.key
         # If session_id provided, place upload into per-session folder for this user
         if request.session_id:
@@ -165,14 +251,14 @@ async def get_upload_url(
                 final_key = request.key
         
         # Generate presigned URL (valid for 15 minutes)
-        presigned_url = s3_client.generate_presigned_url(
+        presigned_url = await storage_repo.presigned_url(
             'put_object',
-            Params={
+            {
                 'Bucket': request.bucket,
                 'Key': final_key,
                 'ContentType': request.content_type
             },
-            ExpiresIn=900  # 15 minutes
+            expires_in=900  # 15 minutes
         )
         
         logger.info(f"Generated upload URL for user {current_user.get('email')}: s3://{request.bucket}/{request.key}")
@@ -279,32 +365,37 @@ def cfg(key: str, default=None):
 
 # --- DynamoDB job table helper ---
 import botocore
-from botocore.config import Config
-
-# Configure boto3 to use container credentials
-boto3_config = Config(
-    region_name=os.environ.get("AWS_DEFAULT_REGION", "eu-central-1")
-)
 
 def get_dynamodb_resource():
-    region = cfg("AWS_DEFAULT_REGION", "eu-central-1")
-    
-    # Use default AWS SDK behavior - it will automatically use VPC endpoints if configured
-    return boto3.resource("dynamodb", region_name=region, config=boto3_config)
+    # Shared pooled resource; default AWS SDK behavior uses VPC endpoints if configured
+    return get_resource("dynamodb", region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"))
 
 
 def get_s3_client():
-    region = cfg("AWS_DEFAULT_REGION", "eu-central-1")
-    
-    # Check if running in ECS with a VPC endpoint
-    if 'ECS_CONTAINER_METADATA_URI_V4' in os.environ:
-        try:
-            # Try to use VPC endpoint if available, but fallback to default
-            return boto3.client("s3", region_name=region, config=boto3_config)
-        except Exception as e:
-            logger.warning(f"Failed to create S3 client with VPC endpoint: {e}")
+    return get_client("s3", region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"))
 
-    return boto3.client("s3", region_name=region, config=boto3_config)
+
+# status/updated_at GSI of the job table used by the search indexer ("" to not create it)
+INDEXER_STATUS_INDEX = cfg("INDEXER_STATUS_INDEX", "status-updated_at-index")
+
+
+def ensure_status_index(table) -> None:
+    """Add the indexer's status index to an existing job table (built by DynamoDB in the background)"""
+    if not INDEXER_STATUS_INDEX:
+        return
+    if any(gsi["IndexName"] == INDEXER_STATUS_INDEX for gsi in table.global_secondary_indexes or []):
+        return
+    definition = status_index_definition(INDEXER_STATUS_INDEX)
+    try:
+        table.meta.client.update_table(
+            TableName=table.name,
+            AttributeDefinitions=definition["AttributeDefinitions"],
+            GlobalSecondaryIndexUpdates=[{"Create": definition["GlobalSecondaryIndex"]}],
+        )
+        logger.info("Creating index %s on DynamoDB table '%s'", INDEXER_STATUS_INDEX, table.name)
+    except botocore.exceptions.ClientError as e:
+        # The indexer scans the table until the index exists
+        logger.warning("Could not create index %s on table '%s': %s", INDEXER_STATUS_INDEX, table.name, e)
 
 
 def ensure_job_table(table_name: str):
@@ -314,17 +405,23 @@ def ensure_job_table(table_name: str):
         table = ddb.Table(table_name)
         table.load()
         logger.info("DynamoDB table '%s' exists", table_name)
+        ensure_status_index(table)
         return table
     except botocore.exceptions.ClientError as e:
         code = e.response.get("Error", {}).get("Code")
         if code in ("ResourceNotFoundException", "ValidationException", "ResourceNotFound"):
             logger.info("Creating DynamoDB table %s", table_name)
-            table = ddb.create_table(
-                TableName=table_name,
-                KeySchema=[{"AttributeName": "job_id", "KeyType": "HASH"}],
-                AttributeDefinitions=[{"AttributeName": "job_id", "AttributeType": "S"}],
-                BillingMode="PAY_PER_REQUEST",
-            )
+            create_kwargs = {
+                "TableName": table_name,
+                "KeySchema": [{"AttributeName": "job_id", "KeyType": "HASH"}],
+                "AttributeDefinitions": [{"AttributeName": "job_id", "AttributeType": "S"}],
+                "BillingMode": "PAY_PER_REQUEST",
+            }
+            if INDEXER_STATUS_INDEX:
+                definition = status_index_definition(INDEXER_STATUS_INDEX)
+                create_kwargs["AttributeDefinitions"] += definition["AttributeDefinitions"]
+                create_kwargs["GlobalSecondaryIndexes"] = [definition["GlobalSecondaryIndex"]]
+            table = ddb.create_table(**create_kwargs)
             # wait until created
             table.wait_until_exists()
             logger.info("DynamoDB table '%s' created", table_name)
@@ -345,13 +442,94 @@ def job_table():
     return _JOB_TABLE_OBJ
 
 
-def save_job_entry(job_id: str, status: str, result=None, video=None, created_at=None, user_id=None, user_email=None, session_id=None):
+# Async repositories used by endpoints (blocking boto3 calls run on a bounded pool)
+jobs_repo = JobRepository(job_table, on_change=notify_local_change)
+storage_repo = StorageRepository(get_s3_client)
+
+# Formatted results of completed jobs (memory LRU + optional shared S3 tier)
+results_cache = ResultsCache(
+    max_bytes=int(cfg("RESULTS_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    s3_bucket=cfg("RESULTS_CACHE_S3_BUCKET", ""),
+    region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"),
+)
+
+def on_job_completed(job: Dict[str, Any]) -> None:
+    """Indexer callback for newly completed jobs (runs on the indexer's worker thread)"""
+    get_chat_cache().invalidate_user(job.get("user_id"))
+    if USE_COST_OPTIMIZED:
+        get_cost_optimized_vector_db().refresh_search_engine(job["job_id"], job.get("user_id"))
+    if USE_LOCAL_VECTOR_INDEX:
+        # A failed embedding is kept as pending by the index and retried on a later search
+        get_local_vector_db().store_video_analyses(list(local_vector_entries([job["job_id"]])))
+
+
+def local_vector_job_ids(tenant: str) -> List[str]:
+    """Completed jobs of a user, for the local vector index backfill (one paginated scan)"""
+    scan_kwargs = {
+        "FilterExpression": (
+            Attr("user_id").eq(tenant) & Attr("result").exists()
+            & (Attr("status").eq("done") | Attr("status").eq("completed"))
+        ),
+        "ProjectionExpression": "job_id",
+    }
+    job_ids = []
+    while True:
+        resp = job_table().scan(**scan_kwargs)
+        job_ids.extend(item["job_id"] for item in resp.get("Items", []))
+        if not resp.get("LastEvaluatedKey"):
+            return job_ids
+        scan_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def local_vector_entries(job_ids: List[str]):
+    """Store entries (see LocalVectorDB.store_video_analyses) of the jobs that have an analysis"""
+    for job_id in job_ids:
+        row = job_table().get_item(Key={"job_id": job_id}).get("Item")
+        analysis = parse_analysis(row or {})
+        if analysis:
+            yield {
+                "job_id": row["job_id"], "video_metadata": video_metadata_for(row), "analysis_results": analysis,
+                "user_id": row.get("user_id"), "session_id": row.get("session_id"),
+            }
+
+
+def on_job_change_local_vectors(item: Dict[str, Any]) -> None:
+    """Job change listener: drop deleted jobs (other instances' deletes with dynamodb-streams)"""
+    if item.get("status") == "deleted":
+        get_local_vector_db().delete_video(item["job_id"])
+
+
+# Catches up on completed jobs the worker did not index (never runs inside a request)
+search_indexer = IncrementalIndexer(
+    job_table,
+    # Otherwise it only feeds completions to on_job_completed (local vector index)
+    (lambda: get_cost_optimized_vector_db()) if USE_COST_OPTIMIZED else None,
+    region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"),
+    on_completed=on_job_completed,
+    status_index=INDEXER_STATUS_INDEX,
+)
+_indexer_task: Optional[asyncio.Task] = None
+
+
+async def run_search_indexer(interval_seconds: float):
+    """Background loop: one incremental indexing pass every ``interval_seconds``"""
+    while True:
+        try:
+            stats = await run_blocking(search_indexer.run_once)
+            if stats["indexed"] or stats["failed"] or stats["followed"]:
+                logger.info(f"Search indexer: {stats}")
+        except Exception as e:
+            logger.warning(f"Search indexer pass failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+def build_job_entry(job_id: str, status: str, result=None, video=None, created_at=None, user_id=None, user_email=None, session_id=None) -> Dict[str, Any]:
+    """Build the DynamoDB item for a job entry without writing it"""
     logger.info(f"[SAVE_JOB_DEBUG] Called with: job_id={job_id}")
     logger.info(f"[SAVE_JOB_DEBUG] user_id = {repr(user_id)} (type: {type(user_id)})")
     logger.info(f"[SAVE_JOB_DEBUG] user_email = {repr(user_email)} (type: {type(user_email)})")
     logger.info(f"[SAVE_JOB_DEBUG] session_id = {repr(session_id)} (type: {type(session_id)})")
     
-    t = job_table()
     current_time = int(time.time())  # Convert to integer
     
     item = {
@@ -414,10 +592,10 @@ def save_job_entry(job_id: str, status: str, result=None, video=None, created_at
             # Non-fatal; best-effort grouping key
             pass
     
-    t.put_item(Item=item)
+    return item
 
 
-def session_status_message(user_id: Optional[str], session_id: Optional[str]) -> Optional[str]:
+async def session_status_message(user_id: Optional[str], session_id: Optional[str]) -> Optional[str]:
     """Summarize current session job statuses for user. Returns a human-friendly string or None.
 
     This helps the chatbot inform users while analyses are still running.
@@ -425,13 +603,11 @@ def session_status_message(user_id: Optional[str], session_id: Optional[str]) ->
     if not user_id or not session_id:
         return None
     try:
-        t = job_table()
-        resp = t.scan(
+        items = await jobs_repo.scan(
                 FilterExpression="user_id = :uid AND session_id = :sid",
                 ExpressionAttributeValues={':uid': user_id, ':sid': session_id},
                 ConsistentRead=True
             )
-        items = resp.get("Items", [])
         if not items:
             return None
         total = len(items)
@@ -514,6 +690,65 @@ app.add_middleware(
 # from worker.agent import agent  # Removed - agent framework was causing crashes
 
 # --- Direct AWS Bedrock ChatBot Implementation ---
+_stats_backfills_running = set()
+
+
+async def _backfill_user_stats(user_id: str):
+    """Count a user's pre-existing completed jobs into the stats table (runs once per user)"""
+    try:
+        fe = Attr('result').exists() & (Attr('status').eq('done') | Attr('status').eq('completed')) & Attr('user_id').eq(user_id)
+        jobs = await jobs_repo.scan(
+            paginate=True,
+            projection=["job_id", "session_id", "result", "analysis_results"],
+            FilterExpression=fe,
+        )
+        await run_blocking(backfill_user, user_id, jobs, region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"))
+    except Exception as e:
+        logger.error(f"Analysis stats backfill failed for user {user_id}: {e}")
+    finally:
+        _stats_backfills_running.discard(user_id)
+
+
+async def user_analysis_stats(user_id: str, session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    O(1) analysis counters for a user (and session) from the stats table.
+
+    Returns None until the user's existing jobs have been backfilled; the
+    backfill is started in the background on first use.
+    """
+    if not user_id:
+        return None
+    stats = await run_blocking(
+        get_analysis_stats, user_id, session_id, region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1")
+    )
+    if stats["backfilled"]:
+        return stats
+    if user_id not in _stats_backfills_running:
+        _stats_backfills_running.add(user_id)
+        asyncio.create_task(_backfill_user_stats(user_id))
+    return None
+
+
+async def analyzed_video_counts(user_id: str, session_id: Optional[str] = None):
+    """(user_analyzed, session_analyzed) for the chat header"""
+    stats = None
+    try:
+        stats = await user_analysis_stats(user_id, session_id)
+    except Exception as e:
+        logger.warning(f"Analysis stats unavailable, counting via scan: {e}")
+    if stats is not None:
+        return stats["user"]["analyzed_videos"], (stats["session"] or {}).get("analyzed_videos", 0)
+    
+    # Not backfilled yet: count with scans (done/completed and has result)
+    fe_all = Attr('result').exists() & (Attr('status').eq('done') | Attr('status').eq('completed')) & Attr('user_id').eq(user_id)
+    user_analyzed = len(await jobs_repo.scan(FilterExpression=fe_all, ConsistentRead=True))
+    session_analyzed = 0
+    if session_id:
+        fe_sess = fe_all & Attr('session_id').eq(session_id)
+        session_analyzed = len(await jobs_repo.scan(FilterExpression=fe_sess, ConsistentRead=True))
+    return user_analyzed, session_analyzed
+
+
 async def smart_rag_search(query: str, user_id: str = None, session_id: str = None) -> str:
     """
     PROFESSIONAL VECTOR DATABASE RAG SEARCH - FORCE ENABLED!
@@ -530,47 +765,26 @@ async def smart_rag_search(query: str, user_id: str = None, session_id: str = No
         # FORCE Vector Database initialization - ignore availability flags
         try:
             print(f"[DEBUG] Attempting to import Vector DB...")
-            from cost_optimized_aws_vector import CostOptimizedAWSVectorDB, CostOptimizedChatBot
+            from cost_optimized_aws_vector import get_cost_optimized_chatbot
             print(f"[DEBUG] Vector DB import successful!")
             
-            # Force migrate existing data if needed
-            vector_db = CostOptimizedAWSVectorDB()
-            
-            # FORCE MIGRATION: Always run migration first time
-            print(f"[VECTOR-RAG] FORCE MIGRATION: Running data migration...")
-            await emergency_migrate_data(vector_db)
-            
-            # Build analysis header from DynamoDB counts (user + optional session)
+            # Shared process-wide chatbot (pooled clients and shared response cache);
+            # indexing happens off the request path (worker + background indexer)
+            chatbot = await run_blocking(get_cost_optimized_chatbot)
+
+            # Build analysis header from the maintained counters (user + optional session)
             session_analyzed = 0
             user_analyzed = 0
             try:
-                ddb = boto3.resource('dynamodb', region_name=cfg('AWS_DEFAULT_REGION', 'eu-central-1'), config=boto3_config)
-                t = ddb.Table(cfg('JOB_TABLE', 'proov_jobs'))
-                # Count for user (done/completed and has result)
-                fe_all = Attr('result').exists() & (Attr('status').eq('done') | Attr('status').eq('completed')) & Attr('user_id').eq(user_id)
-                resp_all = t.scan(FilterExpression=fe_all, ConsistentRead=True)
-                user_analyzed = len(resp_all.get('Items', []))
-                if session_id:
-                    fe_sess = fe_all & Attr('session_id').eq(session_id)
-                    resp_sess = t.scan(FilterExpression=fe_sess, ConsistentRead=True)
-                    session_analyzed = len(resp_sess.get('Items', []))
+                user_analyzed, session_analyzed = await analyzed_video_counts(user_id, session_id)
             except Exception as e_count:
                 print(f"[VECTOR-RAG] Count header failed: {e_count}")
 
             # Prefer session filter when it has results; otherwise fall back to all user videos
             effective_session_id = session_id if session_analyzed > 0 else None
 
-            # CHECK: Try search after migration (with user_id filter)
-            test_results = vector_db.semantic_search("BMW", limit=1, user_id=user_id)
-            print(f"[VECTOR-RAG] After migration: {len(test_results)} BMW results found for user {user_id}")
-            
-            print(f"[VECTOR-RAG] Vector DB has {len(test_results)} BMW results (filtered by user_id)")
-            
-            # Initialize professional chatbot with vector search
-            chatbot = CostOptimizedChatBot(vector_db)
-            
             # 🔒 CRITICAL: Perform semantic search with user_id AND session_id for multi-tenant isolation
-            chat_response = chatbot.chat(query, context_limit=5, user_id=user_id, session_id=effective_session_id)
+            chat_response = await run_blocking(chatbot.chat, query, context_limit=5, user_id=user_id, session_id=effective_session_id)
             
             # Extract response
             response_text = chat_response.get("response", "")
@@ -591,7 +805,6 @@ async def smart_rag_search(query: str, user_id: str = None, session_id: str = No
             debug_info += f"• Chatbot found {len(matched_videos)} matches\n"
             debug_info += f"• Response cached: {from_cache}\n"
             debug_info += f"• Query processed by: Professional Vector DB RAG\n"
-            debug_info += f"• Test search results: {len(test_results)} BMW videos\n"
             
             # Add video details
             for i, video in enumerate(matched_videos[:3], 1):
@@ -614,79 +827,6 @@ async def smart_rag_search(query: str, user_id: str = None, session_id: str = No
         return await basic_rag_fallback(query)
 
 
-async def emergency_migrate_data(vector_db):
-    """Emergency data migration for Vector DB"""
-    try:
-        print("[MIGRATION] Starting emergency Vector DB migration...")
-        
-        # Use boto3 resource for better error handling
-        dynamodb = boto3.resource('dynamodb', region_name='eu-central-1')
-        table = dynamodb.Table('proov_jobs')
-        
-        # Scan for completed jobs with results
-        # Accept both historic "done" and newer "completed" statuses
-        resp = table.scan(
-            FilterExpression="attribute_exists(#result) AND (#status = :status_done OR #status = :status_completed)",
-            ExpressionAttributeNames={"#result": "result", "#status": "status"},
-            ExpressionAttributeValues={":status_done": "done", ":status_completed": "completed"},
-            Limit=15  # Increased limit for better migration
-        )
-        jobs = resp.get("Items", [])
-        print(f"[MIGRATION] Found {len(jobs)} completed jobs to migrate")
-        
-        migrated_count = 0
-        
-        for job in jobs:  # Migrate all found jobs
-            try:
-                # Job data is already in native Python format from boto3 resource  
-                job_id = str(job.get('job_id', ''))
-                status = str(job.get('status', ''))
-                result = job.get('result', '')
-                s3_key = job.get('s3_key', '')
-                s3_bucket = job.get('s3_bucket', 'proovid-results')
-                
-                if status in ("done", "completed") and result and job_id and s3_key:
-                    # Parse analysis results
-                    if isinstance(result, str):
-                        analysis_results = json.loads(result)
-                    else:
-                        analysis_results = result
-                    
-                    if not analysis_results:
-                        print(f"[MIGRATION] No analysis data for {job_id}, skipping")
-                        continue
-                    
-                    # Create video metadata  
-                    video_metadata = {
-                        "key": s3_key,
-                        "bucket": s3_bucket,
-                        "job_id": job_id,
-                        "filename": s3_key.split('/')[-1] if s3_key else "unknown.mp4"
-                    }
-                    
-                    # Store in Vector DB format
-                    vector_db.store_video_analysis(job_id, video_metadata, analysis_results)
-                    migrated_count += 1
-                    
-                    # Log migration with details
-                    labels_count = len(analysis_results.get('labels', []))
-                    text_count = len(analysis_results.get('text_detections', []))
-                    print(f"[MIGRATION] ✅ Migrated {job_id}: {labels_count} labels, {text_count} text detections")
-                    
-                if migrated_count >= 15:
-                    break  # Limit migration for performance
-                    
-            except Exception as e:
-                print(f"[MIGRATION] Error migrating {job_id}: {e}")
-                continue
-        
-        print(f"[MIGRATION] Emergency migration completed: {migrated_count} jobs")
-        
-    except Exception as e:
-        print(f"[MIGRATION] Emergency migration failed: {e}")
-        # Continue anyway
-
-
 async def basic_rag_fallback(query: str) -> str:
     """
     Fallback RAG search when Vector DB is unavailable
@@ -703,9 +843,7 @@ async def basic_rag_fallback(query: str) -> str:
         is_general_query = any(term in query_lower for term in ['welche', 'was', 'zeigen', 'enthalten', 'content', 'inhalt'])
         
         # Get DynamoDB data
-        t = job_table()
-        resp = t.scan(Limit=100)
-        jobs = resp.get("Items", [])
+        jobs = await jobs_repo.scan(Limit=100)
         
         relevant_results = []
         
@@ -855,7 +993,71 @@ async def basic_rag_fallback(query: str) -> str:
         return "🤖 RAG search temporarily unavailable. Please try again!"
 
 
+# Token budget for the video facts in the Bedrock chat prompt
+CHAT_CONTEXT_TOKEN_BUDGET = int(cfg("CHAT_CONTEXT_TOKEN_BUDGET", 600))
+
+# Job attributes the chat context is built from (summaries, not the full analysis result)
+CHAT_CONTEXT_ATTRIBUTES = [
+    "job_id", "session_id", "s3_key", "video_info", "video_summary",
+    "semantic_tags", "text_content", "summary", "search_updated_at",
+]
+# Read only for rows the indexer has not reached yet (no summary fields to build facts from)
+CHAT_RESULT_ATTRIBUTES = ["job_id", "result", "analysis_results"]
+
+
+async def with_unindexed_results(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Add the raw analysis to chat context rows that were never indexed"""
+    unindexed = [
+        item for item in items
+        if item.get("search_updated_at") is None and item.get("video_summary") is None
+    ]
+    if not unindexed:
+        return items
+    rows = await jobs_repo.get_many([item["job_id"] for item in unindexed], projection=CHAT_RESULT_ATTRIBUTES)
+    for item, row in zip(unindexed, rows):
+        if row:
+            item.update(row)
+    return items
+
+# Concurrent identical chat questions of the same user/session share one answer
+chat_flight = AsyncSingleFlight("chat")
+
+
+def _keyword_search(query: str, limit: int, user_id: str = None, session_id: str = None):
+    return get_cost_optimized_vector_db().semantic_search(query, limit, user_id=user_id, session_id=session_id)
+
+
+def _vector_search(query: str, limit: int, user_id: str = None, session_id: str = None):
+    vector_db = get_local_vector_db() if USE_LOCAL_VECTOR_INDEX else get_aws_vector_db()
+    return vector_db.semantic_search(query, limit, user_id=user_id, session_id=session_id)
+
+
+def create_hybrid_retriever() -> Optional[HybridRetriever]:
+    """Keyword + vector retriever (None unless both backends are configured)"""
+    if not USE_COST_OPTIMIZED or not (USE_LOCAL_VECTOR_INDEX or USE_AWS_NATIVE):
+        return None
+    return HybridRetriever(
+        [
+            RetrievalBackend("keyword", _keyword_search, weight=float(cfg("HYBRID_KEYWORD_WEIGHT", 1.0))),
+            RetrievalBackend("vector", _vector_search, weight=float(cfg("HYBRID_VECTOR_WEIGHT", 1.0))),
+        ],
+        budget_seconds=float(cfg("HYBRID_BUDGET_SECONDS", 0.8)),
+    )
+
+
+# Keyword hits and semantic matches fused by rank; HYBRID_SEARCH_ENABLED makes it the
+# default for /semantic-search and the chatbot
+hybrid_retriever = create_hybrid_retriever()
+HYBRID_SEARCH_ENABLED = hybrid_retriever is not None and str(cfg("HYBRID_SEARCH_ENABLED", "false")).lower() == "true"
+
+
 async def call_bedrock_chatbot(message: str, user_id: str = None, session_id: str = None) -> str:
+    """Answer a chat message; identical in-flight requests (same user, session, question) are coalesced"""
+    key = (user_id, session_id, normalize_query(message))
+    return await chat_flight.do(key, lambda: _call_bedrock_chatbot(message, user_id, session_id))
+
+
+async def _call_bedrock_chatbot(message: str, user_id: str = None, session_id: str = None) -> str:
     """
     PROFESSIONAL SOLUTION: RAG-first approach with Bedrock fallback.
     Uses smart video analysis search for instant BMW/car queries!
@@ -876,7 +1078,7 @@ async def call_bedrock_chatbot(message: str, user_id: str = None, session_id: st
         else:
             # Before falling back, provide a session-aware status update if analyses are still running
             try:
-                status_msg = session_status_message(user_id=user_id, session_id=session_id)
+                status_msg = await session_status_message(user_id=user_id, session_id=session_id)
                 if status_msg:
                     print(f"[DIAGNOSTIC] Returning session status message due to no RAG matches")
                     return status_msg
@@ -888,149 +1090,36 @@ async def call_bedrock_chatbot(message: str, user_id: str = None, session_id: st
         import boto3
         import json
         
-        # Initialize clients
-        bedrock = boto3.client('bedrock-runtime', region_name='eu-central-1')
+        # Shared pooled client
+        bedrock = get_client('bedrock-runtime', region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"))
         
         # Get user's video analysis results from DynamoDB with user_id filter
         video_context = ""
         try:
-            t = job_table()
-
             # 🔒 CRITICAL: Filter by user_id (and optional session_id) using proper condition expressions
             if user_id:
                 fe_base = Attr('result').exists() & (Attr('status').eq('done') | Attr('status').eq('completed')) & Attr('user_id').eq(user_id)
                 items = []
                 session_items = []
                 if session_id:
-                    resp_sess = t.scan(FilterExpression=fe_base & Attr('session_id').eq(session_id), Limit=50, ConsistentRead=True)
-                    session_items = resp_sess.get('Items', [])
+                    session_items = await jobs_repo.scan(FilterExpression=fe_base & Attr('session_id').eq(session_id), Limit=50, ConsistentRead=True, projection=CHAT_CONTEXT_ATTRIBUTES)
                 if session_items:
                     items = session_items
                 else:
-                    resp_all = t.scan(FilterExpression=fe_base, Limit=50, ConsistentRead=True)
-                    items = resp_all.get('Items', [])
+                    items = await jobs_repo.scan(FilterExpression=fe_base, Limit=50, ConsistentRead=True, projection=CHAT_CONTEXT_ATTRIBUTES)
                 logger.info(f"🔒 DDB scan: user_id={user_id}, session_id={session_id}, session_items={len(session_items)}, total_items={len(items)}")
             else:
                 # Fallback without user filter (less secure)
                 fe = Attr('result').exists() & (Attr('status').eq('done') | Attr('status').eq('completed'))
-                resp = t.scan(FilterExpression=fe, Limit=100, ConsistentRead=True)
+                items = await jobs_repo.scan(FilterExpression=fe, Limit=100, ConsistentRead=True, projection=CHAT_CONTEXT_ATTRIBUTES)
                 logger.warning("⚠️ DynamoDB scan WITHOUT user_id filter - not recommended!")
-                items = resp.get('Items', [])
             
-            jobs = items
+            jobs = await with_unindexed_results(items)
             
             print(f"[DIAGNOSTIC] DynamoDB scan returned {len(jobs)} jobs for user {user_id}")
             
-            # Filter completed jobs and extract analysis results
-            completed_jobs = []
-            for job in jobs:
-                # Extract values from DynamoDB format {"S": "value"} or direct value
-                # EMERGENCY FIX: Handle DynamoDB string fields properly
-                job_id_raw = job.get('job_id', {})
-                job_id = job_id_raw.get('S', job_id_raw) if isinstance(job_id_raw, dict) else str(job_id_raw) if job_id_raw else 'unknown'
-                
-                status_raw = job.get('status', {})
-                status = status_raw.get('S', status_raw) if isinstance(status_raw, dict) else str(status_raw) if status_raw else ''
-                
-                result_raw = job.get('result', {})
-                result = result_raw.get('S', result_raw) if isinstance(result_raw, dict) else result_raw if result_raw else ''
-                
-                print(f"[DIAGNOSTIC] Job {job_id}: status='{status}', has_result={bool(result)}")
-                
-                # Accept both historic 'done' and newer 'completed' statuses
-                if (status == "done" or status == "completed") and result:
-                    print(f"[DIAGNOSTIC] Processing completed job: {job_id}")
-                    try:
-                        # Parse video data - handle both nested and flat structure  
-                        video_info_raw = job.get("video_info", job.get("video", {}))
-                        print(f"[DIAGNOSTIC] video_info_raw type: {type(video_info_raw)}, value: {video_info_raw}")
-                        
-                        if isinstance(video_info_raw, dict) and 'M' in video_info_raw:
-                            # DynamoDB format: {"M": {"key": {"S": "value"}}}
-                            video_info = {}
-                            for k, v in video_info_raw['M'].items():
-                                if isinstance(v, dict) and 'S' in v:
-                                    video_info[k] = v['S']
-                                else:
-                                    video_info[k] = v
-                        elif isinstance(video_info_raw, str):
-                            try:
-                                video_info = json.loads(video_info_raw)
-                            except:
-                                video_info = {}
-                        elif isinstance(video_info_raw, dict):
-                            video_info = video_info_raw
-                        else:
-                            video_info = {}
-                            
-                        print(f"[DIAGNOSTIC] video_info after parsing: type={type(video_info)}, value={video_info}")
-                        
-                        # Parse analysis results
-                        if isinstance(result, str):
-                            results = json.loads(result)
-                        else:
-                            results = result
-                        
-                        # Extract key information for ChatBot - EMERGENCY FIX for s3_key parsing
-                        s3_key_raw = job.get("s3_key", {})
-                        if isinstance(s3_key_raw, dict):
-                            s3_key = s3_key_raw.get('S', s3_key_raw)
-                        elif isinstance(s3_key_raw, str):
-                            s3_key = s3_key_raw  # Direct string value
-                        else:
-                            s3_key = str(s3_key_raw) if s3_key_raw else ""
-                        
-                        # EMERGENCY FIX: Ensure video_info is always a dict
-                        if not isinstance(video_info, dict):
-                            print(f"[EMERGENCY DEBUG] video_info type: {type(video_info)} - converting to dict")
-                            print(f"[EMERGENCY DEBUG] video_info value: {video_info}")
-                            video_info = {}  # Reset to empty dict if not parseable
-                        
-                        video_name = video_info.get("filename", video_info.get("key", s3_key or "Unknown"))
-                        labels = []
-                        texts = []
-                        blackframes_count = 0
-                        blackframe_samples = []
-                        
-                        # Extract labels from our analysis structure
-                        if "label_detection" in results and "unique_labels" in results["label_detection"]:
-                            for label in results["label_detection"]["unique_labels"][:15]:  # Top 15 labels
-                                if label.get("max_confidence", 0) > 70:
-                                    labels.append(label["name"])
-                        
-                        # Extract detected text from our analysis structure
-                        if "text_detection" in results and "text_detections" in results["text_detection"]:
-                            for text in results["text_detection"]["text_detections"][:10]:  # Top 10 texts
-                                if text.get("confidence", 0) > 50:
-                                    texts.append(text["text"])
-
-                        # Extract blackframes summary
-                        if "blackframes" in results:
-                            bf = results["blackframes"] or {}
-                            frames = bf.get("black_frames") or []
-                            # Some workers provide an integer field; prefer actual count if present
-                            blackframes_count = bf.get("blackframes_detected") or (len(frames) if isinstance(frames, list) else 0)
-                            if isinstance(frames, list) and frames:
-                                for f in frames[:3]:
-                                    try:
-                                        ts = f.get("timestamp")
-                                        if ts is not None:
-                                            blackframe_samples.append(float(ts))
-                                    except Exception:
-                                        continue
-                        
-                        completed_jobs.append({
-                            "name": video_name,
-                            "labels": labels,
-                            "texts": texts,
-                            "blackframes_count": int(blackframes_count or 0),
-                            "blackframe_samples": blackframe_samples,
-                            "job_id": job_id
-                        })
-                        print(f"[DIAGNOSTIC] Added job {job_id}: {len(labels)} labels, {len(texts)} texts")
-                    except Exception as e:
-                        print(f"[DIAGNOSTIC] Error parsing job {job_id}: {e}")
-                        continue
+            # Facts per completed video from the summaries stored at indexing time
+            completed_jobs = [facts_from_job(job) for job in jobs]
             
             # Create counts and header for ChatBot
             total_count = len(jobs)
@@ -1044,23 +1133,15 @@ async def call_bedrock_chatbot(message: str, user_id: str = None, session_id: st
             else:
                 analysis_header = f"\n\nSUMMARY: Found {total_count} analyzed video(s) in your account.\n"
 
-            # Create context for ChatBot
+            # Create context for ChatBot: the facts most relevant to the question, within a token budget
             if completed_jobs:
+                packed = build_context(message, completed_jobs, token_budget=CHAT_CONTEXT_TOKEN_BUDGET)
                 video_context = analysis_header + f"\nUSER'S ANALYZED VIDEOS ({len(completed_jobs)} videos):\n"
-                for i, video in enumerate(completed_jobs[:5], 1):  # Limit to 5 videos
-                    video_context += f"\n{i}. Video: {video['name']}"
-                    if video['labels']:
-                        video_context += f"\n   Labels detected: {', '.join(video['labels'])}"
-                    if video['texts']:
-                        video_context += f"\n   Text detected: {', '.join(video['texts'])}"
-                    if video.get('blackframes_count', 0) > 0:
-                        samples = video.get('blackframe_samples') or []
-                        if samples:
-                            sample_str = ", ".join(f"{s:.1f}s" for s in samples[:3])
-                            video_context += f"\n   Blackframes: {video['blackframes_count']} (e.g., {sample_str})"
-                        else:
-                            video_context += f"\n   Blackframes: {video['blackframes_count']}"
-                    video_context += f"\n   Job ID: {video['job_id']}"
+                video_context += packed.text
+                logger.info(
+                    f"Chat context: {packed.tokens} tokens, {packed.videos_included} videos, "
+                    f"{packed.facts_included} facts ({packed.facts_dropped} dropped)"
+                )
                 
                 video_context += f"\n\nThe user can ask questions about these {len(completed_jobs)} analyzed videos."
             else:
@@ -1115,7 +1196,7 @@ If they have no analyzed videos, explain they need to upload and analyze videos
             print(f"[DIAGNOSTIC] Using timeout: {bedrock_timeout} seconds")
             
             response = await asyncio.wait_for(
-                asyncio.to_thread(
+                run_blocking(
                     bedrock.invoke_model,
                     modelId="anthropic.claude-3-haiku-20240307-v1:0",  # Cost-optimized model
                     body=json.dumps(request_body),
@@ -1139,7 +1220,7 @@ If they have no analyzed videos, explain they need to upload and analyze videos
                 return "🤖 **Quick Response:** I'm here to help with video analysis! While I process your request, try these features: **🎬 Video Analysis**, **📊 Blackframe Detection**, or **🔍 Label Recognition**. Upload a video to get started!"
         
         # Parse response
-        response_body = json.loads(response['body'].read())
+        response_body = json.loads(await run_blocking(response['body'].read))
         
         if 'content' in response_body and len(response_body['content']) > 0:
             return response_body['content'][0]['text']
@@ -1186,8 +1267,15 @@ class AnalyzeResponseJob(BaseModel):
     video: VideoJob
 
 
+class AnalyzeFailedJob(BaseModel):
+    job_id: Optional[str] = None
+    video: VideoJob
+    error: str
+
+
 class AnalyzeResponse(BaseModel):
     jobs: List[AnalyzeResponseJob]
+    failed: List[AnalyzeFailedJob] = []
 
 
 class JobStatusRequest(BaseModel):
@@ -1220,17 +1308,50 @@ class ChatResponse(BaseModel):
 class SemanticSearchRequest(BaseModel):
     query: str
     limit: int = 10
+    # "keyword", "fuzzy_text" (typo-tolerant OCR text lookup), "moments" (time segments
+    # where labels/text appear) or "hybrid" (keyword + vector results fused by rank); the
+    # others need the cost-optimized backend, hybrid also a vector backend. Default:
+    # "hybrid" if HYBRID_SEARCH_ENABLED, else "keyword"
+    mode: Optional[str] = None
+    # moments: parts of "car and person" must appear within this many seconds of each other
+    window_seconds: float = 2.0
 
 class SemanticSearchResponse(BaseModel):
     results: List[Dict[str, Any]]
     query: str
     total_results: int
 
+class FacetSearchRequest(BaseModel):
+    # Optional keywords; without them all videos matching the filters are listed, newest first
+    query: Optional[str] = None
+    has_text: Optional[bool] = None
+    has_blackframes: Optional[bool] = None
+    has_labels: Optional[bool] = None
+    # Label categories (Rekognition), any of
+    categories: List[str] = []
+    session_id: Optional[str] = None
+    # Unix seconds
+    created_from: Optional[int] = None
+    created_to: Optional[int] = None
+    # Seconds
+    min_duration: Optional[float] = None
+    max_duration: Optional[float] = None
+    limit: int = 20
+
+class FacetSearchResponse(BaseModel):
+    results: List[Dict[str, Any]]
+    total_results: int
+    # facet -> value -> number of matching videos (see search_facets)
+    facets: Dict[str, Dict[str, int]]
+
 class VectorStatsResponse(BaseModel):
     total_videos: int
     database_type: str
     llm_provider: str = None
     available: bool
+    videos_with_text: Optional[int] = None
+    videos_with_blackframes: Optional[int] = None
+    label_vocabulary_size: Optional[int] = None
 
 @app.get("/")
 async def root():
@@ -1324,9 +1445,8 @@ async def list_videos(
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     bucket = cfg("AWS_S3_BUCKET", "christian-aws-development")
-    s3 = get_s3_client()
     try:
-        resp = s3.list_objects_v2(Bucket=bucket, Prefix=prefix, MaxKeys=100, Delimiter="/")
+        resp = await storage_repo.list_objects(Bucket=bucket, Prefix=prefix, MaxKeys=100, Delimiter="/")
         items = []
         
         # Add regular files
@@ -1356,13 +1476,12 @@ async def get_video_url(
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Generate a signed URL for video streaming"""
-    s3 = get_s3_client()
     try:
         # Generate signed URL valid for 1 hour
-        signed_url = s3.generate_presigned_url(
+        signed_url = await storage_repo.presigned_url(
             'get_object',
-            Params={'Bucket': bucket, 'Key': key},
-            ExpiresIn=3600  # 1 hour
+            {'Bucket': bucket, 'Key': key},
+            expires_in=3600  # 1 hour
         )
         return {"url": signed_url}
     except ClientError as e:
@@ -1383,6 +1502,9 @@ def store_analysis_in_vector_db(job_id: str, video_metadata: Dict[str, Any], ana
         if USE_COST_OPTIMIZED:
             vector_db = get_cost_optimized_vector_db()
             db_type = "cost-optimized AWS"
+        elif USE_LOCAL_VECTOR_INDEX:
+            vector_db = get_local_vector_db()
+            db_type = "local vector index"
         elif USE_AWS_NATIVE:
             vector_db = get_aws_vector_db()
             db_type = "premium AWS"
@@ -1403,7 +1525,7 @@ def start_agent_analysis(bucket: str, key: str, job_id: str, tool: str):
         logger.info("Starting direct agent analysis for job %s with tool %s and file s3://%s/%s", job_id, tool, bucket, key)
         
         # Update job status to running
-        table = boto3.resource("dynamodb", region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"), config=boto3_config).Table(cfg("JOB_TABLE", "proov_jobs"))
+        table = job_table()
         current_time = int(time.time())
         table.update_item(
             Key={"job_id": job_id},
@@ -1508,29 +1630,96 @@ async def chat_with_videos(
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
 
+@app.post("/chat/stream")
+async def chat_with_videos_stream(
+    request: ChatRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Streaming chat as Server-Sent Events.
+
+    Events: 'matches' (videos found by the search), 'token' (text deltas of the
+    answer as the model produces them), 'done' (full response, same fields as
+    /chat) or 'error'.
+    """
+    if not USE_COST_OPTIMIZED:
+        raise HTTPException(status_code=503, detail="Streaming chat is not available")
+    
+    user_id = current_user.get("sub", "anonymous")
+    chatbot = await run_blocking(get_cost_optimized_chatbot)
+    
+    # Prefer session filter when it has results; otherwise fall back to all user videos
+    effective_session_id = None
+    if request.session_id:
+        try:
+            _, session_analyzed = await analyzed_video_counts(user_id, request.session_id)
+            effective_session_id = request.session_id if session_analyzed > 0 else None
+        except Exception as e:
+            logger.warning(f"Chat stream: session count failed: {e}")
+    
+    async def event_stream():
+        try:
+            events = aiter_in_thread(lambda: chatbot.chat_stream(
+                request.message, context_limit=request.context_limit,
+                user_id=user_id, session_id=effective_session_id,
+            ))
+            async for event in events:
+                event_type = event.pop("type")
+                yield f"event: {event_type}\ndata: {dumps_event(event)}\n\n"
+        except asyncio.TimeoutError:
+            logger.error("Chat stream: model stopped responding")
+            yield f"event: error\ndata: {dumps_event({'detail': 'The model did not respond in time'})}\n\n"
+        except Exception as e:
+            logger.exception("Chat stream failed")
+            yield f"event: error\ndata: {dumps_event({'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/semantic-search", response_model=SemanticSearchResponse)
 async def semantic_search_videos(
     request: SemanticSearchRequest,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
-    Perform semantic search across video metadata
+    Perform semantic search across the current user's video metadata
     """
     if not VECTOR_DB_AVAILABLE:
         raise HTTPException(
             status_code=503, 
             detail="Vector database features are not available"
         )
+    mode = request.mode or ("hybrid" if HYBRID_SEARCH_ENABLED else "keyword")
+    if (
+        mode not in ("keyword", "fuzzy_text", "moments", "hybrid")
+        or (mode != "keyword" and not USE_COST_OPTIMIZED)
+        or (mode == "hybrid" and hybrid_retriever is None)
+    ):
+        raise HTTPException(status_code=400, detail=f"Unsupported search mode: {mode}")
     
     try:
-        if USE_COST_OPTIMIZED:
+        if mode == "hybrid":
+            user_id = current_user.get('sub') or current_user.get('username')
+            results = await run_blocking(hybrid_retriever.search, request.query, request.limit, user_id=user_id)
+        elif USE_COST_OPTIMIZED:
             vector_db = get_cost_optimized_vector_db()
-        elif USE_AWS_NATIVE:
-            vector_db = get_aws_vector_db()
+            user_id = current_user.get('sub') or current_user.get('username')
+            results = await run_blocking(
+                vector_db.semantic_search, request.query, request.limit, user_id=user_id, mode=mode,
+                window_seconds=request.window_seconds,
+            )
+        elif USE_LOCAL_VECTOR_INDEX:
+            user_id = current_user.get('sub') or current_user.get('username')
+            results = await run_blocking(
+                get_local_vector_db().semantic_search, request.query, request.limit, user_id=user_id
+            )
         else:
-            vector_db = get_vector_db()
-        
-        results = vector_db.semantic_search(request.query, request.limit)
+            vector_db = get_aws_vector_db() if USE_AWS_NATIVE else get_vector_db()
+            results = await run_blocking(vector_db.semantic_search, request.query, request.limit)
         
         return SemanticSearchResponse(
             results=results,
@@ -1538,10 +1727,41 @@ async def semantic_search_videos(
             total_results=len(results)
         )
         
+    except SearchUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.exception("Semantic search failed")
         raise HTTPException(status_code=500, detail=f"Semantic search failed: {str(e)}")
 
+@app.post("/search/facets", response_model=FacetSearchResponse)
+async def faceted_search_videos(
+    request: FacetSearchRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Filter the current user's videos and count the facet values for a filter sidebar
+    """
+    if not VECTOR_DB_AVAILABLE or not USE_COST_OPTIMIZED:
+        raise HTTPException(status_code=503, detail="Faceted search is not available")
+
+    filters = request.dict(exclude={"query", "limit"}, exclude_none=True)
+    if not filters.get("categories"):
+        filters.pop("categories", None)
+    try:
+        vector_db = get_cost_optimized_vector_db()
+        user_id = current_user.get('sub') or current_user.get('username')
+        found = await run_blocking(
+            vector_db.faceted_search, request.query, filters, request.limit, user_id=user_id
+        )
+        return FacetSearchResponse(results=found["results"], total_results=found["total"], facets=found["facets"])
+    except SearchUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Faceted search failed")
+        raise HTTPException(status_code=500, detail=f"Faceted search failed: {str(e)}")
+
 # Universal CORS preflight for ALL endpoints
 @app.options("/{path:path}")
 async def universal_options(request: Request, path: str):
@@ -1612,14 +1832,29 @@ async def get_vector_db_stats(current_user: Dict[str, Any] = Depends(get_current
     
     try:
         if USE_COST_OPTIMIZED:
+            # Per-user counters (one item read) instead of counting the table
+            user_id = current_user.get('sub') or current_user.get('username')
+            stats = await user_analysis_stats(user_id)
+            if stats is not None:
+                return VectorStatsResponse(
+                    total_videos=stats["user"]["analyzed_videos"],
+                    database_type="cost_optimized_dynamodb",
+                    llm_provider="aws_bedrock_haiku",
+                    available=True,
+                    videos_with_text=stats["user"]["videos_with_text"],
+                    videos_with_blackframes=stats["user"]["videos_with_blackframes"],
+                    label_vocabulary_size=stats["user"]["label_vocabulary_size"],
+                )
             chatbot = get_cost_optimized_chatbot()
+        elif USE_LOCAL_VECTOR_INDEX:
+            chatbot = get_local_vector_db()  # reports its own stats
         elif USE_AWS_NATIVE:
             chatbot = get_aws_chatbot()
         else:
             vector_db = get_vector_db()
             chatbot = get_chatbot()
         
-        stats = chatbot.get_stats()
+        stats = await run_blocking(chatbot.get_stats)
         
         return VectorStatsResponse(
             total_videos=stats["total_videos"],
@@ -1633,6 +1868,22 @@ async def get_vector_db_stats(current_user: Dict[str, Any] = Depends(get_current
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/vector-db/cache-stats")
+async def get_cache_stats(current_user: Dict[str, Any] = Depends(require_admin)):
+    """Hit rates and sizes of the in-process chat, results and embedding caches, chat coalescing counts, search engine memory and hybrid retrieval timeouts"""
+    return {
+        "chat": get_chat_cache().stats(),
+        "results": results_cache.stats(),
+        "chat_coalescing": chat_flight.stats(),
+        "search_engine": (
+            get_cost_optimized_vector_db().search_engine.stats()
+            if USE_COST_OPTIMIZED and get_cost_optimized_vector_db().search_engine is not None else None
+        ),
+        "embeddings": get_embedding_service().stats() if USE_LOCAL_VECTOR_INDEX or USE_AWS_NATIVE else None,
+        "hybrid": hybrid_retriever.stats() if hybrid_retriever is not None else None,
+    }
+
+
 @app.post("/vector-db/reindex")
 async def reindex_existing_jobs(
     background_tasks: BackgroundTasks,
@@ -1646,9 +1897,7 @@ async def reindex_existing_jobs(
     
     try:
         # Get all completed jobs from DynamoDB
-        table = job_table()
-        resp = table.scan()
-        items = resp.get("Items", [])
+        items = await jobs_repo.scan()
         
         completed_jobs = [
             item for item in items 
@@ -1669,19 +1918,44 @@ async def reindex_existing_jobs(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Videos per embedding call when reindexing into the local vector index / OpenSearch
+REINDEX_EMBED_BATCH = int(cfg("REINDEX_EMBED_BATCH", 256))
+
+
 def reindex_jobs_background(completed_jobs: List[Dict[str, Any]]):
     """Background task to reindex existing jobs"""
     if not VECTOR_DB_AVAILABLE:
         return
         
+    # The embedding backend (the hybrid search's vector side) takes a batch of videos per
+    # call: one embed call (concurrent and cached) and, for OpenSearch, one bulk request
+    if USE_LOCAL_VECTOR_INDEX:
+        batch_db = get_local_vector_db()
+    elif USE_AWS_NATIVE:
+        batch_db = get_aws_vector_db()
+    else:
+        batch_db = None
+
     if USE_COST_OPTIMIZED:
         vector_db = get_cost_optimized_vector_db()
-    elif USE_AWS_NATIVE:
-        vector_db = get_aws_vector_db()
+    elif batch_db is not None:
+        vector_db = None  # batched below
     else:
         vector_db = get_vector_db()
     
     reindexed_count = 0
+    batch: List[Dict[str, Any]] = []
+
+    def store_batch():
+        nonlocal reindexed_count
+        try:
+            # A failing text only skips that video; the others' embeddings are cached
+            stored = batch_db.store_video_analyses(batch, skip_failures=True)
+            if vector_db is None:
+                reindexed_count += stored
+        except Exception as e:
+            logger.error(f"Failed to reindex {len(batch)} jobs into {type(batch_db).__name__}: {e}")
+        batch.clear()
     
     for job in completed_jobs:
         try:
@@ -1713,15 +1987,25 @@ def reindex_jobs_background(completed_jobs: List[Dict[str, Any]]):
             except (json.JSONDecodeError, TypeError):
                 analysis_results = {"raw_result": str(result_raw)}
             
-            # Store in vector database
-            vector_db.store_video_analysis(job_id, video_metadata, analysis_results)
-            reindexed_count += 1
+            if batch_db is not None:
+                batch.append({
+                    "job_id": job_id, "video_metadata": video_metadata, "analysis_results": analysis_results,
+                    "user_id": job.get("user_id"), "session_id": job.get("session_id"),
+                })
+                if len(batch) >= REINDEX_EMBED_BATCH:
+                    store_batch()
             
-            logger.info(f"Reindexed job {job_id} ({reindexed_count}/{len(completed_jobs)})")
+            # Store in vector database
+            if vector_db is not None:
+                vector_db.store_video_analysis(job_id, video_metadata, analysis_results)
+                reindexed_count += 1
+                logger.info(f"Reindexed job {job_id} ({reindexed_count}/{len(completed_jobs)})")
             
         except Exception as e:
             logger.error(f"Failed to reindex job {job.get('job_id', 'unknown')}: {e}")
             continue
+    if batch:
+        store_batch()
     
     logger.info(f"Reindexing completed. Successfully reindexed {reindexed_count}/{len(completed_jobs)} jobs")
 
@@ -1734,15 +2018,13 @@ async def requeue_stale_jobs(
     Admin-only safety net for stuck jobs.
     """
     try:
-        t = job_table()
         now_ts = int(time.time())
         # Scan for queued jobs (small scale; consider GSI for large scale)
-        resp = t.scan(
+        items = await jobs_repo.scan(
             FilterExpression="#status = :queued",
             ExpressionAttributeNames={"#status": "status"},
             ExpressionAttributeValues={":queued": "queued"}
         )
-        items = resp.get("Items", [])
         requeued = 0
         skipped = 0
         for it in items:
@@ -1766,7 +2048,7 @@ async def requeue_stale_jobs(
             if not tool:
                 tool = "analyze_video_complete"
             if bucket and key and job_id:
-                start_worker_container(bucket, key, job_id, tool)
+                await run_blocking(start_worker_container, bucket, key, job_id, tool)
                 requeued += 1
         return {"requeued": requeued, "skipped_recent": skipped, "checked": len(items)}
     except Exception as e:
@@ -1774,17 +2056,11 @@ async def requeue_stale_jobs(
         raise HTTPException(status_code=500, detail=f"Requeue failed: {e}")
 
 # --- Worker launcher (legacy SQS approach) ---
-def start_worker_container(bucket: str, key: str, job_id: str, tool: str):
-    # Enqueue job to SQS for on-demand worker processing
-    # Construct the file_url that the worker expects
-    file_url = f"https://{bucket}.s3.eu-central-1.amazonaws.com/{key}"
-    
-    agent_args = {
-        "file_url": file_url,
-        "bucket": bucket, 
-        "s3_key": key
-    }
+# SQS SendMessageBatch accepts at most 10 entries per call
+SQS_BATCH_SIZE = 10
 
+
+def worker_queue_url() -> str:
     # Default SQS URL - use the hardcoded one we know works
     sqs_url = "https://sqs.eu-central-1.amazonaws.com/851725596604/proov-worker-queue"
     
@@ -1794,14 +2070,67 @@ def start_worker_container(bucket: str, key: str, job_id: str, tool: str):
         sqs_url = config_sqs_url
     elif os.environ.get("SQS_QUEUE_URL"):
         sqs_url = os.environ.get("SQS_QUEUE_URL")
+    return sqs_url
+
 
-    sqs = boto3.client("sqs", region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"), config=boto3_config)
-    body = {
+def build_worker_message(bucket: str, key: str, job_id: str, tool: str) -> Dict[str, Any]:
+    """Build the SQS message body the worker expects for a job"""
+    # Construct the file_url that the worker expects
+    file_url = f"https://{bucket}.s3.eu-central-1.amazonaws.com/{key}"
+    return {
         "job_id": job_id,
         "tool": tool,
-        "agent_args": agent_args,
+        "agent_args": {
+            "file_url": file_url,
+            "bucket": bucket,
+            "s3_key": key
+        },
     }
-    logger.info("Enqueuing job %s to SQS %s with tool %s and file_url %s", job_id, sqs_url, tool, file_url)
+
+
+def record_enqueue_failure(job_id: str, error: str):
+    """Store the last enqueue error on the job row (the row stays 'queued' for requeue-stale)"""
+    try:
+        job_table().update_item(
+            Key={"job_id": job_id},
+            UpdateExpression=(
+                "SET enqueue_last_error = :err, enqueue_error_at = :ts, "
+                "enqueue_attempts = if_not_exists(enqueue_attempts, :zero) + :one"
+            ),
+            ExpressionAttributeValues={
+                ":err": error,
+                ":ts": int(time.time()),
+                ":zero": 0,
+                ":one": 1,
+            },
+        )
+    except Exception:
+        logger.exception("Failed to write enqueue error for job %s", job_id)
+
+
+def record_enqueue_success(job_id: str, message_id: str):
+    """Mark the job row as enqueued and record the MessageId for traceability"""
+    job_table().update_item(
+        Key={"job_id": job_id},
+        UpdateExpression=(
+            "SET sqs_message_id = :mid, enqueued_at = :ts, "
+            "enqueue_attempts = if_not_exists(enqueue_attempts, :zero) + :one"
+        ),
+        ExpressionAttributeValues={
+            ":mid": message_id,
+            ":ts": int(time.time()),
+            ":zero": 0,
+            ":one": 1,
+        },
+    )
+
+
+def start_worker_container(bucket: str, key: str, job_id: str, tool: str):
+    # Enqueue job to SQS for on-demand worker processing
+    sqs_url = worker_queue_url()
+    sqs = get_client("sqs", region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"))
+    body = build_worker_message(bucket, key, job_id, tool)
+    logger.info("Enqueuing job %s to SQS %s with tool %s and file_url %s", job_id, sqs_url, tool, body["agent_args"]["file_url"])
     # Simple, robust retry (up to 2 attempts) to improve enqueue reliability
     last_exc = None
     message_id = ""
@@ -1818,42 +2147,53 @@ def start_worker_container(bucket: str, key: str, job_id: str, tool: str):
     if not message_id:
         # All attempts failed; record and re-raise
         logger.exception("Failed to send SQS message for job %s after retries: %s", job_id, last_exc)
-        try:
-            table = boto3.resource("dynamodb", region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"), config=boto3_config).Table(cfg("JOB_TABLE", "proov_jobs"))
-            now_ts = int(time.time())
-            table.update_item(
-                Key={"job_id": job_id},
-                UpdateExpression=(
-                    "SET enqueue_last_error = :err, enqueue_error_at = :ts, "
-                    "enqueue_attempts = if_not_exists(enqueue_attempts, :zero) + :one"
-                ),
-                ExpressionAttributeValues={
-                    ":err": str(last_exc),
-                    ":ts": now_ts,
-                    ":zero": 0,
-                    ":one": 1,
-                },
-            )
-        except Exception:
-            logger.exception("Failed to write enqueue error for job %s", job_id)
+        record_enqueue_failure(job_id, str(last_exc))
         raise last_exc if last_exc else Exception("Failed to enqueue SQS message")
     # Mark job as enqueued and record MessageId for traceability (success path)
-    table = boto3.resource("dynamodb", region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"), config=boto3_config).Table(cfg("JOB_TABLE", "proov_jobs"))
-    now_ts = int(time.time())
-    table.update_item(
-        Key={"job_id": job_id},
-        UpdateExpression=(
-            "SET sqs_message_id = :mid, enqueued_at = :ts, "
-            "enqueue_attempts = if_not_exists(enqueue_attempts, :zero) + :one"
-        ),
-        ExpressionAttributeValues={
-            ":mid": message_id,
-            ":ts": now_ts,
-            ":zero": 0,
-            ":one": 1,
-        },
-    )
-    
+    record_enqueue_success(job_id, message_id)
+
+
+def enqueue_worker_jobs(messages: List[Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Enqueue many worker messages with SendMessageBatch (10 per call).
+
+    Entry ids are the job ids. Returns ({job_id: MessageId} of the enqueued
+    entries, {job_id: error} of the entries that failed after one retry for
+    non-sender faults); nothing is raised.
+    """
+    sqs_url = worker_queue_url()
+    sqs = get_client("sqs", region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"))
+    enqueued: Dict[str, str] = {}
+    failures: Dict[str, str] = {}
+    for start in range(0, len(messages), SQS_BATCH_SIZE):
+        pending = {
+            body["job_id"]: {"Id": body["job_id"], "MessageBody": json.dumps(body)}
+            for body in messages[start:start + SQS_BATCH_SIZE]
+        }
+        for attempt in range(1, 3):
+            try:
+                resp = sqs.send_message_batch(QueueUrl=sqs_url, Entries=list(pending.values()))
+            except Exception as e:
+                logger.warning("SendMessageBatch attempt %d failed for %d jobs: %s", attempt, len(pending), e)
+                for job_id in pending:
+                    failures[job_id] = str(e)
+                time.sleep(0.5)
+                continue
+            for ok in resp.get("Successful", []):
+                failures.pop(ok["Id"], None)
+                enqueued[ok["Id"]] = ok.get("MessageId", "")
+                logger.info("Enqueued job %s to SQS (MessageId=%s)", ok["Id"], ok.get("MessageId"))
+                pending.pop(ok["Id"], None)
+            for failed in resp.get("Failed", []):
+                failures[failed["Id"]] = f"{failed.get('Code')}: {failed.get('Message', '')}"
+                # Sender faults (bad request) will not succeed on retry
+                if failed.get("SenderFault"):
+                    pending.pop(failed["Id"], None)
+            if not pending:
+                break
+    if failures:
+        logger.error("Failed to enqueue %d of %d jobs to SQS %s", len(failures), len(messages), sqs_url)
+    return enqueued, failures
 
 
 # --- Analyze endpoint: start workers in background ---
@@ -1885,7 +2225,8 @@ async def analyze_videos(
     # Session ID: prefer client-provided, else first job ID (for upload batch grouping)
     session_id = request.session_id
     
-    jobs: List[AnalyzeResponseJob] = []
+    job_ids: List[str] = []
+    items: List[Dict[str, Any]] = []
     for i, video in enumerate(request.videos):
         job_id = str(uuid.uuid4())
         
@@ -1896,8 +2237,8 @@ async def analyze_videos(
         
         logger.info(f"Creating job {job_id} (session: {session_id}) with tool: {video.tool}")
         
-        # Save job entry with user and session info
-        save_job_entry(
+        # Job entry with user and session info; the enqueue outcome is added before it is written
+        item = build_job_entry(
             job_id=job_id,
             status="queued",
             video=video.dict(),
@@ -1905,31 +2246,69 @@ async def analyze_videos(
             user_email=user_email,
             session_id=session_id
         )
-        
-        # Enqueue to worker synchronously to guarantee SQS message creation before responding
-        # This avoids rare cases where background tasks may be dropped by upstream infrastructure
-        start_worker_container(video.bucket, video.key, job_id, video.tool)
-        jobs.append(AnalyzeResponseJob(job_id=job_id, video=video))
+        job_ids.append(job_id)
+        items.append(item)
+    
+    # Enqueue to worker before responding to guarantee SQS message creation
+    # This avoids rare cases where background tasks may be dropped by upstream infrastructure
+    messages = [
+        build_worker_message(video.bucket, video.key, job_id, video.tool)
+        for job_id, video in zip(job_ids, request.videos)
+    ]
+    enqueued, enqueue_failures = await run_blocking(enqueue_worker_jobs, messages) if messages else ({}, {})
     
-    logger.info(f"Created {len(jobs)} jobs in session {session_id} for user {user_email}")
-    return AnalyzeResponse(jobs=jobs)
+    # One bulk write of the rows with their enqueue outcome (the worker reads the row
+    # a few seconds after receiving the message). Rows that failed to enqueue stay
+    # 'queued' with the error, for requeue-stale.
+    now = int(time.time())
+    for item in items:
+        item["enqueue_attempts"] = 1
+        if item["job_id"] in enqueued:
+            item["sqs_message_id"] = enqueued[item["job_id"]]
+            item["enqueued_at"] = now
+        else:
+            item["enqueue_last_error"] = enqueue_failures.get(item["job_id"], "not enqueued")
+            item["enqueue_error_at"] = now
+    unwritten = set(await jobs_repo.put_many(items))
+    
+    jobs: List[AnalyzeResponseJob] = []
+    failed: List[AnalyzeFailedJob] = []
+    for job_id, video in zip(job_ids, request.videos):
+        if job_id in unwritten:
+            # An enqueued message without a row is dropped by the worker
+            failed.append(AnalyzeFailedJob(video=video, error="Failed to create job entry"))
+        elif job_id in enqueue_failures:
+            failed.append(AnalyzeFailedJob(job_id=job_id, video=video, error=f"Failed to enqueue job: {enqueue_failures[job_id]}"))
+        else:
+            jobs.append(AnalyzeResponseJob(job_id=job_id, video=video))
+    
+    if request.videos and not jobs:
+        raise HTTPException(status_code=500, detail=f"Failed to create jobs: {failed[0].error}")
+    
+    logger.info(f"Created {len(jobs)} jobs in session {session_id} for user {user_email} ({len(failed)} failed)")
+    return AnalyzeResponse(jobs=jobs, failed=failed)
 
 
 # --- Job status via search (avoid client.get with id, not supported in AOSS) ---
 @app.post("/job-status", response_model=JobStatusResponse)
-def job_status(
+async def job_status(
     request: JobStatusRequest,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     # DynamoDB-backed job status lookup with user verification
-    t = job_table()
     user_id = current_user.get('sub') or current_user.get('username')
     
+    # Fetch all requested jobs concurrently; failures are reported per job
+    lookups = await asyncio.gather(
+        *(jobs_repo.get(job_id, consistent=True) for job_id in request.job_ids),
+        return_exceptions=True
+    )
+    
     statuses: List[JobStatusItem] = []
-    for job_id in request.job_ids:
+    for job_id, item in zip(request.job_ids, lookups):
         try:
-            resp = t.get_item(Key={"job_id": job_id}, ConsistentRead=True)
-            item = resp.get("Item")
+            if isinstance(item, Exception):
+                raise item
             if not item:
                 statuses.append(JobStatusItem(job_id=job_id, status="not_found", result=""))
                 continue
@@ -1952,49 +2331,75 @@ def job_status(
 
 
 # --- Jobs endpoints for polling (Option B) ---
+def parse_field_selection(fields: Optional[str]) -> Optional[FieldSelection]:
+    """Parse a ``fields`` query parameter, rejecting malformed specs with 400"""
+    try:
+        return FieldSelection.parse(fields)
+    except FieldSelectionError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid fields parameter: {e}")
+
+
+# Output field -> job attributes it is built from (None: the whole item)
+LIST_JOB_SOURCES = {
+    "status": ("status", "job_status"),
+    "result": ("analysis_results", "result"),
+    "latest_doc": None,
+}
+MY_JOB_SOURCES = {
+    "status": ("status", "job_status"),
+}
+
+
+def list_job_entry(it: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a job row to the /jobs entry shape"""
+    # Prefer 'status' field, fallback to 'job_status' for legacy jobs
+    status_value = it.get("status") or it.get("job_status")
+    job_entry = {
+        "job_id": it.get("job_id"), 
+        "status": status_value, 
+        "result": it.get("analysis_results") or it.get("result"),
+        "created_at": it.get("created_at"),  # Unix timestamp
+        "updated_at": it.get("updated_at"),  # Unix timestamp 
+        "latest_doc": without_stored_view(it)
+    }
+    
+    # Add video information directly to job entry for easier frontend access
+    video_data = it.get("video")
+    if video_data:
+        if isinstance(video_data, str):
+            try:
+                video_parsed = json.loads(video_data)
+                job_entry["video"] = video_parsed
+            except json.JSONDecodeError:
+                job_entry["video"] = video_data
+        else:
+            job_entry["video"] = video_data
+    
+    # Also add s3_key if available
+    s3_key = it.get("s3_key")
+    if s3_key:
+        job_entry["s3_key"] = s3_key
+    
+    return job_entry
+
+
 @app.get("/jobs")
-async def list_jobs(current_user: Dict[str, Any] = Depends(get_current_user)):
+async def list_jobs(
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. 'job_id,status,latest_doc.summary'"),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    selection = parse_field_selection(fields)
+    projection = selection.source_attributes(LIST_JOB_SOURCES) if selection else None
     # Scan DynamoDB table for job items (small-scale; for large scale use queries with indexes)
-    t = job_table()
     try:
-        resp = t.scan(Limit=1000)
+        items = await jobs_repo.scan(projection=projection, Limit=1000)
     except Exception as e:
         logger.exception("list_jobs ddb scan failed")
         raise HTTPException(status_code=500, detail=f"DynamoDB error: {e}")
-    items = resp.get("Items", [])
-    # normalize items to expected shape
-    out = []
-    for it in items:
-        # Prefer 'status' field, fallback to 'job_status' for legacy jobs
-        status_value = it.get("status") or it.get("job_status")
-        job_entry = {
-            "job_id": it.get("job_id"), 
-            "status": status_value, 
-            "result": it.get("analysis_results") or it.get("result"),
-            "created_at": it.get("created_at"),  # Unix timestamp
-            "updated_at": it.get("updated_at"),  # Unix timestamp 
-            "latest_doc": it
-        }
-        
-        # Add video information directly to job entry for easier frontend access
-        video_data = it.get("video")
-        if video_data:
-            if isinstance(video_data, str):
-                try:
-                    video_parsed = json.loads(video_data)
-                    job_entry["video"] = video_parsed
-                except json.JSONDecodeError:
-                    job_entry["video"] = video_data
-            else:
-                job_entry["video"] = video_data
-        
-        # Also add s3_key if available
-        s3_key = it.get("s3_key")
-        if s3_key:
-            job_entry["s3_key"] = s3_key
-            
-        out.append(job_entry)
-    return out
+    # normalize items to expected shape; entries are encoded one by one while streaming
+    if selection:
+        return stream_json_list(items, transform=lambda it: selection.apply(list_job_entry(it)))
+    return stream_json_list(items, transform=list_job_entry)
 
 
 # --- NEW: User-specific job endpoints for multi-tenant isolation ---
@@ -2006,30 +2411,30 @@ async def options_my_jobs():
 @app.get("/my-jobs")
 async def get_my_jobs(
     limit: int = 50,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. 'job_id,status,s3_key'"),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
-    """Get all jobs for the current user"""
-    t = job_table()
+    """Get all jobs for the current user (``fields`` selects a sparse fieldset)"""
     user_id = current_user.get('sub') or current_user.get('username')
     user_email = current_user.get('email', 'unknown')
+    selection = parse_field_selection(fields)
     
     try:
         # Scan with filter (note: for production with many jobs, use GSI)
-        resp = t.scan(
+        items = await jobs_repo.scan(
+            projection=selection.source_attributes(MY_JOB_SOURCES) if selection else None,
             FilterExpression="user_id = :uid",
             ExpressionAttributeValues={':uid': user_id},
             Limit=limit,
             ConsistentRead=True
         )
-        items = resp.get("Items", [])
         
         logger.info(f"Found {len(items)} jobs for user {user_email}")
         
-        # Format response
-        out = []
-        for it in items:
+        # Format response (streamed; full result strings can make this large)
+        def my_job_entry(it: Dict[str, Any]) -> Dict[str, Any]:
             status_value = it.get("status") or it.get("job_status")
-            job_entry = {
+            return {
                 "job_id": it.get("job_id"),
                 "status": status_value,
                 "session_id": it.get("session_id"),
@@ -2044,9 +2449,13 @@ async def get_my_jobs(
                 "enqueue_attempts": it.get("enqueue_attempts"),
                 "enqueue_last_error": it.get("enqueue_last_error")
             }
-            out.append(job_entry)
         
-        return {"jobs": out, "total": len(out), "user_email": user_email}
+        return stream_json_list(
+            items,
+            transform=(lambda it: selection.apply(my_job_entry(it))) if selection else my_job_entry,
+            list_key="jobs",
+            envelope={"total": len(items), "user_email": user_email},
+        )
         
     except Exception as e:
         logger.exception(f"get_my_jobs failed for user {user_id}")
@@ -2063,9 +2472,7 @@ async def requeue_single_job(
     Safety: verifies ownership by user_id. Useful if a job got stuck in queued.
     """
     try:
-        t = job_table()
-        resp = t.get_item(Key={"job_id": job_id})
-        item = resp.get("Item")
+        item = await jobs_repo.get(job_id)
         if not item:
             raise HTTPException(status_code=404, detail="Job not found")
 
@@ -2091,7 +2498,7 @@ async def requeue_single_job(
         if not bucket or not key:
             raise HTTPException(status_code=400, detail="Job missing S3 info")
 
-        start_worker_container(bucket, key, job_id, tool)
+        await run_blocking(start_worker_container, bucket, key, job_id, tool)
         return {"status": "requeued", "job_id": job_id}
     except HTTPException:
         raise
@@ -2105,16 +2512,14 @@ async def get_my_sessions(
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Get all upload sessions for the current user (grouped by session_id)"""
-    t = job_table()
     user_id = current_user.get('sub') or current_user.get('username')
     
     try:
         # Get all user jobs
-        resp = t.scan(
+        items = await jobs_repo.scan(
             FilterExpression="user_id = :uid",
             ExpressionAttributeValues={':uid': user_id}
         )
-        items = resp.get("Items", [])
         
         # Group by session_id
         sessions = {}
@@ -2163,16 +2568,14 @@ async def get_session_jobs(
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Get all jobs for a specific session (with user verification)"""
-    t = job_table()
     user_id = current_user.get('sub') or current_user.get('username')
     
     try:
         # Get all jobs with this session_id
-        resp = t.scan(
+        items = await jobs_repo.scan(
             FilterExpression="session_id = :sid",
             ExpressionAttributeValues={':sid': session_id}
         )
-        items = resp.get("Items", [])
         
         # Verify user owns this session
         if items and items[0].get("user_id") != user_id:
@@ -2191,7 +2594,7 @@ async def get_session_jobs(
                 "updated_at": item.get("updated_at")
             })
         
-        return {"session_id": session_id, "jobs": jobs, "total": len(jobs)}
+        return FastJSONResponse({"session_id": session_id, "jobs": jobs, "total": len(jobs)})
         
     except HTTPException:
         raise
@@ -2200,248 +2603,184 @@ async def get_session_jobs(
         raise HTTPException(status_code=500, detail=f"Error retrieving session jobs: {e}")
 
 
+def store_results_view(job_id: str, updated_at, view_json: str):
+    """Write a lazily built view document back, unless the row changed meanwhile"""
+    try:
+        job_table().update_item(
+            Key={"job_id": job_id},
+            UpdateExpression="SET results_view = :view, results_view_version = :version",
+            ConditionExpression="updated_at = :updated_at",
+            ExpressionAttributeValues={
+                ":view": view_json,
+                ":version": RESULTS_FORMAT_VERSION,
+                ":updated_at": updated_at,
+            },
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            logger.warning(f"Failed to store results view for job {job_id}: {e}")
+    except Exception as e:
+        logger.warning(f"Failed to store results view for job {job_id}: {e}")
+
+
 @app.get("/jobs/{job_id}/results")
 async def get_job_results_formatted(
     job_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields/paths with optional slices, e.g. "
+                    "'status,summary,text_detection.texts[0:50]'"
+    ),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Return formatted job results for beautiful frontend display
     Supports both full and partial job IDs
+    
+    Bodies are cached per (job_id, updated_at) and served with a strong ETag;
+    a matching If-None-Match returns 304. With ``fields`` only the selected
+    parts are returned; unless 'analysis_results' is selected, only the stored
+    view document is read from DynamoDB.
     """
-    t = job_table()
+    selection = parse_field_selection(fields)
+    view_only = selection is not None and not selection.includes("analysis_results")
     
-    # If job_id is short (< 20 chars), scan for matching job
-    if len(job_id) < 20:
-        try:
-            resp = t.scan()
-            items = resp.get("Items", [])
-            matching_item = None
-            for item in items:
-                if item.get("job_id", "").startswith(job_id):
-                    matching_item = item
-                    job_id = item.get("job_id")  # Use full job_id
-                    break
-            if not matching_item:
-                raise HTTPException(status_code=404, detail="Job not found")
-            item = matching_item
-        except Exception as e:
-            logger.exception("get_job_results_formatted scan failed for %s", job_id)
-            raise HTTPException(status_code=500, detail=f"DynamoDB error: {e}")
-    else:
-        # Use direct lookup for full job IDs
-        try:
-            resp = t.get_item(Key={"job_id": job_id})
-            item = resp.get("Item")
-            if not item:
-                raise HTTPException(status_code=404, detail="Job not found")
-        except Exception as e:
-            logger.exception("get_job_results_formatted ddb failed for %s", job_id)
-            raise HTTPException(status_code=500, detail=f"DynamoDB error: {e}")
+    # Short job ids (< 20 chars) are resolved by prefix, full ids by direct lookup
+    try:
+        item = await jobs_repo.resolve(job_id, projection=RESULTS_VIEW_ATTRIBUTES if view_only else None)
+    except Exception as e:
+        logger.exception("get_job_results_formatted ddb failed for %s", job_id)
+        raise HTTPException(status_code=500, detail=f"DynamoDB error: {e}")
+    if not item:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job_id = item.get("job_id", job_id)  # Use full job_id
     
     status = item.get("status")
     if status not in ("done", "completed"):
         raise HTTPException(status_code=400, detail=f"Job not completed yet (status: {status})")
     
-    # Parse the result - check multiple possible fields
-    result_raw = item.get("analysis_results") or item.get("result", "{}")
-    try:
-        if isinstance(result_raw, str):
-            result = json.loads(result_raw)
-        else:
-            result = result_raw
-    except json.JSONDecodeError:
-        result = {"raw_result": result_raw}
+    key = results_cache_key(item)
+    etag = results_etag(key, variant=selection.spec if selection else "") if key else None
+    headers = {"Cache-Control": "private, no-cache"}
+    if etag:
+        headers["ETag"] = etag
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
     
-    # Extract video information from multiple sources
-    video_data = item.get("video", {})
-    if isinstance(video_data, str):
-        try:
-            video_data = json.loads(video_data)
-        except json.JSONDecodeError:
-            video_data = {}
-    
-    # Extract bucket/key from multiple sources
-    file_url = item.get("file_url", "")
-    bucket = item.get("s3_bucket")  # First try direct fields
-    key = item.get("s3_key")
-    tool_name = item.get("tool", "")
-    
-    if file_url:
-        # Parse S3 URL to extract bucket and key
-        if file_url.startswith("s3://"):
-            s3_path = file_url[5:]  # Remove s3://
-            parts = s3_path.split("/", 1)
-            if len(parts) == 2:
-                bucket, key = parts
-        elif "s3" in file_url and ".amazonaws.com" in file_url:
-            # Parse HTTPS S3 URL: https://bucket.s3.region.amazonaws.com/key
-            import re
-            match = re.match(r'https://([^.]+)\.s3\.[^.]+\.amazonaws\.com/(.+)', file_url)
-            if match:
-                bucket, key = match.groups()
+    async def full_body(item: Dict[str, Any]) -> bytes:
+        body = results_cache.get(key) if key else None
+        if body is None and key:
+            body = await run_blocking(results_cache.load_s3, key)
+            if body is not None:
+                results_cache.put(key, body)
+        if body is None:
+            body, built_view = render_job_results(item)
+            if built_view is not None and key and fits_stored_view(item, built_view):
+                # Lazy migration: persist the view so the next render is a splice
+                background_tasks.add_task(store_results_view, job_id, item.get("updated_at"), built_view)
+            if key:
+                results_cache.put(key, body)
+                if results_cache.s3_bucket:
+                    background_tasks.add_task(results_cache.store_s3, key, body)
+        return body
     
-    # If bucket/key still not set, try from video_data
-    if not bucket or not key:
-        if video_data.get("bucket"):
-            bucket = video_data.get("bucket")
-        if video_data.get("key"):
-            key = video_data.get("key")
-    
-    # Use video_data for tool if not set
-    if video_data.get("tool"):
-        tool_name = video_data.get("tool")
+    if selection is None:
+        body = await full_body(item)
+    else:
+        view_json = stored_results_view(item) if view_only else None
+        if view_json is not None:
+            document = json.loads(view_json)
+        else:
+            if view_only:
+                # Older job without a view document: the full row is needed
+                item = await jobs_repo.get(job_id)
+                if not item:
+                    raise HTTPException(status_code=404, detail="Job not found")
+            document = json.loads(await full_body(item))
+        body = dumps_json(selection.apply(document))
     
-    # Extract video metadata from result
-    video_metadata = {}
-    if isinstance(result, dict) and "video_metadata" in result:
-        vm = result["video_metadata"]
-        video_metadata = {
-            "duration": vm.get("duration_seconds"),
-            "fps": vm.get("fps"),
-            "total_frames": vm.get("total_frames"),
-            "filename": key,
-            "format": "mp4",  # Default assumption
-            "resolution": f"{vm.get('width', 'N/A')}x{vm.get('height', 'N/A')}" if vm.get('width') and vm.get('height') else None
-        }
+    if not key:
+        headers["ETag"] = body_etag(body)
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
     
-    # Format for frontend display
-    formatted_result = {
-        "job_id": job_id,
-        "status": status,
-        "video_info": {
-            "bucket": bucket,
-            "key": key,
-            "tool": tool_name,
-            "s3_url": file_url,
-            "filename": key if key else "Unknown",
-            **video_metadata
-        },
-        "analysis_results": result,
-        "has_blackframes": item.get("has_blackframes", False),
-        "has_text_detection": item.get("has_text_detection", False),
-        "summary": {}
-    }
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Seconds between SSE keepalive comments on idle job streams
+JOB_STREAM_HEARTBEAT_SECONDS = float(cfg("JOB_STREAM_HEARTBEAT_SECONDS", 15))
+
+
+@app.get("/jobs/stream")
+async def stream_jobs(
+    request: Request,
+    session_id: Optional[str] = Query(None, description="Only stream jobs of this session"),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Server-Sent Events stream of status changes for the user's jobs.
+
+    Sends one 'snapshot' event (current jobs, one read at connect), then a 'job'
+    event per change and keepalive comments while idle. A 'resync' event means
+    events were dropped because the client fell behind; reload via /my-jobs.
+    """
+    user_id = current_user.get('sub') or current_user.get('username')
+    bus = get_job_event_bus()
     
-    # Get summary from DynamoDB first if available
-    ddb_summary = item.get("summary", {})
-    if ddb_summary:
-        # Handle DynamoDB Map format
-        if isinstance(ddb_summary, dict) and 'M' in ddb_summary:
-            # DynamoDB Map format - extract values
-            summary_map = ddb_summary['M']
-            formatted_result["summary"] = {
-                "blackframes_count": int(summary_map.get("blackframes_count", {}).get("N", 0)),
-                "text_detections_count": int(summary_map.get("text_detections_count", {}).get("N", 0)),
-                "analysis_type": summary_map.get("analysis_type", {}).get("S", "basic")
-            }
+    # Subscribe before the snapshot read so no change falls in between
+    subscription = bus.subscribe(user_id, session_id=session_id)
+    try:
+        if session_id:
+            items = await jobs_repo.scan(
+                paginate=True,
+                projection=SNAPSHOT_ATTRIBUTES,
+                FilterExpression="session_id = :sid",
+                ExpressionAttributeValues={':sid': session_id}
+            )
+            if items and items[0].get("user_id") != user_id:
+                logger.warning(f"User {user_id} attempted to stream session {session_id}")
+                raise HTTPException(status_code=403, detail="Access denied")
         else:
-            # Already processed format
-            formatted_result["summary"] = {
-                "blackframes_count": ddb_summary.get("blackframes_count", 0),
-                "text_detections_count": ddb_summary.get("text_detections_count", 0),
-                "analysis_type": ddb_summary.get("analysis_type", "basic")
-            }
-    else:
-        # Fallback to default values
-        formatted_result["summary"] = {
-            "blackframes_count": 0,
-            "text_detections_count": 0,
-            "analysis_type": "basic"
-        }
+            items = await jobs_repo.scan(
+                paginate=True,
+                projection=SNAPSHOT_ATTRIBUTES,
+                FilterExpression="user_id = :uid",
+                ExpressionAttributeValues={':uid': user_id}
+            )
+    except HTTPException:
+        bus.unsubscribe(subscription)
+        raise
+    except Exception as e:
+        bus.unsubscribe(subscription)
+        logger.exception("stream_jobs snapshot failed for user %s", user_id)
+        raise HTTPException(status_code=500, detail=f"DynamoDB error: {e}")
     
-    # Check if this is a complete analysis result
-    if isinstance(result, dict):
-        # Handle complete analysis results (from analyze_video_complete tool)
-        if "blackframes" in result and "text_detection" in result:
-            formatted_result["has_blackframes"] = True
-            formatted_result["has_text_detection"] = True
-            formatted_result["summary"]["analysis_type"] = "complete"
-            
-            # Extract blackframes data
-            blackframes_data = result.get("blackframes", {})
-            if isinstance(blackframes_data, dict):
-                formatted_result["summary"]["blackframes_count"] = blackframes_data.get("blackframes_detected", 0)
-                black_frames_list = blackframes_data.get("black_frames", [])
-                
-                formatted_result["blackframes"] = {
-                    "count": blackframes_data.get("blackframes_detected", 0),
-                    "total_frames": blackframes_data.get("video_metadata", {}).get("total_frames", 0),
-                    "frames": [
-                        {
-                            "frame": bf.get("frame_number"),
-                            "timestamp": bf.get("timestamp"),
-                            "brightness": bf.get("brightness", 0) * 255  # Convert to 0-255 scale
-                        }
-                        for bf in black_frames_list
-                    ]
-                }
-            
-            # Extract text detection data
-            text_data = result.get("text_detection", {})
-            if isinstance(text_data, dict):
-                text_detections = text_data.get("text_detections", [])
-                formatted_result["summary"]["text_detections_count"] = len(text_detections)
-                
-                formatted_result["text_detection"] = {
-                    "count": len(text_detections),
-                    "texts": [
-                        {
-                            "text": td.get("DetectedText", ""),
-                            "confidence": td.get("Confidence", 0) / 100.0,  # Convert to 0-1 scale
-                            "timestamp": td.get("Timestamp", 0),
-                            "boundingBox": td.get("Geometry", {}).get("BoundingBox") if td.get("Geometry") else None
-                        }
-                        for td in text_detections
-                    ]
-                }
-        
-        # Handle blackframes-only results (from detect_blackframes tool)
-        elif "count" in result and "frames" in result and "total_frames" in result:
-            formatted_result["has_blackframes"] = True
-            formatted_result["summary"]["analysis_type"] = "blackframes_only"
-            
-            blackframes_count = result.get("count", 0)
-            black_frames_list = result.get("frames", [])
-            formatted_result["summary"]["blackframes_count"] = blackframes_count
-            
-            # Convert black_frames to frontend format
-            formatted_result["blackframes"] = {
-                "count": blackframes_count,
-                "total_frames": result.get("total_frames", 0),
-                "frames": [
-                    {
-                        "frame": bf.get("frame"),
-                        "timestamp": bf.get("timestamp"),
-                        "brightness": bf.get("brightness", 0)  # Already in correct scale from agent
-                    }
-                    for bf in black_frames_list
-                ]
-            }
-        
-        # Handle text detection-only results (from rekognition_detect_text tool)  
-        elif "texts" in result and "count" in result:
-            formatted_result["has_text_detection"] = True
-            formatted_result["summary"]["analysis_type"] = "text_only"
-            
-            text_detections = result.get("texts", [])
-            formatted_result["summary"]["text_detections_count"] = len(text_detections)
-            
-            # Convert text detections to frontend format
-            formatted_result["text_detection"] = {
-                "count": len(text_detections),
-                "texts": [
-                    {
-                        "text": td.get("text", ""),
-                        "confidence": td.get("confidence", 0) / 100.0 if td.get("confidence", 0) > 1 else td.get("confidence", 0),  # Already in 0-1 scale
-                        "timestamp": td.get("timestamp", 0),
-                        "boundingBox": td.get("bbox") if td.get("bbox") else None
-                    }
-                    for td in text_detections
-                ]
-            }
+    async def event_stream():
+        try:
+            snapshot = {"jobs": [job_event_from_item(it) for it in items]}
+            yield f"event: snapshot\ndata: {dumps_event(snapshot)}\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                batch = await subscription.next_batch(JOB_STREAM_HEARTBEAT_SECONDS)
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    yield "event: resync\ndata: {}\n\n"
+                if not batch:
+                    yield ": keepalive\n\n"
+                    continue
+                for event in batch:
+                    yield f"event: job\ndata: {dumps_event(event)}\n\n"
+        finally:
+            bus.unsubscribe(subscription)
     
-    return formatted_result
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/jobs/{job_id}")
@@ -2453,37 +2792,17 @@ async def get_job(
     Return latest document for a single job_id.
     Supports both full and partial job IDs.
     """
-    t = job_table()
-    
-    # If job_id is short (< 20 chars), scan for matching job
-    if len(job_id) < 20:
-        try:
-            resp = t.scan()
-            items = resp.get("Items", [])
-            matching_item = None
-            for item in items:
-                if item.get("job_id", "").startswith(job_id):
-                    matching_item = item
-                    job_id = item.get("job_id")  # Use full job_id
-                    break
-            if not matching_item:
-                raise HTTPException(status_code=404, detail="Job not found")
-            item = matching_item
-        except Exception as e:
-            logger.exception("get_job scan failed for %s", job_id)
-            raise HTTPException(status_code=500, detail=f"DynamoDB error: {e}")
-    else:
-        # Use direct lookup for full job IDs
-        try:
-            resp = t.get_item(Key={"job_id": job_id})
-            item = resp.get("Item")
-            if not item:
-                raise HTTPException(status_code=404, detail="Job not found")
-        except Exception as e:
-            logger.exception("get_job ddb failed for %s", job_id)
-            raise HTTPException(status_code=500, detail=f"DynamoDB error: {e}")
+    # Short job ids (< 20 chars) are resolved by prefix, full ids by direct lookup
+    try:
+        item = await jobs_repo.resolve(job_id)
+    except Exception as e:
+        logger.exception("get_job ddb failed for %s", job_id)
+        raise HTTPException(status_code=500, detail=f"DynamoDB error: {e}")
+    if not item:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job_id = item.get("job_id", job_id)  # Use full job_id
     
-    return {"job_id": job_id, "status": item.get("status"), "result": item.get("analysis_results") or item.get("result"), "latest_doc": item}
+    return FastJSONResponse({"job_id": job_id, "status": item.get("status"), "result": item.get("analysis_results") or item.get("result"), "latest_doc": without_stored_view(item)})
 
 
 # --- Job Management Endpoints ---
@@ -2493,9 +2812,17 @@ async def delete_job(
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Delete a job from DynamoDB"""
-    t = job_table()
     try:
-        resp = t.delete_item(Key={"job_id": job_id})
+        deleted = await jobs_repo.delete(job_id) or {}
+        results_cache.discard_job(job_id)
+        try:
+            await run_blocking(record_job_removal, job_id, region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"))
+        except Exception as e:
+            logger.warning(f"Failed to update analysis stats after deleting job {job_id}: {e}")
+        if USE_COST_OPTIMIZED:
+            await run_blocking(get_cost_optimized_vector_db().delete_video, job_id, deleted.get("user_id"))
+        if USE_LOCAL_VECTOR_INDEX:
+            await run_blocking(get_local_vector_db().delete_video, job_id)
         logger.info(f"Job {job_id} deleted by user {current_user['username']}")
         return {"message": f"Job {job_id} deleted successfully"}
     except Exception as e:
@@ -2510,11 +2837,9 @@ async def restart_job(
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Restart a job by resetting its status and re-enqueueing it"""
-    t = job_table()
     try:
         # Get the existing job
-        resp = t.get_item(Key={"job_id": job_id})
-        item = resp.get("Item")
+        item = await jobs_repo.get(job_id)
         if not item:
             raise HTTPException(status_code=404, detail="Job not found")
         
@@ -2532,7 +2857,7 @@ async def restart_job(
             raise HTTPException(status_code=400, detail="No video information found in job")
         
         # Reset job status
-        save_job_entry(job_id, "queued", video=video_info)
+        await jobs_repo.put(build_job_entry(job_id, "queued", video=video_info))
         
         # Re-enqueue the job
         bucket = video_info.get("bucket")
@@ -2567,7 +2892,7 @@ async def create_test_job(
     }
     
     # Save job entry
-    save_job_entry(job_id, "queued", video=test_video)
+    await jobs_repo.put(build_job_entry(job_id, "queued", video=test_video))
     
     # Start worker
     background_tasks.add_task(
@@ -2619,7 +2944,6 @@ async def unzip_files(
         }
         
         # Create job entry with proper fields for frontend display
-        table = job_table()
         current_time = int(time.time())
         
         # Extract filename from key for display
@@ -2639,7 +2963,7 @@ async def unzip_files(
         }
         # Always remove job_status if present (legacy)
         job_entry.pop("job_status", None)
-        table.put_item(Item=job_entry)
+        await jobs_repo.put(job_entry)
         
         # Start background task for unzipping
         background_tasks.add_task(process_zip_file, zip_job.bucket, zip_job.key, job_id)
@@ -2657,7 +2981,7 @@ def process_zip_file(bucket: str, key: str, job_id: str):
     """Background task to download, unzip, and re-upload ZIP file contents"""
     try:
         # Initialize DynamoDB table
-        table = boto3.resource("dynamodb", region_name=cfg("AWS_DEFAULT_REGION", "eu-central-1"), config=boto3_config).Table(cfg("JOB_TABLE", "proov_jobs"))
+        table = job_table()
         
         logger.info(f"Starting unzip process for {key} (job {job_id})")
         
@@ -2779,9 +3103,12 @@ def debug_vector_status():
             "COST_OPTIMIZED_AWS_AVAILABLE": COST_OPTIMIZED_AWS_AVAILABLE,
             "PREMIUM_AWS_VECTOR_DB_AVAILABLE": PREMIUM_AWS_VECTOR_DB_AVAILABLE,
             "LOCAL_VECTOR_DB_AVAILABLE": LOCAL_VECTOR_DB_AVAILABLE,
+            "LOCAL_VECTOR_INDEX_AVAILABLE": LOCAL_VECTOR_INDEX_AVAILABLE,
             "VECTOR_DB_AVAILABLE": VECTOR_DB_AVAILABLE,
             "USE_COST_OPTIMIZED": USE_COST_OPTIMIZED,
             "USE_AWS_NATIVE": USE_AWS_NATIVE,
+            "USE_LOCAL_VECTOR_INDEX": USE_LOCAL_VECTOR_INDEX,
+            "HYBRID_SEARCH_ENABLED": HYBRID_SEARCH_ENABLED,
             "imports_working": True
         }
     except Exception as e:
@@ -2796,10 +3123,10 @@ def debug_vector_test():
     """Test Vector DB initialization"""
     try:
         if VECTOR_DB_AVAILABLE:
-            from cost_optimized_aws_vector import CostOptimizedAWSVectorDB, CostOptimizedChatBot
+            from cost_optimized_aws_vector import get_cost_optimized_vector_db
             
             # Try to initialize
-            vector_db = CostOptimizedAWSVectorDB()
+            vector_db = get_cost_optimized_vector_db()
             
             # Test search
             results = vector_db.semantic_search("BMW", limit=3)
@@ -2830,10 +3157,10 @@ def migrate_to_vector_db():
         if not VECTOR_DB_AVAILABLE:
             return {"error": "Vector DB not available", "status": "FAILED"}
         
-        from cost_optimized_aws_vector import CostOptimizedAWSVectorDB
+        from cost_optimized_aws_vector import get_cost_optimized_vector_db
         
         # Initialize Vector DB
-        vector_db = CostOptimizedAWSVectorDB()
+        vector_db = get_cost_optimized_vector_db()
         
         # Get all existing jobs from DynamoDB
         t = job_table()
@@ -15,6 +15,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from botocore.config import Config
 
+from aws_clients import get_client, get_resource
+
 logger = logging.getLogger(__name__)
 
 # Cognito Configuration
@@ -176,7 +178,7 @@ require_user = require_role("user")
 # Optional: Keep backward compatibility for DynamoDB users
 def get_dynamodb_resource():
     """Get DynamoDB resource with proper configuration"""
-    return boto3.resource("dynamodb", region_name=COGNITO_REGION, config=boto3_config)
+    return get_resource("dynamodb", region_name=COGNITO_REGION)
 
 def get_user_from_dynamodb(username: str) -> Optional[Dict[str, Any]]:
     """Get user from DynamoDB (fallback for legacy users)"""
@@ -215,7 +217,7 @@ class UserResponse(BaseModel):
 def authenticate_user(username: str, password: str) -> Optional[Dict[str, Any]]:
     """Authenticate user with Cognito and return access token"""
     try:
-        cognito_client = boto3.client('cognito-idp', config=boto3_config)
+        cognito_client = get_client('cognito-idp', region_name=COGNITO_REGION)
         
         response = cognito_client.admin_initiate_auth(
             UserPoolId=COGNITO_USER_POOL_ID,
@@ -0,0 +1,127 @@
+"""
+Process-wide pooled AWS clients.
+
+Creating a boto3 client resolves credentials, loads service models and opens a
+new connection pool (with fresh TLS handshakes). This registry keeps one client
+and one resource per (service, region, config) for the whole process, with
+``max_pool_connections`` sized to the configured I/O concurrency.
+
+Used by the API and the worker (the worker image puts the backend directory on
+PYTHONPATH).
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGION = os.environ.get("AWS_DEFAULT_REGION", "eu-central-1")
+
+# One pooled connection per concurrent blocking call (see job_repository.AWS_IO_CONCURRENCY)
+MAX_POOL_CONNECTIONS = int(
+    os.environ.get("AWS_MAX_POOL_CONNECTIONS", os.environ.get("AWS_IO_CONCURRENCY", "32"))
+)
+
+# Services the API touches on its hot paths; created during startup
+DEFAULT_WARM_SERVICES = ("dynamodb", "s3", "sqs", "bedrock-runtime")
+DEFAULT_WARM_RESOURCES = ("dynamodb",)
+
+_session: Optional[boto3.session.Session] = None
+_clients: Dict[Tuple, Any] = {}
+_resources: Dict[Tuple, Any] = {}
+_lock = threading.RLock()
+
+
+def _get_session() -> boto3.session.Session:
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = boto3.session.Session()
+    return _session
+
+
+def _registry_key(service: str, region_name: Optional[str], config_overrides: Dict[str, Any]) -> Tuple:
+    overrides = tuple(sorted((k, repr(v)) for k, v in config_overrides.items()))
+    return (service, region_name or DEFAULT_REGION, overrides)
+
+
+def _build_config(region_name: str, config_overrides: Dict[str, Any]) -> Config:
+    options = {
+        "region_name": region_name,
+        "max_pool_connections": MAX_POOL_CONNECTIONS,
+        "retries": {"max_attempts": 3, "mode": "standard"},
+    }
+    options.update(config_overrides)
+    return Config(**options)
+
+
+def get_client(service: str, region_name: Optional[str] = None, **config_overrides):
+    """
+    Get the shared boto3 client for ``service``.
+
+    Keyword arguments are botocore ``Config`` options (e.g. ``read_timeout=60``);
+    each distinct combination gets its own client.
+    """
+    key = _registry_key(service, region_name, config_overrides)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                region = key[1]
+                client = _get_session().client(
+                    service, region_name=region, config=_build_config(region, config_overrides)
+                )
+                _clients[key] = client
+                logger.info("Created pooled %s client (region=%s)", service, region)
+    return client
+
+
+def get_resource(service: str, region_name: Optional[str] = None, **config_overrides):
+    """
+    Get the shared boto3 resource for ``service``.
+
+    Resources are shared across threads; callers only use their request methods
+    (get_item, put_item, ...) which delegate to the thread-safe underlying client.
+    """
+    key = _registry_key(service, region_name, config_overrides)
+    resource = _resources.get(key)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                region = key[1]
+                resource = _get_session().resource(
+                    service, region_name=region, config=_build_config(region, config_overrides)
+                )
+                _resources[key] = resource
+                logger.info("Created pooled %s resource (region=%s)", service, region)
+    return resource
+
+
+def warm_clients(
+    services: Iterable[str] = DEFAULT_WARM_SERVICES,
+    resources: Iterable[str] = DEFAULT_WARM_RESOURCES,
+    region_name: Optional[str] = None,
+) -> None:
+    """Resolve credentials and create clients up front so the first request doesn't pay for it"""
+    try:
+        _get_session().get_credentials()
+    except Exception as e:
+        logger.warning(f"AWS credential resolution failed during warm-up: {e}")
+    for service in services:
+        try:
+            get_client(service, region_name=region_name)
+        except Exception as e:
+            logger.warning(f"Failed to warm {service} client: {e}")
+    for service in resources:
+        try:
+            get_resource(service, region_name=region_name)
+        except Exception as e:
+            logger.warning(f"Failed to warm {service} resource: {e}")
@@ -10,9 +10,12 @@ from typing import List, Dict, Any, Optional
 import numpy as np
 import boto3
 from datetime import datetime
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from opensearchpy import OpenSearch, RequestsHttpConnection, helpers
 from requests_aws4auth import AWS4Auth
 
+from aws_clients import get_client
+from embedding_service import get_embedding_service
+
 logger = logging.getLogger(__name__)
 
 class AWSVectorDB:
@@ -26,8 +29,8 @@ class AWSVectorDB:
         self.opensearch_endpoint = os.environ.get('OPENSEARCH_ENDPOINT')
         self.index_name = 'proovid-videos'
         self.client = None
-        self.s3_client = boto3.client('s3', region_name=self.region)
-        self.bedrock_client = boto3.client('bedrock-runtime', region_name=self.region)
+        self.s3_client = get_client('s3', region_name=self.region)
+        self.bedrock_client = get_client('bedrock-runtime', region_name=self.region)
         self._init_opensearch()
     
     def _init_opensearch(self):
@@ -132,29 +135,56 @@ class AWSVectorDB:
         return enhanced
     
     def create_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Create embeddings using AWS Bedrock Titan"""
-        embeddings = []
+        """
+        Create embeddings (Titan by default) via the shared embedding service:
+        concurrent requests, cached by content, EmbeddingError instead of zero vectors
+        """
+        return get_embedding_service().embed(texts).tolist()
+    
+    def _document(self, job_id: str, video_metadata: Dict[str, Any], analysis_results: Dict[str, Any],
+                  user_id: str = None, session_id: str = None) -> Dict[str, Any]:
+        """OpenSearch document of a video without its embedding (``semantic_content`` is embedded)"""
+        # Extract semantic information
+        semantic_content = []
+        semantic_tags = []
         
-        for text in texts:
-            try:
-                # Use Amazon Titan Embeddings
-                response = self.bedrock_client.invoke_model(
-                    modelId='amazon.titan-embed-text-v1',
-                    body=json.dumps({
-                        "inputText": text[:8000]  # Limit text length
-                    })
-                )
-                
-                result = json.loads(response['body'].read())
-                embedding = result['embedding']
-                embeddings.append(embedding)
-                
-            except Exception as e:
-                logger.error(f"Failed to create embedding: {e}")
-                # Fallback: zero vector
-                embeddings.append([0.0] * 1536)
+        # Add video info
+        video_key = video_metadata.get("key", "")
+        bucket = video_metadata.get("bucket", "")
+        semantic_content.append(f"Video: {video_key}")
+        
+        # Extract labels
+        if "label_detection" in analysis_results:
+            labels = analysis_results["label_detection"].get("semantic_tags", [])
+            semantic_tags.extend(labels[:50])  # Limit to 50 tags
+            semantic_content.extend(labels[:20])  # Top 20 for embedding
+            semantic_content.append(f"Contains: {', '.join(labels[:10])}")
         
-        return embeddings
+        # Extract text content
+        if "text_detection" in analysis_results:
+            texts = analysis_results["text_detection"].get("text_detections", [])
+            text_content = [t.get("text", "") for t in texts[:5]]
+            semantic_content.extend(text_content)
+        
+        doc = {
+            "job_id": job_id,
+            "video_key": video_key,
+            "bucket": bucket,
+            "semantic_content": " ".join(semantic_content),
+            "semantic_tags": semantic_tags,
+            "analysis_type": analysis_results.get("analysis_type", "unknown"),
+            "timestamp": datetime.now().isoformat(),
+            "has_labels": "label_detection" in analysis_results,
+            "has_text": "text_detection" in analysis_results,
+            "has_blackframes": "blackframes" in analysis_results,
+        }
+        
+        # 🔒 Add multi-tenant isolation fields
+        if user_id:
+            doc["user_id"] = user_id
+        if session_id:
+            doc["session_id"] = session_id
+        return doc
     
     def store_video_analysis(self, job_id: str, video_metadata: Dict[str, Any], analysis_results: Dict[str, Any], user_id: str = None, session_id: str = None):
         """
@@ -168,55 +198,10 @@ class AWSVectorDB:
             session_id: Session ID for grouping uploads
         """
         try:
-            # Extract semantic information
-            semantic_content = []
-            semantic_tags = []
-            
-            # Add video info
-            video_key = video_metadata.get("key", "")
-            bucket = video_metadata.get("bucket", "")
-            semantic_content.append(f"Video: {video_key}")
-            
-            # Extract labels
-            if "label_detection" in analysis_results:
-                labels = analysis_results["label_detection"].get("semantic_tags", [])
-                semantic_tags.extend(labels[:50])  # Limit to 50 tags
-                semantic_content.extend(labels[:20])  # Top 20 for embedding
-                semantic_content.append(f"Contains: {', '.join(labels[:10])}")
-            
-            # Extract text content
-            if "text_detection" in analysis_results:
-                texts = analysis_results["text_detection"].get("text_detections", [])
-                text_content = [t.get("text", "") for t in texts[:5]]
-                semantic_content.extend(text_content)
-            
-            # Create searchable text and embedding
-            searchable_text = " ".join(semantic_content)
-            embeddings = self.create_embeddings([searchable_text])
-            
-            # Prepare document with multi-tenant fields
-            doc = {
-                "job_id": job_id,
-                "video_key": video_key,
-                "bucket": bucket,
-                "semantic_content": searchable_text,
-                "semantic_tags": semantic_tags,
-                "analysis_type": analysis_results.get("analysis_type", "unknown"),
-                "timestamp": datetime.now().isoformat(),
-                "has_labels": "label_detection" in analysis_results,
-                "has_text": "text_detection" in analysis_results,
-                "has_blackframes": "blackframes" in analysis_results,
-                "embedding_vector": embeddings[0]
-            }
-            
-            # 🔒 Add multi-tenant isolation fields
-            if user_id:
-                doc["user_id"] = user_id
-                logger.info(f"🔒 Storing video with user_id: {user_id}")
-            
-            if session_id:
-                doc["session_id"] = session_id
-                logger.info(f"🔒 Storing video with session_id: {session_id}")
+            doc = self._document(job_id, video_metadata, analysis_results, user_id=user_id, session_id=session_id)
+            doc["embedding_vector"] = self.create_embeddings([doc["semantic_content"]])[0]
+            if user_id or session_id:
+                logger.info(f"🔒 Storing video with user_id: {user_id}, session_id: {session_id}")
             
             # Store in OpenSearch
             response = self.client.index(
@@ -233,6 +218,47 @@ class AWSVectorDB:
             logger.error(f"Failed to store video analysis: {e}")
             raise
     
+    def store_video_analyses(self, entries: List[Dict[str, Any]], skip_failures: bool = False) -> int:
+        """
+        Store many videos with one embedding call and one bulk request.
+
+        Each entry has the arguments of :meth:`store_video_analysis`. Raises if the
+        batch cannot be embedded; with ``skip_failures`` the entries are embedded one
+        by one instead (successful embeddings come from the cache) and failing ones
+        are skipped, as are documents the bulk request rejects. Returns the number stored.
+        """
+        docs = [
+            self._document(e["job_id"], e["video_metadata"], e["analysis_results"],
+                           user_id=e.get("user_id"), session_id=e.get("session_id"))
+            for e in entries
+        ]
+        if not docs:
+            return 0
+        try:
+            vectors = self.create_embeddings([doc["semantic_content"] for doc in docs])
+        except Exception as e:
+            if not skip_failures:
+                raise
+            logger.warning(f"Batch embedding of {len(docs)} videos failed ({e}), retrying one by one")
+            vectors = []
+            for doc in docs:
+                try:
+                    vectors.append(self.create_embeddings([doc["semantic_content"]])[0])
+                except Exception as single_error:
+                    logger.warning(f"Skipping video {doc['job_id']}: {single_error}")
+                    vectors.append(None)
+        actions = [
+            {"_index": self.index_name, "_id": doc["job_id"], "_source": {**doc, "embedding_vector": vector}}
+            for doc, vector in zip(docs, vectors) if vector is not None
+        ]
+        if not actions:
+            return 0
+        stored, errors = helpers.bulk(self.client, actions, refresh=True, raise_on_error=not skip_failures)
+        if errors:
+            logger.warning(f"OpenSearch rejected {len(errors)} of {len(actions)} videos: {errors[:3]}")
+        logger.info(f"Stored {stored} video analyses in OpenSearch")
+        return stored
+    
     def semantic_search(self, query: str, limit: int = 10, user_id: str = None, session_id: str = None) -> List[Dict[str, Any]]:
         """
         Perform semantic search using vector similarity
@@ -351,7 +377,7 @@ class AWSChatBot:
     
     def __init__(self, vector_db: AWSVectorDB):
         self.vector_db = vector_db
-        self.bedrock_client = boto3.client(
+        self.bedrock_client = get_client(
             'bedrock-runtime',
             region_name=os.environ.get('AWS_DEFAULT_REGION', 'eu-central-1')
         )
@@ -0,0 +1,163 @@
+"""
+Shared chat response cache.
+
+Answers are cached per tenant (user), session and normalized question, so a
+repeated question skips the search and the Bedrock call. The cache is bounded
+by entry count and by approximate size (LRU eviction) and entries expire after
+a TTL. When a job in a user's scope completes, all of that user's answers are
+dropped, since they may no longer reflect the user's videos.
+
+One instance is shared by all chatbot instances in the process
+(:func:`get_chat_cache`).
+"""
+
+import copy
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+CacheKey = Tuple[str, str, str]
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Trailing punctuation does not change the question ("Welche Videos?" == "welche videos")
+_TRAILING_PUNCT_RE = re.compile(r"[\s?!.,;:]+$")
+
+
+def normalize_query(query: str) -> str:
+    query = _WHITESPACE_RE.sub(" ", (query or "").strip().lower())
+    return _TRAILING_PUNCT_RE.sub("", query)
+
+
+def _size_of(value: Dict[str, Any]) -> int:
+    return len(json.dumps(value, default=str, ensure_ascii=False))
+
+
+class ChatResponseCache:
+    """Thread-safe LRU/TTL cache of chat responses, scoped by user and session"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 16 * 1024 * 1024,
+                 ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._by_user: Dict[str, Set[CacheKey]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def key(user_id: Optional[str], session_id: Optional[str], query: str) -> CacheKey:
+        return (user_id or "anonymous", session_id or "", normalize_query(query))
+
+    def get(self, user_id: Optional[str], session_id: Optional[str], query: str) -> Optional[Dict[str, Any]]:
+        """A copy of the cached response, or None"""
+        key = self.key(user_id, session_id, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, _, response = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return copy.deepcopy(response)
+
+    def put(self, user_id: Optional[str], session_id: Optional[str], query: str,
+            response: Dict[str, Any]) -> None:
+        key = self.key(user_id, session_id, query)
+        size = _size_of(response)
+        if size > self.max_bytes:
+            return
+        stored = copy.deepcopy(response)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, stored)
+            self._by_user.setdefault(key[0], set()).add(key)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_user(self, user_id: Optional[str]) -> int:
+        """Drop every cached answer of a user (e.g. after one of their jobs completed)"""
+        with self._lock:
+            keys = self._by_user.pop(user_id or "anonymous", set())
+            for key in keys:
+                self._remove(key, index=False)
+            if keys:
+                self._invalidations += 1
+            return len(keys)
+
+    def on_job_change(self, item: Dict[str, Any]) -> None:
+        """Job change listener: new or removed results invalidate the owner's answers"""
+        if item.get("status") in ("done", "completed", "deleted"):
+            self.invalidate_user(item.get("user_id"))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self._bytes = 0
+
+    def _remove(self, key: CacheKey, index: bool = True) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[1]
+        if index:
+            keys = self._by_user.get(key[0])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_user[key[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
+
+
+_chat_cache: Optional[ChatResponseCache] = None
+_chat_cache_lock = threading.Lock()
+
+
+def get_chat_cache() -> ChatResponseCache:
+    """Process-wide chat cache (sized by CHAT_CACHE_* environment variables)"""
+    global _chat_cache
+    if _chat_cache is None:
+        with _chat_cache_lock:
+            if _chat_cache is None:
+                _chat_cache = ChatResponseCache(
+                    max_entries=int(os.environ.get("CHAT_CACHE_MAX_ENTRIES", "1000")),
+                    max_bytes=int(os.environ.get("CHAT_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+                    ttl_seconds=float(os.environ.get("CHAT_CACHE_TTL_SECONDS", "600")),
+                )
+    return _chat_cache
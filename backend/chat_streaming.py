@@ -0,0 +1,162 @@
+"""
+Token streaming for chat answers.
+
+``BedrockStreamingModel`` calls ``invoke_model_with_response_stream`` and yields
+text deltas as they arrive, so the first words reach the client long before the
+full completion is done. ``LocalStreamingModel`` is a stand-in with the same
+interface (no AWS calls) for local development and tests; select it with
+``CHAT_MODEL_BACKEND=local``.
+
+boto3 event streams are blocking iterators; :func:`aiter_in_thread` drains one
+on a dedicated thread and hands items to the event loop.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional
+
+from aws_clients import get_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+
+# Max seconds without a new chunk before a stream is abandoned
+STREAM_IDLE_TIMEOUT_SECONDS = float(os.environ.get("BEDROCK_STREAM_IDLE_TIMEOUT", "20"))
+
+_DONE = object()
+
+
+class BedrockStreamingModel:
+    """Streams Anthropic messages completions from Bedrock"""
+
+    def __init__(self, model_id: str = DEFAULT_MODEL_ID, region_name: Optional[str] = None):
+        self.model_id = model_id
+        self._client = get_client(
+            "bedrock-runtime",
+            region_name=region_name or os.environ.get("AWS_DEFAULT_REGION", "eu-central-1"),
+        )
+
+    def stream(self, body: Dict[str, Any]) -> Iterator[str]:
+        """Yield the completion's text deltas for a messages request body"""
+        response = self._client.invoke_model_with_response_stream(
+            modelId=self.model_id,
+            body=json.dumps(body),
+            contentType="application/json",
+            accept="application/json",
+        )
+        events = response["body"]
+        try:
+            for event in events:
+                chunk = event.get("chunk")
+                if not chunk:
+                    continue
+                data = json.loads(chunk["bytes"])
+                if data.get("type") == "content_block_delta":
+                    text = data.get("delta", {}).get("text")
+                    if text:
+                        yield text
+                elif data.get("type") == "message_stop":
+                    metrics = data.get("amazon-bedrock-invocationMetrics") or {}
+                    if metrics:
+                        logger.info(
+                            f"Bedrock stream done: first byte {metrics.get('firstByteLatency')} ms, "
+                            f"total {metrics.get('invocationLatency')} ms, "
+                            f"{metrics.get('outputTokenCount')} output tokens"
+                        )
+        finally:
+            # Stops reading the HTTP response if the consumer went away early
+            events.close()
+
+
+class LocalStreamingModel:
+    """Deterministic stand-in that 'generates' a canned answer word by word"""
+
+    model_id = "local"
+
+    def __init__(self, token_delay: float = 0.02, first_token_delay: float = 0.0):
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+
+    def stream(self, body: Dict[str, Any]) -> Iterator[str]:
+        messages = body.get("messages") or []
+        prompt = messages[-1].get("content", "") if messages else ""
+        if isinstance(prompt, list):
+            prompt = " ".join(part.get("text", "") for part in prompt if isinstance(part, dict))
+        answer = f"(local model) {prompt.strip()[:400]}"
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        for i, word in enumerate(answer.split(" ")):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+
+_streaming_model = None
+
+
+def get_streaming_model():
+    """Process-wide streaming model (``CHAT_MODEL_BACKEND``: ``bedrock`` or ``local``)"""
+    global _streaming_model
+    if _streaming_model is None:
+        if os.environ.get("CHAT_MODEL_BACKEND", "bedrock").lower() == "local":
+            _streaming_model = LocalStreamingModel()
+        else:
+            _streaming_model = BedrockStreamingModel(os.environ.get("BEDROCK_CHAT_MODEL_ID", DEFAULT_MODEL_ID))
+    return _streaming_model
+
+
+async def aiter_in_thread(make_iter: Callable[[], Iterable[Any]],
+                          idle_timeout: float = STREAM_IDLE_TIMEOUT_SECONDS) -> AsyncIterator[Any]:
+    """
+    Iterate a blocking iterator on its own thread and yield its items here.
+
+    Raises ``asyncio.TimeoutError`` if no item arrives for ``idle_timeout``
+    seconds. When the consumer stops early, the producer stops after its
+    current item and the iterator is closed.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def hand_over(item, error=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            # Event loop closed; nobody is listening any more
+            stop.set()
+
+    def produce():
+        iterator = None
+        try:
+            iterator = iter(make_iter())
+            for item in iterator:
+                if stop.is_set():
+                    break
+                hand_over(item)
+            hand_over(_DONE)
+        except BaseException as e:
+            hand_over(_DONE, e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                try:
+                    close()
+                except Exception:
+                    pass
+
+    threading.Thread(target=produce, name="chat-stream", daemon=True).start()
+    try:
+        while True:
+            item, error = await asyncio.wait_for(queue.get(), idle_timeout)
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
@@ -6,15 +6,62 @@ Nutzt DynamoDB + S3 statt OpenSearch für minimale Kosten
 import json
 import logging
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 import boto3
 from datetime import datetime
 import hashlib
 import pickle
 import base64
+import threading
+import functools
+
+from aws_clients import get_client, get_resource
+from chat_cache import ChatResponseCache, get_chat_cache, normalize_query
+from chat_streaming import get_streaming_model
+from single_flight import SingleFlight
+from rag_context import build_context, facts_from_search_result
+from video_summary import build_video_summary, dumps_summary, load_summary
+from moment_index import DEFAULT_WINDOW_SECONDS, build_moments, dumps_moments
+from search_facets import analysis_facets
+from job_repository import with_projection
+from keyword_index import INTENT_BLACKFRAMES, INTENT_TEXT, KeywordIndex, document_postings
+from text_analysis import analyze, analyze_query, fold
+from tenant_search import TenantSearchEngine
 
 logger = logging.getLogger(__name__)
 
+
+class SearchUnavailableError(RuntimeError):
+    """The requested search needs the in-process search engine (``SEARCH_ENGINE_ENABLED``)"""
+
+# Job attributes read by semantic_search (search fields written by store_video_analysis)
+SEARCH_ATTRIBUTES = (
+    "job_id", "s3_key", "s3_bucket", "semantic_tags", "analysis_type", "has_labels", "has_text",
+    "has_blackframes", "summary", "search_updated_at", "text_content", "searchable_content", "video_summary",
+)
+
+# Answer searches from the inverted keyword index (see keyword_index) once a tenant is backfilled
+SEARCH_INDEX_ENABLED = os.environ.get("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+
+# Attributes of the rows the in-process search engine keeps per tenant (see tenant_search)
+ENGINE_ATTRIBUTES = SEARCH_ATTRIBUTES + (
+    "session_id", "moments", "created_at", "label_categories", "duration_seconds",
+)
+
+SEARCH_ENGINE_ENABLED = os.environ.get("SEARCH_ENGINE_ENABLED", "true").lower() == "true"
+SEARCH_ENGINE_MEMORY_MB = int(os.environ.get("SEARCH_ENGINE_MEMORY_MB", "256"))
+SEARCH_SNAPSHOT_DIR = os.environ.get("SEARCH_SNAPSHOT_DIR", "/tmp/proov-search")
+SEARCH_SNAPSHOT_MAX_AGE_SECONDS = float(os.environ.get("SEARCH_SNAPSHOT_MAX_AGE_SECONDS", "3600"))
+# Reload a loaded tenant after this long (picks up deletes made through other instances)
+SEARCH_ENGINE_MAX_AGE_SECONDS = float(os.environ.get("SEARCH_ENGINE_MAX_AGE_SECONDS", "900"))
+
+# semantic_search modes: ranked keyword search, typo-tolerant lookup of OCR text lines,
+# or the time segments where labels/text appear
+SEARCH_MODES = ("keyword", "fuzzy_text", "moments")
+
+# Token budget for video facts in the chatbot's Bedrock prompt
+PROMPT_CONTEXT_TOKEN_BUDGET = int(os.environ.get("CHAT_PROMPT_CONTEXT_TOKENS", "300"))
+
 class CostOptimizedAWSVectorDB:
     """
     Kostenoptimierte AWS Vector Database
@@ -29,11 +76,23 @@ class CostOptimizedAWSVectorDB:
         self.table_name = os.environ.get('JOB_TABLE', 'proov_jobs')
         self.s3_bucket = os.environ.get('AWS_S3_BUCKET', 'christian-aws-development')
         
-        self.dynamodb = boto3.resource('dynamodb', region_name=self.region)
-        self.s3_client = boto3.client('s3', region_name=self.region)
-        self.bedrock_client = boto3.client('bedrock-runtime', region_name=self.region)
+        # Shared pooled clients (see aws_clients)
+        self.dynamodb = get_resource('dynamodb', region_name=self.region)
+        self.s3_client = get_client('s3', region_name=self.region)
+        self.bedrock_client = get_client('bedrock-runtime', region_name=self.region)
         
         self.table = self.dynamodb.Table(self.table_name)
+        self._search_flight = SingleFlight("search")
+        self.keyword_index = KeywordIndex(region_name=self.region) if SEARCH_INDEX_ENABLED else None
+        self.search_engine = TenantSearchEngine(
+            self._tenant_rows,
+            memory_budget_bytes=SEARCH_ENGINE_MEMORY_MB * 1024 * 1024,
+            snapshot_dir=SEARCH_SNAPSHOT_DIR,
+            snapshot_max_age_seconds=SEARCH_SNAPSHOT_MAX_AGE_SECONDS,
+            max_age_seconds=SEARCH_ENGINE_MAX_AGE_SECONDS,
+        ) if SEARCH_ENGINE_ENABLED else None
+        self._backfills = set()
+        self._backfill_lock = threading.Lock()
         self._ensure_search_index()
         
         logger.info("Cost-optimized AWS Vector DB initialized")
@@ -55,7 +114,12 @@ class CostOptimizedAWSVectorDB:
         user_id: Optional[str] = None,
         session_id: Optional[str] = None,
     ):
-        """Store video analysis in DynamoDB with searchable metadata"""
+        """
+        Store video analysis in DynamoDB with searchable metadata.
+
+        Raises if the search fields or keyword postings cannot be written; only the
+        in-process search engine refresh is best-effort.
+        """
         try:
             # Extract searchable keywords
             search_keywords = []
@@ -65,38 +129,39 @@ class CostOptimizedAWSVectorDB:
             video_key = video_metadata.get("key", "")
             bucket = video_metadata.get("bucket", "")
 
-            # Add filename keywords
-            filename_words = video_key.replace('/', ' ').replace('_', ' ').replace('-', ' ').split()
-            search_keywords.extend([word.lower() for word in filename_words if len(word) > 2])
+            # Add filename keywords (same analysis as search queries, see text_analysis)
+            search_keywords.extend(analyze(video_key.replace('/', ' ')))
 
             # Extract from analysis results
             if "label_detection" in analysis_results:
                 labels = analysis_results["label_detection"].get("semantic_tags", [])
                 semantic_tags.extend(labels[:30])  # Limit to 30 tags
-                search_keywords.extend([tag.lower() for tag in labels])
+                for tag in labels:
+                    search_keywords.extend(analyze(tag))
 
-            # Extract text content
+            # Compact summary for chat/search (top labels with time ranges, distinct OCR lines, blackframe segments)
+            video_summary = build_video_summary(analysis_results)
+
+            # Extract text content (distinct lines)
             text_content = []
-            if "text_detection" in analysis_results:
-                texts = analysis_results["text_detection"].get("text_detections", [])
-                for text_item in texts:
-                    text = text_item.get("text", "").strip()
-                    if text:
-                        text_content.append(text)
-                        # Add text words as keywords
-                        text_words = text.lower().split()
-                        search_keywords.extend([word for word in text_words if len(word) > 2])
+            for text_item in video_summary["texts"]:
+                text = text_item["text"]
+                text_content.append(text)
+                # Add text words as keywords
+                search_keywords.extend(analyze(text))
 
             # Create searchable content string
             searchable_content = " ".join(search_keywords[:100])  # Limit size
 
+            # Facet values (see search_facets)
+            label_categories, duration_seconds = analysis_facets(analysis_results)
+
             # Prepare DynamoDB item with search fields
             current_time = int(datetime.now().timestamp())
 
             # Update existing job entry with search metadata
             # Build update with optional user/session persistence (without overwriting existing)
             update_expression = [
-                "SET",
                 "search_keywords = :keywords",
                 "semantic_tags = :tags",
                 "searchable_content = :content",
@@ -105,6 +170,9 @@ class CostOptimizedAWSVectorDB:
                 "has_blackframes = :has_blackframes",
                 "text_content = :text_content",
                 "search_updated_at = :search_time",
+                "video_summary = :summary",
+                "moments = :moments",
+                "label_categories = :categories",
             ]
 
             expression_values = {
@@ -116,7 +184,14 @@ class CostOptimizedAWSVectorDB:
                 ":has_blackframes": "blackframes" in analysis_results,
                 ":text_content": text_content[:10],  # Limit text items
                 ":search_time": current_time,
+                ":summary": dumps_summary(video_summary),
+                # Time segments per term for moment search (see moment_index)
+                ":moments": dumps_moments(build_moments(analysis_results)),
+                ":categories": label_categories,
             }
+            if duration_seconds is not None:
+                update_expression.append("duration_seconds = :duration")
+                expression_values[":duration"] = duration_seconds
 
             # If provided, ensure user/session fields are set (but don't overwrite existing)
             if user_id:
@@ -128,20 +203,239 @@ class CostOptimizedAWSVectorDB:
 
             self.table.update_item(
                 Key={"job_id": job_id},
-                UpdateExpression="\n                ".join(update_expression),
+                UpdateExpression="SET " + ", ".join(update_expression),
                 ExpressionAttributeValues=expression_values,
             )
-            
+
+            if self.keyword_index is not None:
+                self._index_keywords(
+                    job_id,
+                    user_id,
+                    session_id,
+                    document_postings(
+                        os.path.basename(video_key),
+                        semantic_tags,
+                        text_content[:10],
+                        has_text=expression_values[":has_text"],
+                        has_blackframes=expression_values[":has_blackframes"],
+                    ),
+                )
+            self.refresh_search_engine(job_id, user_id)
+
             logger.info(f"Stored searchable metadata for job {job_id}")
             
         except Exception as e:
-            logger.error(f"Failed to store video analysis: {e}")
-            # Don't raise - this is optional functionality
-    
-    def semantic_search(self, query: str, limit: int = 10, user_id: str = None, session_id: str = None) -> List[Dict[str, Any]]:
+            # Raise so the caller's index claim is released and the job retried (see search_indexer)
+            logger.error(f"Failed to store video analysis for job {job_id}: {e}")
+            raise
+
+    def _index_keywords(self, job_id: str, user_id: Optional[str], session_id: Optional[str], postings) -> None:
+        """Replace the job's postings in the keyword index (owner read from the job row if not given)"""
+        if not user_id or not session_id:
+            row = self.table.get_item(
+                Key={"job_id": job_id}, **with_projection({}, ("user_id", "session_id"))
+            ).get("Item") or {}
+            user_id = user_id or row.get("user_id")
+            session_id = session_id or row.get("session_id")
+        self.keyword_index.index_document(user_id, job_id, session_id, postings)
+
+    def refresh_search_engine(self, job_id: str, user_id: Optional[str] = None) -> None:
+        """Apply a (re-)indexed job to the in-process search engine"""
+        if self.search_engine is None:
+            return
+        try:
+            if user_id and not self.search_engine.wants(user_id):
+                # Not searched on this instance right now; just drop its outdated snapshot
+                self.search_engine.invalidate(user_id)
+                return
+            row = self.table.get_item(
+                Key={"job_id": job_id}, **with_projection({}, ENGINE_ATTRIBUTES + ("user_id",))
+            ).get("Item")
+            if row and row.get("searchable_content") is not None:
+                tenant = row.pop("user_id", None) or user_id
+                if tenant:
+                    self.search_engine.upsert(tenant, row)
+        except Exception as e:
+            logger.error(f"Failed to update search engine for job {job_id}: {e}")
+
+    def on_job_change(self, item: Dict[str, Any]) -> None:
+        """Job change listener (see job_events): applies changes made through other processes"""
+        if self.search_engine is None:
+            return
+        status = item.get("status")
+        if status == "deleted":
+            self.search_engine.remove(item["job_id"], item.get("user_id"))
+        elif status in ("done", "completed") and item.get("searchable_content") is not None and item.get("user_id"):
+            self.search_engine.upsert(item["user_id"], {k: item[k] for k in ENGINE_ATTRIBUTES if k in item})
+
+    def _start_backfill(self, user_id: str) -> None:
+        """Index a tenant's existing videos in the background; searches scan until it is done"""
+        with self._backfill_lock:
+            if user_id in self._backfills:
+                return
+            self._backfills.add(user_id)
+        threading.Thread(
+            target=self._backfill_tenant, args=(user_id,), name="keyword-backfill", daemon=True
+        ).start()
+
+    def _tenant_rows(self, user_id: str, attributes=ENGINE_ATTRIBUTES) -> Iterator[Dict[str, Any]]:
+        """All searchable job rows of a user (one paginated scan)"""
+        from boto3.dynamodb.conditions import Attr
+
+        scan_params = with_projection(
+            {"FilterExpression": Attr("user_id").eq(user_id) & Attr("searchable_content").exists()},
+            attributes,
+        )
+        while True:
+            response = self.table.scan(**scan_params)
+            yield from response.get("Items", [])
+            if not response.get("LastEvaluatedKey"):
+                return
+            scan_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def _backfill_tenant(self, user_id: str) -> None:
+        try:
+            indexed = 0
+            rows = self._tenant_rows(
+                user_id,
+                ("job_id", "session_id", "s3_key", "semantic_tags", "text_content", "has_text", "has_blackframes"),
+            )
+            for item in rows:
+                self.keyword_index.index_document(
+                    user_id,
+                    item["job_id"],
+                    item.get("session_id"),
+                    document_postings(
+                        os.path.basename(item.get("s3_key") or ""),
+                        item.get("semantic_tags") or [],
+                        item.get("text_content") or [],
+                        has_text=bool(item.get("has_text")),
+                        has_blackframes=bool(item.get("has_blackframes")),
+                    ),
+                )
+                indexed += 1
+            self.keyword_index.mark_ready(user_id)
+            logger.info(f"Keyword index backfilled {indexed} videos for user {user_id}")
+        except Exception as e:
+            logger.error(f"Keyword index backfill failed for user {user_id}: {e}")
+        finally:
+            with self._backfill_lock:
+                self._backfills.discard(user_id)
+
+    def semantic_search(self, query: str, limit: int = 10, user_id: str = None, session_id: str = None,
+                        mode: str = "keyword", window_seconds: float = DEFAULT_WINDOW_SECONDS) -> List[Dict[str, Any]]:
+        """
+        Search (see :meth:`_semantic_search`); concurrent identical searches share one scan.
+
+        ``mode="fuzzy_text"`` matches the query against the user's OCR lines instead,
+        tolerating OCR noise and typos (see :meth:`_fuzzy_text_search`).
+        ``mode="moments"`` returns the time segments where the query's labels/text
+        appear, all parts of "car and person" within ``window_seconds`` of each
+        other (see :meth:`_moment_search`). Both raise SearchUnavailableError when the
+        search engine is disabled.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        key = (user_id, session_id, normalize_query(query), limit, mode, window_seconds)
+        if mode == "moments":
+            search = functools.partial(self._moment_search, window_seconds=window_seconds)
+        elif mode == "fuzzy_text":
+            search = self._fuzzy_text_search
+        else:
+            search = self._semantic_search
+        results = self._search_flight.do(
+            key, lambda: search(query, limit=limit, user_id=user_id, session_id=session_id)
+        )
+        return list(results)
+
+    def _moment_search(self, query: str, limit: int = 10, user_id: str = None, session_id: str = None,
+                       window_seconds: float = DEFAULT_WINDOW_SECONDS) -> List[Dict[str, Any]]:
+        """Videos with the segments where the query matches; score is the matched duration in seconds"""
+        if not user_id:
+            # Moments are only indexed per user
+            return []
+        # Without the engine every request would scan the user's rows and rebuild the index
+        self._require_search_engine("Moment search")
+        try:
+            matches = self.search_engine.moments(
+                user_id, query, session_id=session_id, limit=limit, window_seconds=window_seconds
+            )
+            results = []
+            for row, segments in matches:
+                result = self._search_result(row, round(sum(e - s for s, e in segments), 1))
+                result["metadata"]["moments"] = [{"start": s, "end": e} for s, e in segments]
+                results.append(result)
+            return results
+        except Exception as e:
+            logger.error(f"Moment search failed: {e}")
+            return []
+
+    def _require_search_engine(self, feature: str) -> None:
+        if self.search_engine is None:
+            raise SearchUnavailableError(f"{feature} needs the search engine (SEARCH_ENGINE_ENABLED=false)")
+
+    def faceted_search(self, query: Optional[str] = None, filters: Optional[Dict[str, Any]] = None, limit: int = 20,
+                       user_id: str = None) -> Dict[str, Any]:
+        """
+        Videos matching ``filters`` (and ``query``, if given) with the facet counts for a filter sidebar.
+
+        Filters: ``has_text``, ``has_blackframes``, ``has_labels`` (bool), ``categories``
+        (label categories, any of), ``session_id``, ``created_from``/``created_to`` (unix
+        seconds) and ``min_duration``/``max_duration`` (seconds). Answered from the facet
+        bitmaps of the user's in-memory index (see search_facets), no table scan per request.
+        Raises ValueError for unknown filters and SearchUnavailableError without the search engine.
+        """
+        empty = {"results": [], "total": 0, "facets": {}}
+        if not user_id:
+            # Facets are only indexed per user
+            return empty
+        self._require_search_engine("Faceted search")
+        terms, required = [], []
+        if query and query.strip():
+            terms, required = self._index_terms(*self._query_keywords(query))
+        ranked, facets = self.search_engine.facets(user_id, terms, required=required, filters=filters, limit=limit)
+        if facets is None:
+            return empty
+        results = []
+        for row, score in ranked:
+            result = self._search_result(row, score)
+            result["metadata"]["label_categories"] = row.get("label_categories") or []
+            result["metadata"]["duration_seconds"] = row.get("duration_seconds")
+            result["metadata"]["created_at"] = row.get("created_at")
+            results.append(result)
+        return {
+            "results": results,
+            "total": facets.total,
+            "facets": facets.counts,
+        }
+
+    def _fuzzy_text_search(self, query: str, limit: int = 10, user_id: str = None,
+                           session_id: str = None) -> List[Dict[str, Any]]:
+        """OCR lines similar to ``query`` (trigram candidates, edit-distance verified); score is the similarity"""
+        if not user_id:
+            # OCR lines are only indexed per user
+            return []
+        self._require_search_engine("Fuzzy text search")
+        try:
+            matches = self.search_engine.fuzzy_text(user_id, query, session_id=session_id, limit=limit)
+            results = []
+            for row, similarity, line in matches:
+                result = self._search_result(row, similarity)
+                result["metadata"]["matched_text"] = line
+                results.append(result)
+            return results
+        except Exception as e:
+            logger.error(f"Fuzzy text search failed: {e}")
+            return []
+
+    def _semantic_search(self, query: str, limit: int = 10, user_id: str = None, session_id: str = None) -> List[Dict[str, Any]]:
         """
-        Cost-optimized search using DynamoDB scan with keyword matching
-        No embeddings needed - pure keyword/text matching
+        Cost-optimized keyword search, no embeddings needed.
+
+        Answered in memory by the per-user BM25 engine (see tenant_search) once the
+        user's videos are loaded, else from the inverted keyword index (a few key
+        lookups per term) once they are indexed, otherwise DynamoDB scan with
+        keyword matching.
         
         Args:
             query: Search query
@@ -150,80 +444,25 @@ class CostOptimizedAWSVectorDB:
             session_id: Filter results by session_id (for session-specific search)
         """
         try:
-            # Smart query processing - extract meaningful search terms
-            query_lower = query.lower()
-            query_words = query_lower.split()
-
-            # Detect common intents up front (improves recall when keywords are generic)
-            intent_text = any(w in query_lower for w in ["text", "schrift", "ocr", "kennzeichen", "license plate"])  # "Welcher Text wurde gefunden?"
-            intent_blackframes = any(w in query_lower for w in ["blackframe", "black frame", "schwarze", "schwarzen", "dunkle", "dark frame", "blackframes"])  # "Gibt es Blackframes?"
-
-            # Filter out common German question words and focus on content (keep 'text' out of stopwords!)
-            stopwords = {"welche", "videos", "enthalten", "zeig", "mir", "mit", "haben", "gibt", "das", "die", "der", "den", "eine", "einen", "sind", "wie", "was", "wo", "wer", "wann", "warum"}
-            
-            # German-English synonym mapping with plural/singular handling
-            synonyms = {
-                "autos": ["car", "vehicle", "transportation", "automobile"],
-                "auto": ["car", "vehicle", "transportation"], 
-                "cars": ["car", "vehicle", "transportation", "automobile"],  # ADD PLURAL
-                "car": ["car", "vehicle", "transportation"],
-                "fahrzeug": ["car", "vehicle", "transportation"],
-                "fahrzeuge": ["car", "vehicle", "transportation"],
-                "personen": ["person", "people", "man", "woman", "human", "adult"],
-                "person": ["person", "people", "man", "woman", "human", "adult"],
-                "persons": ["person", "people", "man", "woman", "human", "adult"],  # ADD PLURAL
-                "people": ["person", "people", "man", "woman", "human", "adult"],
-                "leute": ["person", "people", "man", "woman", "human", "adult"],
-                "menschen": ["person", "people", "man", "woman", "human", "adult"],
-                "parfum": ["perfume", "fragrance", "cosmetics", "beauty"],
-                "parfüm": ["perfume", "fragrance", "cosmetics", "beauty"],
-                "sport": ["sports", "athletic", "fitness"],
-                "straße": ["road", "street", "highway", "freeway"],
-                "strasse": ["road", "street", "highway", "freeway"],
-                "gebäude": ["building", "architecture", "structure"],
-                "haus": ["building", "house", "architecture"],
-                "natur": ["nature", "outdoors", "landscape"],
-                "wasser": ["water", "aquatic", "liquid"],
-                "tier": ["animal", "pet", "creature"],
-                "tiere": ["animal", "pet", "creature"],
-                "kleidung": ["clothing", "coat", "apparel"],
-                "logo": ["logo", "emblem", "symbol", "brand"],
-                "text": ["text", "writing", "license plate"],
-                # Color synonyms (helps queries like 'blaues auto' / 'blue car')
-                "blau": ["blue"],
-                "blaues": ["blue"],
-                "blauer": ["blue"],
-                "blauen": ["blue"],
-                "blue": ["blue"],
-                "rot": ["red"],
-                "rotes": ["red"],
-                "roter": ["red"],
-                "roten": ["red"],
-                "red": ["red"],
-                "weiß": ["white"],
-                "weiss": ["white"],
-                "white": ["white"],
-                "schwarz": ["black"],
-                "black": ["black"],
-                "grün": ["green"],
-                "gruen": ["green"],
-                "green": ["green"]
-            }
-            
-            query_keywords = []
-            for word in query_words:
-                if len(word) > 2 and word not in stopwords:
-                    query_keywords.append(word)
-                    # Add synonyms for better matching
-                    if word in synonyms:
-                        query_keywords.extend(synonyms[word])
-            
-            # If no meaningful keywords left, fall back to all words > 2 chars  
-            if not query_keywords:
-                query_keywords = [word for word in query_words if len(word) > 2]
-            
+            query_keywords, intent_text, intent_blackframes = self._query_keywords(query)
             logger.info(f"Original query: '{query}'")
             logger.info(f"Extracted keywords: {query_keywords}")
+
+            if self.search_engine is not None and user_id:
+                terms, required = self._index_terms(query_keywords, intent_text, intent_blackframes)
+                ranked = self.search_engine.search(user_id, terms, required=required, session_id=session_id, limit=limit)
+                if ranked is not None:
+                    return [self._search_result(row, score) for row, score in ranked]
+
+            if self.keyword_index is not None and user_id:
+                try:
+                    if self.keyword_index.is_ready(user_id):
+                        return self._index_search(
+                            query_keywords, intent_text, intent_blackframes, limit, user_id, session_id
+                        )
+                    self._start_backfill(user_id)
+                except Exception as e:
+                    logger.warning(f"Keyword index unavailable, falling back to scan: {e}")
             
             # Scan DynamoDB for matching jobs
             scan_params = {
@@ -287,15 +526,9 @@ class CostOptimizedAWSVectorDB:
                 logger.info(f"Building professional FilterExpression for keywords: {query_keywords[:5]}")
                 
                 for keyword in query_keywords[:5]:  # Limit for performance
-                    # Professional case-insensitive search using attribute_exists and contains
-                    keyword_lower = keyword.lower()
-                    keyword_upper = keyword.upper() 
-                    keyword_title = keyword.capitalize()
-                    
-                    # Check searchable_content for all case variations
-                    condition = (Attr('searchable_content').contains(keyword_lower) | 
-                               Attr('searchable_content').contains(keyword_upper) |
-                               Attr('searchable_content').contains(keyword_title))
+                    # Terms and searchable_content are both folded to lowercase (text_analysis);
+                    # a stem also matches the inflected words in rows indexed before that
+                    condition = Attr('searchable_content').contains(keyword)
                     
                     if filter_expr is None:
                         filter_expr = condition
@@ -331,6 +564,8 @@ class CostOptimizedAWSVectorDB:
                 
                 scan_params['FilterExpression'] = filter_expr
             
+            # Read only the indexed search fields and summary, never the full analysis result
+            scan_params = with_projection(scan_params, SEARCH_ATTRIBUTES)
             response = self.table.scan(**scan_params)
             items = response.get('Items', [])
             logger.info(f"DynamoDB professional scan returned {len(items)} items")
@@ -340,24 +575,7 @@ class CostOptimizedAWSVectorDB:
             for item in items:
                 score = self._calculate_match_score(item, query_keywords)
                 if score > 0:
-                    result = {
-                        "job_id": item.get("job_id", ""),
-                        "score": score,
-                        "metadata": {
-                            "video_key": item.get("s3_key", ""),
-                            "bucket": item.get("s3_bucket", ""),
-                            "semantic_tags": item.get("semantic_tags", []),
-                            "analysis_type": item.get("analysis_type", "unknown"),
-                            "has_labels": item.get("has_labels", False),
-                            "has_text": item.get("has_text", False),
-                            "has_blackframes": item.get("has_blackframes", False),
-                            "blackframes_count": (item.get("summary", {}) or {}).get("blackframes_count", 0),
-                            "timestamp": item.get("search_updated_at", 0),
-                            # Provide sample texts for better answers
-                            "text_content": item.get("text_content", [])
-                        },
-                        "document": item.get("searchable_content", "")
-                    }
+                    result = self._search_result(item, score)
                     scored_results.append(result)
             
             # Sort by score and return top results
@@ -368,6 +586,61 @@ class CostOptimizedAWSVectorDB:
             logger.error(f"Search failed: {e}")
             return []
     
+    def _index_search(self, query_keywords: List[str], intent_text: bool, intent_blackframes: bool,
+                      limit: int, user_id: str, session_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Rank via the keyword index, then read only the top jobs' search fields"""
+        terms, required = self._index_terms(query_keywords, intent_text, intent_blackframes)
+        ranked = self.keyword_index.search(user_id, terms, required=required, session_id=session_id, limit=limit)
+        logger.info(f"Keyword index returned {len(ranked)} jobs for terms {terms[:10]}")
+        if not ranked:
+            return []
+
+        items = {}
+        for start in range(0, len(ranked), 100):  # BatchGetItem reads at most 100 keys
+            keys = [{"job_id": job_id} for job_id, _ in ranked[start:start + 100]]
+            request = with_projection({"Keys": keys}, SEARCH_ATTRIBUTES)
+            while request:
+                response = self.dynamodb.batch_get_item(RequestItems={self.table_name: request})
+                for item in response.get("Responses", {}).get(self.table_name, []):
+                    items[item["job_id"]] = item
+                request = response.get("UnprocessedKeys", {}).get(self.table_name)
+        # Postings of rows deleted outside delete_job are skipped here
+        return [self._search_result(items[job_id], score) for job_id, score in ranked if job_id in items]
+
+    def _index_terms(self, query_keywords: List[str], intent_text: bool, intent_blackframes: bool):
+        """(index terms, required intent terms) for the keyword index and the search engine"""
+        terms = list(query_keywords)
+        required = [INTENT_TEXT] if intent_text else []
+        if intent_blackframes:
+            required.append(INTENT_BLACKFRAMES)
+        return terms, required
+
+    def _search_result(self, item: Dict[str, Any], score: float) -> Dict[str, Any]:
+        return {
+            "job_id": item.get("job_id", ""),
+            "score": score,
+            "metadata": {
+                "video_key": item.get("s3_key", ""),
+                "bucket": item.get("s3_bucket", ""),
+                "semantic_tags": item.get("semantic_tags", []),
+                "analysis_type": item.get("analysis_type", "unknown"),
+                "has_labels": item.get("has_labels", False),
+                "has_text": item.get("has_text", False),
+                "has_blackframes": item.get("has_blackframes", False),
+                "blackframes_count": (item.get("summary", {}) or {}).get("blackframes_count", 0),
+                "timestamp": item.get("search_updated_at", 0),
+                # Provide sample texts for better answers
+                "text_content": item.get("text_content", []),
+                "video_summary": load_summary(item.get("video_summary")),
+            },
+            "document": item.get("searchable_content", "")
+        }
+
+    def _query_keywords(self, query: str):
+        """(analyzed terms incl. synonyms, asks for text, asks for blackframes) for a search query"""
+        analysis = analyze_query(query)
+        return analysis.terms, analysis.intent_text, analysis.intent_blackframes
+
     def _calculate_match_score(self, item: Dict, query_keywords: List[str]) -> float:
         """Calculate relevance score based on keyword matches"""
         score = 0.0
@@ -381,7 +654,7 @@ class CostOptimizedAWSVectorDB:
         # Check semantic tags (higher weight)
         semantic_tags = item.get("semantic_tags", [])
         for tag in semantic_tags:
-            tag_lower = tag.lower()
+            tag_lower = fold(tag)
             for keyword in query_keywords:
                 if keyword in tag_lower or tag_lower in keyword:
                     score += 2.0  # Tags are more important
@@ -389,7 +662,7 @@ class CostOptimizedAWSVectorDB:
         # Check text content
         text_content = item.get("text_content", [])
         for text in text_content:
-            text_lower = text.lower()
+            text_lower = fold(text)
             for keyword in query_keywords:
                 if keyword in text_lower:
                     score += 1.5
@@ -422,13 +695,21 @@ class CostOptimizedAWSVectorDB:
         except:
             return 0
     
-    def delete_video(self, job_id: str):
-        """Remove search metadata from job"""
+    def delete_video(self, job_id: str, user_id: Optional[str] = None):
+        """Remove search metadata from job (and its keyword index postings); ``user_id`` is the owner"""
         try:
+            if self.search_engine is not None:
+                self.search_engine.remove(job_id, user_id)
+            if self.keyword_index is not None:
+                self.keyword_index.remove_document(job_id)
             self.table.update_item(
                 Key={"job_id": job_id},
-                UpdateExpression="REMOVE search_keywords, semantic_tags, searchable_content"
+                UpdateExpression="REMOVE search_keywords, semantic_tags, searchable_content",
+                # Don't recreate a job row that was deleted
+                ConditionExpression="attribute_exists(job_id)",
             )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
         except Exception as e:
             logger.error(f"Failed to delete search data: {e}")
 
@@ -441,13 +722,19 @@ class CostOptimizedChatBot:
     - Caching von Responses
     """
     
-    def __init__(self, vector_db: CostOptimizedAWSVectorDB):
+    def __init__(self, vector_db: CostOptimizedAWSVectorDB, response_cache: Optional[ChatResponseCache] = None,
+                 streaming_model=None, retriever=None):
         self.vector_db = vector_db
-        self.bedrock_client = boto3.client(
+        # Optional hybrid retriever (keyword + vector, see hybrid_retrieval); searches vector_db otherwise
+        self.retriever = retriever
+        self.bedrock_client = get_client(
             'bedrock-runtime',
             region_name=os.environ.get('AWS_DEFAULT_REGION', 'eu-central-1')
         )
-        self.response_cache = {}  # Simple in-memory cache
+        # Shared, bounded cache (per user/session/question), invalidated when jobs complete
+        self.response_cache = response_cache or get_chat_cache()
+        self._streaming_model = streaming_model
+        self._in_flight = SingleFlight("chat")
     
     def chat(self, user_query: str, context_limit: int = 5, user_id: str = None, session_id: str = None) -> Dict[str, Any]:
         """
@@ -460,67 +747,18 @@ class CostOptimizedChatBot:
             session_id: Session ID for session-specific filtering
         """
         try:
-            # Check cache first (cache per user!)
-            cache_key = f"{user_id or 'anonymous'}:{user_query.lower()}"
-            query_hash = hashlib.md5(cache_key.encode()).hexdigest()
-            if query_hash in self.response_cache:
-                cached_response = self.response_cache[query_hash]
+            # Check cache first (cache per user and session!)
+            cached_response = self.response_cache.get(user_id, session_id, user_query)
+            if cached_response is not None:
                 cached_response["from_cache"] = True
                 return cached_response
             
-            # 🔒 Perform search with user_id for multi-tenant isolation
-            logger.info(f"[CHATBOT] Starting search for: '{user_query}' with limit: {context_limit}, user_id: {user_id}")
-            search_results = self.vector_db.semantic_search(user_query, limit=context_limit, user_id=user_id, session_id=session_id)
-            logger.info(f"[CHATBOT] Search returned {len(search_results)} results for user {user_id}")
-            
-            if not search_results:
-                response = {
-                    "response": "Ich konnte keine passenden Videos finden. Versuchen Sie andere Suchbegriffe.",
-                    "matched_videos": [],
-                    "context_used": 0,
-                    "query": user_query,
-                    "timestamp": datetime.now().isoformat()
-                }
-                return response
-            
-            # Simple response for basic queries - no LLM needed
-            if self._is_simple_query(user_query):
-                response_text = self._generate_simple_response(user_query, search_results)
-                use_llm = False
-            else:
-                # Use LLM for complex queries
-                response_text = self._generate_bedrock_response(user_query, search_results)
-                use_llm = True
-            
-            # Build response
-            context_videos = []
-            for result in search_results:
-                metadata = result.get("metadata", {})
-                video_info = {
-                    "job_id": result["job_id"],
-                    "video_key": metadata.get("video_key", ""),
-                    "bucket": metadata.get("bucket", ""),
-                    "similarity_score": round(result["score"], 3),
-                    "semantic_tags": metadata.get("semantic_tags", []),
-                    "has_labels": metadata.get("has_labels", False),
-                    "has_text": metadata.get("has_text", False),
-                    "has_blackframes": metadata.get("has_blackframes", False)
-                }
-                context_videos.append(video_info)
-            
-            response = {
-                "response": response_text,
-                "matched_videos": context_videos,
-                "context_used": len(context_videos),
-                "query": user_query,
-                "used_llm": use_llm,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            # Cache response
-            self.response_cache[query_hash] = response.copy()
-            
-            return response
+            # Concurrent identical questions (same user/session) share one search + LLM call
+            key = (user_id, session_id, normalize_query(user_query), context_limit)
+            response = self._in_flight.do(
+                key, lambda: self._answer(user_query, context_limit, user_id, session_id)
+            )
+            return dict(response)
             
         except Exception as e:
             logger.error(f"Chat failed: {e}")
@@ -533,6 +771,129 @@ class CostOptimizedChatBot:
                 "timestamp": datetime.now().isoformat()
             }
     
+    def _answer(self, user_query: str, context_limit: int, user_id: Optional[str],
+                session_id: Optional[str]) -> Dict[str, Any]:
+        """Search, answer and cache one question (cache miss path of :meth:`chat`)"""
+        # 🔒 Perform search with user_id for multi-tenant isolation
+        logger.info(f"[CHATBOT] Starting search for: '{user_query}' with limit: {context_limit}, user_id: {user_id}")
+        search_results = self._search(user_query, context_limit, user_id, session_id)
+        logger.info(f"[CHATBOT] Search returned {len(search_results)} results for user {user_id}")
+        
+        if not search_results:
+            response = {
+                "response": "Ich konnte keine passenden Videos finden. Versuchen Sie andere Suchbegriffe.",
+                "matched_videos": [],
+                "context_used": 0,
+                "query": user_query,
+                "timestamp": datetime.now().isoformat()
+            }
+            return response
+        
+        # Simple response for basic queries - no LLM needed
+        if self._is_simple_query(user_query):
+            response_text = self._generate_simple_response(user_query, search_results)
+            use_llm = False
+        else:
+            # Use LLM for complex queries
+            response_text = self._generate_bedrock_response(user_query, search_results)
+            use_llm = True
+        
+        # Build response
+        context_videos = self._matched_videos(search_results)
+        
+        response = {
+            "response": response_text,
+            "matched_videos": context_videos,
+            "context_used": len(context_videos),
+            "query": user_query,
+            "used_llm": use_llm,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        # Cache response
+        self.response_cache.put(user_id, session_id, user_query, response)
+        
+        return response
+
+    def chat_stream(self, user_query: str, context_limit: int = 5, user_id: str = None,
+                    session_id: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of :meth:`chat` (blocking generator).
+
+        Yields ``{"type": "matches", ...}`` after the search, ``{"type": "token",
+        "text": ...}`` per text delta and a final ``{"type": "done", ...}`` with
+        the full response (the same dict :meth:`chat` returns).
+        """
+        cached_response = self.response_cache.get(user_id, session_id, user_query)
+        if cached_response is not None:
+            cached_response["from_cache"] = True
+            yield {"type": "matches", "matched_videos": cached_response.get("matched_videos", [])}
+            yield {"type": "token", "text": cached_response.get("response", "")}
+            yield {"type": "done", **cached_response}
+            return
+
+        # 🔒 Perform search with user_id for multi-tenant isolation
+        search_results = self._search(user_query, context_limit, user_id, session_id)
+        context_videos = self._matched_videos(search_results)
+        yield {"type": "matches", "matched_videos": context_videos}
+
+        if not search_results:
+            response_text = "Ich konnte keine passenden Videos finden. Versuchen Sie andere Suchbegriffe."
+            yield {"type": "token", "text": response_text}
+            yield {"type": "done", "response": response_text, "matched_videos": [], "context_used": 0,
+                   "query": user_query, "timestamp": datetime.now().isoformat()}
+            return
+
+        if self._is_simple_query(user_query):
+            response_text = self._generate_simple_response(user_query, search_results)
+            use_llm = False
+            yield {"type": "token", "text": response_text}
+        else:
+            parts = []
+            for text in self.streaming_model.stream(self._bedrock_request_body(user_query, search_results)):
+                parts.append(text)
+                yield {"type": "token", "text": text}
+            response_text = "".join(parts)
+            use_llm = True
+
+        response = {
+            "response": response_text,
+            "matched_videos": context_videos,
+            "context_used": len(context_videos),
+            "query": user_query,
+            "used_llm": use_llm,
+            "timestamp": datetime.now().isoformat()
+        }
+        self.response_cache.put(user_id, session_id, user_query, response)
+        yield {"type": "done", **response}
+
+    def _search(self, user_query: str, limit: int, user_id: Optional[str], session_id: Optional[str]) -> List[Dict]:
+        searcher = self.retriever or self.vector_db
+        return searcher.semantic_search(user_query, limit=limit, user_id=user_id, session_id=session_id)
+
+    @property
+    def streaming_model(self):
+        if self._streaming_model is None:
+            self._streaming_model = get_streaming_model()
+        return self._streaming_model
+
+    def _matched_videos(self, search_results: List[Dict]) -> List[Dict[str, Any]]:
+        context_videos = []
+        for result in search_results:
+            metadata = result.get("metadata", {})
+            video_info = {
+                "job_id": result["job_id"],
+                "video_key": metadata.get("video_key", ""),
+                "bucket": metadata.get("bucket", ""),
+                "similarity_score": round(result["score"], 3),
+                "semantic_tags": metadata.get("semantic_tags", []),
+                "has_labels": metadata.get("has_labels", False),
+                "has_text": metadata.get("has_text", False),
+                "has_blackframes": metadata.get("has_blackframes", False)
+            }
+            context_videos.append(video_info)
+        return context_videos
+    
     def _is_simple_query(self, query: str) -> bool:
         """Check if query can be answered without LLM"""
         simple_patterns = [
@@ -649,27 +1010,31 @@ class CostOptimizedChatBot:
                 response += f"• {e['name']}\n"
         return response.strip()
     
+    def _bedrock_request_body(self, user_query: str, results: List[Dict]) -> Dict[str, Any]:
+        # Facts most relevant to the question within a small token budget (limits cost)
+        packed = build_context(
+            user_query,
+            [facts_from_search_result(result) for result in results],
+            token_budget=PROMPT_CONTEXT_TOKEN_BUDGET,
+        )
+        context = f"Videos gefunden: {len(results)}\n{packed.text.strip()}\n"
+        
+        # Short prompt to minimize tokens
+        prompt = f"Benutzer fragt: '{user_query}'\n{context}\nKurze Antwort (max 100 Wörter):"
+        
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 200,  # Limit output tokens
+            "temperature": 0.3,  # Lower temperature for consistency
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+
     def _generate_bedrock_response(self, user_query: str, results: List[Dict]) -> str:
         """Generate response using Bedrock (cost-optimized)"""
         try:
-            # Simplified prompt to reduce token usage
-            context = f"Videos gefunden: {len(results)}\n"
-            for i, result in enumerate(results[:3], 1):  # Limit to 3 for cost
-                metadata = result.get("metadata", {})
-                tags = metadata.get("semantic_tags", [])[:5]  # Limit tags
-                context += f"{i}. {metadata.get('video_key', 'Video')} - {', '.join(tags)}\n"
-            
-            # Short prompt to minimize tokens
-            prompt = f"Benutzer fragt: '{user_query}'\n{context}\nKurze Antwort (max 100 Wörter):"
-            
-            body = json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 200,  # Limit output tokens
-                "temperature": 0.3,  # Lower temperature for consistency
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ]
-            })
+            body = json.dumps(self._bedrock_request_body(user_query, results))
             
             response = self.bedrock_client.invoke_model(
                 modelId="anthropic.claude-3-haiku-20240307-v1:0",  # Use cheaper Haiku model
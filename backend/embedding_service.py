@@ -0,0 +1,275 @@
+"""
+Text embeddings for vector search, generated concurrently and cached by content.
+
+:class:`EmbeddingService` takes a list of texts and returns one row per text:
+
+1. Identical texts are embedded once.
+2. Texts seen before (same embedder, same text) come from a persistent SQLite
+   cache keyed by ``sha256(embedder id, text)``, so reindexing skips every
+   video whose labels and OCR text did not change.
+3. The rest go to the embedder, in batches for models that take batches
+   (sentence-transformers) or as concurrent single requests on a bounded
+   thread pool for Titan, whose API embeds one text per call. Throttling is
+   retried by botocore's adaptive retry mode.
+
+A text that cannot be embedded raises :class:`EmbeddingError` (after the
+successful ones were cached) instead of being replaced by a zero vector, which
+would silently match nothing or everything.
+
+Embedders (``EMBEDDING_PROVIDER``): ``titan`` (Bedrock, default), ``local``
+(sentence-transformers model, for offline runs) and ``hashing`` (signed feature
+hashing of analyzed terms and character trigrams; no model, deterministic,
+used by tests and benchmarks).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from aws_clients import get_client
+from text_analysis import analyze, fold
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_PROVIDER = os.environ.get("EMBEDDING_PROVIDER", "titan").lower()
+TITAN_MODEL_ID = os.environ.get("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v1")
+LOCAL_MODEL_NAME = os.environ.get("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_CONCURRENCY = int(os.environ.get("EMBEDDING_CONCURRENCY", "16"))
+# Next to the local vector index (persistent /data volume in the Docker image), so a
+# redeploy keeps the cache that lets reindexing skip unchanged videos
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.environ.get("LOCAL_VECTOR_DIR", "/tmp/proov-vectors").rstrip("/")),
+    "proov-embeddings", "cache.sqlite3",
+)
+
+# Titan accepts about 8k tokens; longer texts are cut
+MAX_TEXT_CHARS = 8000
+
+
+class EmbeddingError(Exception):
+    """One or more texts could not be embedded"""
+
+
+class TitanEmbedder:
+    """Amazon Titan text embeddings via Bedrock (one text per request)"""
+
+    batch_size = 1
+
+    def __init__(self, model_id: str = TITAN_MODEL_ID, region_name: Optional[str] = None):
+        self.model_id = model_id
+        self.id = f"bedrock:{model_id}"
+        # Adaptive retries back off on throttling instead of failing the batch
+        self.client = get_client(
+            "bedrock-runtime",
+            region_name=region_name or os.environ.get("AWS_DEFAULT_REGION", "eu-central-1"),
+            retries={"max_attempts": 8, "mode": "adaptive"},
+        )
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        response = self.client.invoke_model(
+            modelId=self.model_id,
+            body=json.dumps({"inputText": texts[0][:MAX_TEXT_CHARS]}),
+        )
+        return [json.loads(response["body"].read())["embedding"]]
+
+
+class LocalEmbedder:
+    """sentence-transformers model on this machine (optional dependency)"""
+
+    batch_size = 64
+
+    def __init__(self, model_name: str = LOCAL_MODEL_NAME):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise EmbeddingError(f"Local embeddings need sentence-transformers: {e}")
+        self.model = SentenceTransformer(model_name)
+        self.id = f"local:{model_name}"
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return self.model.encode(list(texts), batch_size=self.batch_size).tolist()
+
+
+class HashingEmbedder:
+    """Signed feature hashing of analyzed terms (weight 1) and character trigrams (0.5)"""
+
+    batch_size = 256
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.id = f"hashing:{dim}"
+
+    def _index(self, feature: str):
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        rows = []
+        for text in texts:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            for term in analyze(text):
+                i, sign = self._index(term)
+                vector[i] += sign
+            folded = fold(text)
+            for j in range(len(folded) - 2):
+                i, sign = self._index(folded[j:j + 3])
+                vector[i] += 0.5 * sign
+            rows.append(vector.tolist())
+        return rows
+
+
+class EmbeddingCache:
+    """Persistent content-hash -> float32 vector store (SQLite, thread-safe)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        # Rows in the table, counted once and then kept up to date by put_many
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def key(embedder_id: str, text: str) -> str:
+        return hashlib.sha256(f"{embedder_id}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):  # SQLite variable limit
+                chunk = list(keys[start:start + 500])
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, entries: Dict[str, np.ndarray]) -> None:
+        if not entries:
+            return
+        with self._lock, self._conn:
+            # A key is the hash of embedder and text, so an existing row already holds the vector
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in entries.items()],
+            )
+            self._count += max(cursor.rowcount, 0)
+
+    def __len__(self):
+        with self._lock:
+            return self._count
+
+
+class EmbeddingService:
+    """Deduplicated, cached and concurrent embedding of texts (see module docstring)"""
+
+    def __init__(self, embedder, cache: Optional[EmbeddingCache] = None,
+                 concurrency: int = EMBEDDING_CONCURRENCY):
+        self.embedder = embedder
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embed")
+        self._lock = threading.Lock()
+        self._requested = 0
+        self._cache_hits = 0
+        self._embedded = 0
+        self._failures = 0
+        self._seconds = 0.0
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), dim) float32 matrix; raises EmbeddingError if any text fails"""
+        texts = [text or "" for text in texts]
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        keys = {text: EmbeddingCache.key(self.embedder.id, text) for text in dict.fromkeys(texts)}
+        vectors: Dict[str, np.ndarray] = {}
+        if self.cache is not None:
+            cached = self.cache.get_many(list(keys.values()))
+            vectors = {text: cached[key] for text, key in keys.items() if key in cached}
+        missing = [text for text in keys if text not in vectors]
+
+        started = time.monotonic()
+        new: Dict[str, np.ndarray] = {}
+        errors: List[Exception] = []
+        batches = [missing[i:i + self.embedder.batch_size] for i in range(0, len(missing), self.embedder.batch_size)]
+        futures = [(batch, self._executor.submit(self.embedder.embed, batch)) for batch in batches]
+        for batch, future in futures:
+            try:
+                rows = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            for text, row in zip(batch, rows):
+                new[text] = np.asarray(row, dtype=np.float32)
+        if self.cache is not None:
+            self.cache.put_many({keys[text]: vector for text, vector in new.items()})
+        vectors.update(new)
+
+        with self._lock:
+            self._requested += len(texts)
+            self._cache_hits += len(keys) - len(missing)
+            self._embedded += len(new)
+            self._failures += len(missing) - len(new)
+            self._seconds += time.monotonic() - started
+        if errors:
+            raise EmbeddingError(
+                f"{len(missing) - len(new)} of {len(keys)} texts could not be embedded "
+                f"with {self.embedder.id}: {errors[0]}"
+            )
+        return np.stack([vectors[text] for text in texts])
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "embedder": self.embedder.id,
+                "requested": self._requested,
+                "cache_hits": self._cache_hits,
+                "embedded": self._embedded,
+                "failures": self._failures,
+                "embed_seconds": round(self._seconds, 3),
+                "cached_vectors": len(self.cache) if self.cache is not None else 0,
+            }
+
+
+def create_embedder(provider: str = EMBEDDING_PROVIDER):
+    if provider == "titan":
+        return TitanEmbedder()
+    if provider == "local":
+        return LocalEmbedder()
+    if provider == "hashing":
+        return HashingEmbedder()
+    raise ValueError(f"Unknown embedding provider: {provider}")
+
+
+_embedding_service: Optional[EmbeddingService] = None
+_embedding_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Process-wide embedding service (EMBEDDING_* environment variables)"""
+    global _embedding_service
+    if _embedding_service is None:
+        with _embedding_service_lock:
+            if _embedding_service is None:
+                cache = EmbeddingCache(EMBEDDING_CACHE_PATH) if EMBEDDING_CACHE_PATH else None
+                _embedding_service = EmbeddingService(create_embedder(), cache=cache)
+                logger.info(f"Embedding service using {_embedding_service.embedder.id}")
+    return _embedding_service
@@ -0,0 +1,146 @@
+"""
+Sparse fieldsets for API responses.
+
+``fields=status,summary,text_detection.texts[0:50]`` selects top-level fields,
+nested fields (dot paths) and slices of arrays (``[start:end]`` or ``[index]``).
+The selection is used twice: the top-level names become a DynamoDB
+``ProjectionExpression`` (only the needed attributes are read), and the response
+object is trimmed on the server before it is serialized.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+# name, optional [start:end] / [index]
+_SEGMENT_RE = re.compile(r"^([A-Za-z0-9_\-]+)(?:\[(-?\d*)(:?)(-?\d*)\])?$")
+
+# Guard against pathological specs
+MAX_FIELDS = 50
+
+
+class FieldSelectionError(ValueError):
+    """Raised for malformed ``fields`` parameters"""
+
+
+class _Node:
+    __slots__ = ("slice", "children")
+
+    def __init__(self):
+        self.slice: Optional[slice] = None
+        # None = whole value; dict = only these sub-fields
+        self.children: Optional[Dict[str, "_Node"]] = None
+
+
+def _parse_segment(segment: str) -> Tuple[str, Optional[slice]]:
+    match = _SEGMENT_RE.match(segment)
+    if not match:
+        raise FieldSelectionError(f"Invalid field '{segment}'")
+    name, start, colon, end = match.groups()
+    if start is None:
+        return name, None
+    if not colon:
+        if not start:
+            raise FieldSelectionError(f"Invalid index in '{segment}'")
+        index = int(start)
+        return name, slice(index, index + 1 if index != -1 else None)
+    return name, slice(int(start) if start else None, int(end) if end else None)
+
+
+class FieldSelection:
+    """A parsed ``fields`` parameter"""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        self._root: Dict[str, _Node] = {}
+        paths = [p.strip() for p in spec.split(",") if p.strip()]
+        if not paths:
+            raise FieldSelectionError("Empty field selection")
+        if len(paths) > MAX_FIELDS:
+            raise FieldSelectionError(f"At most {MAX_FIELDS} fields can be selected")
+        for path in paths:
+            self._add(path)
+
+    @classmethod
+    def parse(cls, spec: Optional[str]) -> Optional["FieldSelection"]:
+        """Parse a ``fields`` query value; None/blank means 'all fields'"""
+        if spec is None or not spec.strip():
+            return None
+        return cls(spec)
+
+    def _add(self, path: str) -> None:
+        level = self._root
+        segments = path.split(".")
+        for i, segment in enumerate(segments):
+            name, sl = _parse_segment(segment)
+            node = level.get(name)
+            created = node is None
+            if created:
+                node = level[name] = _Node()
+            if sl is not None:
+                node.slice = sl
+            if i == len(segments) - 1:
+                node.children = None
+                return
+            if node.children is None:
+                if not created:
+                    # A shorter path already selects the whole value
+                    return
+                node.children = {}
+            level = node.children
+
+    @property
+    def top_level(self) -> Set[str]:
+        return set(self._root)
+
+    def includes(self, name: str) -> bool:
+        return name in self._root
+
+    def subfields(self, name: str) -> Optional[Set[str]]:
+        """Second-level names selected under ``name`` (None if the whole value is selected)"""
+        node = self._root.get(name)
+        if node is None or node.children is None:
+            return None
+        return set(node.children)
+
+    def apply(self, obj: Any) -> Any:
+        """Return a trimmed copy of ``obj`` containing only the selected fields"""
+        return _apply(obj, self._root)
+
+    def source_attributes(self, sources: Mapping[str, Optional[Iterable[str]]],
+                          always: Iterable[str] = ("job_id",)) -> Optional[List[str]]:
+        """
+        DynamoDB attributes needed to build the selected output fields.
+
+        ``sources`` maps output field -> item attributes it is built from; a value
+        of None means the field is the whole item (if it is selected without
+        sub-fields, no projection is possible and None is returned). Unknown
+        output fields are assumed to be item attributes of the same name.
+        """
+        attributes: Set[str] = set(always)
+        for name in self._root:
+            if name in sources and sources[name] is None:
+                nested = self.subfields(name)
+                if nested is None:
+                    return None
+                attributes.update(nested)
+            else:
+                attributes.update(sources.get(name) or (name,))
+        return sorted(attributes)
+
+
+def _apply(obj: Any, tree: Dict[str, _Node]) -> Any:
+    if isinstance(obj, list):
+        return [_apply(entry, tree) for entry in obj]
+    if not isinstance(obj, dict):
+        return obj
+    out = {}
+    for name, node in tree.items():
+        if name not in obj:
+            continue
+        value = obj[name]
+        if node.slice is not None and isinstance(value, list):
+            value = value[node.slice]
+        if node.children is not None:
+            value = _apply(value, node.children)
+        out[name] = value
+    return out
@@ -0,0 +1,132 @@
+"""
+Character-trigram index for fuzzy OCR text search.
+
+Rekognition OCR is noisy ("BMVV", "G26 M", plates split over two detections),
+so exact term matching misses lines a user can clearly describe. Lines and
+queries are normalized the same way (folded, punctuation and spaces removed,
+common OCR confusions like ``vv``/``w`` and ``0``/``o`` merged) and indexed by
+character trigrams. A lookup counts shared trigrams to find candidate lines
+(each edit changes at most three trigrams, which bounds how many a match
+must share), then verifies them with the edit distance between the query and
+the best matching part of the line. Similarity is ``1 - distance / len(query)``.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from text_analysis import fold
+
+DEFAULT_MIN_SIMILARITY = 0.7
+
+# Candidate lines verified per lookup (most shared trigrams first)
+MAX_CANDIDATES = 500
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+# Characters/sequences Rekognition commonly confuses, mapped to one form
+_OCR_CONFUSIONS = (("vv", "w"), ("rn", "m"), ("0", "o"), ("1", "l"), ("i", "l"), ("|", "l"))
+
+
+def normalize(text: str) -> str:
+    text = fold(text)
+    for seen, canonical in _OCR_CONFUSIONS:
+        text = text.replace(seen, canonical)
+    return _NON_ALNUM_RE.sub("", text)
+
+
+def trigrams(normalized: str) -> Set[str]:
+    return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
+
+def partial_distance(query: str, text: str) -> int:
+    """Edit distance between ``query`` and its best matching substring of ``text``"""
+    previous = [0] * (len(text) + 1)  # a match may start anywhere in text
+    for i, qc in enumerate(query, 1):
+        current = [i] + [0] * len(text)
+        for j, tc in enumerate(text, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (qc != tc))
+        previous = current
+    return min(previous)
+
+
+@dataclass
+class FuzzyMatch:
+    job_id: str
+    line: str
+    similarity: float
+
+
+class TrigramIndex:
+    """OCR lines of one tenant's jobs, indexed by character trigram (not thread-safe)"""
+
+    def __init__(self):
+        self._lines: Dict[int, Tuple[str, str, str]] = {}  # id -> (job_id, line, normalized)
+        self._by_job: Dict[str, List[int]] = {}
+        self._grams: Dict[str, Set[int]] = {}
+        self._next_id = 0
+
+    def add(self, job_id: str, lines: Iterable[str]) -> int:
+        """Index a job's lines (replacing earlier ones); returns the number of trigram entries"""
+        self.remove(job_id)
+        entries = 0
+        ids = []
+        for line in dict.fromkeys(lines):
+            normalized = normalize(line)
+            if not normalized:
+                continue
+            line_id = self._next_id
+            self._next_id += 1
+            self._lines[line_id] = (job_id, line, normalized)
+            ids.append(line_id)
+            for gram in trigrams(normalized):
+                self._grams.setdefault(gram, set()).add(line_id)
+                entries += 1
+        if ids:
+            self._by_job[job_id] = ids
+        return entries
+
+    def remove(self, job_id: str) -> int:
+        entries = 0
+        for line_id in self._by_job.pop(job_id, ()):
+            _, _, normalized = self._lines.pop(line_id)
+            for gram in trigrams(normalized):
+                ids = self._grams.get(gram)
+                if ids is not None:
+                    ids.discard(line_id)
+                    entries += 1
+                    if not ids:
+                        del self._grams[gram]
+        return entries
+
+    def search(self, query: str, limit: int = 10, min_similarity: float = DEFAULT_MIN_SIMILARITY,
+               allowed: Optional[Callable[[str], bool]] = None) -> List[FuzzyMatch]:
+        """Best matching line per job, most similar first"""
+        q = normalize(query)
+        if not q:
+            return []
+        q_grams = trigrams(q)
+        if q_grams:
+            max_edits = int((1.0 - min_similarity) * len(q))
+            min_shared = max(1, len(q_grams) - 3 * max_edits)
+            shared = Counter(line_id for gram in q_grams for line_id in self._grams.get(gram, ()))
+            candidates = [line_id for line_id, n in shared.most_common(MAX_CANDIDATES) if n >= min_shared]
+        else:
+            # Shorter than a trigram: check every line
+            candidates = list(self._lines)
+
+        best: Dict[str, FuzzyMatch] = {}
+        for line_id in candidates:
+            job_id, line, normalized = self._lines[line_id]
+            if allowed is not None and not allowed(job_id):
+                continue
+            similarity = 1.0 - partial_distance(q, normalized) / len(q)
+            if similarity < min_similarity:
+                continue
+            current = best.get(job_id)
+            if current is None or similarity > current.similarity:
+                best[job_id] = FuzzyMatch(job_id, line, round(similarity, 3))
+        return sorted(best.values(), key=lambda m: (-m.similarity, m.job_id))[:limit]
+
+    def __len__(self):
+        return len(self._lines)
@@ -0,0 +1,189 @@
+"""
+Hybrid retrieval: keyword and vector backends queried together, fused by rank.
+
+Keyword search finds exact hits ("BMW text"), vector search finds paraphrases
+("luxury sports car"); neither covers both. :class:`HybridRetriever` sends a
+query to every configured backend at once (on a shared, bounded thread pool),
+waits at most ``budget_seconds`` and merges the ranked lists with reciprocal
+rank fusion:
+
+    score(job) = sum over backends of weight / (RRF_K + rank in that backend)
+
+Scores of different backends (BM25, cosine similarity) are not comparable, but
+ranks are, so a video found by both backends outranks one found by only one.
+
+A backend that misses the budget is left out of this answer (its call keeps
+running and is counted as a timeout); a backend that raises is left out as
+well. A backend that is still busy with ``max_in_flight`` earlier calls is
+skipped, so a hanging backend cannot pile up threads. Only when no backend has
+answered within the budget does the search wait for the first one to finish.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+HYBRID_BUDGET_SECONDS = float(os.environ.get("HYBRID_BUDGET_SECONDS", "0.8"))
+HYBRID_MAX_IN_FLIGHT = int(os.environ.get("HYBRID_MAX_IN_FLIGHT", "8"))
+# Upper bound of the wait when no backend answered within the budget
+HYBRID_MAX_WAIT_SECONDS = float(os.environ.get("HYBRID_MAX_WAIT_SECONDS", "10"))
+
+# Standard RRF constant: damps the advantage of the very first ranks
+RRF_K = 60
+
+# Each backend returns this many times ``limit`` candidates (deeper lists fuse better)
+OVERFETCH = 2
+MAX_CANDIDATES = 50
+
+
+@dataclass
+class RetrievalBackend:
+    """A named search function ``search(query, limit, user_id, session_id) -> [result]``"""
+    name: str
+    search: Callable[..., List[Dict[str, Any]]]
+    weight: float = 1.0
+
+
+def reciprocal_rank_fusion(ranked: Dict[str, List[Dict[str, Any]]], weights: Optional[Dict[str, float]] = None,
+                           limit: int = 10, k: int = RRF_K) -> List[Dict[str, Any]]:
+    """Fuse ranked result lists (backend name -> results, in backend priority order)"""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for name, results in ranked.items():
+        weight = (weights or {}).get(name, 1.0)
+        rank = 0
+        for result in results:
+            job_id = result.get("job_id")
+            if not job_id or name in fused.get(job_id, {}).get("sources", ()):
+                continue
+            rank += 1
+            entry = fused.get(job_id)
+            if entry is None:
+                # The first backend that found the job provides metadata and document
+                entry = fused[job_id] = {**result, "score": 0.0, "sources": {}}
+            entry["score"] += weight / (k + rank)
+            entry["sources"][name] = {"rank": rank, "score": result.get("score")}
+    results = sorted(fused.values(), key=lambda r: (-r["score"], min(s["rank"] for s in r["sources"].values())))
+    # Scaled to 0..1 (1 = first in every backend) so it reads like the backends' similarity scores
+    best = sum((weights or {}).get(name, 1.0) for name in ranked) / (k + 1)
+    for result in results:
+        result["score"] = round(result["score"] / best, 6) if best > 0 else 0.0
+    return results[:limit]
+
+
+class HybridRetriever:
+    """Concurrent multi-backend search with a latency budget and rank fusion (thread-safe)"""
+
+    def __init__(self, backends: Sequence[RetrievalBackend], budget_seconds: float = HYBRID_BUDGET_SECONDS,
+                 max_in_flight: int = HYBRID_MAX_IN_FLIGHT, max_wait_seconds: float = HYBRID_MAX_WAIT_SECONDS,
+                 rrf_k: int = RRF_K):
+        if not backends:
+            raise ValueError("HybridRetriever needs at least one backend")
+        self.backends = list(backends)
+        self.budget_seconds = budget_seconds
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_wait_seconds = max_wait_seconds
+        self.rrf_k = rrf_k
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.backends) * self.max_in_flight, thread_name_prefix="hybrid"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = {b.name: 0 for b in self.backends}
+        self._counts = {b.name: {"answered": 0, "timeouts": 0, "errors": 0, "skipped": 0} for b in self.backends}
+        self._calls = {b.name: 0 for b in self.backends}
+        self._seconds = {b.name: 0.0 for b in self.backends}
+        self._searches = 0
+        self._degraded = 0
+
+    @property
+    def names(self) -> List[str]:
+        return [b.name for b in self.backends]
+
+    def _run(self, backend: RetrievalBackend, query: str, limit: int, user_id: Optional[str],
+             session_id: Optional[str]) -> List[Dict[str, Any]]:
+        started = time.monotonic()
+        try:
+            return backend.search(query, limit, user_id=user_id, session_id=session_id)
+        finally:
+            with self._lock:
+                self._in_flight[backend.name] -= 1
+                self._calls[backend.name] += 1
+                self._seconds[backend.name] += time.monotonic() - started
+
+    def search(self, query: str, limit: int = 10, user_id: Optional[str] = None,
+               session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Fused results of all backends that answered within the budget"""
+        fetch = min(max(limit * OVERFETCH, limit), MAX_CANDIDATES)
+        futures = {}
+        with self._lock:
+            self._searches += 1
+            for backend in self.backends:
+                if self._in_flight[backend.name] >= self.max_in_flight:
+                    self._counts[backend.name]["skipped"] += 1
+                    continue
+                self._in_flight[backend.name] += 1
+                futures[self._executor.submit(self._run, backend, query, fetch, user_id, session_id)] = backend
+
+        started = time.monotonic()
+        pending = set(futures)
+        ranked: Dict[str, List[Dict[str, Any]]] = {}
+        while pending:
+            # Past the budget, wait (up to max_wait_seconds) only while nothing usable arrived
+            limit_seconds = self.budget_seconds if ranked else max(self.budget_seconds, self.max_wait_seconds)
+            timeout = started + limit_seconds - time.monotonic()
+            if timeout <= 0:
+                break
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = futures[future]
+                try:
+                    ranked[backend.name] = future.result() or []
+                except Exception as e:
+                    logger.warning(f"Hybrid search: {backend.name} failed: {e}")
+                    with self._lock:
+                        self._counts[backend.name]["errors"] += 1
+                    continue
+                with self._lock:
+                    self._counts[backend.name]["answered"] += 1
+
+        with self._lock:
+            for future in pending:
+                self._counts[futures[future].name]["timeouts"] += 1
+            if len(ranked) < len(self.backends):
+                self._degraded += 1
+        if pending:
+            logger.info(
+                f"Hybrid search answered without {', '.join(futures[f].name for f in pending)} "
+                f"(budget {self.budget_seconds}s)"
+            )
+        # Keep backend priority order so the first backend's metadata wins
+        ordered = {b.name: ranked[b.name] for b in self.backends if b.name in ranked}
+        return reciprocal_rank_fusion(
+            ordered, {b.name: b.weight for b in self.backends}, limit=limit, k=self.rrf_k
+        )
+
+    # Drop-in for the backends' own semantic_search (chatbot, /semantic-search)
+    def semantic_search(self, query: str, limit: int = 10, user_id: Optional[str] = None,
+                        session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.search(query, limit, user_id=user_id, session_id=session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "searches": self._searches,
+                "degraded": self._degraded,
+                "budget_seconds": self.budget_seconds,
+                "backends": {
+                    name: {
+                        **counts,
+                        "in_flight": self._in_flight[name],
+                        "avg_seconds": round(self._seconds[name] / max(1, self._calls[name]), 4),
+                    }
+                    for name, counts in self._counts.items()
+                },
+            }
@@ -0,0 +1,341 @@
+"""
+Push-based job status events.
+
+Changes to job rows are published to an in-process ``JobEventBus`` and fanned out
+to per-connection subscriptions (used by the ``/jobs/stream`` SSE endpoint).
+
+Change sources (config ``JOB_EVENTS_SOURCE``):
+- ``local`` (default): the API publishes its own writes through the job repository.
+  Worker updates are only seen in production via streams.
+- ``dynamodb-streams``: a background thread tails the job table's DynamoDB stream
+  (StreamViewType NEW_AND_OLD_IMAGES or NEW_IMAGE) and publishes every change,
+  including worker status/progress updates. Each API process reads the stream
+  independently, so idle dashboards cost no table reads at all.
+
+Each subscription keeps at most one pending event per job (newer events replace
+older ones) and a bounded number of jobs; on overflow the oldest job is dropped
+and the client is told to resync.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from aws_clients import get_client
+from json_responses import dumps
+
+logger = logging.getLogger(__name__)
+
+SOURCE_LOCAL = "local"
+SOURCE_DYNAMODB_STREAMS = "dynamodb-streams"
+
+# Max jobs with undelivered events per subscription before it must resync
+DEFAULT_MAX_PENDING = 500
+
+# Small job fields pushed to clients (results are fetched on demand)
+EVENT_FIELDS = (
+    "job_id", "status", "session_id", "updated_at", "created_at",
+    "s3_key", "progress", "enqueue_last_error",
+)
+
+
+# Attributes a snapshot has to read for job_event_from_item and the ownership check
+SNAPSHOT_ATTRIBUTES = EVENT_FIELDS + ("job_status", "user_id")
+
+
+def dumps_event(data: Any) -> str:
+    """One SSE data line (compact JSON, Decimals as int/float)"""
+    return dumps(data).decode("utf-8")
+
+
+def job_event_from_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a job row to the fields pushed to clients"""
+    event = {field: item.get(field) for field in EVENT_FIELDS if item.get(field) is not None}
+    # Prefer 'status' field, fallback to 'job_status' for legacy jobs
+    if "status" not in event and item.get("job_status"):
+        event["status"] = item["job_status"]
+    return event
+
+
+class JobSubscription:
+    """Pending events for one client connection; lives on the event loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, user_id: str,
+                 session_id: Optional[str] = None, max_pending: int = DEFAULT_MAX_PENDING):
+        self.user_id = user_id
+        self.session_id = session_id
+        self.overflowed = False
+        self._loop = loop
+        self._max_pending = max_pending
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+
+    def matches(self, user_id: Optional[str], session_id: Optional[str]) -> bool:
+        if user_id != self.user_id:
+            return False
+        return self.session_id is None or session_id == self.session_id
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Thread-safe: hand an event to the subscription's event loop"""
+        try:
+            self._loop.call_soon_threadsafe(self._enqueue, event)
+        except RuntimeError:
+            # Loop already closed (client gone during shutdown)
+            pass
+
+    def _enqueue(self, event: Dict[str, Any]) -> None:
+        job_id = event["job_id"]
+        if job_id in self._pending:
+            # Coalesce: only the newest state of a job matters
+            self._pending.move_to_end(job_id)
+        elif len(self._pending) >= self._max_pending:
+            self._pending.popitem(last=False)
+            self.overflowed = True
+        self._pending[job_id] = event
+        self._wakeup.set()
+
+    async def next_batch(self, timeout: float) -> List[Dict[str, Any]]:
+        """Wait up to ``timeout`` seconds for events; returns [] on timeout"""
+        if not self._pending:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        batch = list(self._pending.values())
+        self._pending.clear()
+        self._wakeup.clear()
+        return batch
+
+
+def _call_listeners(listeners: List[Callable[[Dict[str, Any]], None]], item: Dict[str, Any]) -> None:
+    for listener in listeners:
+        try:
+            listener(item)
+        except Exception:
+            logger.exception("Job events: listener failed")
+
+
+class JobEventBus:
+    """In-process fan-out of job changes to subscriptions"""
+
+    def __init__(self):
+        self._subscriptions: Set[JobSubscription] = set()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._blocking_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # One thread, so blocking listeners see changes in publish order
+        self._listener_executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None], blocking: bool = False) -> None:
+        """
+        Call ``callback(item)`` for every published change.
+
+        Plain listeners run in the publishing thread, which is the event loop for
+        local changes. ``blocking`` listeners (disk or network I/O) run in order on
+        a dedicated thread instead.
+        """
+        with self._lock:
+            if blocking:
+                self._blocking_listeners.append(callback)
+                if self._listener_executor is None:
+                    self._listener_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-listeners")
+            else:
+                self._listeners.append(callback)
+
+    def subscribe(self, user_id: str, session_id: Optional[str] = None,
+                  max_pending: int = DEFAULT_MAX_PENDING) -> JobSubscription:
+        """Create a subscription bound to the running event loop"""
+        sub = JobSubscription(asyncio.get_running_loop(), user_id, session_id, max_pending)
+        with self._lock:
+            self._subscriptions.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: JobSubscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, item: Dict[str, Any]) -> None:
+        """Publish a changed job row (safe to call from any thread)"""
+        if not item or not item.get("job_id"):
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+            blocking = list(self._blocking_listeners)
+            targets = [
+                sub for sub in self._subscriptions
+                if sub.matches(item.get("user_id"), item.get("session_id"))
+            ]
+        if blocking:
+            self._listener_executor.submit(_call_listeners, blocking, item)
+        _call_listeners(listeners, item)
+        if not targets:
+            return
+        event = job_event_from_item(item)
+        for sub in targets:
+            sub.offer(event)
+
+
+class DynamoDBStreamSource:
+    """Tails the job table's DynamoDB stream and publishes changes to the bus"""
+
+    POLL_INTERVAL_SECONDS = 1.0
+    SHARD_REFRESH_SECONDS = 30.0
+
+    def __init__(self, bus: JobEventBus, table_name: str, region_name: Optional[str] = None):
+        self._bus = bus
+        self._table_name = table_name
+        self._region_name = region_name
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._deserializer = TypeDeserializer()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="job-events-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _stream_arn(self) -> Optional[str]:
+        ddb = get_client("dynamodb", region_name=self._region_name)
+        table = ddb.describe_table(TableName=self._table_name)["Table"]
+        return table.get("LatestStreamArn")
+
+    def _list_shards(self, streams, stream_arn: str) -> List[Dict[str, Any]]:
+        shards = []
+        kwargs = {"StreamArn": stream_arn}
+        while True:
+            desc = streams.describe_stream(**kwargs)["StreamDescription"]
+            shards.extend(desc.get("Shards", []))
+            last = desc.get("LastEvaluatedShardId")
+            if not last:
+                return shards
+            kwargs["ExclusiveStartShardId"] = last
+
+    def _publish_record(self, record: Dict[str, Any]) -> None:
+        change = record.get("dynamodb", {})
+        if record.get("eventName") == "REMOVE":
+            image = change.get("OldImage")
+            if not image:
+                return
+            item = {k: self._deserializer.deserialize(v) for k, v in image.items()}
+            item["status"] = "deleted"
+        else:
+            image = change.get("NewImage")
+            if not image:
+                return
+            item = {k: self._deserializer.deserialize(v) for k, v in image.items()}
+        self._bus.publish(item)
+
+    def _run(self) -> None:
+        try:
+            stream_arn = self._stream_arn()
+        except Exception as e:
+            logger.error(f"Job events: cannot describe table {self._table_name}: {e}")
+            return
+        if not stream_arn:
+            logger.error(f"Job events: DynamoDB stream is not enabled on {self._table_name}")
+            return
+
+        streams = get_client("dynamodbstreams", region_name=self._region_name)
+        iterators: Dict[str, Optional[str]] = {}
+        finished: Set[str] = set()
+        first_refresh = True
+        next_refresh = 0.0
+        logger.info(f"Job events: tailing {stream_arn}")
+
+        while not self._stop.is_set():
+            now = time.time()
+            if now >= next_refresh:
+                try:
+                    for shard in self._list_shards(streams, stream_arn):
+                        shard_id = shard["ShardId"]
+                        if shard_id in iterators or shard_id in finished:
+                            continue
+                        # Existing shards start at the tip; shards appearing later are read fully
+                        is_open = "EndingSequenceNumber" not in shard.get("SequenceNumberRange", {})
+                        if first_refresh and not is_open:
+                            finished.add(shard_id)
+                            continue
+                        iterator_type = "LATEST" if first_refresh else "TRIM_HORIZON"
+                        iterators[shard_id] = streams.get_shard_iterator(
+                            StreamArn=stream_arn, ShardId=shard_id, ShardIteratorType=iterator_type
+                        )["ShardIterator"]
+                    first_refresh = False
+                except Exception as e:
+                    logger.warning(f"Job events: shard refresh failed: {e}")
+                next_refresh = now + self.SHARD_REFRESH_SECONDS
+
+            got_records = False
+            for shard_id, iterator in list(iterators.items()):
+                try:
+                    resp = streams.get_records(ShardIterator=iterator, Limit=1000)
+                except Exception as e:
+                    logger.warning(f"Job events: get_records failed for {shard_id}: {e}")
+                    iterators.pop(shard_id, None)
+                    next_refresh = 0.0
+                    continue
+                for record in resp.get("Records", []):
+                    got_records = True
+                    try:
+                        self._publish_record(record)
+                    except Exception:
+                        logger.exception("Job events: failed to publish stream record")
+                next_iterator = resp.get("NextShardIterator")
+                if next_iterator:
+                    iterators[shard_id] = next_iterator
+                else:
+                    # Shard closed; its children are picked up on the next refresh
+                    iterators.pop(shard_id, None)
+                    finished.add(shard_id)
+                    next_refresh = 0.0
+
+            if not got_records:
+                self._stop.wait(self.POLL_INTERVAL_SECONDS)
+
+
+_bus = JobEventBus()
+_source_name = SOURCE_LOCAL
+_stream_source: Optional[DynamoDBStreamSource] = None
+
+
+def get_job_event_bus() -> JobEventBus:
+    return _bus
+
+
+def start_job_events(source: str, table_name: str, region_name: Optional[str] = None) -> None:
+    """Configure the change source; called once at API startup"""
+    global _source_name, _stream_source
+    _source_name = source
+    if source == SOURCE_DYNAMODB_STREAMS:
+        _stream_source = DynamoDBStreamSource(_bus, table_name, region_name)
+        _stream_source.start()
+    elif source != SOURCE_LOCAL:
+        logger.warning(f"Unknown JOB_EVENTS_SOURCE '{source}', using in-process events only")
+        _source_name = SOURCE_LOCAL
+    logger.info(f"Job events source: {_source_name}")
+
+
+def stop_job_events() -> None:
+    if _stream_source:
+        _stream_source.stop()
+
+
+def notify_local_change(item: Dict[str, Any]) -> None:
+    """Publish a write made by this process (no-op when the stream is the source)"""
+    if _source_name == SOURCE_LOCAL:
+        _bus.publish(item)
@@ -0,0 +1,230 @@
+"""
+Async data access layer for jobs (DynamoDB) and video storage (S3).
+
+boto3 is synchronous, so every call is offloaded to a bounded thread pool.
+FastAPI ``async def`` endpoints await these methods instead of calling boto3
+directly, which keeps the event loop free while AWS responds.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from boto3.dynamodb.conditions import Attr
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for concurrent blocking AWS calls per process
+AWS_IO_CONCURRENCY = int(os.environ.get("AWS_IO_CONCURRENCY", "32"))
+
+# DynamoDB BatchWriteItem accepts at most 25 requests per call
+BATCH_WRITE_SIZE = 25
+BATCH_WRITE_MAX_ATTEMPTS = 5
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+_io_executor_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool used for blocking AWS I/O"""
+    global _io_executor
+    if _io_executor is None:
+        with _io_executor_lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(
+                    max_workers=AWS_IO_CONCURRENCY,
+                    thread_name_prefix="aws-io",
+                )
+    return _io_executor
+
+
+async def run_blocking(fn: Callable, *args, **kwargs):
+    """Run a blocking callable on the shared I/O pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def with_projection(kwargs: Dict[str, Any], attributes: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """
+    Add a ProjectionExpression for ``attributes`` to get_item/scan kwargs.
+
+    Attribute names are always aliased (#p0, #p1, ...) so reserved words like
+    'status' work; existing ExpressionAttributeNames are kept.
+    """
+    if not attributes:
+        return kwargs
+    names = dict(kwargs.get("ExpressionAttributeNames", {}))
+    placeholders = []
+    for i, attribute in enumerate(attributes):
+        placeholder = f"#p{i}"
+        names[placeholder] = attribute
+        placeholders.append(placeholder)
+    return {**kwargs, "ProjectionExpression": ", ".join(placeholders), "ExpressionAttributeNames": names}
+
+
+class JobRepository:
+    """
+    Async access to the job table.
+
+    The table is resolved lazily through ``table_provider`` inside the worker
+    thread, so the first call (which may create the table) never blocks the loop.
+    ``on_change`` (optional) is called on the event loop with each row written
+    or deleted through the repository.
+    """
+
+    def __init__(self, table_provider: Callable[[], Any],
+                 on_change: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self._table_provider = table_provider
+        self._on_change = on_change
+
+    def _notify(self, item: Optional[Dict[str, Any]]) -> None:
+        if self._on_change and item:
+            try:
+                self._on_change(item)
+            except Exception:
+                logger.exception("Job change callback failed")
+
+    async def _call(self, method: str, **kwargs):
+        def invoke():
+            return getattr(self._table_provider(), method)(**kwargs)
+        return await run_blocking(invoke)
+
+    async def get(self, job_id: str, consistent: bool = False,
+                  projection: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """Fetch a single job item by its full job_id (only ``projection`` attributes if given)"""
+        kwargs = with_projection({"Key": {"job_id": job_id}, "ConsistentRead": consistent}, projection)
+        resp = await self._call("get_item", **kwargs)
+        return resp.get("Item")
+
+    async def get_many(self, job_ids: List[str], consistent: bool = False,
+                       projection: Optional[Iterable[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """Fetch several jobs concurrently; order matches ``job_ids``"""
+        return await asyncio.gather(
+            *(self.get(job_id, consistent=consistent, projection=projection) for job_id in job_ids)
+        )
+
+    async def put(self, item: Dict[str, Any]) -> None:
+        await self._call("put_item", Item=item)
+        self._notify(item)
+
+    async def put_many(self, items: List[Dict[str, Any]]) -> List[str]:
+        """
+        Write many job items with BatchWriteItem (25 per call).
+
+        UnprocessedItems are retried with backoff; returns the job_ids that could
+        not be written so callers can report them per item.
+        """
+        def invoke():
+            table = self._table_provider()
+            # The resource's client converts native Python values like Table methods do
+            client = table.meta.client
+            failed: List[str] = []
+            for start in range(0, len(items), BATCH_WRITE_SIZE):
+                chunk = items[start:start + BATCH_WRITE_SIZE]
+                pending = [{"PutRequest": {"Item": item}} for item in chunk]
+                for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+                    try:
+                        resp = client.batch_write_item(RequestItems={table.name: pending})
+                        pending = resp.get("UnprocessedItems", {}).get(table.name, [])
+                    except Exception as e:
+                        logger.warning("BatchWriteItem attempt %d failed: %s", attempt + 1, e)
+                    if not pending:
+                        break
+                    time.sleep(min(0.05 * (2 ** attempt), 1.0))
+                for request in pending:
+                    failed.append(request["PutRequest"]["Item"]["job_id"])
+            if failed:
+                logger.error("BatchWriteItem left %d of %d job items unwritten", len(failed), len(items))
+            return failed
+        failed = await run_blocking(invoke)
+        if self._on_change:
+            unwritten = set(failed)
+            for item in items:
+                if item["job_id"] not in unwritten:
+                    self._notify(item)
+        return failed
+
+    async def update(self, job_id: str, **update_kwargs) -> Dict[str, Any]:
+        """Run ``update_item`` for ``job_id``; kwargs are passed through to boto3"""
+        if self._on_change and "ReturnValues" not in update_kwargs:
+            update_kwargs["ReturnValues"] = "ALL_NEW"
+        resp = await self._call("update_item", Key={"job_id": job_id}, **update_kwargs)
+        if update_kwargs.get("ReturnValues") == "ALL_NEW":
+            self._notify(resp.get("Attributes"))
+        return resp
+
+    async def delete(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Delete a job; returns the deleted item (None if there was none)"""
+        resp = await self._call("delete_item", Key={"job_id": job_id}, ReturnValues="ALL_OLD")
+        old = resp.get("Attributes")
+        if old:
+            self._notify({**old, "status": "deleted"})
+        return old
+
+    async def scan(self, paginate: bool = False, projection: Optional[Iterable[str]] = None,
+                   **scan_kwargs) -> List[Dict[str, Any]]:
+        """
+        Scan the job table.
+
+        With ``paginate=False`` only the first page is returned (same semantics as a
+        plain ``table.scan``); with ``paginate=True`` all pages are followed.
+        ``projection`` limits the attributes read.
+        """
+        scan_kwargs = with_projection(scan_kwargs, projection)
+
+        def invoke():
+            table = self._table_provider()
+            resp = table.scan(**scan_kwargs)
+            items = resp.get("Items", [])
+            while paginate and resp.get("LastEvaluatedKey"):
+                resp = table.scan(ExclusiveStartKey=resp["LastEvaluatedKey"], **scan_kwargs)
+                items.extend(resp.get("Items", []))
+            return items
+        return await run_blocking(invoke)
+
+    async def find_by_prefix(self, prefix: str,
+                             projection: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """Resolve a shortened job_id by scanning for the first job that starts with it"""
+        def invoke():
+            table = self._table_provider()
+            scan_kwargs = with_projection({"FilterExpression": Attr("job_id").begins_with(prefix)}, projection)
+            while True:
+                resp = table.scan(**scan_kwargs)
+                items = resp.get("Items", [])
+                if items:
+                    return items[0]
+                if not resp.get("LastEvaluatedKey"):
+                    return None
+                scan_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        return await run_blocking(invoke)
+
+    async def resolve(self, job_id: str,
+                      projection: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """Fetch a job by full id, or by prefix for short ids (< 20 chars)"""
+        if len(job_id) < 20:
+            return await self.find_by_prefix(job_id, projection=projection)
+        return await self.get(job_id, projection=projection)
+
+
+class StorageRepository:
+    """Async access to S3 for presigned URLs and listings"""
+
+    def __init__(self, client_provider: Callable[[], Any]):
+        self._client_provider = client_provider
+
+    async def presigned_url(self, operation: str, params: Dict[str, Any], expires_in: int) -> str:
+        def invoke():
+            return self._client_provider().generate_presigned_url(
+                operation, Params=params, ExpiresIn=expires_in
+            )
+        return await run_blocking(invoke)
+
+    async def list_objects(self, **list_kwargs) -> Dict[str, Any]:
+        def invoke():
+            return self._client_provider().list_objects_v2(**list_kwargs)
+        return await run_blocking(invoke)
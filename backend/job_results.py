@@ -0,0 +1,475 @@
+"""
+Formatted job results for the frontend, plus an immutable cache of them.
+
+The worker stores a compact "view document" (the formatted result without the
+raw analysis, ``results_view`` / ``results_view_version``) on the job row at
+completion; the API splices the stored raw result into it instead of
+reformatting. Older rows are formatted on demand and migrated lazily.
+
+A completed job's formatted result only changes when its row changes, so the
+serialized response is cached under (job_id, updated_at): in memory with an
+LRU byte budget and, optionally, in S3 so other API instances share it. The
+same key yields a strong ETag, which lets repeat views return 304 without
+reading the cache at all.
+
+Shared by the API and the worker, so this module must not import FastAPI.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from aws_clients import get_client
+
+logger = logging.getLogger(__name__)
+
+# Bump when the formatted shape changes so stored views, cached bodies and ETags are invalidated
+RESULTS_FORMAT_VERSION = 1
+
+# Skip storing a view that would push the job row towards DynamoDB's 400 KB item limit
+MAX_STORED_VIEW_BYTES = 150 * 1024
+
+# Budget for a whole job row including the view; the rest of the 400 KB limit is
+# headroom for the search fields the indexer adds to the row later
+MAX_JOB_ITEM_BYTES = 350 * 1024
+
+# View document attributes: internal to the results endpoint, not part of the job document
+STORED_VIEW_ATTRIBUTES = ("results_view", "results_view_version")
+
+
+def _json_default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+
+def dumps_compact(data: Any) -> str:
+    """Compact, deterministic JSON (DynamoDB Decimals become int/float)"""
+    return json.dumps(data, default=_json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def _attribute_value_size(value: Any) -> int:
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (int, float, Decimal)):
+        return len(str(value)) // 2 + 2
+    if isinstance(value, dict):
+        return 3 + sum(len(str(k).encode("utf-8")) + _attribute_value_size(v) + 1 for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return 3 + sum(_attribute_value_size(v) + 1 for v in value)
+    return len(str(value).encode("utf-8"))
+
+
+def item_size_bytes(item: Dict[str, Any]) -> int:
+    """Estimated DynamoDB size of an item (UTF-8 attribute names and values, rounded up)"""
+    return sum(len(name.encode("utf-8")) + _attribute_value_size(value) for name, value in item.items())
+
+
+def without_stored_view(item: Dict[str, Any]) -> Dict[str, Any]:
+    """The job row without the view document attributes"""
+    return {k: v for k, v in item.items() if k not in STORED_VIEW_ATTRIBUTES}
+
+
+def fits_stored_view(item: Dict[str, Any], view_json: str) -> bool:
+    """Whether a job row (without a view) still fits the item budget with ``view_json`` added"""
+    view_bytes = len(view_json.encode("utf-8"))
+    if view_bytes > MAX_STORED_VIEW_BYTES:
+        return False
+    # + attribute names and the version number
+    return item_size_bytes(without_stored_view(item)) + view_bytes + 64 <= MAX_JOB_ITEM_BYTES
+
+
+def format_job_results(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Reshape a completed job row into the structure the results page renders"""
+    job_id = item.get("job_id")
+    status = item.get("status")
+    
+    # Parse the result - check multiple possible fields
+    result_raw = item.get("analysis_results") or item.get("result", "{}")
+    try:
+        if isinstance(result_raw, str):
+            result = json.loads(result_raw)
+        else:
+            result = result_raw
+    except json.JSONDecodeError:
+        result = {"raw_result": result_raw}
+    
+    # Extract video information from multiple sources
+    video_data = item.get("video", {})
+    if isinstance(video_data, str):
+        try:
+            video_data = json.loads(video_data)
+        except json.JSONDecodeError:
+            video_data = {}
+    
+    # Extract bucket/key from multiple sources
+    file_url = item.get("file_url", "")
+    bucket = item.get("s3_bucket")  # First try direct fields
+    key = item.get("s3_key")
+    tool_name = item.get("tool", "")
+    
+    if file_url:
+        # Parse S3 URL to extract bucket and key
+        if file_url.startswith("s3://"):
+            s3_path = file_url[5:]  # Remove s3://
+            parts = s3_path.split("/", 1)
+            if len(parts) == 2:
+                bucket, key = parts
+        elif "s3" in file_url and ".amazonaws.com" in file_url:
+            # Parse HTTPS S3 URL: https://bucket.s3.region.amazonaws.com/key
+            match = re.match(r'https://([^.]+)\.s3\.[^.]+\.amazonaws\.com/(.+)', file_url)
+            if match:
+                bucket, key = match.groups()
+    
+    # If bucket/key still not set, try from video_data
+    if not bucket or not key:
+        if video_data.get("bucket"):
+            bucket = video_data.get("bucket")
+        if video_data.get("key"):
+            key = video_data.get("key")
+    
+    # Use video_data for tool if not set
+    if video_data.get("tool"):
+        tool_name = video_data.get("tool")
+    
+    # Extract video metadata from result
+    video_metadata = {}
+    if isinstance(result, dict) and "video_metadata" in result:
+        vm = result["video_metadata"]
+        video_metadata = {
+            "duration": vm.get("duration_seconds"),
+            "fps": vm.get("fps"),
+            "total_frames": vm.get("total_frames"),
+            "filename": key,
+            "format": "mp4",  # Default assumption
+            "resolution": f"{vm.get('width', 'N/A')}x{vm.get('height', 'N/A')}" if vm.get('width') and vm.get('height') else None
+        }
+    
+    # Format for frontend display
+    formatted_result = {
+        "job_id": job_id,
+        "status": status,
+        "video_info": {
+            "bucket": bucket,
+            "key": key,
+            "tool": tool_name,
+            "s3_url": file_url,
+            "filename": key if key else "Unknown",
+            **video_metadata
+        },
+        "analysis_results": result,
+        "has_blackframes": item.get("has_blackframes", False),
+        "has_text_detection": item.get("has_text_detection", False),
+        "summary": {}
+    }
+    
+    # Get summary from DynamoDB first if available
+    ddb_summary = item.get("summary", {})
+    if ddb_summary:
+        # Handle DynamoDB Map format
+        if isinstance(ddb_summary, dict) and 'M' in ddb_summary:
+            # DynamoDB Map format - extract values
+            summary_map = ddb_summary['M']
+            formatted_result["summary"] = {
+                "blackframes_count": int(summary_map.get("blackframes_count", {}).get("N", 0)),
+                "text_detections_count": int(summary_map.get("text_detections_count", {}).get("N", 0)),
+                "analysis_type": summary_map.get("analysis_type", {}).get("S", "basic")
+            }
+        else:
+            # Already processed format
+            formatted_result["summary"] = {
+                "blackframes_count": ddb_summary.get("blackframes_count", 0),
+                "text_detections_count": ddb_summary.get("text_detections_count", 0),
+                "analysis_type": ddb_summary.get("analysis_type", "basic")
+            }
+    else:
+        # Fallback to default values
+        formatted_result["summary"] = {
+            "blackframes_count": 0,
+            "text_detections_count": 0,
+            "analysis_type": "basic"
+        }
+    
+    # Check if this is a complete analysis result
+    if isinstance(result, dict):
+        # Handle complete analysis results (from analyze_video_complete tool)
+        if "blackframes" in result and "text_detection" in result:
+            formatted_result["has_blackframes"] = True
+            formatted_result["has_text_detection"] = True
+            formatted_result["summary"]["analysis_type"] = "complete"
+            
+            # Extract blackframes data
+            blackframes_data = result.get("blackframes", {})
+            if isinstance(blackframes_data, dict):
+                formatted_result["summary"]["blackframes_count"] = blackframes_data.get("blackframes_detected", 0)
+                black_frames_list = blackframes_data.get("black_frames", [])
+                
+                formatted_result["blackframes"] = {
+                    "count": blackframes_data.get("blackframes_detected", 0),
+                    "total_frames": blackframes_data.get("video_metadata", {}).get("total_frames", 0),
+                    "frames": [
+                        {
+                            "frame": bf.get("frame_number"),
+                            "timestamp": bf.get("timestamp"),
+                            "brightness": bf.get("brightness", 0) * 255  # Convert to 0-255 scale
+                        }
+                        for bf in black_frames_list
+                    ]
+                }
+            
+            # Extract text detection data
+            text_data = result.get("text_detection", {})
+            if isinstance(text_data, dict):
+                text_detections = text_data.get("text_detections", [])
+                formatted_result["summary"]["text_detections_count"] = len(text_detections)
+                
+                formatted_result["text_detection"] = {
+                    "count": len(text_detections),
+                    "texts": [
+                        {
+                            "text": td.get("DetectedText", ""),
+                            "confidence": td.get("Confidence", 0) / 100.0,  # Convert to 0-1 scale
+                            "timestamp": td.get("Timestamp", 0),
+                            "boundingBox": td.get("Geometry", {}).get("BoundingBox") if td.get("Geometry") else None
+                        }
+                        for td in text_detections
+                    ]
+                }
+        
+        # Handle blackframes-only results (from detect_blackframes tool)
+        elif "count" in result and "frames" in result and "total_frames" in result:
+            formatted_result["has_blackframes"] = True
+            formatted_result["summary"]["analysis_type"] = "blackframes_only"
+            
+            blackframes_count = result.get("count", 0)
+            black_frames_list = result.get("frames", [])
+            formatted_result["summary"]["blackframes_count"] = blackframes_count
+            
+            # Convert black_frames to frontend format
+            formatted_result["blackframes"] = {
+                "count": blackframes_count,
+                "total_frames": result.get("total_frames", 0),
+                "frames": [
+                    {
+                        "frame": bf.get("frame"),
+                        "timestamp": bf.get("timestamp"),
+                        "brightness": bf.get("brightness", 0)  # Already in correct scale from agent
+                    }
+                    for bf in black_frames_list
+                ]
+            }
+        
+        # Handle text detection-only results (from rekognition_detect_text tool)  
+        elif "texts" in result and "count" in result:
+            formatted_result["has_text_detection"] = True
+            formatted_result["summary"]["analysis_type"] = "text_only"
+            
+            text_detections = result.get("texts", [])
+            formatted_result["summary"]["text_detections_count"] = len(text_detections)
+            
+            # Convert text detections to frontend format
+            formatted_result["text_detection"] = {
+                "count": len(text_detections),
+                "texts": [
+                    {
+                        "text": td.get("text", ""),
+                        "confidence": td.get("confidence", 0) / 100.0 if td.get("confidence", 0) > 1 else td.get("confidence", 0),  # Already in 0-1 scale
+                        "timestamp": td.get("timestamp", 0),
+                        "boundingBox": td.get("bbox") if td.get("bbox") else None
+                    }
+                    for td in text_detections
+                ]
+            }
+    
+    return formatted_result
+
+
+def build_results_view(item: Dict[str, Any]) -> str:
+    """Serialized view document for a completed job row (formatted result minus raw analysis)"""
+    view = format_job_results(item)
+    view.pop("analysis_results", None)
+    return dumps_compact(view)
+
+
+# Attributes needed to serve a results request from the stored view document alone
+RESULTS_VIEW_ATTRIBUTES = ("job_id", "status", "updated_at", "results_view", "results_view_version")
+
+
+def stored_results_view(item: Dict[str, Any]) -> Optional[str]:
+    """The row's precomputed view document if it matches the current format version"""
+    view = item.get("results_view")
+    version = item.get("results_view_version")
+    if isinstance(view, str) and version is not None and int(version) == RESULTS_FORMAT_VERSION:
+        return view
+    return None
+
+
+def raw_results_json(item: Dict[str, Any], trusted: bool = False) -> str:
+    """
+    The job's raw analysis as JSON text, reusing the stored string when it is JSON.
+
+    ``trusted`` skips validation for rows whose result was written by the worker
+    together with a view document.
+    """
+    result_raw = item.get("analysis_results") or item.get("result", "{}")
+    if isinstance(result_raw, str):
+        if trusted:
+            return result_raw
+        try:
+            json.loads(result_raw)
+            return result_raw
+        except json.JSONDecodeError:
+            return dumps_compact({"raw_result": result_raw})
+    return dumps_compact(result_raw)
+
+
+def render_results_body(view_json: str, results_json: str) -> bytes:
+    """Splice the raw analysis into the view document without re-parsing either"""
+    return (view_json[:-1] + ',"analysis_results":' + results_json + "}").encode("utf-8")
+
+
+def render_job_results(item: Dict[str, Any]) -> Tuple[bytes, Optional[str]]:
+    """
+    Response body for a completed job row.
+
+    Returns (body, view_json) where ``view_json`` is set when the view had to be
+    built because the row has none (callers may persist it).
+    """
+    view_json = stored_results_view(item)
+    if view_json is not None:
+        return render_results_body(view_json, raw_results_json(item, trusted=True)), None
+    view_json = build_results_view(item)
+    return render_results_body(view_json, raw_results_json(item)), view_json
+
+
+def results_cache_key(item: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Cache key for a job row, or None if the row carries no updated_at"""
+    updated_at = item.get("updated_at")
+    if updated_at is None:
+        return None
+    return (item["job_id"], str(updated_at))
+
+
+def results_etag(key: Tuple[str, str], variant: str = "") -> str:
+    """
+    Strong ETag for the formatted body of ``key`` (deterministic per key and format
+    version); ``variant`` distinguishes trimmed representations such as field selections.
+    """
+    digest = hashlib.sha256(f"{RESULTS_FORMAT_VERSION}:{key[0]}:{key[1]}:{variant}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, as RFC 9110 requires for this header)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResultsCache:
+    """
+    LRU cache of serialized result bodies bounded by total bytes, with an
+    optional S3 tier (``s3_bucket``). S3 methods block and should be called
+    off the event loop.
+    """
+
+    def __init__(self, max_bytes: int, s3_bucket: Optional[str] = None,
+                 s3_prefix: str = "results-cache", region_name: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.s3_bucket = s3_bucket or None
+        self.s3_prefix = s3_prefix.strip("/")
+        self.region_name = region_name
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Tuple[str, str], body: bytes) -> None:
+        # A single oversized body would evict everything else
+        if len(body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def discard_job(self, job_id: str) -> None:
+        """Drop every cached version of a job (e.g. after delete)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == job_id]:
+                self._size -= len(self._entries.pop(key))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "s3_enabled": bool(self.s3_bucket),
+            }
+
+    def _s3_key(self, key: Tuple[str, str]) -> str:
+        return f"{self.s3_prefix}/v{RESULTS_FORMAT_VERSION}/{key[0]}/{key[1]}.json"
+
+    def load_s3(self, key: Tuple[str, str]) -> Optional[bytes]:
+        if not self.s3_bucket:
+            return None
+        try:
+            resp = get_client("s3", region_name=self.region_name).get_object(
+                Bucket=self.s3_bucket, Key=self._s3_key(key)
+            )
+            return resp["Body"].read()
+        except Exception as e:
+            # NoSuchKey is the normal miss; anything else just falls back to formatting
+            logger.debug(f"Results cache S3 miss for {key}: {e}")
+            return None
+
+    def store_s3(self, key: Tuple[str, str], body: bytes) -> None:
+        if not self.s3_bucket:
+            return
+        try:
+            get_client("s3", region_name=self.region_name).put_object(
+                Bucket=self.s3_bucket, Key=self._s3_key(key), Body=body,
+                ContentType="application/json",
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store results cache entry for {key} in S3: {e}")
@@ -0,0 +1,273 @@
+"""
+Per-user and per-session analysis counters.
+
+The chat header and ``/vector-db/stats`` used to count a user's analyzed videos
+with filtered scans over the whole job table. Instead, the worker records every
+completed job once in a small stats table (``JOB_STATS_TABLE``):
+
+- ``pk=USER#<user_id>, sk=TOTAL`` and ``sk=SESSION#<session_id>``: counters
+  ``analyzed_videos``, ``videos_with_text``, ``videos_with_blackframes`` and
+  ``label_vocabulary_size``
+- ``pk=USER#<user_id>, sk=VOCAB`` / ``VOCAB#<session_id>``: string set of labels
+- ``pk=JOB#<job_id>, sk=COUNTED``: marker that makes counting idempotent
+
+The marker and both counter updates are written in one transaction, so a job is
+counted exactly once even if the worker retries or the job is restarted.
+Deleting a job reverses its counters (the label vocabulary only grows).
+
+Shared by the API and the worker.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from aws_clients import get_resource
+
+logger = logging.getLogger(__name__)
+
+STATS_TABLE = os.environ.get("JOB_STATS_TABLE", "proov_job_stats")
+
+COUNTERS = ("analyzed_videos", "videos_with_text", "videos_with_blackframes", "label_vocabulary_size")
+
+# Cap labels per job added to the vocabulary sets
+MAX_LABELS_PER_JOB = 200
+
+
+def _table(region_name: Optional[str] = None):
+    return get_resource("dynamodb", region_name=region_name).Table(STATS_TABLE)
+
+
+def ensure_stats_table(region_name: Optional[str] = None):
+    """Create the stats table if it does not exist (same approach as the job table)"""
+    ddb = get_resource("dynamodb", region_name=region_name)
+    table = ddb.Table(STATS_TABLE)
+    try:
+        table.load()
+        return table
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code")
+        if code not in ("ResourceNotFoundException", "ValidationException", "ResourceNotFound"):
+            raise
+    logger.info("Creating DynamoDB table %s", STATS_TABLE)
+    table = ddb.create_table(
+        TableName=STATS_TABLE,
+        KeySchema=[
+            {"AttributeName": "pk", "KeyType": "HASH"},
+            {"AttributeName": "sk", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    table.wait_until_exists()
+    return table
+
+
+def analysis_facts(analysis_data: Any) -> Dict[str, Any]:
+    """has_text / has_blackframes / labels for a job's parsed analysis result"""
+    facts = {"has_text": False, "has_blackframes": False, "labels": []}
+    if not isinstance(analysis_data, dict):
+        return facts
+
+    text_data = analysis_data.get("text_detection")
+    if isinstance(text_data, dict) and text_data.get("text_detections"):
+        facts["has_text"] = True
+    elif analysis_data.get("texts"):
+        facts["has_text"] = True
+
+    blackframes = analysis_data.get("blackframes")
+    if isinstance(blackframes, dict):
+        facts["has_blackframes"] = bool(
+            blackframes.get("blackframes_detected") or blackframes.get("black_frames")
+        )
+    elif "frames" in analysis_data and "total_frames" in analysis_data:
+        facts["has_blackframes"] = bool(analysis_data.get("count") or analysis_data.get("frames"))
+
+    label_data = analysis_data.get("label_detection")
+    labels = set()
+    if isinstance(label_data, dict):
+        for label in label_data.get("unique_labels", []) or []:
+            if isinstance(label, dict) and label.get("name"):
+                labels.add(str(label["name"]).lower())
+        for tag in label_data.get("semantic_tags", []) or []:
+            if tag:
+                labels.add(str(tag).lower())
+    facts["labels"] = sorted(labels)[:MAX_LABELS_PER_JOB]
+    return facts
+
+
+def _counter_update(table_name: str, user_id: str, sk: str, sign: int,
+                    facts: Dict[str, Any], now: int) -> Dict[str, Any]:
+    return {
+        "Update": {
+            "TableName": table_name,
+            "Key": {"pk": f"USER#{user_id}", "sk": sk},
+            "UpdateExpression": (
+                "ADD analyzed_videos :one, videos_with_text :text, videos_with_blackframes :black "
+                "SET updated_at = :now"
+            ),
+            "ExpressionAttributeValues": {
+                ":one": sign,
+                ":text": sign if facts.get("has_text") else 0,
+                ":black": sign if facts.get("has_blackframes") else 0,
+                ":now": now,
+            },
+        }
+    }
+
+
+def _update_vocabulary(table, user_id: str, vocab_sk: str, counter_sk: str, labels: List[str], now: int) -> None:
+    # Set union is idempotent; the returned set gives the new vocabulary size
+    resp = table.update_item(
+        Key={"pk": f"USER#{user_id}", "sk": vocab_sk},
+        UpdateExpression="ADD labels :labels SET updated_at = :now",
+        ExpressionAttributeValues={":labels": set(labels), ":now": now},
+        ReturnValues="UPDATED_NEW",
+    )
+    size = len(resp.get("Attributes", {}).get("labels", ()))
+    try:
+        table.update_item(
+            Key={"pk": f"USER#{user_id}", "sk": counter_sk},
+            UpdateExpression="SET label_vocabulary_size = :size",
+            ConditionExpression="attribute_not_exists(label_vocabulary_size) OR label_vocabulary_size < :size",
+            ExpressionAttributeValues={":size": size},
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+
+
+def record_job_completion(job_id: str, user_id: Optional[str], session_id: Optional[str],
+                          analysis_data: Any, region_name: Optional[str] = None) -> bool:
+    """
+    Count a completed job for its user (and session). Returns False if the job
+    was already counted or has no user. Safe to call repeatedly.
+    """
+    if not user_id:
+        return False
+    table = _table(region_name)
+    client = table.meta.client
+    facts = analysis_facts(analysis_data)
+    now = int(time.time())
+
+    marker = {"pk": f"JOB#{job_id}", "sk": "COUNTED", "user_id": user_id,
+              "has_text": facts["has_text"], "has_blackframes": facts["has_blackframes"], "counted_at": now}
+    if session_id:
+        marker["session_id"] = session_id
+    items = [
+        {"Put": {"TableName": STATS_TABLE, "Item": marker, "ConditionExpression": "attribute_not_exists(pk)"}},
+        _counter_update(STATS_TABLE, user_id, "TOTAL", 1, facts, now),
+    ]
+    if session_id:
+        items.append(_counter_update(STATS_TABLE, user_id, f"SESSION#{session_id}", 1, facts, now))
+
+    try:
+        client.transact_write_items(TransactItems=items)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "TransactionCanceledException":
+            reasons = e.response.get("CancellationReasons", [])
+            if reasons and reasons[0].get("Code") == "ConditionalCheckFailed":
+                logger.info(f"Job {job_id} already counted")
+                return False
+        raise
+
+    if facts["labels"]:
+        try:
+            _update_vocabulary(table, user_id, "VOCAB", "TOTAL", facts["labels"], now)
+            if session_id:
+                _update_vocabulary(table, user_id, f"VOCAB#{session_id}", f"SESSION#{session_id}", facts["labels"], now)
+        except Exception as e:
+            # Counters are already correct; the vocabulary catches up with the next job
+            logger.warning(f"Failed to update label vocabulary for job {job_id}: {e}")
+    return True
+
+
+def record_job_removal(job_id: str, region_name: Optional[str] = None) -> bool:
+    """Reverse a counted job's counters (e.g. after delete). Returns False if it was not counted."""
+    table = _table(region_name)
+    marker = table.get_item(Key={"pk": f"JOB#{job_id}", "sk": "COUNTED"}, ConsistentRead=True).get("Item")
+    if not marker:
+        return False
+    user_id = marker["user_id"]
+    session_id = marker.get("session_id")
+    now = int(time.time())
+    items = [
+        {"Delete": {"TableName": STATS_TABLE, "Key": {"pk": f"JOB#{job_id}", "sk": "COUNTED"},
+                    "ConditionExpression": "attribute_exists(pk)"}},
+        _counter_update(STATS_TABLE, user_id, "TOTAL", -1, marker, now),
+    ]
+    if session_id:
+        items.append(_counter_update(STATS_TABLE, user_id, f"SESSION#{session_id}", -1, marker, now))
+    try:
+        table.meta.client.transact_write_items(TransactItems=items)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "TransactionCanceledException":
+            return False
+        raise
+    return True
+
+
+def _counters(item: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    item = item or {}
+    return {name: max(int(item.get(name, 0)), 0) for name in COUNTERS}
+
+
+def get_analysis_stats(user_id: str, session_id: Optional[str] = None,
+                       region_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Read a user's counters (and the session's) with one BatchGetItem.
+
+    ``backfilled`` is False until the user's pre-existing jobs have been counted
+    (see :func:`backfill_user`).
+    """
+    table = _table(region_name)
+    keys = [{"pk": f"USER#{user_id}", "sk": "TOTAL"}]
+    if session_id:
+        keys.append({"pk": f"USER#{user_id}", "sk": f"SESSION#{session_id}"})
+    resp = table.meta.client.batch_get_item(RequestItems={
+        STATS_TABLE: {
+            "Keys": keys,
+            "ProjectionExpression": "sk, backfilled, " + ", ".join(COUNTERS),
+        }
+    })
+    by_sk = {item["sk"]: item for item in resp.get("Responses", {}).get(STATS_TABLE, [])}
+    total = by_sk.get("TOTAL")
+    return {
+        "user": _counters(total),
+        "session": _counters(by_sk.get(f"SESSION#{session_id}")) if session_id else None,
+        "backfilled": bool(total and total.get("backfilled")),
+    }
+
+
+def backfill_user(user_id: str, jobs: List[Dict[str, Any]], region_name: Optional[str] = None) -> int:
+    """
+    Count a user's existing completed jobs (rows from the job table) and mark the
+    user as backfilled. Jobs that are already counted are skipped by the marker.
+    """
+    counted = 0
+    for job in jobs:
+        result = job.get("analysis_results") or job.get("result")
+        if isinstance(result, str):
+            try:
+                result = json.loads(result)
+            except json.JSONDecodeError:
+                result = {}
+        try:
+            if record_job_completion(job["job_id"], user_id, job.get("session_id"), result, region_name):
+                counted += 1
+        except Exception as e:
+            logger.warning(f"Backfill failed for job {job.get('job_id')}: {e}")
+    _table(region_name).update_item(
+        Key={"pk": f"USER#{user_id}", "sk": "TOTAL"},
+        UpdateExpression="SET backfilled = :yes, updated_at = :now",
+        ExpressionAttributeValues={":yes": True, ":now": int(time.time())},
+    )
+    logger.info(f"Backfilled analysis stats for user {user_id}: {counted} of {len(jobs)} jobs counted")
+    return counted
@@ -0,0 +1,116 @@
+"""
+Fast JSON responses.
+
+Uses orjson when installed (falls back to the standard library), converts
+DynamoDB ``Decimal`` values to int/float, passes pre-serialized JSON through
+(``RawJSON``) and streams large lists in chunks instead of building the whole
+body in memory.
+
+Endpoints that return a ``FastJSONResponse`` / ``stream_json_list`` response
+directly also skip FastAPI's ``jsonable_encoder`` pass over the payload.
+"""
+
+import json
+import logging
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Union
+
+from fastapi.responses import Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# orjson >= 3.9 can embed already serialized JSON without parsing it
+_ORJSON_FRAGMENT = getattr(orjson, "Fragment", None) if ORJSON_AVAILABLE else None
+
+# Flush streamed bodies in chunks of roughly this size
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class RawJSON:
+    """A value that is already valid JSON text and should be embedded as-is"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Union[str, bytes]):
+        self.value = value.encode("utf-8") if isinstance(value, str) else value
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    if isinstance(obj, RawJSON):
+        if _ORJSON_FRAGMENT is not None:
+            return _ORJSON_FRAGMENT(obj.value)
+        # No fragment support: parse so the encoder can write it
+        return json.loads(obj.value)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        data, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSONResponse replacement rendered with :func:`dumps`"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _iter_json_list(items: Iterable[Any], transform: Optional[Callable[[Any], Any]]) -> Iterator[bytes]:
+    buffer = bytearray(b"[")
+    first = True
+    for item in items:
+        if transform is not None:
+            item = transform(item)
+        if not first:
+            buffer += b","
+        buffer += dumps(item)
+        first = False
+        if len(buffer) >= STREAM_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
+
+
+def stream_json_list(
+    items: Iterable[Any],
+    transform: Optional[Callable[[Any], Any]] = None,
+    envelope: Optional[Dict[str, Any]] = None,
+    list_key: str = "items",
+    status_code: int = 200,
+) -> StreamingResponse:
+    """
+    Stream ``items`` as a JSON array, encoding one item at a time.
+
+    With ``envelope`` the array is written as ``list_key`` of an object, followed
+    by the envelope's fields: ``{"<list_key>": [...], **envelope}``.
+    """
+    def body() -> Iterator[bytes]:
+        if envelope is None:
+            yield from _iter_json_list(items, transform)
+            return
+        yield b"{" + dumps(list_key) + b":"
+        yield from _iter_json_list(items, transform)
+        tail = dumps(envelope)
+        # Append the envelope's members after the list (skip its braces)
+        yield (b"," + tail[1:]) if len(tail) > 2 else b"}"
+
+    return StreamingResponse(body(), status_code=status_code, media_type="application/json")
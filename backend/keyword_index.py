@@ -0,0 +1,216 @@
+"""
+Inverted keyword index for video search.
+
+``semantic_search`` used to scan the job table with ``contains()`` filters; the
+scan ``Limit`` applies before the filter, so recall depended on table order.
+This index stores one posting per (tenant, term, job, field) in its own table
+(``SEARCH_INDEX_TABLE``):
+
+- ``pk=T#<tenant>#<term>, sk=<job_id>#<field>``: ``weight``, ``session_id``
+- ``pk=J#<job_id>, sk=TERMS``: manifest of the job's posting keys, so a
+  re-index can delete postings that no longer apply
+- ``pk=T#<tenant>, sk=READY#<analyzer version>``: the tenant's existing jobs
+  have been indexed (with the current ``text_analysis`` pipeline)
+
+Terms are produced by ``text_analysis.analyze``. A query is one ``Query`` per term (a handful of key lookups) followed by
+ranking the union, independent of the table size. Intent terms (``~text``,
+``~blackframes``) mark videos that have OCR text / black frames.
+
+Shared by the API and the worker (``store_video_analysis`` maintains it).
+"""
+
+import logging
+import math
+import os
+import threading
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from aws_clients import get_resource
+from text_analysis import ANALYZER_VERSION, analyze
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_TABLE = os.environ.get("SEARCH_INDEX_TABLE", "proov_search_index")
+
+FIELD_WEIGHTS = {"tag": 2.0, "text": 1.5, "file": 1.0, "flag": 1.0}
+
+INTENT_TEXT = "~text"
+INTENT_BLACKFRAMES = "~blackframes"
+
+# Postings read per term at most (very common terms carry little signal)
+MAX_POSTINGS_PER_TERM = 2000
+
+READY_SK = f"READY#{ANALYZER_VERSION}"
+
+
+def document_postings(filename: str, tags: Iterable[str], texts: Iterable[str],
+                      has_text: bool = False, has_blackframes: bool = False) -> Dict[Tuple[str, str], float]:
+    """(term, field) -> weight for one video; repeated terms add log-damped weight"""
+    counts: Counter = Counter()
+    for field, values in (("file", [filename]), ("tag", tags), ("text", texts)):
+        for value in values:
+            for token in analyze(value):
+                counts[(token, field)] += 1
+    postings = {
+        key: round(FIELD_WEIGHTS[key[1]] * (1.0 + math.log(count)), 3)
+        for key, count in counts.items()
+    }
+    if has_text:
+        postings[(INTENT_TEXT, "flag")] = FIELD_WEIGHTS["flag"]
+    if has_blackframes:
+        postings[(INTENT_BLACKFRAMES, "flag")] = FIELD_WEIGHTS["flag"]
+    return postings
+
+
+def _tenant(user_id: Optional[str]) -> str:
+    return user_id or "_"
+
+
+class KeywordIndex:
+    """Term -> (tenant, job_id, field, weight) postings in DynamoDB"""
+
+    def __init__(self, table_name: str = SEARCH_INDEX_TABLE, region_name: Optional[str] = None):
+        self.table_name = table_name
+        self.region_name = region_name
+        self._ready: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def table(self):
+        return get_resource("dynamodb", region_name=self.region_name).Table(self.table_name)
+
+    def ensure_table(self):
+        """Create the index table if it does not exist (same approach as the stats table)"""
+        ddb = get_resource("dynamodb", region_name=self.region_name)
+        table = ddb.Table(self.table_name)
+        try:
+            table.load()
+            return table
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code not in ("ResourceNotFoundException", "ValidationException", "ResourceNotFound"):
+                raise
+        logger.info("Creating DynamoDB table %s", self.table_name)
+        table = ddb.create_table(
+            TableName=self.table_name,
+            KeySchema=[
+                {"AttributeName": "pk", "KeyType": "HASH"},
+                {"AttributeName": "sk", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "pk", "AttributeType": "S"},
+                {"AttributeName": "sk", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        table.wait_until_exists()
+        return table
+
+    # --- maintenance ---
+
+    def index_document(self, user_id: Optional[str], job_id: str, session_id: Optional[str],
+                       postings: Dict[Tuple[str, str], float]) -> None:
+        """Replace the postings of ``job_id`` with ``postings``"""
+        tenant = _tenant(user_id)
+        table = self.table
+        manifest = table.get_item(Key={"pk": f"J#{job_id}", "sk": "TERMS"}).get("Item") or {}
+        old_keys = set(manifest.get("postings") or ())
+        new_keys = {f"T#{tenant}#{term}|{job_id}#{field}" for term, field in postings}
+
+        with table.batch_writer() as batch:
+            for key in old_keys - new_keys:
+                pk, sk = key.split("|", 1)
+                batch.delete_item(Key={"pk": pk, "sk": sk})
+            for (term, field), weight in postings.items():
+                item = {
+                    "pk": f"T#{tenant}#{term}",
+                    "sk": f"{job_id}#{field}",
+                    "job_id": job_id,
+                    "weight": Decimal(str(weight)),
+                }
+                if session_id:
+                    item["session_id"] = session_id
+                batch.put_item(Item=item)
+        if new_keys:
+            table.put_item(Item={"pk": f"J#{job_id}", "sk": "TERMS", "tenant": tenant, "postings": new_keys})
+        elif manifest:
+            table.delete_item(Key={"pk": f"J#{job_id}", "sk": "TERMS"})
+
+    def remove_document(self, job_id: str) -> None:
+        self.index_document(None, job_id, None, {})
+
+    def is_ready(self, user_id: Optional[str]) -> bool:
+        tenant = _tenant(user_id)
+        if tenant in self._ready:
+            return True
+        item = self.table.get_item(Key={"pk": f"T#{tenant}", "sk": READY_SK}).get("Item")
+        if item:
+            with self._lock:
+                self._ready.add(tenant)
+        return bool(item)
+
+    def mark_ready(self, user_id: Optional[str]) -> None:
+        tenant = _tenant(user_id)
+        self.table.put_item(Item={"pk": f"T#{tenant}", "sk": READY_SK})
+        with self._lock:
+            self._ready.add(tenant)
+
+    # --- queries ---
+
+    def postings(self, user_id: Optional[str], term: str) -> List[Dict[str, Any]]:
+        """All postings of ``term`` for a tenant (one Query, paginated)"""
+        kwargs = {
+            "KeyConditionExpression": Key("pk").eq(f"T#{_tenant(user_id)}#{term}"),
+            "ProjectionExpression": "job_id, sk, weight, session_id",
+        }
+        items: List[Dict[str, Any]] = []
+        table = self.table
+        while True:
+            resp = table.query(**kwargs)
+            items.extend(resp.get("Items", []))
+            if not resp.get("LastEvaluatedKey") or len(items) >= MAX_POSTINGS_PER_TERM:
+                return items
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    def search(self, user_id: Optional[str], terms: Iterable[str], required: Iterable[str] = (),
+               session_id: Optional[str] = None, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank the tenant's jobs matching any of ``terms`` (and all ``required`` intent terms).
+
+        A job's score is the sum of its posting weights, each scaled by how rare
+        the term is among the query's terms. Returns ``[(job_id, score)]``.
+        """
+        def matching(postings):
+            if session_id is None:
+                return postings
+            return [p for p in postings if p.get("session_id") == session_id]
+
+        allowed: Optional[Set[str]] = None
+        for term in dict.fromkeys(required):
+            jobs = {p["job_id"] for p in matching(self.postings(user_id, term))}
+            allowed = jobs if allowed is None else allowed & jobs
+
+        by_term = {term: matching(self.postings(user_id, term)) for term in dict.fromkeys(terms)}
+        scores: Dict[str, float] = {}
+        if any(by_term.values()):
+            max_df = max(len({p["job_id"] for p in postings}) for postings in by_term.values())
+            for postings in by_term.values():
+                df = len({p["job_id"] for p in postings})
+                if not df:
+                    continue
+                rarity = 1.0 + math.log(1.0 + max_df / df)
+                for p in postings:
+                    if allowed is not None and p["job_id"] not in allowed:
+                        continue
+                    scores[p["job_id"]] = scores.get(p["job_id"], 0.0) + float(p["weight"]) * rarity
+        elif allowed is not None:
+            # Intent-only query ("Gibt es Blackframes?")
+            scores = {job_id: 1.0 for job_id in allowed}
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked[:limit]
@@ -0,0 +1,840 @@
+"""
+Self-contained vector index: embeddings in memory-mapped files, one directory per tenant.
+
+Vector search without an OpenSearch cluster or an external vector database.
+Each tenant (user) has a directory ``LOCAL_VECTOR_DIR/<sha256(tenant)[:32]>/``:
+
+- ``meta.json``: dimension, dtype, capacity and ANN graph state
+- ``vectors.bin``: (capacity, dim) float32 or int8 matrix (``np.memmap``), grown by doubling
+- ``scales.bin``: float32 scale per row (int8 only)
+- ``ids.jsonl``: append-only sidecar with one line per stored row (job id and
+  result metadata) or deleted job. It is the source of truth: rows written to
+  the matrix but missing here (crash mid-write) are ignored and overwritten.
+- ``graph.bin``: (capacity, GRAPH_DEGREE) int32 neighbour lists of the ANN graph
+- ``covered``: the tenant's existing jobs have been backfilled
+- ``pending.json``: job ids whose embedding failed, retried by the next sync
+
+Vectors are L2-normalized, so cosine similarity is a dot product. int8 rows
+store ``round(v / scale)`` with ``scale = max|v| / 127`` (a quarter of the size,
+scores within about 1%). Tenants with up to ``ANN_THRESHOLD`` rows are searched
+brute force (matrix-vector products over the memmap in blocks); larger ones
+through a navigable small-world graph (greedy beam search over neighbour lists,
+``EF_SEARCH`` candidates), which is built in the background once a tenant
+crosses the threshold and then extended as rows are added. Until the graph
+covers every row, searches stay brute force.
+
+Deleted rows remain in the graph as waypoints and are skipped in results; a
+tenant is compacted when more than a quarter of its rows are deleted. One
+process writes a tenant directory at a time (the API instance that indexes).
+Each tenant has its own lock, so a graph build or compaction only holds up
+that tenant's stores and searches.
+
+``LOCAL_VECTOR_DIR`` belongs on persistent storage (the Docker image declares
+``/data`` as a volume): on an empty directory every tenant is backfilled and
+re-embedded again on its first search.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from embedding_service import get_embedding_service
+from video_summary import build_video_summary
+
+logger = logging.getLogger(__name__)
+
+LOCAL_VECTOR_DIR = os.environ.get("LOCAL_VECTOR_DIR", "/tmp/proov-vectors")
+# Minimum pause between two syncs (backfill / retry of failed embeddings) of a tenant
+LOCAL_VECTOR_RETRY_SECONDS = float(os.environ.get("LOCAL_VECTOR_RETRY_SECONDS", "300"))
+# "float32" or "int8"
+LOCAL_VECTOR_DTYPE = os.environ.get("LOCAL_VECTOR_DTYPE", "float32").lower()
+ANN_THRESHOLD = int(os.environ.get("LOCAL_VECTOR_ANN_THRESHOLD", "20000"))
+GRAPH_DEGREE = 16
+EF_CONSTRUCTION = 64
+EF_SEARCH = int(os.environ.get("LOCAL_VECTOR_EF_SEARCH", "64"))
+GRAPH_SEEDS = 8
+
+META_VERSION = 1
+COVERED_FILE = "covered"
+PENDING_FILE = "pending.json"
+# Graph rows inserted per lock hold, videos loaded and embedded per sync step
+GRAPH_BUILD_BATCH = 64
+SYNC_BATCH = 64
+_INITIAL_CAPACITY = 256
+_BLOCK_ROWS = 8192
+_DEFAULT_TENANT = "_default"
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    if not norm:
+        raise ValueError("Cannot index a zero vector")
+    return vector / norm
+
+
+class TenantVectors:
+    """Memory-mapped vectors, id sidecar and ANN graph of one tenant (callers lock)"""
+
+    def __init__(self, path: str, meta: Dict[str, Any]):
+        self.path = path
+        self.dim = int(meta["dim"])
+        self.dtype = meta["dtype"]
+        self.capacity = int(meta["capacity"])
+        self.graph_count = int(meta.get("graph_count", 0))
+        self.entry = int(meta.get("entry", -1))
+        self.count = 0
+        self.job_rows: Dict[str, int] = {}
+        self.docs: Dict[int, Dict[str, Any]] = {}
+        self.row_jobs: List[Optional[str]] = []
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._graph: Optional[np.memmap] = None
+        self._live = np.zeros(self.capacity, dtype=bool)
+
+    # --- files ---
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @classmethod
+    def create(cls, path: str, dim: int, dtype: str) -> "TenantVectors":
+        if dtype not in ("float32", "int8"):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        os.makedirs(path, exist_ok=True)
+        tenant = cls(path, {"dim": dim, "dtype": dtype, "capacity": _INITIAL_CAPACITY})
+        open(tenant._file("ids.jsonl"), "w").close()
+        tenant._map()
+        tenant._write_meta()
+        return tenant
+
+    @classmethod
+    def open(cls, path: str) -> Optional["TenantVectors"]:
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("v") != META_VERSION:
+            return None
+        tenant = cls(path, meta)
+        tenant._map(with_graph=tenant.graph_count > 0)
+        tenant._replay()
+        return tenant
+
+    def _write_meta(self) -> None:
+        meta = {
+            "v": META_VERSION, "dim": self.dim, "dtype": self.dtype, "capacity": self.capacity,
+            "graph_count": self.graph_count, "entry": self.entry,
+        }
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    def _map(self, with_graph: bool = False) -> None:
+        """(Re)open the memmaps at the current capacity, extending the files if needed"""
+        self._vectors = self._open_map("vectors.bin", self.dtype, (self.capacity, self.dim))
+        self._scales = self._open_map("scales.bin", "float32", (self.capacity,)) if self.dtype == "int8" else None
+        self._graph = self._open_map("graph.bin", "int32", (self.capacity, GRAPH_DEGREE), fill=-1) if with_graph else None
+        if len(self._live) < self.capacity:
+            self._live = np.concatenate([self._live, np.zeros(self.capacity - len(self._live), dtype=bool)])
+
+    def _open_map(self, name: str, dtype: str, shape: Tuple[int, ...], fill: int = 0) -> np.memmap:
+        path = self._file(name)
+        itemsize = np.dtype(dtype).itemsize
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        size = int(np.prod(shape)) * itemsize
+        if old_size < size:
+            with open(path, "ab") as f:
+                f.truncate(size)
+        mm = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+        if fill and old_size < size:
+            mm.reshape(-1)[old_size // itemsize:] = fill
+        return mm
+
+    def _replay(self) -> None:
+        """Rebuild the row maps from the id sidecar"""
+        valid_bytes = 0
+        with open(self._file("ids.jsonl"), "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn last line (cut off below)
+                valid_bytes += len(line)
+                if "deleted" in entry:
+                    self._forget(entry["deleted"])
+                    continue
+                row = int(entry["row"])
+                if row >= self.capacity:
+                    break
+                self._forget(entry["job_id"])
+                while len(self.row_jobs) <= row:
+                    self.row_jobs.append(None)
+                self.row_jobs[row] = entry["job_id"]
+                self.job_rows[entry["job_id"]] = row
+                self.docs[row] = entry.get("doc") or {}
+                self._live[row] = True
+                self.count = max(self.count, row + 1)
+        if os.path.getsize(self._file("ids.jsonl")) > valid_bytes:
+            with open(self._file("ids.jsonl"), "r+b") as f:
+                f.truncate(valid_bytes)
+        if self.entry >= self.count:
+            # Graph rows past the sidecar (crash): rebuild it
+            self.entry, self.graph_count = -1, 0
+        self.graph_count = min(self.graph_count, self.count)
+
+    def _append_log(self, entry: Dict[str, Any]) -> None:
+        with open(self._file("ids.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        for mm in (self._vectors, self._scales, self._graph):
+            if mm is not None:
+                mm.flush()
+        self._vectors = self._scales = self._graph = None
+
+    # --- rows ---
+
+    def __len__(self):
+        return len(self.job_rows)
+
+    @property
+    def deleted(self) -> int:
+        return self.count - len(self.job_rows)
+
+    def _forget(self, job_id: str) -> bool:
+        row = self.job_rows.pop(job_id, None)
+        if row is None:
+            return False
+        self.row_jobs[row] = None
+        self.docs.pop(row, None)
+        self._live[row] = False
+        return True
+
+    def _grow(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        with_graph = self._graph is not None
+        self.close()
+        self.capacity = capacity
+        self._map(with_graph=with_graph)
+        self._write_meta()
+
+    def add(self, job_id: str, vector: np.ndarray, doc: Dict[str, Any]) -> int:
+        vector = _normalize(vector)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Embedding has {vector.shape[0]} dimensions, index has {self.dim}")
+        row = self.count
+        self._grow(row + 1)
+        if self.dtype == "int8":
+            scale = float(np.abs(vector).max()) / 127.0
+            self._vectors[row] = np.round(vector / scale).astype(np.int8)
+            self._scales[row] = scale
+        else:
+            self._vectors[row] = vector
+        self._vectors.flush()
+        if self._scales is not None:
+            self._scales.flush()
+        self._append_log({"row": row, "job_id": job_id, "doc": doc})
+        self._forget(job_id)
+        self.row_jobs.append(job_id)
+        self.job_rows[job_id] = row
+        self.docs[row] = doc
+        self._live[row] = True
+        self.count = row + 1
+        return row
+
+    def remove(self, job_id: str) -> bool:
+        if job_id not in self.job_rows:
+            return False
+        self._append_log({"deleted": job_id})
+        return self._forget(job_id)
+
+    def iter_live(self) -> Iterator[Tuple[str, np.ndarray, Dict[str, Any]]]:
+        for job_id, row in sorted(self.job_rows.items(), key=lambda kv: kv[1]):
+            yield job_id, self._rows(np.array([row]))[0], self.docs[row]
+
+    # --- scoring ---
+
+    def _rows(self, rows: np.ndarray) -> np.ndarray:
+        """Decoded float32 vectors of ``rows``"""
+        block = np.asarray(self._vectors[rows], dtype=np.float32)
+        if self._scales is not None:
+            block *= np.asarray(self._scales[rows])[:, None]
+        return block
+
+    def _dot(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        return self._rows(rows) @ query
+
+    def _brute_force(self, query: np.ndarray) -> np.ndarray:
+        """Scores of all rows (-inf for deleted ones)"""
+        scores = np.full(self.count, -np.inf, dtype=np.float32)
+        for start in range(0, self.count, _BLOCK_ROWS):
+            end = min(start + _BLOCK_ROWS, self.count)
+            block = np.asarray(self._vectors[start:end], dtype=np.float32) @ query
+            if self._scales is not None:
+                block *= np.asarray(self._scales[start:end])
+            scores[start:end] = block
+        scores[~self._live[:self.count]] = -np.inf
+        return scores
+
+    def search(self, query: np.ndarray, k: int,
+               allowed: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Tuple[int, float]]:
+        """``[(row, cosine similarity)]`` of the ``k`` nearest live rows, best first"""
+        query = _normalize(query)
+        if not self.job_rows or k <= 0:
+            return []
+        if self.graph_ready:
+            ef = max(EF_SEARCH, k * (4 if allowed else 1))
+            ranked = self._graph_search(query, ef)
+            results = [
+                (row, score) for row, score in ranked
+                if self._live[row] and (allowed is None or allowed(self.docs[row]))
+            ]
+            if len(results) >= k or len(ranked) >= len(self.job_rows):
+                return results[:k]
+            # Filter too selective for the beam: fall back to exact search
+
+        scores = self._brute_force(query)
+        live = int(self._live[:self.count].sum())
+        take = min(live, k if allowed is None else max(k * 4, 64))
+        while True:
+            top = np.argpartition(-scores, take - 1)[:take] if take < self.count else np.arange(self.count)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            results = [
+                (int(row), float(scores[row])) for row in top
+                if self._live[row] and (allowed is None or allowed(self.docs[int(row)]))
+            ]
+            if len(results) >= k or take >= live:
+                return results[:k]
+            take = min(live, take * 4)
+
+    # --- ANN graph (navigable small world) ---
+
+    @property
+    def graph_ready(self) -> bool:
+        return self._graph is not None and self.graph_count >= self.count and self.count > ANN_THRESHOLD
+
+    @property
+    def needs_graph(self) -> bool:
+        return self.count > ANN_THRESHOLD and self.graph_count < self.count
+
+    def _seeds(self) -> List[int]:
+        """Entry point plus rows spread over the graph (a beam from one point can stall in a cluster)"""
+        step = max(1, self.graph_count // GRAPH_SEEDS)
+        return list(dict.fromkeys([self.entry] + list(range(0, self.graph_count, step))[:GRAPH_SEEDS]))
+
+    def _graph_search(self, query: np.ndarray, ef: int) -> List[Tuple[int, float]]:
+        seeds = self._seeds()
+        visited = set(seeds)
+        best = [(float(score), row) for row, score in zip(seeds, self._dot(np.array(seeds), query))]  # min-heap
+        heapq.heapify(best)
+        candidates = [(-score, row) for score, row in best]  # max-heap by score
+        heapq.heapify(candidates)
+        while len(best) > ef:
+            heapq.heappop(best)
+        while candidates:
+            negative, row = heapq.heappop(candidates)
+            if len(best) >= ef and -negative < best[0][0]:
+                break
+            neighbours = [int(n) for n in self._graph[row] if n >= 0 and int(n) not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+            for neighbour, score in zip(neighbours, self._dot(np.array(neighbours), query)):
+                score = float(score)
+                if len(best) < ef or score > best[0][0]:
+                    heapq.heappush(candidates, (-score, neighbour))
+                    heapq.heappush(best, (score, neighbour))
+                    if len(best) > ef:
+                        heapq.heappop(best)
+        return sorted(((row, score) for score, row in best), key=lambda rs: -rs[1])
+
+    def _select_neighbours(self, ranked: List[Tuple[int, float]]) -> List[int]:
+        """HNSW heuristic: skip a candidate that is closer to an already selected
+        neighbour than to the new row, which keeps links into other clusters"""
+        rows = np.array([row for row, _ in ranked])
+        vectors = self._rows(rows)
+        selected: List[int] = []
+        skipped: List[int] = []
+        for i, (row, score) in enumerate(ranked):
+            if len(selected) >= GRAPH_DEGREE:
+                break
+            if selected and float((vectors[selected] @ vectors[i]).max()) > score:
+                skipped.append(i)
+                continue
+            selected.append(i)
+        # Fill up with the nearest skipped ones
+        selected.extend(skipped[:GRAPH_DEGREE - len(selected)])
+        return [int(rows[i]) for i in selected]
+
+    def _link(self, row: int, neighbour: int) -> None:
+        """Add ``row`` to ``neighbour``'s list, re-selecting the list when it is full"""
+        links = self._graph[neighbour]
+        free = np.flatnonzero(links < 0)
+        if len(free):
+            links[free[0]] = row
+            return
+        rows = np.append(links, row).astype(np.int64)
+        scores = self._dot(rows, self._rows(np.array([neighbour]))[0])
+        order = np.argsort(-scores)
+        self._graph[neighbour] = self._select_neighbours([(int(rows[i]), float(scores[i])) for i in order])
+
+    def extend_graph(self, max_rows: int) -> int:
+        """Insert up to ``max_rows`` rows not yet in the graph; returns how many were inserted"""
+        if self._graph is None:
+            self.close()
+            self._map(with_graph=True)
+        inserted = 0
+        while self.graph_count < self.count and inserted < max_rows:
+            row = self.graph_count
+            self._graph[row] = -1
+            if self.entry < 0:
+                self.entry = row
+            else:
+                vector = self._rows(np.array([row]))[0]
+                ranked = [(n, score) for n, score in self._graph_search(vector, EF_CONSTRUCTION) if n != row]
+                nearest = self._select_neighbours(ranked)
+                self._graph[row, :len(nearest)] = nearest
+                for neighbour in nearest:
+                    self._link(row, neighbour)
+            self.graph_count += 1
+            inserted += 1
+        self._graph.flush()
+        self._write_meta()
+        return inserted
+
+
+class LocalVectorDB:
+    """
+    Vector search over memory-mapped per-tenant indexes (see module docstring)
+    Same interface as AWSVectorDB: store_video_analysis / semantic_search / delete_video
+
+    ``list_jobs(tenant)`` (job ids of the tenant's completed jobs) and
+    ``load_jobs(job_ids)`` (store entries, see :meth:`store_video_analyses`) let
+    the index fill itself: a tenant without a coverage marker is backfilled in
+    the background on its first search, and jobs whose embedding failed are
+    retried on a later search. A covered tenant is diffed against ``list_jobs``
+    once per process (on its first search), which picks up jobs completed while
+    no instance was running; while it runs, new jobs arrive through the indexer
+    feed (``store_video_analyses``). Without them the index only holds what was stored.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, dtype: Optional[str] = None,
+                 embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 list_jobs: Optional[Callable[[str], Iterable[str]]] = None,
+                 load_jobs: Optional[Callable[[List[str]], Iterable[Dict[str, Any]]]] = None):
+        self.base_dir = base_dir or LOCAL_VECTOR_DIR
+        self.dtype = dtype or LOCAL_VECTOR_DTYPE
+        # Cached, concurrent embeddings that raise on failure (see embedding_service)
+        self._embed = embed or get_embedding_service().embed
+        self.list_jobs = list_jobs
+        self.load_jobs = load_jobs
+        self._tenants: Dict[str, TenantVectors] = {}
+        self._job_tenants: Dict[str, str] = {}
+        self._all_opened = False
+        self._graph_builds = set()
+        # Per tenant: job ids whose embedding failed, whether the backfill is done, last sync start
+        self._pending: Dict[str, Set[str]] = {}
+        self._covered: Dict[str, bool] = {}
+        self._diffed: Set[str] = set()
+        self._synced_at: Dict[str, float] = {}
+        self._syncing: Set[str] = set()
+        # ``_lock`` guards the maps above; a tenant's files and rows are guarded by its own
+        # lock, which is always taken before ``_lock`` (never while holding it)
+        self._lock = threading.RLock()
+        self._tenant_locks: Dict[str, threading.RLock] = {}
+        os.makedirs(self.base_dir, exist_ok=True)
+        logger.info(f"Local vector index at {self.base_dir} ({self.dtype})")
+
+    # --- tenants ---
+
+    def _tenant_path(self, tenant: str) -> str:
+        return os.path.join(self.base_dir, hashlib.sha256(tenant.encode("utf-8")).hexdigest()[:32])
+
+    def _tenant_lock(self, tenant: str) -> threading.RLock:
+        with self._lock:
+            lock = self._tenant_locks.get(tenant)
+            if lock is None:
+                lock = self._tenant_locks[tenant] = threading.RLock()
+            return lock
+
+    def _tenant(self, tenant: str, dim: Optional[int] = None) -> Optional[TenantVectors]:
+        """The tenant's index, opened or created (``dim`` given) on demand; caller holds its lock"""
+        with self._lock:
+            index = self._tenants.get(tenant)
+        if index is None:
+            path = self._tenant_path(tenant)
+            index = TenantVectors.open(path)
+            if index is None and dim is not None:
+                index = TenantVectors.create(path, dim, self.dtype)
+                with open(os.path.join(path, "tenant"), "w", encoding="utf-8") as f:
+                    f.write(tenant)
+            if index is not None:
+                self._install(tenant, index)
+        return index
+
+    def _install(self, tenant: str, index: TenantVectors) -> None:
+        with self._lock:
+            self._tenants[tenant] = index
+            for job_id in index.job_rows:
+                self._job_tenants[job_id] = tenant
+            if index.needs_graph:
+                self._start_graph_build(tenant)
+
+    def _open_all(self) -> None:
+        """Open every tenant on disk (to find the owner of a job)"""
+        with self._lock:
+            if self._all_opened:
+                return
+        for name in os.listdir(self.base_dir):
+            try:
+                with open(os.path.join(self.base_dir, name, "tenant"), encoding="utf-8") as f:
+                    tenant = f.read()
+            except OSError:
+                continue
+            with self._tenant_lock(tenant):
+                self._tenant(tenant)
+        with self._lock:
+            self._all_opened = True
+
+    def _start_graph_build(self, tenant: str) -> None:
+        with self._lock:
+            if tenant in self._graph_builds:
+                return
+            self._graph_builds.add(tenant)
+        threading.Thread(
+            target=self._build_graph, args=(tenant,), name="vector-graph-build", daemon=True
+        ).start()
+
+    def _build_graph(self, tenant: str) -> None:
+        try:
+            while True:
+                # Short batches under the tenant's lock: only this tenant's stores and searches wait
+                with self._tenant_lock(tenant):
+                    with self._lock:
+                        index = self._tenants.get(tenant)
+                    if index is None or not index.extend_graph(GRAPH_BUILD_BATCH):
+                        break
+            logger.info(f"Vector graph built for tenant {tenant}")
+        except Exception as e:
+            logger.error(f"Vector graph build failed for tenant {tenant}: {e}")
+        finally:
+            with self._lock:
+                self._graph_builds.discard(tenant)
+
+    def _compact(self, tenant: str, index: TenantVectors) -> TenantVectors:
+        """Rewrite a tenant without its deleted rows (the graph is rebuilt); caller holds its lock"""
+        path = self._tenant_path(tenant)
+        tmp = f"{path}.compact"
+        shutil.rmtree(tmp, ignore_errors=True)
+        compacted = TenantVectors.create(tmp, index.dim, index.dtype)
+        for job_id, vector, doc in index.iter_live():
+            compacted.add(job_id, vector, doc)
+        compacted.close()
+        for name in ("tenant", COVERED_FILE, PENDING_FILE):
+            if os.path.exists(os.path.join(path, name)):
+                shutil.copy(os.path.join(path, name), os.path.join(tmp, name))
+        index.close()
+        old = f"{path}.old"
+        os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+        reopened = TenantVectors.open(path)
+        self._install(tenant, reopened)
+        logger.info(f"Compacted vector index of tenant {tenant}: {len(reopened)} rows")
+        return reopened
+
+    # --- coverage (lazy backfill and retries) ---
+
+    def _is_covered(self, tenant: str) -> bool:
+        with self._lock:
+            covered = self._covered.get(tenant)
+        if covered is None:
+            covered = os.path.exists(os.path.join(self._tenant_path(tenant), COVERED_FILE))
+            with self._lock:
+                self._covered[tenant] = covered
+                if tenant not in self._pending:
+                    self._pending[tenant] = set(self._read_pending(tenant))
+        return covered
+
+    def _read_pending(self, tenant: str) -> List[str]:
+        try:
+            with open(os.path.join(self._tenant_path(tenant), PENDING_FILE), encoding="utf-8") as f:
+                return list(json.load(f))
+        except (OSError, ValueError):
+            return []
+
+    def _write_tenant_file(self, tenant: str, name: str, data: Any) -> None:
+        path = self._tenant_path(tenant)
+        os.makedirs(path, exist_ok=True)
+        tmp = os.path.join(path, f"{name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, os.path.join(path, name))
+
+    def _set_pending(self, tenant: str, job_ids: Set[str]) -> None:
+        with self._lock:
+            self._pending[tenant] = set(job_ids)
+        try:
+            self._write_tenant_file(tenant, PENDING_FILE, sorted(job_ids))
+        except OSError as e:
+            logger.warning(f"Failed to persist pending vectors of tenant {tenant}: {e}")
+
+    def _ensure_coverage(self, tenant: str) -> None:
+        """Start a background sync if the tenant was not diffed by this process or has failed jobs"""
+        if self.list_jobs is None or self.load_jobs is None or tenant == _DEFAULT_TENANT:
+            return
+        covered = self._is_covered(tenant)
+        now = time.monotonic()
+        with self._lock:
+            if tenant in self._syncing or (covered and tenant in self._diffed and not self._pending.get(tenant)):
+                return
+            if now - self._synced_at.get(tenant, -LOCAL_VECTOR_RETRY_SECONDS) < LOCAL_VECTOR_RETRY_SECONDS:
+                return
+            self._syncing.add(tenant)
+            self._synced_at[tenant] = now
+        threading.Thread(target=self._sync_tenant, args=(tenant,), name="vector-sync", daemon=True).start()
+
+    def _sync_tenant(self, tenant: str) -> None:
+        try:
+            covered = self._is_covered(tenant)
+            with self._lock:
+                job_ids = set(self._pending.get(tenant, ()))
+                diff = not covered or tenant not in self._diffed
+            if diff:
+                with self._tenant_lock(tenant):
+                    index = self._tenant(tenant)
+                    indexed = set(index.job_rows) if index is not None else set()
+                job_ids.update(job_id for job_id in self.list_jobs(tenant) if job_id not in indexed)
+            ordered = sorted(job_ids)
+            loaded: Set[str] = set()
+            stored = 0
+            for start in range(0, len(ordered), SYNC_BATCH):
+                entries = list(self.load_jobs(ordered[start:start + SYNC_BATCH]))
+                loaded.update(entry["job_id"] for entry in entries)
+                stored += self.store_video_analyses(entries, skip_failures=True)
+            # Jobs that are gone (or have no analysis) stop being retried
+            pending = self._pending_for(tenant)
+            failed = pending & loaded
+            self._set_pending(tenant, (pending - job_ids) | failed)
+            if not covered:
+                self._write_tenant_file(tenant, COVERED_FILE, {"covered_at": datetime.now().isoformat()})
+                with self._lock:
+                    self._covered[tenant] = True
+            if diff:
+                with self._lock:
+                    self._diffed.add(tenant)
+            logger.info(f"Local vector index synced tenant {tenant}: {stored} stored, {len(failed)} still failing")
+        except Exception as e:
+            logger.error(f"Local vector index sync failed for tenant {tenant}: {e}")
+        finally:
+            with self._lock:
+                self._syncing.discard(tenant)
+
+    def _pending_for(self, tenant: str) -> Set[str]:
+        with self._lock:
+            return self._pending.get(tenant, set())
+
+    def _record_failures(self, entries: List[Dict[str, Any]], stored: Set[str]) -> None:
+        """Remember jobs that could not be embedded (retried by a later sync); clear stored ones"""
+        by_tenant: Dict[str, Set[str]] = {}
+        for entry in entries:
+            by_tenant.setdefault(entry.get("user_id") or _DEFAULT_TENANT, set()).add(entry["job_id"])
+        for tenant, job_ids in by_tenant.items():
+            if tenant == _DEFAULT_TENANT:
+                continue
+            self._is_covered(tenant)  # loads the persisted pending set
+            pending = self._pending_for(tenant)
+            updated = (pending | (job_ids - stored)) - (job_ids & stored)
+            if updated != pending:
+                self._set_pending(tenant, updated)
+
+    # --- interface ---
+
+    def _searchable_text(self, video_metadata: Dict[str, Any], analysis_results: Dict[str, Any]) -> str:
+        semantic_content = [f"Video: {video_metadata.get('key', '')}"]
+        if "label_detection" in analysis_results:
+            labels = analysis_results["label_detection"].get("semantic_tags", [])
+            semantic_content.extend(labels[:20])
+            semantic_content.append(f"Contains: {', '.join(labels[:10])}")
+        # Distinct OCR lines instead of the first raw detections
+        semantic_content.extend(t["text"] for t in build_video_summary(analysis_results)["texts"][:10])
+        return " ".join(semantic_content)
+
+    def store_video_analysis(self, job_id: str, video_metadata: Dict[str, Any], analysis_results: Dict[str, Any],
+                             user_id: str = None, session_id: str = None):
+        """Embed the video's labels and text and (re)place its vector in the owner's index"""
+        self.store_video_analyses([{
+            "job_id": job_id, "video_metadata": video_metadata, "analysis_results": analysis_results,
+            "user_id": user_id, "session_id": session_id,
+        }])
+
+    def store_video_analyses(self, entries: List[Dict[str, Any]], skip_failures: bool = False) -> int:
+        """
+        Store many videos with one embedding call (concurrent and cached, see
+        embedding_service). Each entry has the arguments of :meth:`store_video_analysis`.
+        Raises EmbeddingError without storing anything if a text cannot be embedded;
+        with ``skip_failures`` the entries are retried one by one instead (successful
+        embeddings come from the cache) and only the failing ones are skipped.
+        Failed jobs are retried by a later sync. Returns the number stored.
+        """
+        if not entries:
+            return 0
+        texts = [self._searchable_text(e["video_metadata"], e["analysis_results"]) for e in entries]
+        try:
+            embeddings = self._embed(texts)
+        except Exception as e:
+            if not skip_failures or len(entries) == 1:
+                self._record_failures(entries, set())
+                if skip_failures:
+                    logger.warning(f"Skipping video {entries[0]['job_id']}: {e}")
+                    return 0
+                raise
+            return sum(self.store_video_analyses([entry], skip_failures=True) for entry in entries)
+
+        by_tenant: Dict[str, List[Tuple[Dict[str, Any], str, np.ndarray]]] = {}
+        for entry, searchable_text, embedding in zip(entries, texts, embeddings):
+            by_tenant.setdefault(entry.get("user_id") or _DEFAULT_TENANT, []).append((entry, searchable_text, embedding))
+        for tenant, items in by_tenant.items():
+            for entry, _, _ in items:
+                with self._lock:
+                    previous = self._job_tenants.get(entry["job_id"])
+                if previous and previous != tenant:
+                    with self._tenant_lock(previous):
+                        with self._lock:
+                            old = self._tenants.get(previous)
+                        if old is not None:
+                            old.remove(entry["job_id"])
+            with self._tenant_lock(tenant):
+                index = self._tenant(tenant, dim=len(items[0][2]))
+                for entry, searchable_text, embedding in items:
+                    analysis_results = entry["analysis_results"]
+                    doc = {
+                        "video_key": entry["video_metadata"].get("key", ""),
+                        "bucket": entry["video_metadata"].get("bucket", ""),
+                        "semantic_tags": (analysis_results.get("label_detection") or {}).get("semantic_tags", [])[:50],
+                        "analysis_type": analysis_results.get("analysis_type", "unknown"),
+                        "timestamp": datetime.now().isoformat(),
+                        "has_labels": "label_detection" in analysis_results,
+                        "has_text": "text_detection" in analysis_results,
+                        "has_blackframes": "blackframes" in analysis_results,
+                        "session_id": entry.get("session_id"),
+                        "document": searchable_text,
+                    }
+                    index.add(entry["job_id"], embedding, doc)
+                with self._lock:
+                    for entry, _, _ in items:
+                        self._job_tenants[entry["job_id"]] = tenant
+                    if index.needs_graph:
+                        self._start_graph_build(tenant)
+        self._record_failures(entries, {e["job_id"] for e in entries})
+        logger.info(f"Stored {len(entries)} vectors in local index")
+        return len(entries)
+
+    def semantic_search(self, query: str, limit: int = 10, user_id: str = None, session_id: str = None) -> List[Dict[str, Any]]:
+        """Nearest videos of the user (optionally one session) by cosine similarity"""
+        try:
+            tenant = user_id or _DEFAULT_TENANT
+            self._ensure_coverage(tenant)
+            with self._tenant_lock(tenant):
+                if self._tenant(tenant) is None:
+                    return []
+            query_vector = self._embed([query])[0]
+            allowed = (lambda doc: doc.get("session_id") == session_id) if session_id else None
+            with self._tenant_lock(tenant):
+                index = self._tenant(tenant)
+                ranked = [(index.row_jobs[row], score, index.docs[row]) for row, score in
+                          index.search(query_vector, limit, allowed=allowed)]
+            return [
+                {
+                    "job_id": job_id,
+                    "score": score,
+                    "metadata": {
+                        "video_key": doc.get("video_key", ""),
+                        "bucket": doc.get("bucket", ""),
+                        "semantic_tags": doc.get("semantic_tags", []),
+                        "analysis_type": doc.get("analysis_type", ""),
+                        "has_labels": doc.get("has_labels", False),
+                        "has_text": doc.get("has_text", False),
+                        "has_blackframes": doc.get("has_blackframes", False),
+                        "timestamp": doc.get("timestamp", ""),
+                    },
+                    "document": doc.get("document", ""),
+                }
+                for job_id, score, doc in ranked
+            ]
+        except Exception as e:
+            logger.error(f"Semantic search failed: {e}")
+            return []
+
+    def get_video_count(self) -> int:
+        self._open_all()
+        with self._lock:
+            return sum(len(index) for index in self._tenants.values())
+
+    def delete_video(self, job_id: str):
+        """Delete video from its owner's index"""
+        try:
+            with self._lock:
+                known = job_id in self._job_tenants
+            if not known:
+                self._open_all()
+            with self._lock:
+                tenant = self._job_tenants.get(job_id)
+            if tenant is None:
+                return
+            with self._tenant_lock(tenant):
+                with self._lock:
+                    if self._job_tenants.get(job_id) != tenant:
+                        return
+                    del self._job_tenants[job_id]
+                    index = self._tenants.get(tenant)
+                    building = tenant in self._graph_builds
+                if index is None or not index.remove(job_id):
+                    return
+                if index.deleted * 4 > index.count and index.count > 64 and not building:
+                    self._compact(tenant, index)
+            logger.info(f"Deleted video {job_id} from local vector index")
+        except Exception as e:
+            logger.error(f"Failed to delete video: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._open_all()
+        with self._lock:
+            return {
+                "total_videos": sum(len(index) for index in self._tenants.values()),
+                "database_type": f"local_vector_index_{self.dtype}",
+                "llm_provider": "none",
+                "available": True,
+                "tenants": len(self._tenants),
+                "ann_tenants": sum(1 for index in self._tenants.values() if index.graph_ready),
+                "pending_videos": sum(len(job_ids) for job_ids in self._pending.values()),
+                "syncing_tenants": len(self._syncing),
+                "last_updated": datetime.now().isoformat(),
+            }
+
+
+# Singleton instance
+_local_vector_db = None
+
+def get_local_vector_db() -> LocalVectorDB:
+    """Get local vector index singleton"""
+    global _local_vector_db
+    if _local_vector_db is None:
+        _local_vector_db = LocalVectorDB()
+    return _local_vector_db
@@ -0,0 +1,231 @@
+"""
+Time-coded moments: where in a video a label or text is visible.
+
+At indexing time the per-frame detections are reduced to merged time intervals
+per analyzed term and stored on the job row as ``moments`` (compact JSON):
+
+    {"v": 1, "terms": {"car": [[0.0, 13.0], [30.0, 33.0]], "bmw": [[2.5, 6.5]], ...}}
+
+Labels come from the label detection's ``label_segments`` (consecutive sampled
+frames already merged by the worker) or, for older standalone results, from
+``labels_by_frame``; text from the timestamped OCR lines. Each sample is widened
+by half its sampling interval, since the object was visible around it.
+
+:class:`MomentIndex` holds (term -> job -> sorted intervals) for one tenant. A
+query may combine terms ("car and person"): each part may match any of its
+synonyms, and a video matches where all parts occur within ``window_seconds``
+of each other (interval intersection after widening every part by half the
+window).
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from text_analysis import analyze, analyze_query
+
+MOMENTS_VERSION = 1
+
+LABEL_SAMPLE_SECONDS = 2.0
+TEXT_SAMPLE_SECONDS = 1.0
+MIN_LABEL_CONFIDENCE = 70
+MIN_TEXT_CONFIDENCE = 50
+
+MAX_TERMS = 300
+MAX_INTERVALS_PER_TERM = 50
+
+DEFAULT_WINDOW_SECONDS = 2.0
+
+_CONJUNCTION_RE = re.compile(r"\s+(?:and|und|with|mit|sowie|&|\+)\s+", re.IGNORECASE)
+
+Interval = Tuple[float, float]
+
+
+def merge_intervals(intervals: Iterable[Sequence[float]], gap: float = 0.0) -> List[List[float]]:
+    """Sorted, non-overlapping intervals (ones at most ``gap`` apart are joined)"""
+    merged: List[List[float]] = []
+    for start, end in sorted((float(s), float(e)) for s, e in intervals):
+        if merged and start - merged[-1][1] <= gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def intersect_intervals(a: Sequence[Sequence[float]], b: Sequence[Sequence[float]]) -> List[List[float]]:
+    """Intersection of two sorted interval lists (two-pointer sweep)"""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if start <= end:
+            result.append([start, end])
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def widen(intervals: Sequence[Sequence[float]], by: float) -> List[List[float]]:
+    return merge_intervals([max(0.0, s - by), e + by] for s, e in intervals)
+
+
+def _num(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _label_samples(analysis: Dict[str, Any]) -> Tuple[Dict[str, List[List[float]]], float]:
+    """Label name -> raw [start, end] ranges, and the label sampling interval"""
+    label_data = analysis.get("label_detection")
+    if not isinstance(label_data, dict):
+        label_data = analysis  # standalone label detection result
+    step = _num(label_data.get("sample_interval_seconds")) or LABEL_SAMPLE_SECONDS
+    segments = label_data.get("label_segments")
+    if isinstance(segments, dict):
+        return {str(name): [list(map(float, seg)) for seg in segs] for name, segs in segments.items()}, step
+    ranges: Dict[str, List[List[float]]] = {}
+    for detection in label_data.get("labels_by_frame") or []:
+        if not isinstance(detection, dict) or not detection.get("name"):
+            continue
+        ts = _num(detection.get("timestamp"))
+        if ts is None or (_num(detection.get("confidence")) or 0) < MIN_LABEL_CONFIDENCE:
+            continue
+        ranges.setdefault(str(detection["name"]), []).append([ts, ts])
+    return ranges, step
+
+
+def _text_samples(analysis: Dict[str, Any]) -> List[Tuple[str, float]]:
+    text_data = analysis.get("text_detection")
+    detections = text_data.get("text_detections", []) if isinstance(text_data, dict) else analysis.get("texts", [])
+    samples = []
+    for detection in detections or []:
+        if not isinstance(detection, dict) or not detection.get("text"):
+            continue
+        ts = _num(detection.get("timestamp"))
+        if ts is None or (_num(detection.get("confidence")) or 100) < MIN_TEXT_CONFIDENCE:
+            continue
+        samples.append((str(detection["text"]), ts))
+    return samples
+
+
+def build_moments(analysis: Any) -> Dict[str, Any]:
+    """Moments dict (term -> merged intervals) for a parsed analysis result"""
+    if not isinstance(analysis, dict):
+        analysis = {}
+    raw: Dict[str, List[List[float]]] = {}
+
+    label_ranges, label_step = _label_samples(analysis)
+    for name, ranges in label_ranges.items():
+        padded = [[s - label_step / 2, e + label_step / 2] for s, e in ranges]
+        for term in dict.fromkeys(analyze(name)):
+            raw.setdefault(term, []).extend(padded)
+
+    for text, ts in _text_samples(analysis):
+        for term in dict.fromkeys(analyze(text)):
+            raw.setdefault(term, []).append([ts - TEXT_SAMPLE_SECONDS / 2, ts + TEXT_SAMPLE_SECONDS / 2])
+
+    terms = {}
+    for term, intervals in raw.items():
+        merged = merge_intervals(([max(0.0, s), e] for s, e in intervals), gap=label_step / 2)
+        terms[term] = [[round(s, 1), round(e, 1)] for s, e in merged[:MAX_INTERVALS_PER_TERM]]
+    # Keep the terms seen longest if a video has very many
+    if len(terms) > MAX_TERMS:
+        keep = sorted(terms, key=lambda t: -sum(e - s for s, e in terms[t]))[:MAX_TERMS]
+        terms = {t: terms[t] for t in keep}
+    return {"v": MOMENTS_VERSION, "terms": terms}
+
+
+def dumps_moments(moments: Dict[str, Any]) -> str:
+    return json.dumps(moments, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_moments(value: Any) -> Optional[Dict[str, Any]]:
+    """Parse a stored ``moments`` attribute (None if missing or outdated)"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return None
+    if not isinstance(value, dict) or value.get("v") != MOMENTS_VERSION:
+        return None
+    return value
+
+
+def query_parts(query: str) -> List[List[str]]:
+    """Terms (with synonyms) of each conjunct of a moment query ("car and person")"""
+    parts = []
+    for part in _CONJUNCTION_RE.split(query or ""):
+        terms = analyze_query(part).terms
+        if terms:
+            parts.append(terms)
+    return parts
+
+
+class MomentIndex:
+    """(term -> job_id -> sorted intervals) for one tenant (not thread-safe)"""
+
+    def __init__(self):
+        self._terms: Dict[str, Dict[str, List[List[float]]]] = {}
+        self._by_job: Dict[str, List[str]] = {}
+
+    def add(self, job_id: str, moments: Optional[Dict[str, Any]]) -> int:
+        """Index a job's moments (replacing earlier ones); returns the number of entries"""
+        self.remove(job_id)
+        terms = (moments or {}).get("terms") or {}
+        for term, intervals in terms.items():
+            self._terms.setdefault(term, {})[job_id] = [[float(s), float(e)] for s, e in intervals]
+        if terms:
+            self._by_job[job_id] = list(terms)
+        return len(terms)
+
+    def remove(self, job_id: str) -> int:
+        terms = self._by_job.pop(job_id, [])
+        for term in terms:
+            jobs = self._terms.get(term)
+            if jobs is not None:
+                jobs.pop(job_id, None)
+                if not jobs:
+                    del self._terms[term]
+        return len(terms)
+
+    def _part_intervals(self, terms: Sequence[str]) -> Dict[str, List[List[float]]]:
+        """job_id -> union of the intervals of any of ``terms``"""
+        by_job: Dict[str, List[List[float]]] = {}
+        for term in terms:
+            for job_id, intervals in self._terms.get(term, {}).items():
+                by_job.setdefault(job_id, []).extend(intervals)
+        return {job_id: merge_intervals(intervals) for job_id, intervals in by_job.items()}
+
+    def search(self, parts: Sequence[Sequence[str]], window_seconds: float = DEFAULT_WINDOW_SECONDS,
+               allowed=None) -> List[Tuple[str, List[List[float]]]]:
+        """``[(job_id, segments)]`` where all parts co-occur, longest total duration first"""
+        if not parts:
+            return []
+        matches: Optional[Dict[str, List[List[float]]]] = None
+        for terms in parts:
+            current = self._part_intervals(terms)
+            if len(parts) > 1:
+                current = {job_id: widen(intervals, window_seconds / 2) for job_id, intervals in current.items()}
+            if matches is None:
+                matches = current
+                continue
+            matches = {
+                job_id: segments
+                for job_id, segments in (
+                    (job_id, intersect_intervals(matches[job_id], current[job_id]))
+                    for job_id in matches.keys() & current.keys()
+                )
+                if segments
+            }
+        results = [
+            (job_id, [[round(s, 1), round(e, 1)] for s, e in segments])
+            for job_id, segments in (matches or {}).items()
+            if allowed is None or allowed(job_id)
+        ]
+        results.sort(key=lambda r: (-sum(e - s for s, e in r[1]), r[0]))
+        return results
@@ -0,0 +1,250 @@
+"""
+Token-budgeted context assembly for RAG prompts.
+
+Candidate facts about the user's videos (labels, OCR lines, blackframe stats)
+are scored against the question and packed greedily into an explicit token
+budget, so the prompt (and Bedrock latency) stays bounded no matter how many
+videos a user has. A video's header line is only paid for once one of its facts
+makes the cut.
+
+Facts come from the compact ``video_summary`` written at indexing time (see
+``video_summary``), or for rows indexed before summaries existed from
+``semantic_tags``, ``text_content`` and the ``summary`` counters. Raw
+``result`` JSON is parsed only if a caller passes rows that were never indexed.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from video_summary import load_summary
+
+# Rough size of a token for Claude models on mixed German/English text
+CHARS_PER_TOKEN = 4
+
+DEFAULT_TOKEN_BUDGET = 600
+
+_WORD_RE = re.compile(r"[0-9a-zA-ZäöüÄÖÜß]+")
+
+_STOPWORDS = {
+    "welche", "welcher", "welches", "videos", "video", "enthalten", "zeig", "zeige", "mir", "mit",
+    "haben", "gibt", "das", "die", "der", "den", "dem", "ein", "eine", "einen", "sind", "wie", "was",
+    "wo", "wer", "wann", "warum", "und", "oder", "in", "im", "es", "ist", "the", "a", "an", "and",
+    "or", "of", "is", "are", "which", "what", "show", "me", "with", "my",
+}
+
+_BLACKFRAME_TERMS = ("blackframe", "black frame", "schwarz", "dunkel", "dark")
+_TEXT_TERMS = ("text", "schrift", "ocr", "kennzeichen", "license", "logo", "geschrieben")
+
+# Base weight per fact kind (before query overlap)
+_KIND_WEIGHT = {"label": 1.0, "text": 0.8, "blackframes": 0.5}
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+def query_terms(query: str) -> List[str]:
+    return [w for w in (m.lower() for m in _WORD_RE.findall(query or "")) if len(w) > 1 and w not in _STOPWORDS]
+
+
+@dataclass
+class VideoFacts:
+    """What the prompt may say about one video"""
+
+    job_id: str
+    name: str
+    labels: List[str] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    blackframes_count: int = 0
+    blackframe_samples: List[float] = field(default_factory=list)
+
+
+@dataclass
+class ContextResult:
+    text: str
+    tokens: int
+    videos_included: int
+    facts_included: int
+    facts_dropped: int
+
+
+def _parse_json(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return {}
+    return value
+
+
+def facts_from_analysis(job_id: str, name: str, results: Dict[str, Any]) -> VideoFacts:
+    """Facts from a parsed analysis result (rows without precomputed fields)"""
+    facts = VideoFacts(job_id=job_id, name=name)
+    if not isinstance(results, dict):
+        return facts
+    label_data = results.get("label_detection") or {}
+    for label in label_data.get("unique_labels", []) or []:
+        if isinstance(label, dict) and label.get("name") and label.get("max_confidence", 0) > 70:
+            facts.labels.append(label["name"])
+    text_data = results.get("text_detection") or {}
+    for text in text_data.get("text_detections", []) or []:
+        if isinstance(text, dict) and text.get("text") and text.get("confidence", 0) > 50:
+            facts.texts.append(text["text"])
+    bf = results.get("blackframes") or {}
+    if isinstance(bf, dict):
+        frames = bf.get("black_frames") or []
+        facts.blackframes_count = int(bf.get("blackframes_detected") or (len(frames) if isinstance(frames, list) else 0))
+        for frame in (frames if isinstance(frames, list) else [])[:3]:
+            try:
+                if frame.get("timestamp") is not None:
+                    facts.blackframe_samples.append(float(frame["timestamp"]))
+            except (AttributeError, TypeError, ValueError):
+                continue
+    return facts
+
+
+def _time_range(start: Any, end: Any) -> str:
+    if start is None or end is None:
+        return ""
+    if start == end:
+        return f" ({start}s)"
+    return f" ({start}-{end}s)"
+
+
+def facts_from_summary(job_id: str, name: str, summary: Dict[str, Any]) -> VideoFacts:
+    """Facts from a stored video summary (labels carry the time range they were seen in)"""
+    blackframes = summary.get("blackframes") or {}
+    segments = blackframes.get("segments") or []
+    return VideoFacts(
+        job_id=job_id,
+        name=name,
+        labels=[l["name"] + _time_range(l.get("from"), l.get("to")) for l in summary.get("labels", [])],
+        texts=[t["text"] for t in summary.get("texts", [])],
+        blackframes_count=int(blackframes.get("count", 0) or 0),
+        blackframe_samples=[float(seg[0]) for seg in segments[:3]],
+    )
+
+
+def facts_from_job(job: Dict[str, Any]) -> VideoFacts:
+    """Facts for a job row, preferring the fields written at indexing time"""
+    job_id = str(job.get("job_id", "unknown"))
+    video = _parse_json(job.get("video_info") or job.get("video") or {})
+    if not isinstance(video, dict):
+        video = {}
+    s3_key = job.get("s3_key") or ""
+    name = video.get("filename") or video.get("key") or s3_key or "Unknown"
+
+    stored = load_summary(job.get("video_summary"))
+    if stored is not None:
+        return facts_from_summary(job_id, name, stored)
+    if job.get("search_updated_at") is not None:
+        summary = job.get("summary") or {}
+        return VideoFacts(
+            job_id=job_id,
+            name=name,
+            labels=[str(t) for t in job.get("semantic_tags") or []],
+            texts=[str(t) for t in job.get("text_content") or []],
+            blackframes_count=int(summary.get("blackframes_count", 0) or 0),
+        )
+    return facts_from_analysis(job_id, name, _parse_json(job.get("result") or job.get("analysis_results") or {}))
+
+
+def facts_from_search_result(result: Dict[str, Any]) -> VideoFacts:
+    """Facts for a ``semantic_search`` result (metadata comes from the indexed row)"""
+    metadata = result.get("metadata") or {}
+    key = metadata.get("video_key") or ""
+    name = key.split("/")[-1] if key else "Video"
+    stored = load_summary(metadata.get("video_summary"))
+    if stored is not None:
+        return facts_from_summary(str(result.get("job_id", "")), name, stored)
+    return VideoFacts(
+        job_id=str(result.get("job_id", "")),
+        name=name,
+        labels=[str(t) for t in metadata.get("semantic_tags") or []],
+        texts=[str(t) for t in metadata.get("text_content") or []],
+        blackframes_count=int(metadata.get("blackframes_count", 0) or 0),
+    )
+
+
+def _overlap(terms: Sequence[str], text: str) -> float:
+    if not terms:
+        return 0.0
+    lowered = text.lower()
+    return sum(1.0 for term in terms if term in lowered)
+
+
+def _blackframe_line(video: VideoFacts) -> str:
+    if video.blackframe_samples:
+        samples = ", ".join(f"{s:.1f}s" for s in video.blackframe_samples[:3])
+        return f"Blackframes: {video.blackframes_count} (e.g., {samples})"
+    return f"Blackframes: {video.blackframes_count}"
+
+
+def build_context(query: str, videos: Sequence[VideoFacts], token_budget: int = DEFAULT_TOKEN_BUDGET,
+                  max_facts_per_kind: int = 15) -> ContextResult:
+    """
+    Pack the facts most relevant to ``query`` into ``token_budget`` tokens.
+
+    The rendered text lists videos in order of their best fact, one line per
+    fact kind, in the same shape the chat prompts used before.
+    """
+    terms = query_terms(query)
+    q = (query or "").lower()
+    wants_blackframes = any(t in q for t in _BLACKFRAME_TERMS)
+    wants_text = any(t in q for t in _TEXT_TERMS)
+
+    # (score, video index, rank within video, kind, value)
+    candidates = []
+    for vi, video in enumerate(videos):
+        # Earlier videos (search rank / recency) win ties
+        position = 1.0 / (1 + vi * 0.1)
+        for rank, label in enumerate(video.labels[:max_facts_per_kind]):
+            score = _KIND_WEIGHT["label"] * position / (1 + rank * 0.15) + 3.0 * _overlap(terms, label)
+            candidates.append((score, vi, rank, "label", label))
+        for rank, text in enumerate(video.texts[:max_facts_per_kind]):
+            score = _KIND_WEIGHT["text"] * position / (1 + rank * 0.15) + 3.0 * _overlap(terms, text)
+            if wants_text:
+                score += 1.5
+            candidates.append((score, vi, rank, "text", text))
+        if video.blackframes_count:
+            score = _KIND_WEIGHT["blackframes"] * position + (3.0 if wants_blackframes else 0.0)
+            candidates.append((score, vi, 0, "blackframes", _blackframe_line(video)))
+    candidates.sort(key=lambda c: (-c[0], c[1], c[2]))
+
+    used = 0
+    chosen: Dict[int, Dict[str, List[str]]] = {}
+    best: Dict[int, float] = {}
+    dropped = 0
+    for score, vi, _, kind, value in candidates:
+        cost = estimate_tokens(value) + 1
+        if vi not in chosen:
+            video = videos[vi]
+            cost += estimate_tokens(f"\n{len(chosen) + 1}. Video: {video.name}\n   Job ID: {video.job_id}") + 6
+        if used + cost > token_budget:
+            dropped += 1
+            continue
+        used += cost
+        chosen.setdefault(vi, {}).setdefault(kind, []).append(value)
+        best.setdefault(vi, score)
+
+    lines = []
+    for n, vi in enumerate(sorted(chosen, key=lambda i: (-best[i], i)), 1):
+        video = videos[vi]
+        kinds = chosen[vi]
+        lines.append(f"\n{n}. Video: {video.name}")
+        if kinds.get("label"):
+            lines.append(f"\n   Labels detected: {', '.join(kinds['label'])}")
+        if kinds.get("text"):
+            lines.append(f"\n   Text detected: {', '.join(kinds['text'])}")
+        if kinds.get("blackframes"):
+            lines.append(f"\n   {kinds['blackframes'][0]}")
+        lines.append(f"\n   Job ID: {video.job_id}")
+    return ContextResult(
+        text="".join(lines),
+        tokens=used,
+        videos_included=len(chosen),
+        facts_included=sum(len(v) for kinds in chosen.values() for v in kinds.values()),
+        facts_dropped=dropped,
+    )
@@ -0,0 +1,268 @@
+"""
+Facet bitmaps for filtered search and filter-sidebar counts.
+
+Every job of a tenant gets a small integer id; each facet value ("has_text" =
+"true", "category" = "Vehicle", "session" = ..., "month" = "2026-10",
+"duration" = "30s-2m") keeps a bitmap (a Python int) of the ids that have it,
+updated when a job is indexed or removed. Filters are ANDs of bitmaps (values
+of one field are ORed), date and duration ranges are cut from sorted value
+lists, and the count of every facet value is one AND plus a popcount - no
+table scan and no pass over the rows.
+
+Counts follow the usual sidebar semantics: a field's counts ignore that field's
+own filter (so the other values of a selected field stay visible) but apply
+all the others.
+"""
+
+import bisect
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Fields counted in the sidebar, in display order
+FACET_FIELDS = ("has_text", "has_blackframes", "has_labels", "category", "session", "month", "duration")
+
+# Filter keys accepted by FacetIndex.filter (besides the facet fields above)
+RANGE_FILTERS = {
+    "created_from": ("created_at", "min"),
+    "created_to": ("created_at", "max"),
+    "min_duration": ("duration_seconds", "min"),
+    "max_duration": ("duration_seconds", "max"),
+}
+FILTER_FIELDS = {"has_text", "has_blackframes", "has_labels", "categories", "session_id"} | set(RANGE_FILTERS)
+
+# (label, upper bound in seconds) of the duration buckets
+DURATION_BUCKETS = (("<30s", 30), ("30s-2m", 120), ("2-10m", 600), (">10m", None))
+
+# Values returned per multi-valued field (most frequent first)
+MAX_FACET_VALUES = 50
+
+
+def _num(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def duration_bucket(seconds: float) -> str:
+    for label, upper in DURATION_BUCKETS:
+        if upper is None or seconds < upper:
+            return label
+    return DURATION_BUCKETS[-1][0]
+
+
+def analysis_facets(analysis: Any) -> Tuple[List[str], Optional[Decimal]]:
+    """(label categories, duration in seconds) of a parsed analysis result, for the job row"""
+    if not isinstance(analysis, dict):
+        return [], None
+    label_data = analysis.get("label_detection")
+    if not isinstance(label_data, dict):
+        label_data = analysis  # standalone label detection result
+    categories = label_data.get("categories") or label_data.get("categories_found") or []
+    duration = _num(label_data.get("duration_seconds"))
+    if duration is None:
+        for part in (analysis, label_data):
+            metadata = part.get("video_metadata")
+            if isinstance(metadata, dict) and _num(metadata.get("duration_seconds")) is not None:
+                duration = _num(metadata.get("duration_seconds"))
+                break
+    # DynamoDB numbers must be Decimal
+    return sorted({str(c) for c in categories if c}), None if duration is None else Decimal(str(round(duration, 2)))
+
+
+def row_facets(row: Dict[str, Any]) -> Tuple[Dict[str, List[str]], Dict[str, float]]:
+    """(field -> values, numeric field -> value) of a searchable job row"""
+    values: Dict[str, List[str]] = {
+        "has_text": ["true" if row.get("has_text") else "false"],
+        "has_blackframes": ["true" if row.get("has_blackframes") else "false"],
+        "has_labels": ["true" if row.get("has_labels") else "false"],
+        "category": [str(c) for c in row.get("label_categories") or []],
+    }
+    if row.get("session_id"):
+        values["session"] = [str(row["session_id"])]
+    numbers: Dict[str, float] = {}
+    created_at = _num(row.get("created_at"))
+    if created_at is not None:
+        numbers["created_at"] = created_at
+        values["month"] = [time.strftime("%Y-%m", time.gmtime(created_at))]
+    duration = _num(row.get("duration_seconds"))
+    if duration is not None:
+        numbers["duration_seconds"] = duration
+        values["duration"] = [duration_bucket(duration)]
+    return values, numbers
+
+
+def _bool_value(value: Any) -> str:
+    if isinstance(value, str):
+        return "true" if value.lower() in ("true", "1", "yes") else "false"
+    return "true" if value else "false"
+
+
+@dataclass
+class FacetResult:
+    bitmap: int
+    counts: Dict[str, Dict[str, int]]
+
+    @property
+    def total(self) -> int:
+        return self.bitmap.bit_count()
+
+
+class FacetIndex:
+    """Facet value bitmaps over one tenant's jobs (not thread-safe)"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._jobs: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._all = 0
+        # (field, value) -> bitmap of ids
+        self._bitmaps: Dict[Tuple[str, str], int] = {}
+        self._keys: Dict[int, List[Tuple[str, str]]] = {}
+        # numeric field -> sorted [(value, id)]
+        self._sorted: Dict[str, List[Tuple[float, int]]] = {}
+        self._numbers: Dict[int, Dict[str, float]] = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, job_id: str, values: Dict[str, Iterable[str]], numbers: Dict[str, float]) -> int:
+        """Index a job's facet values (replacing earlier ones); returns the number of entries"""
+        self.remove(job_id)
+        doc = self._free.pop() if self._free else len(self._jobs)
+        if doc == len(self._jobs):
+            self._jobs.append(job_id)
+        else:
+            self._jobs[doc] = job_id
+        self._ids[job_id] = doc
+        bit = 1 << doc
+        self._all |= bit
+        keys = [(field, value) for field, field_values in values.items() for value in dict.fromkeys(field_values)]
+        for key in keys:
+            self._bitmaps[key] = self._bitmaps.get(key, 0) | bit
+        self._keys[doc] = keys
+        for field, value in numbers.items():
+            bisect.insort(self._sorted.setdefault(field, []), (value, doc))
+        self._numbers[doc] = dict(numbers)
+        return len(keys) + len(numbers)
+
+    def remove(self, job_id: str) -> int:
+        doc = self._ids.pop(job_id, None)
+        if doc is None:
+            return 0
+        mask = ~(1 << doc)
+        self._all &= mask
+        keys = self._keys.pop(doc, [])
+        for key in keys:
+            bitmap = self._bitmaps[key] & mask
+            if bitmap:
+                self._bitmaps[key] = bitmap
+            else:
+                del self._bitmaps[key]
+        numbers = self._numbers.pop(doc, {})
+        for field, value in numbers.items():
+            entries = self._sorted[field]
+            i = bisect.bisect_left(entries, (value, doc))
+            if i < len(entries) and entries[i] == (value, doc):
+                del entries[i]
+        self._jobs[doc] = None
+        self._free.append(doc)
+        return len(keys) + len(numbers)
+
+    def bitmap_of(self, job_ids: Iterable[str]) -> int:
+        return self._from_docs(self._ids[j] for j in job_ids if j in self._ids)
+
+    def job_ids(self, bitmap: int) -> List[str]:
+        """Job ids of the set bits (in id order)"""
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+        return [
+            self._jobs[(i << 3) + bit]
+            for i, byte in enumerate(data) if byte
+            for bit in range(8) if byte >> bit & 1
+        ]
+
+    def number(self, job_id: str, field: str) -> Optional[float]:
+        doc = self._ids.get(job_id)
+        return None if doc is None else self._numbers.get(doc, {}).get(field)
+
+    def _from_docs(self, docs: Iterable[int]) -> int:
+        # Set bits in a byte array and convert once (OR-ing shifted ints is quadratic)
+        data = bytearray((len(self._jobs) + 7) // 8)
+        for doc in docs:
+            data[doc >> 3] |= 1 << (doc & 7)
+        return int.from_bytes(data, "little")
+
+    def _range(self, field: str, low: Optional[float], high: Optional[float]) -> int:
+        entries = self._sorted.get(field, [])
+        start = 0 if low is None else bisect.bisect_left(entries, (low, -1))
+        end = len(entries) if high is None else bisect.bisect_right(entries, (high, len(self._jobs)))
+        return self._from_docs(doc for _, doc in entries[start:end])
+
+    def _any_of(self, field: str, values: Iterable[str]) -> int:
+        bitmap = 0
+        for value in values:
+            bitmap |= self._bitmaps.get((field, value), 0)
+        return bitmap
+
+    def _filter_bitmaps(self, filters: Dict[str, Any]) -> Dict[str, int]:
+        """facet field -> bitmap of its filter (fields without a filter are omitted)"""
+        unknown = set(filters) - FILTER_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown facet filter: {', '.join(sorted(unknown))}")
+        bitmaps: Dict[str, int] = {}
+        for field in ("has_text", "has_blackframes", "has_labels"):
+            if filters.get(field) is not None:
+                bitmaps[field] = self._any_of(field, [_bool_value(filters[field])])
+        if filters.get("categories"):
+            categories = filters["categories"]
+            bitmaps["category"] = self._any_of("category", [categories] if isinstance(categories, str) else categories)
+        if filters.get("session_id"):
+            bitmaps["session"] = self._any_of("session", [str(filters["session_id"])])
+        bounds: Dict[str, Dict[str, float]] = {}
+        for key, (field, side) in RANGE_FILTERS.items():
+            value = _num(filters.get(key))
+            if value is not None:
+                bounds.setdefault(field, {})[side] = value
+        for field, bound in bounds.items():
+            facet = "month" if field == "created_at" else "duration"
+            bitmaps[facet] = self._range(field, bound.get("min"), bound.get("max"))
+        return bitmaps
+
+    def filter(self, filters: Dict[str, Any], candidates: Optional[int] = None) -> FacetResult:
+        """Jobs matching all filters (within ``candidates``, default all) and the facet counts"""
+        base = self._all if candidates is None else candidates & self._all
+        field_filters = self._filter_bitmaps(filters or {})
+        matched = base
+        for bitmap in field_filters.values():
+            matched &= bitmap
+
+        counts: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS}
+        # Per field: everything but the field's own filter
+        scope: Dict[str, int] = {}
+        for field in FACET_FIELDS:
+            if field not in field_filters:
+                scope[field] = matched
+                continue
+            bitmap = base
+            for other, other_bitmap in field_filters.items():
+                if other != field:
+                    bitmap &= other_bitmap
+            scope[field] = bitmap
+        for (field, value), bitmap in self._bitmaps.items():
+            n = (bitmap & scope.get(field, matched)).bit_count()
+            if n:
+                counts.setdefault(field, {})[value] = n
+        for field, values in counts.items():
+            if field == "duration":
+                order = [label for label, _ in DURATION_BUCKETS]
+                counts[field] = {label: values[label] for label in order if label in values}
+            elif field == "month":
+                counts[field] = dict(sorted(values.items(), reverse=True))
+            else:
+                ranked = sorted(values.items(), key=lambda kv: (-kv[1], kv[0]))
+                counts[field] = dict(ranked[:MAX_FACET_VALUES])
+        return FacetResult(matched, counts)
@@ -0,0 +1,403 @@
+"""
+Incremental search indexing of completed jobs.
+
+Each job version is indexed exactly once: before calling ``store_video_analysis``
+the indexer claims the job with a conditional update that sets
+``indexed_version`` to the job's ``updated_at``; a failed claim means another
+process (the worker at completion, or another API instance) already indexed
+that version. A failed indexing run releases the claim so it is retried.
+
+``IncrementalIndexer`` catches up on jobs the worker did not index (older jobs,
+worker failures). It keeps a high-water mark of ``updated_at`` in the stats
+table and only looks at jobs changed since then (minus a small lag window for
+clock skew between writers). It runs in the background of the API, never
+inside a request.
+
+Only one API instance at a time looks for candidates: the holder of a lease row
+in the stats table. It queries the ``status``/``updated_at`` GSI
+``INDEXER_STATUS_INDEX`` (created with the job table, see
+:func:`status_index_definition`). While the index does not exist or is still
+being built it scans the job table instead; a filter on ``updated_at`` does not
+reduce the read units of a scan, so a scan pass costs a full table read, and
+after each scan that finds nothing new the next scans are skipped for twice as
+many passes (up to ``INDEXER_MAX_SCAN_SKIP``). The jobs it sees completing are
+appended to a bounded feed row; every instance reads that one row per pass to
+run its per-process completion callback (cache invalidation, the local vector
+index etc.). Without a vector DB (``vector_db_provider=None``) the indexer only
+feeds completions and indexes nothing itself.
+
+Shared by the API and the worker.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from aws_clients import get_resource
+from job_stats import STATS_TABLE
+
+logger = logging.getLogger(__name__)
+
+# Re-check jobs this many seconds older than the watermark (writers' clocks differ)
+INDEXER_LAG_SECONDS = int(os.environ.get("INDEXER_LAG_SECONDS", "300"))
+
+# A crashed leader is replaced after this long
+INDEXER_LEASE_SECONDS = int(os.environ.get("INDEXER_LEASE_SECONDS", "180"))
+
+# GSI with partition key ``status`` and sort key ``updated_at`` ("" disables it, see module docstring)
+INDEXER_STATUS_INDEX = os.environ.get("INDEXER_STATUS_INDEX", "status-updated_at-index")
+
+# Without the index: at most this many passes are skipped between two table scans
+INDEXER_MAX_SCAN_SKIP = int(os.environ.get("INDEXER_MAX_SCAN_SKIP", "15"))
+
+# Completions kept in the feed row; instances that fall further behind skip the gap
+FEED_SIZE = 500
+
+WATERMARK_KEY = {"pk": "INDEXER", "sk": "WATERMARK"}
+LEASE_KEY = {"pk": "INDEXER", "sk": "LEASE"}
+FEED_KEY = {"pk": "INDEXER", "sk": "COMPLETED"}
+
+CANDIDATE_ATTRIBUTES = "job_id, updated_at, indexed_version, user_id, session_id"
+# Non-key attributes the status index projects (enough for candidates, no result blobs)
+STATUS_INDEX_ATTRIBUTES = ["indexed_version", "user_id", "session_id"]
+FEED_ATTRIBUTES = ("job_id", "updated_at", "user_id", "session_id")
+
+
+def status_index_definition(index_name: str) -> Dict[str, Any]:
+    """AttributeDefinitions and GSI spec of the indexer's status index (create_table / update_table)"""
+    return {
+        "AttributeDefinitions": [
+            {"AttributeName": "status", "AttributeType": "S"},
+            {"AttributeName": "updated_at", "AttributeType": "N"},
+        ],
+        "GlobalSecondaryIndex": {
+            "IndexName": index_name,
+            "KeySchema": [
+                {"AttributeName": "status", "KeyType": "HASH"},
+                {"AttributeName": "updated_at", "KeyType": "RANGE"},
+            ],
+            "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": STATUS_INDEX_ATTRIBUTES},
+        },
+    }
+
+
+def claim_job_version(table, job_id: str, updated_at) -> bool:
+    """Claim ``job_id`` at version ``updated_at`` for indexing; False if already claimed"""
+    try:
+        table.update_item(
+            Key={"job_id": job_id},
+            UpdateExpression="SET indexed_version = :version",
+            ConditionExpression=(
+                "attribute_exists(job_id) AND "
+                "(attribute_not_exists(indexed_version) OR indexed_version < :version)"
+            ),
+            ExpressionAttributeValues={":version": updated_at},
+        )
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            return False
+        raise
+
+
+def release_job_version(table, job_id: str, updated_at) -> None:
+    """Undo a claim after a failed indexing run so the job is picked up again"""
+    try:
+        table.update_item(
+            Key={"job_id": job_id},
+            UpdateExpression="REMOVE indexed_version",
+            ConditionExpression="indexed_version = :version",
+            ExpressionAttributeValues={":version": updated_at},
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            logger.warning(f"Failed to release index claim for job {job_id}: {e}")
+
+
+def parse_analysis(job: Dict[str, Any]) -> Dict[str, Any]:
+    result = job.get("analysis_results") or job.get("result") or {}
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except json.JSONDecodeError:
+            return {}
+    return result if isinstance(result, dict) else {}
+
+
+def video_metadata_for(job: Dict[str, Any]) -> Dict[str, Any]:
+    video = job.get("video_info") or job.get("video") or {}
+    if isinstance(video, str):
+        try:
+            video = json.loads(video)
+        except json.JSONDecodeError:
+            video = {}
+    if not isinstance(video, dict):
+        video = {}
+    key = video.get("key") or job.get("s3_key", "")
+    return {
+        "key": key,
+        "bucket": video.get("bucket") or job.get("s3_bucket", ""),
+        "job_id": job.get("job_id"),
+        "filename": video.get("filename") or (key.split("/")[-1] if key else ""),
+        "s3_url": video.get("s3_url") or job.get("file_url", ""),
+    }
+
+
+def index_job_once(table, vector_db, job: Dict[str, Any],
+                   analysis_data: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Index one completed job row unless this version was already indexed.
+
+    Returns True if this call indexed the job.
+    """
+    job_id = job["job_id"]
+    updated_at = job.get("updated_at")
+    if updated_at is None:
+        updated_at = int(time.time())
+    if analysis_data is None:
+        analysis_data = parse_analysis(job)
+    if not analysis_data:
+        return False
+    if not claim_job_version(table, job_id, updated_at):
+        return False
+    try:
+        vector_db.store_video_analysis(
+            job_id,
+            video_metadata_for(job),
+            analysis_data,
+            user_id=job.get("user_id"),
+            session_id=job.get("session_id"),
+        )
+    except Exception:
+        release_job_version(table, job_id, updated_at)
+        raise
+    return True
+
+
+class IncrementalIndexer:
+    """Indexes jobs completed since the last high-water mark (one elected instance at a time)"""
+
+    def __init__(self, table_provider: Callable[[], Any], vector_db_provider: Optional[Callable[[], Any]],
+                 region_name: Optional[str] = None,
+                 on_completed: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 status_index: Optional[str] = None, lease_seconds: int = INDEXER_LEASE_SECONDS):
+        self._table_provider = table_provider
+        self._vector_db_provider = vector_db_provider
+        self._region_name = region_name
+        # Called with (job_id, updated_at, user_id, session_id) of jobs completed since the last pass
+        self._on_completed = on_completed
+        self._status_index = INDEXER_STATUS_INDEX if status_index is None else status_index
+        self._lease_seconds = lease_seconds
+        self._instance_id = uuid.uuid4().hex
+        # Last feed entry this instance has handed to on_completed (None: not started yet)
+        self._feed_seq: Optional[int] = None
+        # Scan fallback: passes to skip after scans that found nothing new
+        self._scan_backoff = 0
+        self._scans_to_skip = 0
+        self._index_warned = False
+
+    def _state_table(self):
+        return get_resource("dynamodb", region_name=self._region_name).Table(STATS_TABLE)
+
+    def get_watermark(self) -> int:
+        item = self._state_table().get_item(Key=WATERMARK_KEY, ConsistentRead=True).get("Item")
+        return int(item["updated_at"]) if item else 0
+
+    def set_watermark(self, value: int) -> None:
+        try:
+            self._state_table().update_item(
+                Key=WATERMARK_KEY,
+                UpdateExpression="SET updated_at = :wm, advanced_at = :now",
+                ConditionExpression="attribute_not_exists(updated_at) OR updated_at < :wm",
+                ExpressionAttributeValues={":wm": value, ":now": int(time.time())},
+            )
+        except ClientError as e:
+            # Another instance already moved further ahead
+            if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+
+    def acquire_lease(self) -> bool:
+        """Take or renew the indexer lease; False while another live instance holds it"""
+        now = int(time.time())
+        try:
+            self._state_table().update_item(
+                Key=LEASE_KEY,
+                UpdateExpression="SET owner_id = :me, expires_at = :expires",
+                ConditionExpression="attribute_not_exists(owner_id) OR owner_id = :me OR expires_at < :now",
+                ExpressionAttributeValues={
+                    ":me": self._instance_id, ":expires": now + self._lease_seconds, ":now": now,
+                },
+            )
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                return False
+            raise
+
+    def _query_candidates(self, table, since: int) -> List[Dict[str, Any]]:
+        """Completed jobs with ``updated_at >= since`` from the status index"""
+        candidates = []
+        for status in ("done", "completed"):
+            # Jobs without a result (the index does not project it) are skipped by index_pass
+            query_kwargs = {
+                "IndexName": self._status_index,
+                "KeyConditionExpression": Key("status").eq(status) & Key("updated_at").gte(since),
+                "ProjectionExpression": CANDIDATE_ATTRIBUTES,
+            }
+            while True:
+                resp = table.query(**query_kwargs)
+                candidates.extend(resp.get("Items", []))
+                if not resp.get("LastEvaluatedKey"):
+                    break
+                query_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        return candidates
+
+    def _scan_candidates(self, table, since: int) -> List[Dict[str, Any]]:
+        """Completed jobs with ``updated_at >= since`` that carry a result (full table read)"""
+        candidates = []
+        scan_kwargs = {
+            "FilterExpression": (
+                Attr("updated_at").gte(since)
+                & (Attr("status").eq("done") | Attr("status").eq("completed"))
+                & Attr("result").exists()
+            ),
+            "ProjectionExpression": CANDIDATE_ATTRIBUTES,
+        }
+        while True:
+            resp = table.scan(**scan_kwargs)
+            candidates.extend(resp.get("Items", []))
+            if not resp.get("LastEvaluatedKey"):
+                break
+            scan_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        return candidates
+
+    def _candidates(self, table, since: int) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """(candidates or None if this pass skips its scan, whether they come from a scan)"""
+        if self._status_index:
+            try:
+                return self._query_candidates(table, since), False
+            except ClientError as e:
+                # Missing or still backfilling index
+                if e.response.get("Error", {}).get("Code") not in ("ValidationException", "ResourceNotFoundException"):
+                    raise
+                if not self._index_warned:
+                    logger.warning(f"Indexer: status index {self._status_index} not usable, scanning instead: {e}")
+                    self._index_warned = True
+        if self._scans_to_skip > 0:
+            self._scans_to_skip -= 1
+            return None, True
+        return self._scan_candidates(table, since), True
+
+    def _append_feed(self, completed: List[Dict[str, Any]]) -> None:
+        """Append completions to the feed row (only the lease holder writes it)"""
+        state = self._state_table()
+        feed = state.get_item(Key=FEED_KEY, ConsistentRead=True).get("Item") or {}
+        seq = int(feed.get("seq", 0))
+        entries = list(feed.get("entries", []))
+        # A failed job keeps the watermark back, so later passes see its neighbours again
+        seen = {(e["job_id"], int(e.get("updated_at", 0))) for e in entries}
+        completed = [j for j in completed if (j["job_id"], int(j.get("updated_at", 0))) not in seen]
+        if not completed:
+            return
+        for job in completed:
+            seq += 1
+            entries.append({**{k: job[k] for k in FEED_ATTRIBUTES if job.get(k) is not None}, "seq": seq})
+        state.put_item(Item={**FEED_KEY, "seq": seq, "entries": entries[-FEED_SIZE:]})
+
+    def follow_feed(self) -> int:
+        """Run on_completed for feed entries this instance has not seen; returns their number"""
+        if not self._on_completed:
+            return 0
+        feed = self._state_table().get_item(Key=FEED_KEY, ConsistentRead=True).get("Item") or {}
+        seq = int(feed.get("seq", 0))
+        if self._feed_seq is None:
+            # Fresh process: its caches are empty, nothing to catch up on
+            self._feed_seq = seq
+            return 0
+        entries = [e for e in feed.get("entries", []) if int(e["seq"]) > self._feed_seq]
+        if entries and int(entries[0]["seq"]) > self._feed_seq + 1:
+            logger.warning(f"Indexer: missed {int(entries[0]['seq']) - self._feed_seq - 1} completions")
+        for entry in entries:
+            try:
+                self._on_completed({k: entry[k] for k in FEED_ATTRIBUTES if k in entry})
+            except Exception as e:
+                logger.warning(f"Indexer: completion callback failed: {e}")
+        self._feed_seq = seq
+        return len(entries)
+
+    def run_once(self) -> Dict[str, int]:
+        """One indexing pass (blocking); returns counters for logging"""
+        stats = {"candidates": 0, "indexed": 0, "skipped": 0, "failed": 0}
+        if self.acquire_lease():
+            stats = self.index_pass()
+        stats["followed"] = self.follow_feed()
+        return stats
+
+    def index_pass(self) -> Dict[str, int]:
+        """Index candidates since the watermark (call only while holding the lease)"""
+        table = self._table_provider()
+        watermark = self.get_watermark()
+        since = max(watermark - INDEXER_LAG_SECONDS, 0)
+
+        # Candidates: completed jobs changed since the watermark whose current version is not indexed
+        candidates, scanned = self._candidates(table, since)
+        if candidates is None:
+            return {"candidates": 0, "indexed": 0, "skipped": 0, "failed": 0}
+
+        stats = {"candidates": len(candidates), "indexed": 0, "skipped": 0, "failed": 0}
+        high = watermark
+        oldest_failure = None
+        vector_db = None
+        completed = []
+        for candidate in sorted(candidates, key=lambda c: int(c.get("updated_at", 0))):
+            updated_at = int(candidate.get("updated_at", 0))
+            if self._vector_db_provider is None:
+                # Feed only; lag-window repeats are dropped by _append_feed
+                high = max(high, updated_at)
+                completed.append(candidate)
+                continue
+            indexed = candidate.get("indexed_version")
+            if indexed is not None and int(indexed) >= updated_at:
+                stats["skipped"] += 1
+                high = max(high, updated_at)
+                if updated_at > watermark:
+                    completed.append(candidate)
+                continue
+            try:
+                job = table.get_item(Key={"job_id": candidate["job_id"]}).get("Item")
+                if job:
+                    if vector_db is None:
+                        vector_db = self._vector_db_provider()
+                    if index_job_once(table, vector_db, job):
+                        stats["indexed"] += 1
+                    else:
+                        stats["skipped"] += 1
+                high = max(high, updated_at)
+                # Also lag-window jobs indexed only now; failed jobs are fed once a later pass indexed them
+                completed.append(candidate)
+            except Exception as e:
+                stats["failed"] += 1
+                logger.warning(f"Indexer: failed to index job {candidate.get('job_id')}: {e}")
+                if oldest_failure is None:
+                    oldest_failure = updated_at
+
+        # Never move the watermark past a job that still needs indexing
+        if oldest_failure is not None:
+            high = min(high, oldest_failure - 1)
+        if completed:
+            self._append_feed(completed)
+        if high > watermark:
+            self.set_watermark(high)
+        if scanned:
+            if high > watermark or stats["failed"]:
+                self._scan_backoff = 0
+            else:
+                self._scan_backoff = min(max(1, self._scan_backoff * 2), INDEXER_MAX_SCAN_SKIP)
+            self._scans_to_skip = self._scan_backoff
+        return stats
@@ -0,0 +1,97 @@
+"""
+In-flight request coalescing ("single flight").
+
+Concurrent calls with the same key share one execution: the first caller runs
+the function, later callers wait for it and receive the same result (or the
+same exception). Nothing is cached: once the call finishes, the next call with
+that key runs again. Keys must include the tenant scope (user/session) of the
+work, never just the input.
+
+``SingleFlight`` is for blocking code running on worker threads,
+``AsyncSingleFlight`` for coroutines on the event loop (waiting callers do not
+hold a thread).
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Thread-safe coalescing of identical blocking calls"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"executed": self._executed, "shared": self._shared, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """Coalescing of identical coroutine calls on one event loop"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._executed = 0
+        self._shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self._shared += 1
+            # shield: a waiter that is cancelled must not cancel the shared call
+            return await asyncio.shield(future)
+
+        self._executed += 1
+        future = asyncio.ensure_future(fn())
+        self._calls[key] = future
+        future.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"executed": self._executed, "shared": self._shared, "in_flight": len(self._calls)}
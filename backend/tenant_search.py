@@ -0,0 +1,498 @@
+"""
+In-process BM25 search, one index per tenant.
+
+Each tenant's searchable job rows (the fields ``store_video_analysis`` writes)
+are held in memory with postings of their ``text_analysis`` terms for three fields (tags, OCR text,
+filename) and scored with BM25F: per-field term frequencies are length
+normalized, weighted by ``FIELD_BOOSTS`` and combined before saturation. A
+query touches only the postings of its terms and returns the stored rows, so
+searching takes milliseconds and reads nothing from DynamoDB.
+
+Tenants are loaded lazily on first use (in the background; callers fall back
+to the keyword index until the load finished), from a local JSON snapshot if
+one is fresh enough, otherwise from the ``loader`` (one table scan for that
+tenant). Completed and deleted jobs are applied incrementally. When the
+estimated memory of all loaded tenants exceeds the budget, the least recently
+used tenants are snapshotted and evicted.
+
+Changes made through other instances reach a loaded tenant through the
+callers' update feeds; as a backstop, a tenant loaded longer than
+``max_age_seconds`` ago is reloaded from the ``loader`` in the background on
+its next use (the old index keeps answering until the new one is installed).
+
+Each tenant index also keeps a character-trigram index of its OCR lines (see
+``fuzzy_text``) for typo-tolerant text lookups, the time intervals of its
+labels and text (see ``moment_index``) for moment search, and facet bitmaps
+(see ``search_facets``) for filtered search with sidebar counts.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fuzzy_text import DEFAULT_MIN_SIMILARITY, TrigramIndex
+from job_results import dumps_compact
+from moment_index import DEFAULT_WINDOW_SECONDS, MomentIndex, load_moments, query_parts
+from keyword_index import INTENT_BLACKFRAMES, INTENT_TEXT
+from search_facets import FacetIndex, FacetResult, row_facets
+from text_analysis import analyze
+from video_summary import load_summary
+
+logger = logging.getLogger(__name__)
+
+FIELD_BOOSTS = {"tag": 2.0, "text": 1.5, "file": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNAPSHOT_VERSION = 2
+
+# Rough per-entry overheads of the Python structures (for the memory budget)
+_POSTING_BYTES = 160
+_DOC_BYTES = 400
+
+
+def document_fields(row: Dict[str, Any]) -> Tuple[Dict[str, List[str]], Set[str]]:
+    """Tokens per field and intent flags of a searchable job row"""
+    fields = {
+        "tag": [t for tag in row.get("semantic_tags") or [] for t in analyze(str(tag))],
+        "text": [t for text in row.get("text_content") or [] for t in analyze(str(text))],
+        "file": analyze(os.path.basename(row.get("s3_key") or "")),
+    }
+    flags = set()
+    if row.get("has_text"):
+        flags.add(INTENT_TEXT)
+    if row.get("has_blackframes"):
+        flags.add(INTENT_BLACKFRAMES)
+    return fields, flags
+
+
+def ocr_lines(row: Dict[str, Any]) -> List[str]:
+    """Distinct OCR lines of a row (``text_content`` plus the summary's texts)"""
+    lines = [str(t) for t in row.get("text_content") or []]
+    summary = load_summary(row.get("video_summary"))
+    if summary:
+        lines.extend(t["text"] for t in summary.get("texts", []) if t.get("text"))
+    return list(dict.fromkeys(lines))
+
+
+class TenantIndex:
+    """BM25F index over one tenant's job rows (not thread-safe; the engine locks)"""
+
+    def __init__(self):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.lengths: Dict[str, Dict[str, int]] = {}
+        self.flags: Dict[str, Set[str]] = {INTENT_TEXT: set(), INTENT_BLACKFRAMES: set()}
+        # term -> job_id -> field -> term frequency
+        self.postings: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.field_totals: Counter = Counter()
+        self.ocr = TrigramIndex()
+        self.moment_index = MomentIndex()
+        self.facet_index = FacetIndex()
+        self.approx_bytes = 0
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.rows)
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        job_id = row["job_id"]
+        self.remove(job_id)
+        fields, flags = document_fields(row)
+        self.rows[job_id] = row
+        self.lengths[job_id] = {field: len(tokens) for field, tokens in fields.items()}
+        self.field_totals.update(self.lengths[job_id])
+        for flag in flags:
+            self.flags[flag].add(job_id)
+        entries = 0
+        for field, tokens in fields.items():
+            for term, tf in Counter(tokens).items():
+                self.postings.setdefault(term, {}).setdefault(job_id, {})[field] = tf
+                entries += 1
+        entries += self.ocr.add(job_id, ocr_lines(row))
+        entries += self.moment_index.add(job_id, load_moments(row.get("moments")))
+        entries += self.facet_index.add(job_id, *row_facets(row))
+        self.approx_bytes += _DOC_BYTES + entries * _POSTING_BYTES + len(dumps_compact(row))
+        self.dirty = True
+
+    def remove(self, job_id: str) -> bool:
+        row = self.rows.pop(job_id, None)
+        if row is None:
+            return False
+        fields, _ = document_fields(row)
+        self.field_totals.subtract(self.lengths.pop(job_id))
+        for members in self.flags.values():
+            members.discard(job_id)
+        entries = self.ocr.remove(job_id) + self.moment_index.remove(job_id) + self.facet_index.remove(job_id)
+        for term in {t for tokens in fields.values() for t in tokens}:
+            docs = self.postings.get(term)
+            if docs is None:
+                continue
+            entries += len(docs.pop(job_id, ()))
+            if not docs:
+                del self.postings[term]
+        self.approx_bytes -= _DOC_BYTES + entries * _POSTING_BYTES + len(dumps_compact(row))
+        self.dirty = True
+        return True
+
+    def search(self, terms: Iterable[str], required: Iterable[str] = (), session_id: Optional[str] = None,
+               limit: int = 10) -> List[Tuple[Dict[str, Any], float]]:
+        """``[(row, score)]`` best first; ``required`` intent flags must all be set"""
+        allowed: Optional[Set[str]] = None
+        for flag in dict.fromkeys(required):
+            members = self.flags.get(flag, set())
+            allowed = set(members) if allowed is None else allowed & members
+
+        n_docs = len(self.rows)
+        avg_len = {field: (self.field_totals[field] / n_docs if n_docs else 0.0) or 1.0 for field in FIELD_BOOSTS}
+        scores: Dict[str, float] = {}
+        for term in dict.fromkeys(terms):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1.0 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for job_id, tfs in docs.items():
+                if allowed is not None and job_id not in allowed:
+                    continue
+                lengths = self.lengths[job_id]
+                weighted_tf = sum(
+                    FIELD_BOOSTS[field] * tf / (1.0 - BM25_B + BM25_B * lengths[field] / avg_len[field])
+                    for field, tf in tfs.items()
+                )
+                scores[job_id] = scores.get(job_id, 0.0) + idf * weighted_tf * (BM25_K1 + 1.0) / (BM25_K1 + weighted_tf)
+        if not scores and allowed is not None:
+            # Intent-only query ("Gibt es Blackframes?")
+            scores = {job_id: 1.0 for job_id in allowed}
+
+        ranked = [
+            (self.rows[job_id], score) for job_id, score in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+            if session_id is None or self.rows[job_id].get("session_id") == session_id
+        ]
+        return ranked[:limit]
+
+    def fuzzy_text(self, query: str, session_id: Optional[str] = None, limit: int = 10,
+                   min_similarity: float = DEFAULT_MIN_SIMILARITY) -> List[Tuple[Dict[str, Any], float, str]]:
+        """``[(row, similarity, matched OCR line)]`` for a typo-tolerant text query"""
+        def in_session(job_id: str) -> bool:
+            return self.rows[job_id].get("session_id") == session_id
+
+        matches = self.ocr.search(
+            query, limit=limit, min_similarity=min_similarity, allowed=in_session if session_id is not None else None
+        )
+        return [(self.rows[m.job_id], m.similarity, m.line) for m in matches]
+
+    def moments(self, query: str, session_id: Optional[str] = None, limit: int = 10,
+                window_seconds: float = DEFAULT_WINDOW_SECONDS) -> List[Tuple[Dict[str, Any], List[List[float]]]]:
+        """``[(row, segments)]`` where all parts of ``query`` co-occur"""
+        def in_session(job_id: str) -> bool:
+            return self.rows[job_id].get("session_id") == session_id
+
+        matches = self.moment_index.search(
+            query_parts(query), window_seconds=window_seconds, allowed=in_session if session_id is not None else None
+        )
+        return [(self.rows[job_id], segments) for job_id, segments in matches[:limit]]
+
+    def facets(self, terms: Iterable[str] = (), required: Iterable[str] = (), filters: Optional[Dict[str, Any]] = None,
+               limit: int = 20) -> Tuple[List[Tuple[Dict[str, Any], float]], FacetResult]:
+        """Rows matching the query (if any) and ``filters``, and the facet counts of that set
+
+        With terms the rows are ranked by BM25, otherwise newest first.
+        """
+        terms, required = list(terms), list(required)
+        scores: Optional[Dict[str, float]] = None
+        candidates = None
+        if terms or required:
+            scores = {row["job_id"]: score for row, score in self.search(terms, required=required, limit=len(self.rows))}
+            candidates = self.facet_index.bitmap_of(scores)
+        result = self.facet_index.filter(filters or {}, candidates)
+        job_ids = self.facet_index.job_ids(result.bitmap)
+        if scores is not None:
+            job_ids.sort(key=lambda job_id: (-scores[job_id], job_id))
+        else:
+            job_ids.sort(key=lambda job_id: (-(self.facet_index.number(job_id, "created_at") or 0), job_id))
+        return [(self.rows[job_id], scores[job_id] if scores else 1.0) for job_id in job_ids[:limit]], result
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {"v": SNAPSHOT_VERSION, "built_at": time.time(), "rows": list(self.rows.values())}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "TenantIndex":
+        index = cls()
+        for row in rows:
+            index.upsert(row)
+        index.dirty = False
+        return index
+
+
+class TenantSearchEngine:
+    """Per-tenant :class:`TenantIndex` instances with lazy loading and LRU eviction"""
+
+    def __init__(self, loader: Callable[[str], Iterable[Dict[str, Any]]],
+                 memory_budget_bytes: int = 256 * 1024 * 1024,
+                 snapshot_dir: Optional[str] = None,
+                 snapshot_max_age_seconds: float = 3600.0,
+                 max_age_seconds: float = 0.0):
+        self.loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_max_age_seconds = snapshot_max_age_seconds
+        # 0: loaded tenants are only changed by upsert/remove
+        self.max_age_seconds = max_age_seconds
+        self._tenants: "OrderedDict[str, TenantIndex]" = OrderedDict()
+        self._loaded_at: Dict[str, float] = {}
+        self._job_tenants: Dict[str, str] = {}
+        self._loading: Set[str] = set()
+        # Updates that arrive while a tenant is loading are applied once it is installed
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending_removals: Set[str] = set()
+        self._lock = threading.RLock()
+        self._loads = 0
+        self._snapshot_loads = 0
+        self._evictions = 0
+        self._refreshes = 0
+
+    # --- queries ---
+
+    def search(self, tenant: str, terms: Iterable[str], required: Iterable[str] = (),
+               session_id: Optional[str] = None, limit: int = 10) -> Optional[List[Tuple[Dict[str, Any], float]]]:
+        """Ranked rows, or None while the tenant is not loaded yet (a background load is started)"""
+        with self._lock:
+            index = self._tenants.get(tenant)
+            if index is not None:
+                self._touch(tenant)
+                return index.search(terms, required=required, session_id=session_id, limit=limit)
+        self.load_async(tenant)
+        return None
+
+    def fuzzy_text(self, tenant: str, query: str, session_id: Optional[str] = None, limit: int = 10,
+                   min_similarity: float = DEFAULT_MIN_SIMILARITY) -> List[Tuple[Dict[str, Any], float, str]]:
+        """Fuzzy OCR lookup; loads the tenant first if needed (blocking)"""
+        return self._with_index(
+            tenant, lambda index: index.fuzzy_text(query, session_id=session_id, limit=limit, min_similarity=min_similarity)
+        )
+
+    def moments(self, tenant: str, query: str, session_id: Optional[str] = None, limit: int = 10,
+                window_seconds: float = DEFAULT_WINDOW_SECONDS) -> List[Tuple[Dict[str, Any], List[List[float]]]]:
+        """Moment lookup; loads the tenant first if needed (blocking)"""
+        return self._with_index(
+            tenant, lambda index: index.moments(query, session_id=session_id, limit=limit, window_seconds=window_seconds)
+        )
+
+    def facets(self, tenant: str, terms: Iterable[str] = (), required: Iterable[str] = (),
+               filters: Optional[Dict[str, Any]] = None,
+               limit: int = 20) -> Tuple[List[Tuple[Dict[str, Any], float]], Optional[FacetResult]]:
+        """Filtered rows and facet counts; loads the tenant first if needed (blocking)"""
+        return self._with_index(
+            tenant, lambda index: index.facets(terms, required=required, filters=filters, limit=limit),
+            lambda: ([], None),
+        )
+
+    def _with_index(self, tenant: str, fn: Callable[[TenantIndex], Any], default: Callable[[], Any] = list) -> Any:
+        for attempt in range(2):
+            with self._lock:
+                index = self._tenants.get(tenant)
+                if index is not None:
+                    self._touch(tenant)
+                    return fn(index)
+            if attempt == 0 and self.load(tenant) is None:
+                break
+        return default()
+
+    def _touch(self, tenant: str) -> None:
+        """Mark a loaded tenant as used; reload it in the background once it is too old (lock held)"""
+        self._tenants.move_to_end(tenant)
+        if (self.max_age_seconds and tenant not in self._loading
+                and time.monotonic() - self._loaded_at.get(tenant, 0.0) > self.max_age_seconds):
+            self._loading.add(tenant)
+            # A failed refresh is retried only after another max_age_seconds
+            self._loaded_at[tenant] = time.monotonic()
+            threading.Thread(
+                target=self._load, args=(tenant, True), name="tenant-search-refresh", daemon=True
+            ).start()
+
+    def is_loaded(self, tenant: str) -> bool:
+        with self._lock:
+            return tenant in self._tenants
+
+    def wants(self, tenant: str) -> bool:
+        """Whether updates for ``tenant`` need the row (loaded or loading)"""
+        with self._lock:
+            return tenant in self._tenants or tenant in self._loading
+
+    def invalidate(self, tenant: str) -> None:
+        """Forget the tenant's snapshot (it changed while not loaded here)"""
+        self._discard_snapshot(tenant)
+
+    # --- updates ---
+
+    def upsert(self, tenant: str, row: Dict[str, Any]) -> None:
+        """Apply a (re-)indexed job; unloaded tenants just drop their outdated snapshot"""
+        with self._lock:
+            index = self._tenants.get(tenant)
+            if tenant in self._loading:
+                # Also while a loaded tenant is being refreshed: the new index must not miss it
+                self._pending.setdefault(tenant, []).append(row)
+            if index is None:
+                self._discard_snapshot(tenant)
+                return
+            index.upsert(row)
+            self._job_tenants[row["job_id"]] = tenant
+            self._enforce_budget()
+
+    def remove(self, job_id: str, tenant: Optional[str] = None) -> None:
+        """Drop a deleted job; ``tenant`` (the owner) lets an unloaded tenant drop its outdated snapshot"""
+        with self._lock:
+            tenant = self._job_tenants.pop(job_id, None) or tenant
+            index = self._tenants.get(tenant) if tenant else None
+            if index is not None:
+                index.remove(job_id)
+            if self._loading:
+                self._pending_removals.add(job_id)
+            if index is None and tenant:
+                self._discard_snapshot(tenant)
+
+    # --- loading / eviction ---
+
+    def load_async(self, tenant: str) -> None:
+        with self._lock:
+            if tenant in self._tenants or tenant in self._loading:
+                return
+            self._loading.add(tenant)
+        threading.Thread(target=self._load, args=(tenant,), name="tenant-search-load", daemon=True).start()
+
+    def load(self, tenant: str) -> TenantIndex:
+        """Load a tenant synchronously (snapshot or loader)"""
+        with self._lock:
+            if tenant in self._tenants:
+                return self._tenants[tenant]
+            self._loading.add(tenant)
+        return self._load(tenant)
+
+    def _load(self, tenant: str, refresh: bool = False) -> Optional[TenantIndex]:
+        """Build a tenant's index; ``refresh`` replaces a loaded index with one read from the loader"""
+        try:
+            started = time.monotonic()
+            rows = None if refresh else self._read_snapshot(tenant)
+            from_snapshot = rows is not None
+            if rows is None:
+                rows = list(self.loader(tenant))
+            index = TenantIndex.from_rows(rows)
+            with self._lock:
+                current = self._tenants.get(tenant)
+                if current is not None and not refresh:
+                    return current
+                for row in self._pending.pop(tenant, []):
+                    index.upsert(row)
+                for job_id in self._pending_removals & index.rows.keys():
+                    index.remove(job_id)
+                if not self._loading - {tenant}:
+                    self._pending_removals.clear()
+                if current is not None:
+                    for job_id in current.rows:
+                        self._job_tenants.pop(job_id, None)
+                    self._refreshes += 1
+                else:
+                    self._loads += 1
+                self._tenants[tenant] = index
+                self._tenants.move_to_end(tenant)
+                self._loaded_at[tenant] = time.monotonic()
+                for job_id in index.rows:
+                    self._job_tenants[job_id] = tenant
+                self._snapshot_loads += int(from_snapshot)
+            if not from_snapshot:
+                self._write_snapshot(tenant, index)
+            logger.info(
+                f"Search engine loaded {len(index)} videos for tenant {tenant} "
+                f"({'snapshot' if from_snapshot else 'table'}, {time.monotonic() - started:.2f}s)"
+            )
+            with self._lock:
+                self._enforce_budget()
+            return index
+        except Exception as e:
+            logger.error(f"Search engine failed to load tenant {tenant}: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._loading.discard(tenant)
+                self._pending.pop(tenant, None)
+
+    def _enforce_budget(self) -> None:
+        # Always keep the most recently used tenant, even if it alone exceeds the budget
+        while len(self._tenants) > 1 and self.memory_bytes() > self.memory_budget_bytes:
+            tenant, index = self._tenants.popitem(last=False)
+            self._loaded_at.pop(tenant, None)
+            for job_id in index.rows:
+                self._job_tenants.pop(job_id, None)
+            if index.dirty:
+                self._write_snapshot(tenant, index)
+            self._evictions += 1
+            logger.info(f"Search engine evicted tenant {tenant} ({index.approx_bytes} bytes)")
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(index.approx_bytes for index in self._tenants.values())
+
+    # --- snapshots ---
+
+    def _snapshot_path(self, tenant: str) -> Optional[str]:
+        if not self.snapshot_dir:
+            return None
+        digest = hashlib.sha256(tenant.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.snapshot_dir, f"{digest}.json.gz")
+
+    def _read_snapshot(self, tenant: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._snapshot_path(tenant)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable search snapshot {path}: {e}")
+            return None
+        if data.get("v") != SNAPSHOT_VERSION or time.time() - data.get("built_at", 0) > self.snapshot_max_age_seconds:
+            return None
+        return data.get("rows") or []
+
+    def _write_snapshot(self, tenant: str, index: TenantIndex) -> None:
+        path = self._snapshot_path(tenant)
+        if not path:
+            return
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                f.write(dumps_compact(index.to_snapshot()))
+            os.replace(tmp, path)
+            index.dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to write search snapshot for tenant {tenant}: {e}")
+
+    def _discard_snapshot(self, tenant: str) -> None:
+        path = self._snapshot_path(tenant)
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tenants_loaded": len(self._tenants),
+                "videos": sum(len(index) for index in self._tenants.values()),
+                "memory_bytes": sum(index.approx_bytes for index in self._tenants.values()),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "loads": self._loads,
+                "snapshot_loads": self._snapshot_loads,
+                "evictions": self._evictions,
+                "refreshes": self._refreshes,
+                "loading": len(self._loading),
+            }
+
@@ -0,0 +1,39 @@
+"""
+Shared fixtures. Backend modules import each other by bare name, so the backend
+directory goes on ``sys.path``; AWS is replaced by moto for tests that need the API.
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-central-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("CHAT_MODEL_BACKEND", "local")
+
+TEST_USER = {"sub": "user-1", "username": "user-1", "email": "user-1@example.com"}
+
+
+@pytest.fixture(scope="session")
+def api_module():
+    """The API app on mocked AWS, with authentication replaced by ``TEST_USER``"""
+    moto = pytest.importorskip("moto")
+    mock = moto.mock_aws()
+    mock.start()
+    import api
+    api.app.dependency_overrides[api.get_current_user] = lambda: TEST_USER
+    yield api
+    api.app.dependency_overrides.clear()
+    mock.stop()
+
+
+@pytest.fixture
+def client(api_module):
+    from fastapi.testclient import TestClient
+    return TestClient(api_module.app)
@@ -0,0 +1,143 @@
+import asyncio
+import functools
+import json
+import time
+
+import pytest
+
+from chat_streaming import LocalStreamingModel, aiter_in_thread
+
+# Not a "simple" query (see CostOptimizedChatBot._is_simple_query), so the model answers
+QUESTION = "Was passiert in der Szene am Anfang?"
+
+SEARCH_RESULT = {
+    "job_id": "job-1",
+    "score": 0.9,
+    "metadata": {"video_key": "videos/clip.mp4", "bucket": "bucket", "semantic_tags": ["car"]},
+    "document": "Ein rotes Auto auf der Autobahn",
+}
+
+
+class StubRetriever:
+    def __init__(self, results=None, error=None):
+        self.results = results if results is not None else [SEARCH_RESULT]
+        self.error = error
+
+    def semantic_search(self, query, limit=10, user_id=None, session_id=None):
+        if self.error:
+            raise self.error
+        return self.results
+
+
+def parse_sse(text):
+    """[(event, data)] of an SSE body; every frame is 'event: ...' + 'data: ...' + blank line"""
+    events = []
+    for frame in text.split("\n\n"):
+        if not frame:
+            continue
+        lines = frame.split("\n")
+        assert len(lines) == 2 and lines[0].startswith("event: ") and lines[1].startswith("data: "), frame
+        events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return events
+
+
+@pytest.fixture
+def chatbot(api_module, monkeypatch):
+    if not api_module.USE_COST_OPTIMIZED:
+        pytest.skip("Streaming chat needs the cost-optimized backend")
+    chatbot = api_module.get_cost_optimized_chatbot()
+    monkeypatch.setattr(chatbot, "retriever", StubRetriever())
+    monkeypatch.setattr(chatbot, "_streaming_model", LocalStreamingModel(token_delay=0))
+    chatbot.response_cache.clear()
+    return chatbot
+
+
+def stream(client, message):
+    response = client.post("/chat/stream", json={"message": message})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return parse_sse(response.text)
+
+
+def test_tokens_arrive_in_order_between_matches_and_done(client, chatbot):
+    events = stream(client, QUESTION)
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "matches" and kinds[-1] == "done"
+    assert set(kinds[1:-1]) == {"token"} and len(kinds) > 3
+    assert [v["job_id"] for v in events[0][1]["matched_videos"]] == ["job-1"]
+
+    tokens = [data["text"] for kind, data in events if kind == "token"]
+    done = events[-1][1]
+    # The deltas concatenate to the final answer, in model order
+    assert "".join(tokens) == done["response"]
+    assert done["response"].startswith("(local model) Benutzer fragt: 'Was passiert")
+    assert done["used_llm"] is True and done["context_used"] == 1
+
+
+def test_no_matches_answers_without_the_model(client, chatbot, monkeypatch):
+    monkeypatch.setattr(chatbot, "retriever", StubRetriever(results=[]))
+    events = stream(client, QUESTION + " (leer)")
+    assert [kind for kind, _ in events] == ["matches", "token", "done"]
+    assert events[-1][1]["context_used"] == 0
+
+
+def test_search_failure_is_an_error_event(client, chatbot, monkeypatch):
+    monkeypatch.setattr(chatbot, "retriever", StubRetriever(error=RuntimeError("search down")))
+    events = stream(client, QUESTION + " (fehler)")
+    assert events == [("error", {"detail": "search down"})]
+
+
+def test_stalled_model_is_an_error_event(client, chatbot, api_module, monkeypatch):
+    monkeypatch.setattr(chatbot, "_streaming_model", LocalStreamingModel(token_delay=0, first_token_delay=1.0))
+    monkeypatch.setattr(api_module, "aiter_in_thread", functools.partial(aiter_in_thread, idle_timeout=0.2))
+    events = stream(client, QUESTION + " (langsam)")
+    assert events[0][0] == "matches"
+    assert events[-1] == ("error", {"detail": "The model did not respond in time"})
+
+
+def collect(make_iter, idle_timeout):
+    async def run():
+        return [item async for item in aiter_in_thread(make_iter, idle_timeout=idle_timeout)]
+    return asyncio.run(run())
+
+
+def test_aiter_in_thread_yields_items_in_order():
+    assert collect(lambda: iter(range(100)), idle_timeout=1) == list(range(100))
+
+
+def test_aiter_in_thread_idle_timeout_stops_the_producer():
+    produced = []
+
+    def slow():
+        for i in range(3):
+            if i:
+                time.sleep(0.5)
+            produced.append(i)
+            yield i
+
+    async def run():
+        received = []
+        with pytest.raises(asyncio.TimeoutError):
+            async for item in aiter_in_thread(slow, idle_timeout=0.1):
+                received.append(item)
+        return received
+
+    assert asyncio.run(run()) == [0]
+    # The producer stops after its current item instead of draining the iterator
+    time.sleep(0.7)
+    assert produced == [0, 1]
+
+
+def test_aiter_in_thread_reraises_producer_errors():
+    def failing():
+        yield 1
+        raise ValueError("model error")
+
+    async def run():
+        received = []
+        with pytest.raises(ValueError, match="model error"):
+            async for item in aiter_in_thread(failing, idle_timeout=1):
+                received.append(item)
+        return received
+
+    assert asyncio.run(run()) == [1]
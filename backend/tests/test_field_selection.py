@@ -0,0 +1,81 @@
+import pytest
+
+from field_selection import FieldSelection, FieldSelectionError
+
+JOB = {
+    "job_id": "j1",
+    "status": "done",
+    "text_detection": {"texts": ["a", "b", "c", "d"], "count": 4},
+    "latest_doc": {"summary": "Ein rotes Auto", "labels": ["Car", "Road"], "video": {"key": "v.mp4"}},
+}
+
+
+def test_slice_range():
+    selection = FieldSelection("text_detection.texts[1:3]")
+    assert selection.apply(JOB) == {"text_detection": {"texts": ["b", "c"]}}
+
+
+def test_open_slices():
+    assert FieldSelection("text_detection.texts[:2]").apply(JOB)["text_detection"]["texts"] == ["a", "b"]
+    assert FieldSelection("text_detection.texts[2:]").apply(JOB)["text_detection"]["texts"] == ["c", "d"]
+
+
+def test_index():
+    assert FieldSelection("text_detection.texts[0]").apply(JOB)["text_detection"]["texts"] == ["a"]
+    assert FieldSelection("text_detection.texts[-1]").apply(JOB)["text_detection"]["texts"] == ["d"]
+
+
+def test_parent_and_child_merge_to_whole_value():
+    # Either order: selecting 'a' keeps all of 'a' even when 'a.b' is also selected
+    for spec in ("latest_doc,latest_doc.summary", "latest_doc.summary,latest_doc"):
+        selection = FieldSelection(spec)
+        assert selection.apply(JOB) == {"latest_doc": JOB["latest_doc"]}
+        assert selection.subfields("latest_doc") is None
+
+
+def test_sibling_paths_merge():
+    selection = FieldSelection("latest_doc.summary,latest_doc.video.key,job_id")
+    assert selection.apply(JOB) == {
+        "job_id": "j1",
+        "latest_doc": {"summary": "Ein rotes Auto", "video": {"key": "v.mp4"}},
+    }
+    assert selection.subfields("latest_doc") == {"summary", "video"}
+
+
+def test_lists_of_objects_are_trimmed_per_entry():
+    data = {"items": [{"a": 1, "b": 2}, {"a": 3, "b": 4}]}
+    assert FieldSelection("items.a").apply(data) == {"items": [{"a": 1}, {"a": 3}]}
+
+
+def test_blank_spec_selects_everything():
+    assert FieldSelection.parse(None) is None
+    assert FieldSelection.parse("  ") is None
+
+
+def test_source_attributes():
+    sources = {"status": ("status", "job_status"), "latest_doc": None}
+    assert FieldSelection("status,s3_key").source_attributes(sources) == ["job_id", "job_status", "s3_key", "status"]
+    # The whole-item source projects to the selected sub-fields
+    assert FieldSelection("latest_doc.summary,latest_doc.labels").source_attributes(sources) == [
+        "job_id", "labels", "summary",
+    ]
+    # ... and cannot be projected when it is selected as a whole
+    assert FieldSelection("status,latest_doc").source_attributes(sources) is None
+
+
+@pytest.mark.parametrize("spec", [",", "a[x]", "a[]", "a.b[1:2:3]", "a b", "a..b", "a[0"])
+def test_malformed_specs(spec):
+    with pytest.raises(FieldSelectionError):
+        FieldSelection(spec)
+
+
+def test_too_many_fields():
+    with pytest.raises(FieldSelectionError):
+        FieldSelection(",".join(f"f{i}" for i in range(60)))
+
+
+@pytest.mark.parametrize("spec", ["a[x]", "status,,a..b"])
+def test_malformed_spec_is_a_400(client, spec):
+    response = client.get("/jobs", params={"fields": spec})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid fields parameter")
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def run_followers(flight, key, fn, count):
+    """Start ``count`` threads calling ``flight.do(key, fn)``; returns their outcomes (filled on join)"""
+    outcomes = [None] * count
+
+    def call(i):
+        try:
+            outcomes[i] = ("result", flight.do(key, fn))
+        except Exception as e:
+            outcomes[i] = ("error", e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_sync_followers_share_the_leaders_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return {"answer": 42}
+
+    threads, outcomes = run_followers(flight, ("user-1", "q"), fn, 8)
+    wait_until(lambda: flight.stats()["shared"] == 7)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    results = [value for kind, value in outcomes]
+    assert all(kind == "result" for kind, _ in outcomes)
+    # Every caller receives the very same object
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"executed": 1, "shared": 7, "in_flight": 0}
+
+
+def test_sync_followers_receive_the_leaders_exception_and_the_key_is_released():
+    flight = SingleFlight()
+    release = threading.Event()
+    error = RuntimeError("backend down")
+
+    def failing():
+        release.wait(2)
+        raise error
+
+    threads, outcomes = run_followers(flight, "key", failing, 4)
+    wait_until(lambda: flight.stats()["shared"] == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes == [("error", error)] * 4
+    # Failures are not cached: the next call runs again
+    assert flight.do("key", lambda: "recovered") == "recovered"
+    assert flight.stats()["executed"] == 2
+
+
+def test_sync_keys_are_independent():
+    flight = SingleFlight()
+    assert flight.do(("user-1", "q"), lambda: "a") == "a"
+    assert flight.do(("user-2", "q"), lambda: "b") == "b"
+    assert flight.stats()["shared"] == 0
+
+
+def test_async_followers_share_result_and_exception():
+    async def main():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await release.wait()
+            return ["result"]
+
+        tasks = [asyncio.create_task(flight.do("key", fn)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        assert len(calls) == 1 and all(result is results[0] for result in results)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        outcomes = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+        assert [type(outcome) for outcome in outcomes] == [ValueError] * 3
+        assert flight.stats() == {"executed": 2, "shared": 6, "in_flight": 0}
+
+    asyncio.run(main())
+
+
+def test_async_cancelled_leader_does_not_cancel_or_poison_the_shared_call():
+    async def main():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+        finished = []
+
+        async def fn():
+            await release.wait()
+            finished.append(1)
+            return "result"
+
+        leader = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        # The shared call keeps running for the follower
+        release.set()
+        assert await follower == "result"
+        assert finished == [1]
+
+        # The key is free again once the call finished
+        await asyncio.sleep(0)
+        assert flight.stats()["in_flight"] == 0
+        assert await flight.do("key", lambda: asyncio.sleep(0, result="fresh")) == "fresh"
+
+    asyncio.run(main())
+
+
+def test_async_cancelled_follower_leaves_the_others_alone():
+    async def main():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+
+        async def fn():
+            await release.wait()
+            return "result"
+
+        leader = asyncio.create_task(flight.do("key", fn))
+        followers = [asyncio.create_task(flight.do("key", fn)) for _ in range(3)]
+        await asyncio.sleep(0)
+        followers[0].cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await leader == "result"
+        assert [await f for f in followers[1:]] == ["result", "result"]
+        assert followers[0].cancelled()
+
+    asyncio.run(main())
@@ -0,0 +1,193 @@
+"""
+Text analysis shared by search queries and the search indexes.
+
+Both sides run the same pipeline, so a query term matches the indexed term no
+matter how either was inflected or spelled:
+
+1. Unicode normalization and folding: lowercase, ``ä→ae``, ``ö→oe``, ``ü→ue``,
+   ``ß→ss``, other accents dropped
+2. Tokenization on anything that is not a letter or digit (``"BMW-Logo,"`` ->
+   ``bmw``, ``logo``); single characters and stopwords are dropped
+3. Light German/English stemming (``fahrzeugen``, ``fahrzeuge`` -> ``fahrzeug``;
+   ``cars`` -> ``car``); words from the synonym data are kept whole when the
+   stripped form would not be a known word (``gruen``)
+4. Compound splitting against the known word parts (``kennzeichenschild`` also
+   yields ``kennzeichen`` and ``schild``)
+
+Queries additionally get synonym expansion and intent detection. Stopwords,
+intents, synonyms and compound parts come from ``search_synonyms.json``
+(``SEARCH_SYNONYMS_FILE``) and are compiled once at import.
+"""
+
+import json
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Set, Tuple
+
+SYNONYMS_FILE = os.environ.get(
+    "SEARCH_SYNONYMS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_synonyms.json")
+)
+
+# Bump when the pipeline changes so persisted index terms are rebuilt
+ANALYZER_VERSION = 1
+
+_FOLD = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+# (suffix, replacement), first match wins
+_SUFFIXES = (
+    ("ungen", "ung"),
+    ("ies", "y"),
+    ("ern", ""),
+    ("en", ""),
+    ("er", ""),
+    ("es", ""),
+    ("e", ""),
+    ("s", ""),
+)
+_MIN_STEM = 3
+_MIN_COMPOUND = 8
+
+
+def fold(text: str) -> str:
+    """Lowercase, umlaut-fold and strip accents"""
+    text = unicodedata.normalize("NFKC", text or "").lower().translate(_FOLD)
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(fold(text)) if len(t) > 1]
+
+
+def _load_data() -> Dict:
+    with open(SYNONYMS_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+_DATA = _load_data()
+_STOPWORDS: Set[str] = {fold(w) for w in _DATA.get("stopwords", [])}
+_INTENTS: Dict[str, Tuple[str, ...]] = {
+    name: tuple(fold(w) for w in words) for name, words in _DATA.get("intents", {}).items()
+}
+# Folded words the stemmer and compound splitter treat as known
+_VOCAB: Set[str] = {
+    t
+    for word in (
+        list(_DATA.get("synonyms", {}))
+        + [w for words in _DATA.get("synonyms", {}).values() for w in words]
+        + _DATA.get("compound_parts", [])
+    )
+    for t in _tokens(word)
+}
+
+
+def _stem(token: str) -> str:
+    if len(token) <= _MIN_STEM or token.isdigit():
+        return token
+    for suffix, replacement in _SUFFIXES:
+        if not token.endswith(suffix) or len(token) - len(suffix) + len(replacement) < _MIN_STEM:
+            continue
+        if suffix == "s" and token[-2] in "siu":
+            # glass, bus, iris
+            return token
+        stem = token[: -len(suffix)] + replacement
+        if stem not in _VOCAB and stem + "e" in _VOCAB:
+            # strassen -> strasse, leuten -> leute
+            return stem + "e"
+        if token in _VOCAB and stem not in _VOCAB:
+            return token
+        return stem
+    return token
+
+
+_PART_STEMS: Set[str] = {_stem(w) for w in _VOCAB if len(w) >= _MIN_STEM}
+
+
+def _is_part(word: str) -> bool:
+    return len(word) >= _MIN_STEM and _stem(word) in _PART_STEMS
+
+
+@lru_cache(maxsize=4096)
+def _split_compound(token: str) -> Tuple[str, ...]:
+    """Known parts of a compound word, or () if it does not split"""
+    if len(token) < _MIN_COMPOUND:
+        return ()
+    best: Tuple[str, ...] = ()
+    best_key = None
+    # Linking elements: strassen|schild, arbeits|platz
+    for link in ("", "s", "n", "en"):
+        for i in range(len(token) - _MIN_STEM, _MIN_STEM + len(link) - 1, -1):
+            head, tail = token[:i], token[i:]
+            if link:
+                if not head.endswith(link):
+                    continue
+                head = head[: -len(link)]
+            if not _is_part(head):
+                continue
+            if _is_part(tail):
+                parts, shortest = (_stem(head), _stem(tail)), min(len(head), len(tail))
+            else:
+                rest = _split_compound(tail)
+                if not rest:
+                    continue
+                parts, shortest = (_stem(head),) + rest, min(len(head), min(len(p) for p in rest))
+            # Prefer the split with the longest shortest part (kennzeichen|schild, not kennzeichens|child)
+            key = (shortest, not link)
+            if best_key is None or key > best_key:
+                best, best_key = parts, key
+    return best
+
+
+@lru_cache(maxsize=65536)
+def _analyze_token(token: str) -> Tuple[str, ...]:
+    stem = _stem(token)
+    parts = tuple(p for p in _split_compound(token) if p != stem)
+    return (stem,) + parts
+
+
+def analyze(text: str) -> List[str]:
+    """Index terms of a text (field values, filenames, OCR lines)"""
+    return [
+        term
+        for token in _tokens(text)
+        if token not in _STOPWORDS
+        for term in _analyze_token(token)
+    ]
+
+
+_SYNONYMS: Dict[str, Tuple[str, ...]] = {}
+for _word, _expansions in _DATA.get("synonyms", {}).items():
+    # Keyed by the word's own stem only (not its compound parts: autobahn is no synonym of auto)
+    for _key in {_stem(t) for t in _tokens(_word)}:
+        _SYNONYMS[_key] = tuple(dict.fromkeys(_SYNONYMS.get(_key, ()) + tuple(
+            term for expansion in _expansions for term in analyze(expansion)
+        )))
+
+
+@dataclass(frozen=True)
+class QueryAnalysis:
+    terms: List[str]
+    intent_text: bool
+    intent_blackframes: bool
+
+
+def analyze_query(query: str) -> QueryAnalysis:
+    """Terms (with synonyms) and intents of a search query"""
+    folded = fold(query)
+    tokens = _tokens(query)
+    content = [t for t in tokens if t not in _STOPWORDS] or [t for t in tokens if len(t) > 2]
+    terms: Dict[str, None] = {}
+    for token in content:
+        for term in _analyze_token(token):
+            terms[term] = None
+            for synonym in _SYNONYMS.get(term, ()):
+                terms[synonym] = None
+    return QueryAnalysis(
+        terms=list(terms),
+        intent_text=any(w in folded for w in _INTENTS.get("text", ())),
+        intent_blackframes=any(w in folded for w in _INTENTS.get("blackframes", ())),
+    )
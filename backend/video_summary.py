@@ -0,0 +1,147 @@
+"""
+Compact per-video summaries.
+
+Built once when a completed job is indexed and stored on the job row as
+``video_summary`` (compact JSON string, like ``results_view``). Chat and search
+read these instead of parsing the full ``result`` JSON on every message:
+
+    {"v": 1,
+     "labels": [{"name": "Car", "conf": 98, "from": 0.0, "to": 12.5, "n": 7}, ...],
+     "texts": [{"text": "BMW M2", "at": 3.0, "n": 4}, ...],
+     "blackframes": {"count": 12, "segments": [[0.0, 0.4], [30.1, 30.5]]}}
+
+Labels are the most frequent/confident ones with the time range they were seen
+in, OCR lines are deduplicated (case/whitespace-insensitive) and consecutive
+black frames are merged into segments.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+SUMMARY_VERSION = 1
+
+MAX_LABELS = 30
+MAX_TEXTS = 30
+MAX_BLACKFRAME_SEGMENTS = 20
+MIN_LABEL_CONFIDENCE = 70
+MIN_TEXT_CONFIDENCE = 50
+
+# Black frames closer together than this (seconds) belong to one segment
+BLACKFRAME_GAP_SECONDS = 0.5
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _num(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _labels(analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+    label_data = analysis.get("label_detection")
+    if not isinstance(label_data, dict):
+        # Standalone label detection result
+        label_data = analysis if "unique_labels" in analysis else {}
+    labels = []
+    for label in label_data.get("unique_labels", []) or []:
+        if not isinstance(label, dict) or not label.get("name"):
+            continue
+        confidence = _num(label.get("max_confidence"))
+        if confidence < MIN_LABEL_CONFIDENCE:
+            continue
+        labels.append({
+            "name": str(label["name"]),
+            "conf": int(round(confidence)),
+            "from": round(_num(label.get("first_seen")), 1),
+            "to": round(_num(label.get("last_seen")), 1),
+            "n": int(_num(label.get("occurrences"), 1)),
+        })
+    if not labels:
+        # Older results only carry tag names
+        labels = [{"name": str(tag)} for tag in (label_data.get("semantic_tags") or []) if tag]
+    labels.sort(key=lambda l: (-l.get("n", 0), -l.get("conf", 0)))
+    return labels[:MAX_LABELS]
+
+
+def _texts(analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+    text_data = analysis.get("text_detection")
+    if isinstance(text_data, dict):
+        detections = text_data.get("text_detections", [])
+    else:
+        # Standalone text detection result
+        detections = analysis.get("texts", [])
+    seen: Dict[str, Dict[str, Any]] = {}
+    for detection in detections or []:
+        if not isinstance(detection, dict):
+            continue
+        text = _SPACE_RE.sub(" ", str(detection.get("text") or "")).strip()
+        if not text or _num(detection.get("confidence"), 100) < MIN_TEXT_CONFIDENCE:
+            continue
+        key = text.lower()
+        entry = seen.get(key)
+        timestamp = round(_num(detection.get("timestamp")), 1)
+        if entry is None:
+            seen[key] = {"text": text, "at": timestamp, "n": 1}
+        else:
+            entry["n"] += 1
+            entry["at"] = min(entry["at"], timestamp)
+    texts = sorted(seen.values(), key=lambda t: (-t["n"], t["at"]))
+    return texts[:MAX_TEXTS]
+
+
+def _blackframes(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    bf = analysis.get("blackframes")
+    if isinstance(bf, dict):
+        frames = bf.get("black_frames") or []
+        count = int(_num(bf.get("blackframes_detected"), len(frames)))
+    elif "frames" in analysis and "total_frames" in analysis:
+        # Standalone blackframe detection result
+        frames = analysis.get("frames") or []
+        count = int(_num(analysis.get("count"), len(frames)))
+    else:
+        return {"count": 0, "segments": []}
+
+    timestamps = sorted(
+        _num(f.get("timestamp")) for f in frames if isinstance(f, dict) and f.get("timestamp") is not None
+    )
+    segments: List[List[float]] = []
+    for ts in timestamps:
+        if segments and ts - segments[-1][1] <= BLACKFRAME_GAP_SECONDS:
+            segments[-1][1] = ts
+        else:
+            segments.append([ts, ts])
+    return {
+        "count": count or len(timestamps),
+        "segments": [[round(a, 1), round(b, 1)] for a, b in segments[:MAX_BLACKFRAME_SEGMENTS]],
+    }
+
+
+def build_video_summary(analysis: Any) -> Dict[str, Any]:
+    """Summary dict for a parsed analysis result"""
+    if not isinstance(analysis, dict):
+        analysis = {}
+    return {
+        "v": SUMMARY_VERSION,
+        "labels": _labels(analysis),
+        "texts": _texts(analysis),
+        "blackframes": _blackframes(analysis),
+    }
+
+
+def dumps_summary(summary: Dict[str, Any]) -> str:
+    return json.dumps(summary, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_summary(value: Any) -> Optional[Dict[str, Any]]:
+    """Parse a stored ``video_summary`` attribute (None if missing or outdated)"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return None
+    if not isinstance(value, dict) or int(_num(value.get("v"))) != SUMMARY_VERSION:
+        return None
+    return value
@@ -115,11 +115,25 @@ def rekognition_detect_labels(bucket: str = 'christian-aws-development', video:
         cap.release()
         os.unlink(temp_path)  # Clean up
         
+        # Time ranges per label (consecutive sampled frames merged) for moment search
+        sample_seconds = sample_interval / fps if fps > 0 else 2.0
+        label_segments = {}
+        for label in all_labels:
+            if label["confidence"] < 70:
+                continue
+            segments = label_segments.setdefault(label["name"], [])
+            if segments and label["timestamp"] - segments[-1][1] <= sample_seconds * 1.5:
+                segments[-1][1] = label["timestamp"]
+            else:
+                segments.append([label["timestamp"], label["timestamp"]])
+
         # Create semantic search friendly result
         result = {
             "total_labels_detected": len(all_labels),
             "unique_labels_count": len(unique_labels),
             "labels_by_frame": all_labels,
+            "label_segments": label_segments,
+            "sample_interval_seconds": round(sample_seconds, 2),
             "unique_labels": list(unique_labels.values()),
             "semantic_tags": [label["name"] for label in unique_labels.values()],
             "video_metadata": {
@@ -336,7 +350,11 @@ def analyze_video_complete(bucket: str = 'christian-aws-development', video: str
             "total_labels": labels_data.get("total_labels_detected", 0),
             "unique_labels": labels_data.get("unique_labels", []),
             "semantic_tags": labels_data.get("semantic_tags", []),
-            "categories": labels_data.get("categories_found", [])
+            "categories": labels_data.get("categories_found", []),
+            # Compact time ranges instead of the per-frame list
+            "label_segments": labels_data.get("label_segments", {}),
+            "sample_interval_seconds": labels_data.get("sample_interval_seconds"),
+            "duration_seconds": labels_data.get("video_metadata", {}).get("duration_seconds")
         },
         "summary": {
             "blackframes_count": blackframes_data.get("count", 0),
@@ -11,11 +11,16 @@ import threading
 import tempfile
 import zipfile
 from decimal import Decimal
+from botocore.exceptions import ClientError
 from agent import rekognition_detect_text, detect_blackframes, analyze_video_complete, rekognition_detect_labels
+from aws_clients import get_client, get_resource
+from job_results import build_results_view, fits_stored_view, without_stored_view, RESULTS_FORMAT_VERSION
+from job_stats import record_job_completion
+from search_indexer import index_job_once
 
-# Vector DB Integration
+# Vector DB Integration (shared backend module, importable via PYTHONPATH=/app)
 try:
-    from cost_optimized_aws_vector import CostOptimizedAWSVectorDB
+    from cost_optimized_aws_vector import get_cost_optimized_vector_db
     VECTOR_DB_AVAILABLE = True
     print("[VECTOR-DB] Cost-optimized Vector DB module loaded successfully")
 except ImportError as e:
@@ -49,8 +54,7 @@ def process_zip_file(bucket: str, key: str, job_id: str):
         
         # Update job status to processing (write to 'status' field only)
         current_time = int(time.time())
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table('proov_jobs')
+        table = get_ddb_table()
         table.update_item(
             Key={"job_id": job_id},
             UpdateExpression="SET #status = :status, updated_at = :updated_at",
@@ -61,7 +65,7 @@ def process_zip_file(bucket: str, key: str, job_id: str):
             }
         )
         
-        s3 = boto3.client("s3")
+        s3 = get_client("s3")
         
         # Create temporary directory for processing
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -135,8 +139,7 @@ def process_zip_file(bucket: str, key: str, job_id: str):
         logging.exception(f"Unzip job {job_id} failed: {str(e)}")
         
         # Update job with error status (use 'status' field)
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table('proov_jobs')
+        table = get_ddb_table()
         current_time = int(time.time())
         table.update_item(
             Key={"job_id": job_id},
@@ -171,33 +174,22 @@ def timeout_operation(operation, timeout_seconds):
     
     return result[0], result[1]
 
+_ddb_table = None
+
 def get_ddb_table():
-    """Get DynamoDB table with extended timeout settings."""
-    session = boto3.Session()
-    
-    # Create config with extended timeouts
-    config = boto3.session.Config(
-        read_timeout=60,
-        connect_timeout=60,
-        retries={'max_attempts': 3}
-    )
-    
-    # Use the Gateway Endpoint for DynamoDB (no explicit endpoint needed)
-    logging.info("Using DynamoDB Gateway Endpoint via VPC routing")
-    
-    ddb = session.resource('dynamodb', region_name='eu-central-1', config=config)
-    table_name = os.environ.get("JOB_TABLE", "proov_jobs")
-    return ddb.Table(table_name)
+    """Get DynamoDB table with extended timeout settings (pooled, created once per process)."""
+    global _ddb_table
+    if _ddb_table is None:
+        # Use the Gateway Endpoint for DynamoDB (no explicit endpoint needed)
+        logging.info("Using DynamoDB Gateway Endpoint via VPC routing")
+        ddb = get_resource('dynamodb', region_name='eu-central-1', read_timeout=60, connect_timeout=60)
+        table_name = os.environ.get("JOB_TABLE", "proov_jobs")
+        _ddb_table = ddb.Table(table_name)
+    return _ddb_table
 
 def get_sqs_client():
     """Get SQS client with extended timeout settings."""
-    config = boto3.session.Config(
-        read_timeout=60,
-        connect_timeout=60,
-        retries={'max_attempts': 3}
-    )
-    
-    return boto3.client('sqs', region_name='eu-central-1', config=config)
+    return get_client('sqs', region_name='eu-central-1', read_timeout=60, connect_timeout=60)
 
 def get_vector_db():
     """Get Vector DB instance for storing analysis results."""
@@ -206,8 +198,7 @@ def get_vector_db():
         return None
     
     try:
-        vector_db = CostOptimizedAWSVectorDB()
-        logging.info("Vector DB initialized successfully")
+        vector_db = get_cost_optimized_vector_db()
         return vector_db
     except Exception as e:
         logging.error(f"Failed to initialize Vector DB: {e}")
@@ -552,44 +543,31 @@ def _process_messages(messages):
                 logging.info("Final item keys: %s", list(item.keys()))
                 logging.info("==========================================")
                 
-                # Store in Vector DB for semantic search with multi-tenant isolation
+                # Precompute the frontend view document so the API can serve it without reformatting
                 try:
-                    vector_db = get_vector_db()
-                    if vector_db and analysis_data:
-                        video_metadata = {
-                            "key": video_info.get("key", ""),
-                            "bucket": video_info.get("bucket", ""),
-                            "job_id": job_id,
-                            "filename": video_info.get("filename", ""),
-                            "s3_url": video_info.get("s3_url", "")
-                        }
-                        
-                        # 🔒 CRITICAL: Pass user_id and session_id for multi-tenant isolation
-                        user_id = item.get("user_id")
-                        session_id = item.get("session_id")
-                        
-                        logging.info("🔒 Storing in Vector DB with user_id=%s, session_id=%s", user_id, session_id)
-                        
-                        vector_db.store_video_analysis(
-                            job_id, 
-                            video_metadata, 
-                            analysis_data,
-                            user_id=user_id,
-                            session_id=session_id
-                        )
-                        logging.info("✅ STORED IN VECTOR DB: Job %s with %d labels, %d text detections", 
-                                   job_id, 
-                                   len(analysis_data.get("labels", [])),
-                                   len(analysis_data.get("text_detections", [])))
+                    view_json = build_results_view(item)
+                    # Whole row in UTF-8 bytes: result, summary etc. count towards the 400 KB limit too
+                    if fits_stored_view(item, view_json):
+                        item["results_view"] = view_json
+                        item["results_view_version"] = RESULTS_FORMAT_VERSION
                     else:
-                        logging.warning("❌ Vector DB not available or no analysis data to store")
+                        logging.info("Results view for job %s does not fit the job row, API will format on demand", job_id)
                 except Exception as e:
-                    logging.error("❌ Failed to store in Vector DB: %s", e)
+                    logging.warning("Failed to build results view for job %s: %s", job_id, e)
                 
                 result_op, error = timeout_operation(
                     lambda: t.put_item(Item=item),
                     10  # 10 second timeout
                 )
+                if (error and "results_view" in item and isinstance(error, ClientError)
+                        and error.response.get("Error", {}).get("Code") == "ValidationException"):
+                    # Size estimate was off: the row matters, the view can be rebuilt by the API
+                    logging.warning("Job %s rejected with results view (%s), retrying without it", job_id, error)
+                    item = without_stored_view(item)
+                    result_op, error = timeout_operation(
+                        lambda: t.put_item(Item=item),
+                        10
+                    )
                 
                 if error:
                     if isinstance(error, TimeoutError):
@@ -598,6 +576,32 @@ def _process_messages(messages):
                         logging.error("Error updating job %s status to done: %s", job_id, error)
                 else:
                     logging.info("Updated job %s status to done with file_url: %s", job_id, item.get("video_info", {}).get("s3_url", "N/A"))
+                
+                # Index for search once per job version; the API's incremental indexer picks the
+                # job up later if this fails. After the put: indexing adds search fields to the
+                # job row, which put_item would overwrite.
+                if not error:
+                    try:
+                        vector_db = get_vector_db()
+                        if vector_db and analysis_data:
+                            # 🔒 user_id/session_id come from the item for multi-tenant isolation
+                            if index_job_once(t, vector_db, item, analysis_data):
+                                logging.info("✅ STORED IN VECTOR DB: Job %s (user_id=%s, session_id=%s)",
+                                             job_id, item.get("user_id"), item.get("session_id"))
+                        else:
+                            logging.warning("❌ Vector DB not available or no analysis data to store")
+                    except Exception as e:
+                        logging.error("❌ Failed to store in Vector DB: %s", e)
+
+                # Per-user/session analysis counters (idempotent per job)
+                if not error:
+                    try:
+                        record_job_completion(
+                            job_id, item.get("user_id"), item.get("session_id"), analysis_data,
+                            region_name='eu-central-1'
+                        )
+                    except Exception as e:
+                        logging.error("Failed to update analysis stats for job %s: %s", job_id, e)
             except Exception:
                 logging.exception("Failed to write done status to DynamoDB")
         except Exception as e:
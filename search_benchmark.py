@@ -0,0 +1,773 @@
+#!/usr/bin/env python3
+"""
+Search benchmark and relevance regression harness.
+
+Builds synthetic tenant corpora (labels drawn from a Zipf distribution, OCR
+lines on a share of the videos, some black frames) in local stand-ins, runs a
+workload of labeled queries against every search backend and reports per
+backend:
+
+- p50/p95/p99 latency per query (after one unmeasured warm-up pass),
+- DynamoDB read units per query (estimated the way DynamoDB bills eventually
+  consistent reads: 4 KB units, Scan/Query by the items they evaluate),
+- recall@k against the generated ground truth (overall and per query kind),
+- tenant leaks (results owned by another tenant).
+
+Backends: ``cost_optimized`` (CostOptimizedAWSVectorDB, in-process BM25
+engine), ``cost_optimized_index`` (same, inverted keyword index),
+``cost_optimized_scan`` (same, table scan), ``local_vector`` (LocalVectorDB),
+``aws_opensearch`` (AWSVectorDB on an in-memory OpenSearch stand-in),
+``chromadb`` (VideoVectorDB on an in-memory Chroma collection) and ``hybrid``
+(HybridRetriever over cost_optimized + local_vector). DynamoDB is moto; every
+vector backend embeds with ``--embedding-provider`` (default ``hashing``, no
+model or network). Backends whose dependencies are missing are skipped.
+
+No AWS account is used; nothing here reads the live tables.
+
+Usage:
+    python search_benchmark.py                                # run and print
+    python search_benchmark.py --save-baseline                # store as search_benchmark_baseline.json
+    python search_benchmark.py --baseline search_benchmark_baseline.json   # exit 1 on regressions
+    python search_benchmark.py --tenants 5 --videos 2000 --backends cost_optimized,hybrid
+
+Latencies of the DynamoDB-backed paths are moto's (they grow with the number
+and size of requests, not with AWS network time), so compare them with each
+other and with a baseline recorded on the same machine and corpus settings;
+recall and read units are deterministic for a given ``--seed``.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Set
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_benchmark_baseline.json")
+
+REPORT_VERSION = 1
+REGION = "eu-central-1"
+
+ALL_BACKENDS = (
+    "cost_optimized", "cost_optimized_index", "cost_optimized_scan",
+    "local_vector", "aws_opensearch", "chromadb", "hybrid",
+)
+
+# label -> parent labels (Rekognition also reports the parents, e.g. Car -> Vehicle, Transportation)
+LABELS = {
+    "Car": ["Vehicle", "Transportation"], "Truck": ["Vehicle", "Transportation"],
+    "Motorcycle": ["Vehicle", "Transportation"], "Bicycle": ["Vehicle", "Transportation"],
+    "Bus": ["Vehicle", "Transportation"], "Wheel": ["Machine"], "Tire": ["Machine"],
+    "Person": ["Human"], "Face": ["Human"], "Crowd": ["Human"], "Clothing": ["Apparel"],
+    "Dog": ["Animal", "Pet"], "Cat": ["Animal", "Pet"], "Horse": ["Animal"], "Bird": ["Animal"],
+    "Tree": ["Plant", "Nature"], "Flower": ["Plant", "Nature"], "Mountain": ["Outdoors", "Nature"],
+    "Sea": ["Water", "Outdoors"], "Sky": ["Outdoors"], "Beach": ["Outdoors", "Water"],
+    "Building": ["Architecture"], "Bridge": ["Architecture"], "Road": ["Tarmac"], "City": ["Urban"],
+    "Soccer": ["Sport", "Team Sport"], "Tennis": ["Sport"], "Running": ["Sport"],
+    "Laptop": ["Electronics", "Computer"], "Phone": ["Electronics"], "Screen": ["Electronics"],
+    "Logo": ["Symbol"], "Text": [], "Food": [], "Furniture": [], "Kitchen": ["Indoors"],
+}
+
+OCR_LINES = [
+    "BMW M2", "BMW G26", "Audi A4", "Mercedes AMG", "Porsche 911", "SALE 50%", "Open 24h",
+    "Welcome to Munich", "Exit", "Stop", "Coffee Shop", "Hotel Adler", "Gate 12", "Parkhaus",
+    "Ausfahrt", "Bahnhof", "Apotheke", "Baustelle", "Kino", "Bäckerei Müller",
+]
+
+# German queries the keyword analyzer maps through search_synonyms.json -> label
+GERMAN_QUERIES = {
+    "Auto": ["Car"], "Lkw": ["Truck"], "Motorrad": ["Motorcycle"], "Fahrrad": ["Bicycle"],
+    "Personen": ["Person"], "Hund": ["Dog"], "Katze": ["Cat"], "Baum": ["Tree"], "Gebäude": ["Building"],
+}
+
+# Queries without a shared word -> labels they mean (needs a semantic embedder to work)
+PARAPHRASES = {
+    "luxury sports car": ["Car"], "four-legged pet": ["Dog", "Cat"], "ocean waves": ["Sea", "Beach"],
+    "football match": ["Soccer"], "smartphone": ["Phone"], "skyline": ["City", "Building"],
+    "notebook computer": ["Laptop"], "people walking": ["Person", "Crowd"],
+}
+
+QUERY_KINDS = ("label", "german", "text", "paraphrase", "combined")
+
+
+@dataclass
+class CorpusConfig:
+    tenants: int = 3
+    videos_per_tenant: int = 150
+    labels_per_video: int = 8
+    label_skew: float = 1.1
+    text_ratio: float = 0.4
+    texts_per_video: int = 3
+    blackframe_ratio: float = 0.1
+    queries_per_tenant: int = 20
+    seed: int = 7
+
+
+@dataclass
+class Video:
+    job_id: str
+    user_id: str
+    session_id: str
+    key: str
+    labels: List[str]
+    texts: List[str]
+    analysis: Dict[str, Any]
+
+
+@dataclass
+class LabeledQuery:
+    user_id: str
+    kind: str
+    query: str
+    relevant: Set[str] = field(default_factory=set)
+
+
+def _zipf_weights(n: int, skew: float) -> List[float]:
+    return [1.0 / (rank ** skew) for rank in range(1, n + 1)]
+
+
+def _analysis(labels: List[str], texts: List[str], blackframes: int, duration: float,
+              rng: random.Random) -> Dict[str, Any]:
+    """Analysis result in the worker's "complete" format (see worker/agent.py)"""
+    unique, segments = [], {}
+    for name in labels + [p for label in labels for p in LABELS[label]]:
+        if name in segments:
+            continue
+        start = round(rng.uniform(0, max(0.0, duration - 4)), 1)
+        end = round(min(duration, start + rng.uniform(2, 20)), 1)
+        segments[name] = [[start, end]]
+        unique.append({
+            "name": name, "max_confidence": round(rng.uniform(75, 99.9), 1), "first_seen": start,
+            "last_seen": end, "occurrences": max(1, int((end - start) / 2)), "categories": [],
+        })
+    detections = [
+        {"text": text, "timestamp": round(rng.uniform(0, duration), 1), "confidence": round(rng.uniform(80, 99), 1)}
+        for text in texts
+    ]
+    frames = [{"timestamp": round(rng.uniform(0, duration), 1)} for _ in range(blackframes)]
+    return {
+        "analysis_type": "complete",
+        "blackframes": {"blackframes_detected": blackframes, "black_frames": frames},
+        "text_detection": {"text_detections": detections, "count": len(detections)},
+        "label_detection": {
+            "unique_labels": unique,
+            "semantic_tags": [label["name"] for label in unique],
+            "categories": sorted({p for label in labels for p in LABELS[label][:1]}),
+            "label_segments": segments,
+            "sample_interval_seconds": 2.0,
+            "duration_seconds": duration,
+        },
+    }
+
+
+def build_corpus(config: CorpusConfig) -> List[Video]:
+    rng = random.Random(config.seed)
+    label_weights = _zipf_weights(len(LABELS), config.label_skew)
+    text_weights = _zipf_weights(len(OCR_LINES), config.label_skew)
+    videos = []
+    for t in range(config.tenants):
+        user_id = f"bench-user-{t}"
+        # Popularity order differs per tenant
+        names, lines = list(LABELS), list(OCR_LINES)
+        rng.shuffle(names)
+        rng.shuffle(lines)
+        for v in range(config.videos_per_tenant):
+            count = max(1, min(len(names), int(rng.gauss(config.labels_per_video, config.labels_per_video / 3))))
+            labels = list(dict.fromkeys(rng.choices(names, weights=label_weights, k=count)))
+            texts = []
+            if rng.random() < config.text_ratio:
+                texts = list(dict.fromkeys(rng.choices(lines, weights=text_weights, k=config.texts_per_video)))
+            blackframes = rng.randint(1, 12) if rng.random() < config.blackframe_ratio else 0
+            duration = round(rng.uniform(5, 900), 1)
+            job_id = f"bench-{t:02d}-{v:05d}"
+            key = f"users/{user_id}/{job_id}/clip_{v}.mp4"
+            videos.append(Video(
+                job_id, user_id, f"bench-session-{t}-{v % 5}", key, labels, texts,
+                _analysis(labels, texts, blackframes, duration, rng),
+            ))
+    return videos
+
+
+def labeled_queries(videos: List[Video], config: CorpusConfig) -> List[LabeledQuery]:
+    """Queries per tenant with their relevant job ids, spread over QUERY_KINDS"""
+    rng = random.Random(config.seed + 1)
+    queries = []
+    for t in range(config.tenants):
+        user_id = f"bench-user-{t}"
+        own = [v for v in videos if v.user_id == user_id]
+        by_label: Dict[str, Set[str]] = {}
+        by_text: Dict[str, Set[str]] = {}
+        for video in own:
+            for label in video.labels:
+                by_label.setdefault(label, set()).add(video.job_id)
+            for text in video.texts:
+                by_text.setdefault(text, set()).add(video.job_id)
+
+        def with_labels(labels):
+            return set().union(*(by_label.get(label, set()) for label in labels))
+
+        candidates = {
+            "label": [(label, jobs) for label, jobs in by_label.items()],
+            "german": [(q, with_labels(labels)) for q, labels in GERMAN_QUERIES.items()],
+            "text": [(text, jobs) for text, jobs in by_text.items()],
+            "paraphrase": [(q, with_labels(labels)) for q, labels in PARAPHRASES.items()],
+            "combined": [
+                (f"{a} {b}", by_label[a] & by_label[b])
+                for a in by_label for b in by_label if a < b
+            ],
+        }
+        for kind in candidates:
+            candidates[kind] = sorted((q, jobs) for q, jobs in candidates[kind] if jobs)
+        for i in range(config.queries_per_tenant):
+            kind = QUERY_KINDS[i % len(QUERY_KINDS)]
+            if candidates[kind]:
+                query, relevant = rng.choice(candidates[kind])
+                queries.append(LabeledQuery(user_id, kind, query, set(relevant)))
+    return queries
+
+
+# --- DynamoDB read units -------------------------------------------------------------------------
+
+def item_size(value: Any) -> int:
+    """Approximate DynamoDB size in bytes of a deserialized attribute value"""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (int, float, Decimal)):
+        return (len(str(value).replace("-", "").replace(".", "")) + 1) // 2 + 1
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return 3 + sum(len(k.encode("utf-8")) + item_size(v) + 1 for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 3 + sum(item_size(v) + 1 for v in value)
+    return len(str(value))
+
+
+class ReadUnitMeter:
+    """Estimated read capacity units of the reads made through a DynamoDB client"""
+
+    def __init__(self, client, item_bytes: Dict[str, float]):
+        self.client = client
+        self.item_bytes = item_bytes  # table -> average full item size (billing ignores projections)
+        self.units = 0.0
+        self._handlers = [
+            ("provide-client-params.dynamodb", self._remember),
+            ("after-call.dynamodb", self._count),
+        ]
+        for event, handler in self._handlers:
+            client.meta.events.register(event, handler)
+
+    def close(self):
+        for event, handler in self._handlers:
+            self.client.meta.events.unregister(event, handler)
+
+    def _remember(self, params, context, **kwargs):
+        context["bench_params"] = dict(params)
+
+    def _units(self, table: str, items: float, consistent: bool, per_item: bool) -> float:
+        size = self.item_bytes.get(table, 1024.0)
+        factor = 1.0 if consistent else 0.5
+        if per_item:
+            return items * max(1, math.ceil(size / 4096)) * factor
+        return max(1, math.ceil(items * size / 4096)) * factor
+
+    def _count(self, parsed, model, context, **kwargs):
+        params = context.get("bench_params") or {}
+        operation = model.name
+        if operation == "GetItem":
+            self.units += self._units(params.get("TableName"), 1, params.get("ConsistentRead", False), True)
+        elif operation == "BatchGetItem":
+            for table, items in (parsed.get("Responses") or {}).items():
+                consistent = (params.get("RequestItems") or {}).get(table, {}).get("ConsistentRead", False)
+                self.units += self._units(table, len(items), consistent, True)
+        elif operation in ("Query", "Scan"):
+            self.units += self._units(
+                params.get("TableName"), parsed.get("ScannedCount", 0), params.get("ConsistentRead", False), False
+            )
+
+
+def average_item_bytes(table) -> float:
+    sizes = []
+    params: Dict[str, Any] = {}
+    while True:
+        response = table.scan(**params)
+        sizes.extend(item_size(item) for item in response.get("Items", []))
+        if not response.get("LastEvaluatedKey"):
+            break
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return statistics.fmean(sizes) if sizes else 0.0
+
+
+# --- Stand-ins -----------------------------------------------------------------------------------
+
+class LocalOpenSearch:
+    """
+    In-memory stand-in for the OpenSearch calls AWSVectorDB makes.
+
+    Exact cosine k-NN; ``bool`` filters are applied after the k nearest are
+    taken, as the nmslib engine does, so tenant filters can cost recall.
+    """
+
+    def __init__(self):
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self._matrix = None
+        self.indices = SimpleNamespace(exists=lambda index: True, create=lambda index, body=None: None)
+
+    def index(self, index, id, body, refresh=False):
+        self.docs[id] = body
+        self._matrix = None
+        return {"_id": id, "result": "created"}
+
+    def delete(self, index, id):
+        self.docs.pop(id, None)
+        self._matrix = None
+
+    def count(self, index):
+        return {"count": len(self.docs)}
+
+    def _vectors(self):
+        import numpy as np
+
+        if self._matrix is None:
+            ids = list(self.docs)
+            matrix = np.array([self.docs[i]["embedding_vector"] for i in ids], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = (ids, matrix / np.where(norms == 0, 1, norms))
+        return self._matrix
+
+    def search(self, index, body):
+        import numpy as np
+
+        query = body["query"]
+        filters = []
+        if "bool" in query:
+            filters = query["bool"].get("filter", [])
+            query = query["bool"]["must"][0]
+        knn = query["knn"]["embedding_vector"]
+        ids, matrix = self._vectors()
+        vector = np.asarray(knn["vector"], dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1)
+        similarity = matrix @ vector if len(ids) else np.zeros(0)
+        nearest = np.argsort(-similarity)[:knn["k"]]
+        hits = []
+        for i in nearest:
+            source = self.docs[ids[i]]
+            if all(source.get(f) == v for term in filters for f, v in term["term"].items()):
+                excluded = set(body.get("_source", {}).get("excludes", []))
+                hits.append({
+                    "_id": ids[i],
+                    # nmslib cosinesimil: 1 / (1 + (1 - cos))
+                    "_score": float(1 / (2 - similarity[i])),
+                    "_source": {k: v for k, v in source.items() if k not in excluded},
+                })
+        return {"hits": {"hits": hits[:body.get("size", 10)]}}
+
+
+class EmbedderModel:
+    """sentence-transformers ``encode`` on top of an embedding_service embedder"""
+
+    def __init__(self, embed: Callable[[List[str]], Any]):
+        self._embed = embed
+
+    def encode(self, texts):
+        return self._embed(list(texts))
+
+
+# --- Backends ------------------------------------------------------------------------------------
+
+class BackendUnavailable(Exception):
+    pass
+
+
+@dataclass
+class Backend:
+    name: str
+    search: Callable[..., List[Dict[str, Any]]]  # (query, limit, user_id) -> results
+    meter: Optional[ReadUnitMeter] = None
+
+
+class BenchmarkSetup:
+    """Loads the corpus into the requested backends (moto DynamoDB, temporary directories)"""
+
+    def __init__(self, videos: List[Video], workdir: str):
+        self.videos = videos
+        self.workdir = workdir
+        self._cost_optimized = None
+        self._local_vector = None
+        self._meter = None
+
+    def job_row(self, video: Video) -> Dict[str, Any]:
+        return {
+            "job_id": video.job_id,
+            "user_id": video.user_id,
+            "session_id": video.session_id,
+            "status": "completed",
+            "s3_key": video.key,
+            "s3_bucket": "bench-bucket",
+            "video_info": {"bucket": "bench-bucket", "key": video.key},
+            "created_at": int(time.time()),
+            "result": json.dumps(video.analysis),
+        }
+
+    def cost_optimized_db(self):
+        """One loaded CostOptimizedAWSVectorDB; the variants share its tables"""
+        if self._cost_optimized is None:
+            from aws_clients import get_resource
+            from cost_optimized_aws_vector import CostOptimizedAWSVectorDB
+            from search_indexer import video_metadata_for
+
+            ddb = get_resource("dynamodb", region_name=REGION)
+            table = ddb.create_table(
+                TableName=os.environ["JOB_TABLE"],
+                KeySchema=[{"AttributeName": "job_id", "KeyType": "HASH"}],
+                AttributeDefinitions=[{"AttributeName": "job_id", "AttributeType": "S"}],
+                BillingMode="PAY_PER_REQUEST",
+            )
+            db = CostOptimizedAWSVectorDB()
+            db.keyword_index.ensure_table()
+            with table.batch_writer() as batch:
+                for video in self.videos:
+                    batch.put_item(Item=self.job_row(video))
+            for video in self.videos:
+                db.store_video_analysis(
+                    video.job_id, video_metadata_for(self.job_row(video)), video.analysis,
+                    user_id=video.user_id, session_id=video.session_id,
+                )
+            for user_id in sorted({v.user_id for v in self.videos}):
+                db._backfill_tenant(user_id)  # marks the tenant's keyword index ready
+            self._meter = ReadUnitMeter(ddb.meta.client, {
+                table.name: average_item_bytes(table),
+                db.keyword_index.table_name: average_item_bytes(db.keyword_index.table),
+            })
+            self._cost_optimized = db
+        return self._cost_optimized
+
+    def cost_optimized(self, variant: str) -> Backend:
+        from cost_optimized_aws_vector import CostOptimizedAWSVectorDB
+
+        loaded = self.cost_optimized_db()
+        if variant == "engine":
+            db = loaded
+        else:
+            db = CostOptimizedAWSVectorDB()
+            db.search_engine = None
+            if variant == "scan":
+                db.keyword_index = None
+        return Backend(
+            f"cost_optimized_{variant}" if variant != "engine" else "cost_optimized",
+            lambda query, limit, user_id: db.semantic_search(query, limit, user_id=user_id),
+            self._meter,
+        )
+
+    def local_vector_db(self):
+        if self._local_vector is None:
+            from local_vector_db import LocalVectorDB
+
+            db = LocalVectorDB(base_dir=os.path.join(self.workdir, "local-vectors"))
+            db.store_video_analyses([
+                {
+                    "job_id": v.job_id, "video_metadata": {"key": v.key, "bucket": "bench-bucket"},
+                    "analysis_results": v.analysis, "user_id": v.user_id, "session_id": v.session_id,
+                }
+                for v in self.videos
+            ])
+            self._local_vector = db
+        return self._local_vector
+
+    def local_vector(self) -> Backend:
+        db = self.local_vector_db()
+        return Backend("local_vector", lambda query, limit, user_id: db.semantic_search(query, limit, user_id=user_id))
+
+    def aws_opensearch(self) -> Backend:
+        try:
+            from aws_vector_db import AWSVectorDB
+        except ImportError as e:
+            raise BackendUnavailable(f"aws_vector_db needs opensearch-py and requests-aws4auth ({e})")
+        db = AWSVectorDB.__new__(AWSVectorDB)
+        db.region = REGION
+        db.index_name = "proovid-videos"
+        db.client = LocalOpenSearch()
+        for video in self.videos:
+            db.store_video_analysis(
+                video.job_id, {"key": video.key, "bucket": "bench-bucket"}, video.analysis,
+                user_id=video.user_id, session_id=video.session_id,
+            )
+        return Backend("aws_opensearch", lambda query, limit, user_id: db.semantic_search(query, limit, user_id=user_id))
+
+    def chromadb(self) -> Backend:
+        try:
+            import chromadb
+            from vector_db import VideoVectorDB
+        except ImportError as e:
+            raise BackendUnavailable(f"vector_db needs chromadb and sentence-transformers ({e})")
+        from embedding_service import get_embedding_service
+
+        db = VideoVectorDB.__new__(VideoVectorDB)
+        db.db_type = "chromadb"
+        db.model = EmbedderModel(get_embedding_service().embed)
+        db.client = chromadb.EphemeralClient()
+        db.collection = db.client.get_or_create_collection(name="video_metadata")
+        for video in self.videos:
+            db.store_video_analysis(video.job_id, {"key": video.key, "bucket": "bench-bucket"}, video.analysis)
+        # No tenant filter in VideoVectorDB: other tenants' videos show up as leaks
+        return Backend("chromadb", lambda query, limit, user_id: db.semantic_search(query, limit))
+
+    def hybrid(self, budget_seconds: float) -> Backend:
+        from hybrid_retrieval import HybridRetriever, RetrievalBackend
+
+        keyword, vector = self.cost_optimized_db(), self.local_vector_db()
+        retriever = HybridRetriever(
+            [RetrievalBackend("keyword", keyword.semantic_search), RetrievalBackend("vector", vector.semantic_search)],
+            budget_seconds=budget_seconds,
+        )
+        return Backend("hybrid", lambda query, limit, user_id: retriever.search(query, limit, user_id=user_id), self._meter)
+
+    def backend(self, name: str, args) -> Backend:
+        if name == "cost_optimized":
+            return self.cost_optimized("engine")
+        if name == "cost_optimized_index":
+            return self.cost_optimized("index")
+        if name == "cost_optimized_scan":
+            return self.cost_optimized("scan")
+        if name == "local_vector":
+            return self.local_vector()
+        if name == "aws_opensearch":
+            return self.aws_opensearch()
+        if name == "chromadb":
+            return self.chromadb()
+        if name == "hybrid":
+            return self.hybrid(args.hybrid_budget)
+        raise ValueError(f"Unknown backend: {name}")
+
+
+# --- Workload and report -------------------------------------------------------------------------
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+
+def run_workload(backend: Backend, queries: List[LabeledQuery], owners: Dict[str, str], k: int,
+                 repeat: int) -> Dict[str, Any]:
+    meter = backend.meter
+    start_units = meter.units if meter else 0.0
+    for q in queries:  # warm-up: caches, lazily loaded tenant indexes
+        backend.search(q.query, k, q.user_id)
+    warmup_units = (meter.units - start_units) if meter else None
+
+    latencies: List[float] = []
+    units_before = meter.units if meter else 0.0
+    recall_by_kind: Dict[str, List[float]] = {}
+    leaks = 0
+    for run in range(repeat):
+        for q in queries:
+            started = time.perf_counter()
+            results = backend.search(q.query, k, q.user_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if run:
+                continue
+            found = [r.get("job_id") for r in results[:k]]
+            leaks += sum(1 for job_id in found if owners.get(job_id) not in (None, q.user_id))
+            hits = len(set(found) & q.relevant)
+            recall_by_kind.setdefault(q.kind, []).append(hits / min(k, len(q.relevant)))
+    searches = len(queries) * repeat
+    all_recall = [r for values in recall_by_kind.values() for r in values]
+    return {
+        "queries": len(queries),
+        "searches": searches,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        },
+        "read_units_per_query": round((meter.units - units_before) / searches, 3) if meter and searches else None,
+        "warmup_read_units": round(warmup_units, 1) if warmup_units is not None else None,
+        f"recall_at_{k}": round(statistics.fmean(all_recall), 4) if all_recall else 0.0,
+        "recall_by_kind": {kind: round(statistics.fmean(v), 4) for kind, v in sorted(recall_by_kind.items())},
+        "tenant_leaks": leaks,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], recall_tolerance: float,
+            latency_tolerance: float, read_unit_tolerance: float) -> List[str]:
+    """Regressions of ``report`` against ``baseline`` (empty if none)"""
+    regressions = []
+    k = report["k"]
+    recall_key = f"recall_at_{k}"
+    for name, current in report["backends"].items():
+        base = baseline.get("backends", {}).get(name)
+        if base is None:
+            continue
+        if recall_key in base and current[recall_key] < base[recall_key] - recall_tolerance:
+            regressions.append(f"{name}: {recall_key} {base[recall_key]} -> {current[recall_key]}")
+        for kind, value in current["recall_by_kind"].items():
+            before = base.get("recall_by_kind", {}).get(kind)
+            if before is not None and value < before - recall_tolerance:
+                regressions.append(f"{name}: recall ({kind}) {before} -> {value}")
+        before, now = base["latency_ms"]["p95"], current["latency_ms"]["p95"]
+        # 1 ms floor: sub-millisecond jitter is not a regression
+        if now > before * latency_tolerance and now - before > 1.0:
+            regressions.append(f"{name}: p95 latency {before} ms -> {now} ms")
+        before, now = base.get("read_units_per_query"), current.get("read_units_per_query")
+        if before is not None and now is not None and now > before * (1 + read_unit_tolerance) + 0.01:
+            regressions.append(f"{name}: read units per query {before} -> {now}")
+        if current["tenant_leaks"] > base.get("tenant_leaks", 0):
+            regressions.append(f"{name}: tenant leaks {base.get('tenant_leaks', 0)} -> {current['tenant_leaks']}")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    k = report["k"]
+    corpus = report["corpus"]
+    print(
+        f"\nCorpus: {corpus['tenants']} tenants x {corpus['videos_per_tenant']} videos, "
+        f"{report['queries']} labeled queries, k={k}, embeddings: {report['embedding_provider']}\n"
+    )
+    header = f"{'backend':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RU/query':>10}{'recall@' + str(k):>11}{'leaks':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in report["backends"].items():
+        units = stats["read_units_per_query"]
+        print(
+            f"{name:<22}{stats['latency_ms']['p50']:>9.2f}{stats['latency_ms']['p95']:>9.2f}"
+            f"{stats['latency_ms']['p99']:>9.2f}{'-' if units is None else f'{units:.2f}':>10}"
+            f"{stats[f'recall_at_{k}']:>11.3f}{stats['tenant_leaks']:>7}"
+        )
+    print("\nrecall@%d by query kind:" % k)
+    for name, stats in report["backends"].items():
+        print(f"  {name:<20} " + "  ".join(f"{kind}={value:.2f}" for kind, value in stats["recall_by_kind"].items()))
+    for name, reason in report["skipped"].items():
+        print(f"skipped {name}: {reason}")
+
+
+def configure_environment(workdir: str, provider: str) -> None:
+    """Settings the backend modules read at import time (before importing them)"""
+    os.environ.update({
+        "AWS_DEFAULT_REGION": REGION,
+        "AWS_ACCESS_KEY_ID": "benchmark",
+        "AWS_SECRET_ACCESS_KEY": "benchmark",
+        "JOB_TABLE": "bench_jobs",
+        "SEARCH_INDEX_TABLE": "bench_search_index",
+        "SEARCH_SNAPSHOT_DIR": os.path.join(workdir, "snapshots"),
+        "EMBEDDING_PROVIDER": provider,
+        "EMBEDDING_CACHE_PATH": "",
+    })
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    defaults = CorpusConfig()
+    parser.add_argument("--backends", default=",".join(ALL_BACKENDS), help="comma separated, default: all")
+    parser.add_argument("--tenants", type=int, default=defaults.tenants)
+    parser.add_argument("--videos", type=int, default=defaults.videos_per_tenant, help="videos per tenant")
+    parser.add_argument("--labels-per-video", type=int, default=defaults.labels_per_video)
+    parser.add_argument("--label-skew", type=float, default=defaults.label_skew, help="Zipf exponent of labels/OCR lines")
+    parser.add_argument("--text-ratio", type=float, default=defaults.text_ratio, help="share of videos with OCR text")
+    parser.add_argument("--texts-per-video", type=int, default=defaults.texts_per_video)
+    parser.add_argument("--blackframe-ratio", type=float, default=defaults.blackframe_ratio)
+    parser.add_argument("--queries", type=int, default=defaults.queries_per_tenant, help="labeled queries per tenant")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("-k", type=int, default=10, help="results per query (recall@k)")
+    parser.add_argument("--repeat", type=int, default=2, help="measured passes over the workload")
+    parser.add_argument("--embedding-provider", default="hashing", choices=("hashing", "local", "titan"))
+    parser.add_argument("--hybrid-budget", type=float, default=1.0, help="HybridRetriever budget in seconds")
+    parser.add_argument("--output", help="also write the report to this JSON file")
+    parser.add_argument("--baseline", help="compare against this report; exit 1 on regressions")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help=f"write the report as baseline (default {os.path.basename(DEFAULT_BASELINE)})")
+    parser.add_argument("--recall-tolerance", type=float, default=0.02)
+    parser.add_argument("--latency-tolerance", type=float, default=1.5, help="allowed p95 factor")
+    parser.add_argument("--read-unit-tolerance", type=float, default=0.1, help="allowed relative increase")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.backends.split(",") if n.strip()]
+    unknown = set(names) - set(ALL_BACKENDS)
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(sorted(unknown))}")
+    config = CorpusConfig(
+        tenants=args.tenants, videos_per_tenant=args.videos, labels_per_video=args.labels_per_video,
+        label_skew=args.label_skew, text_ratio=args.text_ratio, texts_per_video=args.texts_per_video,
+        blackframe_ratio=args.blackframe_ratio, queries_per_tenant=args.queries, seed=args.seed,
+    )
+    logging.basicConfig(level=logging.WARNING)
+    # The backends log every search at INFO/ERROR level
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    workdir = tempfile.mkdtemp(prefix="proov-bench-")
+    configure_environment(workdir, args.embedding_provider)
+    try:
+        from moto import mock_aws
+    except ImportError:
+        print("The benchmark needs moto for its local DynamoDB: pip install moto", file=sys.stderr)
+        return 2
+
+    videos = build_corpus(config)
+    queries = labeled_queries(videos, config)
+    owners = {v.job_id: v.user_id for v in videos}
+    report: Dict[str, Any] = {
+        "version": REPORT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "corpus": asdict(config),
+        "k": args.k,
+        "repeat": args.repeat,
+        "queries": len(queries),
+        "embedding_provider": args.embedding_provider,
+        "backends": {},
+        "skipped": {},
+    }
+    try:
+        with mock_aws():
+            setup = BenchmarkSetup(videos, workdir)
+            for name in names:
+                started = time.monotonic()
+                try:
+                    backend = setup.backend(name, args)
+                except BackendUnavailable as e:
+                    report["skipped"][name] = str(e)
+                    continue
+                print(f"{name}: loaded in {time.monotonic() - started:.1f}s, running {len(queries)} queries", file=sys.stderr)
+                report["backends"][name] = run_workload(backend, queries, owners, args.k, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != report["corpus"] or baseline.get("k") != report["k"]:
+            print("\nWarning: baseline was recorded with other corpus settings or k", file=sys.stderr)
+        regressions = compare(report, baseline, args.recall_tolerance, args.latency_tolerance, args.read_unit_tolerance)
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())